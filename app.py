@@ -1,40 +1,259 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 
 from google.cloud import bigquery
 import anthropic
+import contextvars
+import hmac
 import os
 import json
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Mapping
 from datetime import datetime
 
 # 설정 및 유틸리티 모듈 임포트
-from config.schema_config import PROJECT_ID, TABLE_SCHEMA, get_schema_prompt
+from config.schema_config import PROJECT_ID, TABLE_SCHEMA, get_schema_prompt, get_full_table_name, get_wildcard_table_name
 from config.prompts import (
     get_sql_generation_system_prompt, 
     get_analysis_report_prompt, 
-    get_html_generation_prompt
+    get_html_generation_prompt,
+    get_sql_repair_prompt,
+    get_followup_sql_prompt,
+    PROMPT_VERSION
 )
 from utils.data_utils import (
     safe_json_serialize, 
-    suggest_chart_config, 
     analyze_data_structure, 
     generate_summary_insights
 )
-from utils.html_utils import validate_claude_html, generate_fallback_html
+from utils.html_utils import validate_claude_html, validate_analysis_report, generate_fallback_html
+from utils.bigquery_utils import build_stats_pushdown_script, build_analysis_from_pushdown, lint_sql
+from utils.streaming_stats import StreamingStatsAccumulator
+from utils.result_set import ResultSet
+from utils.json_utils import dumps as json_dumps, dumps_bytes as json_dumps_bytes, loads as json_loads
+from utils.compression import compress_response
+from utils.static_assets import StaticAssetStore, IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
+from utils.job_queue import JobManager, JobQueueFullError
+from utils.model_router import ModelRouter
+from utils.chart_utils import prepare_chart
+from utils.admission import (
+    AdmissionController, AdmissionRejected, BackendGate, ClientRateLimiter, parse_retry_after
+)
+from utils.circuit_breaker import CircuitBreaker
+from utils.stale_cache import StaleResponseCache
+from utils.racing import race_candidates, CandidateCancelled
+from utils.report_cache import ReportCache, result_fingerprint
+from utils.local_query import LocalQueryError, is_local_sql, strip_local_marker
+from utils.session_results import SessionResultStore
+from utils.query_decomposition import split_subqueries, merge_results
+from utils.bigquery_jobs import (
+    QueryCancelled, query_context, current_query_context, query_labels, effective_timeout, check_cancelled,
+    wait_for_job, socket_disconnect_checker, lifecycle_stats, jobs_view, popular_queries_sql, routed_execution
+)
+from utils.export import (
+    EXPORT_MIMETYPES, available_formats, export_filename, counted, sign_export_token, verify_export_token,
+    stream_csv_pages, stream_csv_result, stream_parquet_batches, stream_parquet_result
+)
+from utils.preview import build_preview_sql, FirstRowTimer, preview_stats
+from utils.spill import (
+    SpillingResultBuilder, SharedMemoryBudget, request_memory, cleanup_spill_dir, memory_stats
+)
+from utils.sql_repair import SqlRepairCache, is_repairable_error
+from utils.intent_templates import IntentTemplateRouter
+from utils.query_history import QueryHistory, shape_hash
+from utils.summary_tables import SummaryRouter, list_summary_tables, summary_dataset
+from utils.incremental import IncrementalAggregator, shard_prefix
+from utils.sql_cache import SqlCache
+from utils.warmup import SharedPopularity, WarmupScheduler
+from utils.metrics import metrics
+from config.performance_config import (
+    STATS_PUSHDOWN_ENABLED,
+    STATS_PUSHDOWN_SAMPLE_ROWS,
+    STATS_PUSHDOWN_TOP_K,
+    STREAMING_STATS_SAMPLE_ROWS,
+    STREAMING_STATS_MAX_COUNTERS,
+    STREAMING_STATS_MAX_DISTINCT,
+    SKETCH_TDIGEST_COMPRESSION,
+    COMPRESSION_ENABLED,
+    COMPRESSION_MIN_BYTES,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY,
+    STATIC_DIST_DIR,
+    JOB_WORKERS,
+    JOB_MAX_QUEUE_DEPTH,
+    JOB_QUICK_WORKERS,
+    JOB_RESULT_MAX_ROWS,
+    JOB_TTL_SECONDS,
+    JOB_RETRY_AFTER_SECONDS,
+    JOB_STORE_PATH,
+    JOB_ABANDON_SECONDS,
+    BIGQUERY_JOB_TIMEOUT_SECONDS,
+    REQUEST_DEADLINE_SECONDS,
+    BIGQUERY_MAX_BYTES_BILLED,
+    BIGQUERY_POLL_INTERVAL_SECONDS,
+    EXPORT_PAGE_SIZE,
+    EXPORT_PARQUET_COMPRESSION,
+    EXPORT_TOKEN_SECRET,
+    EXPORT_TOKEN_TTL_SECONDS,
+    INTENT_TEMPLATES_ENABLED,
+    INTENT_MODEL_PATH,
+    INTENT_MIN_CONFIDENCE,
+    RESULT_MEMORY_BUDGET_MB,
+    RESULT_SPILL_DIR,
+    RESULT_PROCESS_MEMORY_BUDGET_MB,
+    RESULT_SPILL_ORPHAN_SECONDS,
+    RESULT_SPILL_RESPONSE_ROWS,
+    PREVIEW_ENABLED,
+    PREVIEW_ROWS,
+    PREVIEW_DELAY_SECONDS,
+    PREVIEW_SAMPLE_PERCENT,
+    PREVIEW_MAX_BYTES_BILLED,
+    QUERY_HISTORY_ENABLED,
+    QUERY_HISTORY_PATH,
+    SUMMARY_ROUTING_ENABLED,
+    SUMMARY_TABLE_DATASET,
+    SUMMARY_APPROXIMATE_DISTINCT,
+    SUMMARY_STALENESS_CHECK_SECONDS,
+    INCREMENTAL_SHARDS_ENABLED,
+    INCREMENTAL_STORE_PATH,
+    INCREMENTAL_METADATA_TTL_SECONDS,
+    INCREMENTAL_APPROXIMATE_DISTINCT,
+    SQL_CACHE_ENABLED,
+    SQL_CACHE_MAX_ENTRIES,
+    SQL_CACHE_MAX_AGE_SECONDS,
+    WARMUP_ENABLED,
+    WARMUP_POPULARITY_LOOKBACK_DAYS,
+    WARMUP_POPULARITY_CACHE_SECONDS,
+    BIGQUERY_JOBS_REGION,
+    WARMUP_TOP_K,
+    WARMUP_MODES,
+    WARMUP_SAMPLE_MODE,
+    WARMUP_SCHEDULE_HOURS,
+    WARMUP_CHECK_SECONDS,
+    WARMUP_CONCURRENCY,
+    WARMUP_MAX_QUESTIONS,
+    WARMUP_MAX_BYTES,
+    WARMUP_ON_START,
+    WARMUP_STARTUP_MAX_QUESTIONS,
+    WARMUP_TRIGGER_TOKEN,
+    MODEL_ROUTING_ENABLED,
+    MODEL_TIERS,
+    MODEL_FAST_MAX_COMPLEXITY,
+    MODEL_STAGE_MIN_TIER,
+    REPORT_MIN_QUALITY_SCORE,
+    SQL_REPAIR_ENABLED,
+    SQL_REPAIR_MAX_ATTEMPTS,
+    SQL_REPAIR_TIME_BUDGET_SECONDS,
+    SQL_REPAIR_CACHE_SIZE,
+    CHART_MAX_POINTS,
+    CHART_TOP_N,
+    ADMISSION_ENABLED,
+    ANTHROPIC_MAX_CONCURRENT,
+    BIGQUERY_MAX_CONCURRENT,
+    ADMISSION_MAX_WAITING,
+    ADMISSION_MAX_WAIT_SECONDS,
+    CLIENT_REQUESTS_PER_MINUTE,
+    CLIENT_BURST,
+    BACKEND_DEFAULT_BACKOFF_SECONDS,
+    BREAKER_WINDOW,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_FAILURE_RATE,
+    BREAKER_OPEN_SECONDS,
+    TIMEOUT_LATENCY_MULTIPLIER,
+    ANTHROPIC_TIMEOUT_MIN_SECONDS,
+    ANTHROPIC_TIMEOUT_MAX_SECONDS,
+    BIGQUERY_TIMEOUT_MIN_SECONDS,
+    BIGQUERY_TIMEOUT_MAX_SECONDS,
+    STALE_CACHE_MAX_ENTRIES,
+    STALE_CACHE_MAX_AGE_SECONDS,
+    STALE_CACHE_MAX_MB,
+    STALE_CACHE_MAX_ROWS,
+    HTML_MAX_TOKENS,
+    HTML_MIN_QUALITY_SCORE,
+    HTML_RACE_ENABLED,
+    HTML_RACE_FAN_OUT,
+    HTML_RACE_MAX_FAN_OUT,
+    HTML_RACE_MAX_OUTPUT_TOKENS,
+    HTML_RACE_MAX_EXTRA_INFLIGHT,
+    HTML_RACE_VARIANTS,
+    REPORT_CACHE_ENABLED,
+    REPORT_CACHE_PATH,
+    REPORT_CACHE_MAX_MB,
+    REPORT_CACHE_MAX_ENTRIES,
+    REPORT_CACHE_MAX_AGE_SECONDS,
+    FOLLOWUP_LOCAL_ENABLED,
+    SESSION_RESULT_MAX_SESSIONS,
+    SESSION_RESULT_MAX_ROWS,
+    SESSION_RESULT_TTL_SECONDS,
+    SESSION_RESULT_MAX_MB,
+    FOLLOWUP_LOCAL_TIMEOUT_SECONDS,
+    QUERY_DECOMPOSITION_ENABLED,
+    QUERY_DECOMPOSITION_MAX_SUBQUERIES
+)
+
+class FastJSONProvider(JSONProvider):
+    """jsonify 응답을 공통 고속 인코더(orjson 우선)로 한 번에 직렬화하는 JSON 프로바이더"""
+    
+    mimetype = "application/json"
+    
+    def dumps(self, obj, **kwargs):
+        return json_dumps(obj)
+    
+    def loads(self, s, **kwargs):
+        return json_loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(json_dumps_bytes(obj), mimetype=self.mimetype)
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app, origins=["http://localhost:3000"])  # 프론트엔드 URL 허용
 
+# 빌드된 정적 파일 (지문 경로 + 사전 압축본, 메모리 캐시)
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+static_assets = StaticAssetStore(APP_ROOT, os.path.join(APP_ROOT, STATIC_DIST_DIR))
+
 @app.route('/')
 def index():
-    """메인 페이지"""
+    """메인 페이지 (빌드된 경우 지문 경로가 반영된 index.html)"""
+    response = static_assets.build_response(
+        app.response_class, request, static_assets.index_path(), REVALIDATE_CACHE_CONTROL
+    )
+    if response is not None:
+        return response
     return send_from_directory('.', 'index.html')
 
 @app.route('/<path:filename>')
 def static_files(filename):
-    """정적 파일 서빙"""
-    return send_from_directory('.', filename)
+    """정적 파일 서빙 (지문이 붙은 파일은 immutable 캐시)"""
+    if static_assets.is_fingerprinted(filename):
+        response = static_assets.build_response(
+            app.response_class, request, os.path.join(APP_ROOT, filename), IMMUTABLE_CACHE_CONTROL
+        )
+        if response is not None:
+            return response
+    
+    response = send_from_directory('.', filename)
+    response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+    return response
+
+@app.after_request
+def compress_api_response(response):
+    """Accept-Encoding 협상에 따라 JSON/HTML 응답 압축"""
+    if not COMPRESSION_ENABLED:
+        return response
+    return compress_response(
+        response,
+        request.headers.get('Accept-Encoding'),
+        min_bytes=COMPRESSION_MIN_BYTES,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY
+    )
 
 # 환경 변수에서 API 키 읽기
 ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
@@ -43,8 +262,10 @@ if not ANTHROPIC_API_KEY:
 
 # Anthropic 클라이언트 초기화
 try:
+    # 429 재시도/백오프는 승인 제어에서 전역으로 처리 (SDK 스레드별 재시도 비활성화)
     anthropic_client = anthropic.Anthropic(
-        api_key=ANTHROPIC_API_KEY
+        api_key=ANTHROPIC_API_KEY,
+        max_retries=0
     ) if ANTHROPIC_API_KEY else None
 except Exception as e:
     print(f"Anthropic 클라이언트 초기화 실패: {e}")
@@ -59,121 +280,827 @@ except Exception as e:
     print(f"BigQuery 클라이언트 초기화 실패: {e}")
     bigquery_client = None
 
-def natural_language_to_sql(question):
-    """자연어 질문을 BigQuery SQL로 변환"""
-    if not anthropic_client:
-        raise Exception("Anthropic 클라이언트가 초기화되지 않았습니다.")
+# 비동기 작업 관리자 (워커 풀 + 로컬 SQLite 저장소)
+job_manager = JobManager(
+    JOB_STORE_PATH,
+    max_workers=JOB_WORKERS,
+    max_queue_depth=JOB_MAX_QUEUE_DEPTH,
+    ttl_seconds=JOB_TTL_SECONDS,
+    abandon_seconds=JOB_ABANDON_SECONDS,
+    # 빠른 조회는 오래 걸리는 리포트 작업과 워커/대기 한도를 나눠 쓰지 않음
+    dedicated_workers={"quick": JOB_QUICK_WORKERS}
+)
+
+# 백엔드별 동시 실행 제한 + 클라이언트별 속도 제한
+admission = AdmissionController(
+    [
+        BackendGate("anthropic", ANTHROPIC_MAX_CONCURRENT, ADMISSION_MAX_WAITING, ADMISSION_MAX_WAIT_SECONDS),
+        BackendGate("bigquery", BIGQUERY_MAX_CONCURRENT, ADMISSION_MAX_WAITING, ADMISSION_MAX_WAIT_SECONDS)
+    ],
+    client_limiter=ClientRateLimiter(CLIENT_REQUESTS_PER_MINUTE, CLIENT_BURST),
+    enabled=ADMISSION_ENABLED
+)
+
+# 백엔드별 서킷 브레이커 (작업별 적응형 타임아웃 포함)
+circuit_breakers = {
+    name: CircuitBreaker(
+        name,
+        window=BREAKER_WINDOW,
+        failure_threshold=BREAKER_FAILURE_THRESHOLD,
+        failure_rate=BREAKER_FAILURE_RATE,
+        open_seconds=BREAKER_OPEN_SECONDS,
+        min_timeout=min_timeout,
+        max_timeout=max_timeout,
+        timeout_multiplier=TIMEOUT_LATENCY_MULTIPLIER
+    )
+    for name, min_timeout, max_timeout in (
+        ("anthropic", ANTHROPIC_TIMEOUT_MIN_SECONDS, ANTHROPIC_TIMEOUT_MAX_SECONDS),
+        ("bigquery", BIGQUERY_TIMEOUT_MIN_SECONDS, BIGQUERY_TIMEOUT_MAX_SECONDS)
+    )
+}
+
+def _bigquery_guard(operation):
+    """BigQuery 호출 보호 (요청 모드별 지연 분포로 적응형 타임아웃, 모드별 작업 최대 실행 시간보다 짧게 자르지 않음)"""
+    context = current_query_context()
+    if context is None:
+        return circuit_breakers["bigquery"].guard(operation)
+    return circuit_breakers["bigquery"].guard(f"{operation}.{context.mode}", floor=context.job_timeout)
+
+# 장애 시 대체 응답으로 쓸 최근 성공 응답
+stale_cache = StaleResponseCache(
+    STALE_CACHE_MAX_ENTRIES, STALE_CACHE_MAX_AGE_SECONDS, max_bytes=STALE_CACHE_MAX_MB * 1024 * 1024
+)
+
+# 생성된 리포트 캐시 (SQLite 파일, 마운트한 볼륨에 두면 인스턴스가 바뀌어도 유지)
+report_cache = ReportCache(
+    REPORT_CACHE_PATH,
+    PROMPT_VERSION,
+    max_bytes=REPORT_CACHE_MAX_MB * 1024 * 1024,
+    max_entries=REPORT_CACHE_MAX_ENTRIES,
+    max_age_seconds=REPORT_CACHE_MAX_AGE_SECONDS,
+    enabled=REPORT_CACHE_ENABLED
+)
+
+# 대화 세션별 직전 조회 결과 (후속 질문을 로컬 SQL 엔진으로 처리)
+session_results = SessionResultStore(
+    SESSION_RESULT_MAX_SESSIONS, SESSION_RESULT_MAX_ROWS, SESSION_RESULT_TTL_SECONDS,
+    max_bytes=SESSION_RESULT_MAX_MB * 1024 * 1024,
+    query_timeout_seconds=FOLLOWUP_LOCAL_TIMEOUT_SECONDS
+)
+
+# 내보내기 토큰 서명 키 (인스턴스 간에 같아야 하므로 배포 시 Secret Manager로 지정)
+if EXPORT_TOKEN_SECRET:
+    _export_secret = EXPORT_TOKEN_SECRET.encode("utf-8")
+else:
+    print("EXPORT_TOKEN_SECRET 미설정: 프로세스별 임시 키 사용 (다른 인스턴스의 토큰은 질문으로 다시 생성)")
+    _export_secret = os.urandom(32)
+
+# 분해된 하위 쿼리 동시 실행용 워커 풀 (BigQuery 동시 실행 수는 승인 제어가 제한)
+subquery_executor = ThreadPoolExecutor(
+    max_workers=BIGQUERY_MAX_CONCURRENT + QUERY_DECOMPOSITION_MAX_SUBQUERIES, thread_name_prefix="subquery"
+)
+
+# 전체 쿼리와 동시에 실행하는 미리보기 쿼리용 워커 풀
+preview_executor = ThreadPoolExecutor(max_workers=BIGQUERY_MAX_CONCURRENT, thread_name_prefix="preview")
+
+# HTML 후보 동시 생성용 워커 풀과 추가 후보 동시 실행 상한 (비용 제한)
+html_race_executor = ThreadPoolExecutor(
+    max_workers=ANTHROPIC_MAX_CONCURRENT + HTML_RACE_MAX_EXTRA_INFLIGHT, thread_name_prefix="html-race"
+)
+html_race_extra_slots = threading.BoundedSemaphore(HTML_RACE_MAX_EXTRA_INFLIGHT)
+
+# 속도 제한을 적용할 엔드포인트 (Claude/BigQuery를 호출하는 요청)
+RATE_LIMITED_ENDPOINTS = {"quick_query", "structured_analysis", "creative_html_analysis", "create_job", "legacy_query", "export_results"}
+
+def _raise_if_backend_overloaded(backend, error):
+    """백엔드의 429/과부하/할당량 오류이면 백오프 후 AdmissionRejected(503) 발생"""
+    status_code = getattr(error, "status_code", None) or getattr(error, "code", None)
+    message = str(error)
+    overloaded = status_code in (429, 529) or any(
+        marker in message for marker in ("rateLimitExceeded", "quotaExceeded", "overloaded_error")
+    )
+    if not overloaded:
+        return
     
-    system_prompt = get_sql_generation_system_prompt()
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    wait = parse_retry_after(headers.get("retry-after"), BACKEND_DEFAULT_BACKOFF_SECONDS)
+    admission.note_backoff(backend, wait)
+    raise AdmissionRejected(
+        f"{backend} 사용량이 많아 잠시 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+        status_code=503, retry_after=wait
+    )
+
+# 단계별 모델 등급 라우터 (빠른 모델 우선, 실패 시 escalation)
+model_router = ModelRouter(
+    MODEL_TIERS,
+    stage_min_tier=MODEL_STAGE_MIN_TIER,
+    fast_max_score=MODEL_FAST_MAX_COMPLEXITY,
+    enabled=MODEL_ROUTING_ENABLED
+)
 
+# BigQuery 오류 → SQL 패치 캐시 (반복되는 실수는 LLM 호출 없이 수정)
+sql_repair_cache = SqlRepairCache(SQL_REPAIR_CACHE_SIZE)
+
+# 자주 들어오는 질문 형태 → 템플릿 SQL (확신이 높으면 Claude 호출 생략)
+intent_router = IntentTemplateRouter(
+    INTENT_MODEL_PATH,
+    get_full_table_name(),
+    min_confidence=INTENT_MIN_CONFIDENCE,
+    enabled=INTENT_TEMPLATES_ENABLED,
+    wildcard_table=get_wildcard_table_name()
+)
+
+# 이 인스턴스의 쿼리 형태별 실행 이력 + 반복 집계 쿼리의 요약 테이블 재작성
+# (요약 테이블 추천은 모든 인스턴스의 BigQuery 작업 이력으로 scripts/advise_summary_tables.py에서)
+query_history = QueryHistory(QUERY_HISTORY_PATH, enabled=QUERY_HISTORY_ENABLED)
+
+def _base_table_modified():
+    """원본 테이블 마지막 수정 시각 (테이블 메타데이터, 과금 없음)"""
+    return bigquery_client.get_table(get_full_table_name().strip("`")).modified.timestamp()
+
+summary_router = SummaryRouter(
+    lambda: list_summary_tables(bigquery_client, *summary_dataset(get_full_table_name(), SUMMARY_TABLE_DATASET)),
+    get_full_table_name(),
+    base_modified=_base_table_modified,
+    approximate_distinct=SUMMARY_APPROXIMATE_DISTINCT,
+    staleness_check_seconds=SUMMARY_STALENESS_CHECK_SECONDS,
+    enabled=SUMMARY_ROUTING_ENABLED and bigquery_client is not None
+)
+
+# 날짜/기간 질문의 와일드카드 샤드 테이블(events_*) 집계 쿼리의 샤드별 부분 집계 캐시 (새로 추가/수정된 샤드만 조회)
+SHARD_PREFIX = shard_prefix(get_wildcard_table_name())
+
+def _shard_metadata():
+    """샤드 테이블별 마지막 수정 시각 (데이터셋 __TABLES__ 메타데이터, 테이블 데이터는 읽지 않음)"""
+    dataset, table_prefix = SHARD_PREFIX.rsplit(".", 1)
+    job_config = _query_job_config(
+        "shard_metadata",
+        query_parameters=[bigquery.ScalarQueryParameter("prefix", "STRING", table_prefix)]
+    )
+    query_job = bigquery_client.query(
+        f"SELECT table_id, last_modified_time FROM `{dataset}.__TABLES__` WHERE STARTS_WITH(table_id, @prefix)",
+        job_config=job_config
+    )
+    return {row.table_id[len(table_prefix):]: row.last_modified_time / 1000 for row in query_job.result(timeout=30)}
+
+incremental_aggregator = IncrementalAggregator(
+    INCREMENTAL_STORE_PATH,
+    SHARD_PREFIX,
+    _shard_metadata,
+    lambda sql_query: execute_bigquery(sql_query, preview=False),
+    metadata_ttl_seconds=INCREMENTAL_METADATA_TTL_SECONDS,
+    approximate_distinct=INCREMENTAL_APPROXIMATE_DISTINCT,
+    enabled=INCREMENTAL_SHARDS_ENABLED and bigquery_client is not None
+)
+
+# 질문 → 실행에 성공한 SQL (같은 질문은 Claude 호출 생략)
+sql_cache = SqlCache(SQL_CACHE_MAX_ENTRIES, SQL_CACHE_MAX_AGE_SECONDS, enabled=SQL_CACHE_ENABLED)
+
+# 요청별 + 프로세스 전체 결과 메모리 한도 (넘으면 결과를 디스크로 내려 씀), 이전 프로세스가 남긴 파일 정리
+RESULT_MEMORY_BUDGET_BYTES = RESULT_MEMORY_BUDGET_MB * 1024 * 1024
+result_memory_budget = SharedMemoryBudget(RESULT_PROCESS_MEMORY_BUDGET_MB * 1024 * 1024)
+_removed_spill_files = cleanup_spill_dir(RESULT_SPILL_DIR, RESULT_SPILL_ORPHAN_SECONDS)
+if _removed_spill_files:
+    print(f"남은 결과 파일 {_removed_spill_files}개 삭제: {RESULT_SPILL_DIR}")
+
+def call_claude(stage, tier, max_rate_limit_retries=1, cancel_event=None, **kwargs):
+    """등급에 맞는 모델로 Claude 호출 → 응답 텍스트 (지연 시간 기록)
+
+    동시 실행 슬롯 안에서 호출하며, 429/과부하 응답이면 Retry-After만큼 전역 백오프한 뒤
+    대기 마감 시간 안에서 다시 시도한다. cancel_event가 주어지면 스트리밍으로 받으면서
+    이벤트가 설정되는 즉시 연결을 닫고 CandidateCancelled를 발생시킨다.
+    """
+    for attempt in range(max_rate_limit_retries + 1):
+        if cancel_event is not None and cancel_event.is_set():
+            raise CandidateCancelled("다른 후보가 채택되어 생성을 건너뜁니다.")
+        try:
+            with admission.slot("anthropic"):
+                return _create_message(stage, tier, cancel_event=cancel_event, **kwargs)
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            try:
+                _raise_if_backend_overloaded("anthropic", e)
+            except AdmissionRejected:
+                if attempt < max_rate_limit_retries:
+                    continue  # 다음 시도의 슬롯 획득에서 백오프가 끝날 때까지 대기 (마감 초과 시 거절)
+                raise
+            raise
+
+def _stream_message(model, timeout, cancel_event, **kwargs):
+    """스트리밍으로 메시지 생성 (cancel_event가 설정되면 연결을 닫고 CandidateCancelled)"""
+    with anthropic_client.messages.stream(model=model, timeout=timeout, **kwargs) as stream:
+        for _ in stream.text_stream:
+            if cancel_event.is_set():
+                raise CandidateCancelled("다른 후보가 채택되어 생성을 중단했습니다.")
+        return stream.get_final_message()
+
+def _create_message(stage, tier, cancel_event=None, **kwargs):
+    start = time.monotonic()
+    success = False
     try:
-        response = anthropic_client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1000,
-            system=system_prompt,
-            messages=[
-                {"role": "user", "content": question}
-            ]
+        with circuit_breakers["anthropic"].guard(stage) as timeout:
+            model = model_router.model_for(tier)
+            if cancel_event is None:
+                response = anthropic_client.messages.create(model=model, timeout=timeout, **kwargs)
+            else:
+                response = _stream_message(model, timeout, cancel_event, **kwargs)
+        success = True
+        
+        # 실제 사용 토큰 수 기록
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            metrics.increment(f"model.{stage}.input_tokens.{tier}", usage.input_tokens)
+            metrics.increment(f"model.{stage}.output_tokens.{tier}", usage.output_tokens)
+            print(f"Claude 토큰 사용 ({stage}/{tier}): 입력 {usage.input_tokens:,}, 출력 {usage.output_tokens:,}")
+        
+        return response.content[0].text.strip()
+    finally:
+        model_router.record(stage, tier, time.monotonic() - start, success)
+
+def _lint_generated_sql(sql_query, decompose):
+    """생성된 SQL 검사 (하위 쿼리로 나뉜 SQL은 하위 쿼리마다 검사)"""
+    parts = split_subqueries(sql_query) if decompose else []
+    if not parts:
+        return lint_sql(sql_query, PROJECT_ID)
+    issues = []
+    if len(parts) > QUERY_DECOMPOSITION_MAX_SUBQUERIES:
+        issues.append(f"하위 쿼리가 {QUERY_DECOMPOSITION_MAX_SUBQUERIES}개를 넘음")
+    for name, part in parts:
+        issues.extend(f"{name}: {issue}" for issue in lint_sql(part, PROJECT_ID))
+    return issues
+
+def generate_sql(question, tier=None, followup=None, decompose=False):
+    """자연어 질문을 BigQuery SQL로 변환 → (SQL, 사용한 모델 등급)
+
+    생성된 SQL이 기본 검사(lint_sql)를 통과하지 못하면 다음 등급 모델로 다시 생성한다.
+    followup(세션의 직전 결과)이 주어지면 직전 결과만으로 답할 수 있는 질문에 대해
+    "-- LOCAL"로 시작하는 로컬 SQL을 반환할 수 있다. decompose가 True이면 복합 질문을
+    "-- SUBQUERY:"로 구분된 독립 하위 쿼리들로 반환할 수 있다.
+    """
+    if not anthropic_client:
+        raise Exception("Anthropic 클라이언트가 초기화되지 않았습니다.")
+    
+    system_prompt = get_sql_generation_system_prompt(QUERY_DECOMPOSITION_MAX_SUBQUERIES if decompose else 0)
+    tier = tier or model_router.select("sql", question)
+    content = question
+    if followup is not None:
+        content = get_followup_sql_prompt(
+            question, followup.question, followup.sql_query,
+            followup.table.describe(), followup.row_count, followup.table.engine
         )
+
+    while True:
+        try:
+            sql_query = call_claude(
+                "sql", tier,
+                max_tokens=1000,
+                system=system_prompt,
+                messages=[
+                    {"role": "user", "content": content}
+                ]
+            )
+        except AdmissionRejected:
+            raise
+        except Exception as e:
+            raise Exception(f"Claude API 호출 중 오류 발생: {str(e)}")
         
-        sql_query = response.content[0].text.strip()
-        print(f"생성된 SQL: {sql_query}")  # 디버깅용
-        return sql_query
+        print(f"생성된 SQL ({tier}): {sql_query}")  # 디버깅용
         
-    except Exception as e:
-        raise Exception(f"Claude API 호출 중 오류 발생: {str(e)}")
+        if followup is not None and is_local_sql(sql_query):
+            return sql_query, tier
+        
+        issues = _lint_generated_sql(sql_query, decompose)
+        if not issues:
+            return sql_query, tier
+        
+        next_tier = model_router.escalate("sql", tier, f"SQL 검사 실패 {issues}")
+        if next_tier is None:
+            # 최상위 모델 결과는 그대로 실행하여 BigQuery 오류로 보고
+            return sql_query, tier
+        tier = next_tier
 
-def execute_bigquery(sql_query):
-    """BigQuery에서 SQL 쿼리 실행"""
+def natural_language_to_sql(question):
+    """자연어 질문을 BigQuery SQL로 변환"""
+    sql_query, _ = generate_sql(question)
+    return sql_query
+
+def repair_sql(question, sql_query, error_message, tier):
+    """BigQuery 오류 메시지를 근거로 실패한 SQL 수정 요청"""
+    repaired = call_claude(
+        "repair", tier,
+        max_tokens=1000,
+        messages=[
+            {"role": "user", "content": get_sql_repair_prompt(question, sql_query, error_message)}
+        ]
+    )
+    print(f"수정된 SQL ({tier}): {repaired}")  # 디버깅용
+    return repaired
+
+def _run_subquery(sql_query):
+    start = time.monotonic()
+    result = execute_bigquery(sql_query, preview=False)
+    result["seconds"] = time.monotonic() - start
+    return result
+
+def execute_decomposed(parts):
+    """하위 쿼리들을 별도 BigQuery 작업으로 동시에 실행하고 결과를 로컬에서 병합
+
+    각 하위 쿼리는 요청의 QueryContext(라벨, 마감 시간, 취소 조건)를 복사해 실행한다.
+    """
+    futures = [
+        (name, subquery_executor.submit(contextvars.copy_context().run, _run_subquery, sql))
+        for name, sql in parts
+    ]
+    results = []
+    subqueries = []
+    failure = None
+    for name, future in futures:
+        result = future.result()
+        subqueries.append({
+            "name": name,
+            "success": result["success"],
+            "row_count": result.get("row_count", 0),
+            "bytes_processed": result.get("bytes_processed"),
+            "seconds": round(result["seconds"], 3)
+        })
+        if result["success"]:
+            results.append((name, result["data"]))
+        elif failure is None:
+            failure = f"하위 쿼리 {name} 실행 오류: {result['error']}"
+    
+    if failure is not None:
+        return {"success": False, "error": failure, "data": [], "subqueries": subqueries}
+    
+    rows, strategy = merge_results(results)
+    print(f"하위 쿼리 {len(parts)}개 병합 ({strategy}): {len(rows)}행")  # 디버깅용
+    return {
+        "success": True,
+        "data": rows,
+        "row_count": len(rows),
+        "bytes_processed": sum(item["bytes_processed"] or 0 for item in subqueries),
+        "query_plan": {"type": "decomposed", "merge": strategy, "subqueries": subqueries}
+    }
+
+def execute_query_plan(sql_query, execute, **execute_kwargs):
+    """SQL 실행 (하위 쿼리로 나뉜 SQL이면 동시에 실행 후 병합)
+
+    단일 쿼리와 분해 실행의 소요 시간/처리 바이트는 query_plan.single /
+    query_plan.decomposed 지표로 기록되어 /health에서 비교할 수 있다.
+    
+    원본 테이블에 대한 반복 집계 쿼리는 요약 테이블이 있으면 그 테이블로 재작성해 실행하고,
+    실패하면 원래 SQL로 다시 실행한다. 와일드카드 샤드 테이블(events_*) 집계 쿼리는
+    새로 추가/수정된 샤드만 집계해 저장된 샤드별 부분 집계와 병합한다.
+    BigQuery 실행은 형태별 이력에 기록되고, 재작성한 실행의 작업에는 원래 쿼리 형태 라벨이 붙는다.
+    """
+    parts = split_subqueries(sql_query) if execute is execute_bigquery else []
+    plan = "decomposed" if parts else "single"
+    rewritable = execute is execute_bigquery and not parts
+    incremental = incremental_aggregator.plan(sql_query) if rewritable else None
+    routed_sql, summary = summary_router.route(sql_query) if rewritable and incremental is None else (None, None)
+    
+    start = time.monotonic()
+    result = None
+    if incremental is not None:
+        with routed_execution(shape_hash(sql_query)):
+            result = incremental_aggregator.execute(incremental)
+        if result is not None:
+            result["data"] = ResultSet.from_rows(result["data"])
+            print(f"샤드별 증분 집계: {result['incremental']}")  # 디버깅용
+    if result is None and routed_sql is not None:
+        print(f"요약 테이블로 재작성 ({summary['table']}): {routed_sql}")  # 디버깅용
+        with routed_execution(shape_hash(sql_query)):
+            result = execute(routed_sql, **execute_kwargs)
+        if result["success"]:
+            metrics.increment("summary.routed")
+        else:
+            metrics.increment("summary.fallback")
+            print(f"요약 테이블 실행 실패, 원본 테이블로 실행: {result.get('error')}")
+            summary = None
+            start = time.monotonic()
+    if result is None or (routed_sql is not None and summary is None):
+        result = execute_decomposed(parts) if parts else execute(sql_query, **execute_kwargs)
+    
+    if result["success"] and execute is execute_bigquery:
+        routed = summary is not None or "incremental" in result
+        query_history.record(sql_query, result.get("bytes_processed"), time.monotonic() - start, routed=routed)
+    if result["success"]:
+        metrics.observe(f"query_plan.{plan}", time.monotonic() - start)
+        metrics.increment(f"query_plan.{plan}.count")
+        if result.get("bytes_processed") is not None:
+            metrics.increment(f"query_plan.{plan}.bytes_processed", result["bytes_processed"])
+        result.setdefault("query_plan", {"type": plan})
+        result["query_plan"]["bytes_processed"] = result.get("bytes_processed")
+        if result.get("timing") is not None:
+            result["query_plan"]["timing"] = result["timing"]
+        if summary is not None:
+            result["query_plan"]["summary_table"] = summary
+        if "incremental" in result:
+            result["query_plan"]["incremental"] = result["incremental"]
+    return result
+
+def execute_local_followup(followup, sql_query):
+    """세션의 직전 결과에 로컬 SQL 실행 (execute_bigquery와 같은 형식의 결과)"""
+    start = time.monotonic()
     try:
-        print(f"실행할 SQL: {sql_query}")  # 디버깅용
-        print(f"사용 중인 프로젝트 ID: {bigquery_client.project}")  # 디버깅용
+        rows = followup.table.query(strip_local_marker(sql_query))
+    except LocalQueryError as e:
+        metrics.increment("followup.local.failed")
+        print(f"직전 결과 조회 실패, BigQuery로 처리: {e}")
+        return {"success": False, "error": str(e), "data": []}
+    
+    elapsed = time.monotonic() - start
+    metrics.observe("followup.local", elapsed)
+    print(f"직전 결과에서 후속 질문 처리 ({followup.table.engine}, {len(rows)}행, {elapsed * 1000:.1f}ms)")
+    return {"success": True, "data": rows, "row_count": len(rows), "local": True}
+
+def _remember_result(session_id, question, sql_query, query_result):
+    """후속 질문용으로 세션의 직전 결과 보관 (메모리에 있는 전체 결과일 때만)"""
+    if not FOLLOWUP_LOCAL_ENABLED or not session_id or not query_result["success"]:
+        return
+    data = query_result.get("data", [])
+    if isinstance(data, ResultSet) and data.spill is not None:
+        return
+    complete = not query_result.get("sampled") and len(data) >= query_result.get("row_count", len(data))
+    session_results.put(session_id, question, sql_query, data, complete=complete)
+
+def generate_and_execute_sql(question, execute=None, progress=None, session_id=None, **execute_kwargs):
+    """SQL 생성 → 실행 → (BigQuery가 거부하면) 오류 기반 수정 후 재실행
+
+    수정은 캐시된 패치를 먼저 적용하고, 없으면 Claude에게 오류 메시지와 함께
+    수정을 요청한다. Claude 수정 요청은 SQL_REPAIR_MAX_ATTEMPTS번, 전체 수정은
+    SQL_REPAIR_TIME_BUDGET_SECONDS 안에서만 시도하며 두 번째 요청부터는 다음 등급
+    모델을 사용한다. → (SQL, 실행 결과)
+
+    session_id에 직전 결과가 있으면 모델이 직전 결과만으로 답할 수 있다고 판단한
+    후속 질문은 BigQuery 대신 로컬 SQL 엔진으로 처리하고, 실패하면 BigQuery로 처리한다.
+    
+    자주 들어오는 형태의 질문(지표 하나 또는 차원 하나로 나눈 지표)은 의도 분류기가
+    확신하면 Claude 없이 템플릿 SQL을 사용한다. 템플릿 SQL이 실패하면 일반 수정 흐름을 따른다.
+    
+    같은 질문에 대해 최근 실행에 성공한 SQL이 있으면(직전 결과가 없는 경우) 그 SQL을 그대로
+    사용하고, 실패하면 캐시에서 지운 뒤 일반 수정 흐름을 따른다.
+    """
+    execute = execute or execute_bigquery
+    followup = session_results.get(session_id) if FOLLOWUP_LOCAL_ENABLED else None
+    decompose = QUERY_DECOMPOSITION_ENABLED and execute is execute_bigquery
+    
+    _report_progress(progress, "sql_generation")
+    cached_sql = sql_cache.get(question, decompose) if followup is None else None
+    template = intent_router.match(question) if cached_sql is None else None
+    if cached_sql is not None:
+        sql_query, tier = cached_sql, None
+        print(f"캐시된 SQL: {sql_query}")  # 디버깅용
+    elif template is not None:
+        sql_query, tier = template.sql, None
+        print(f"템플릿 SQL ({template.intent}, 확신도 {template.confidence:.2f}): {sql_query}")  # 디버깅용
+    else:
+        sql_query, tier = generate_sql(question, followup=followup, decompose=decompose)
+    
+    if followup is not None and is_local_sql(sql_query):
+        _report_progress(progress, "local_query")
+        query_result = execute_local_followup(followup, sql_query)
+        if query_result["success"]:
+            _remember_result(session_id, question, sql_query, query_result)
+            return sql_query, query_result
+        _report_progress(progress, "sql_generation")
+        sql_query, tier = generate_sql(question, decompose=decompose)
+    
+    _report_progress(progress, "query_execution")
+    query_result = execute_query_plan(sql_query, execute, **execute_kwargs)
+    if template is not None and not query_result["success"]:
+        metrics.increment("intent.failed")
+    if cached_sql is not None and not query_result["success"]:
+        sql_cache.forget(question, decompose)
+    
+    deadline = time.monotonic() + SQL_REPAIR_TIME_BUDGET_SECONDS
+    attempts = 0
+    
+    while SQL_REPAIR_ENABLED and not query_result["success"]:
+        error = query_result.get("error")
+        if not is_repairable_error(error) or time.monotonic() >= deadline:
+            break
         
-        # 쿼리 실행
-        query_job = bigquery_client.query(sql_query)
-        results = query_job.result()
+        failed_sql = sql_query
+        _report_progress(progress, "sql_repair")
         
-        # 결과를 딕셔너리 리스트로 변환
-        rows = []
-        for row in results:
-            # BigQuery Row 객체를 딕셔너리로 변환
-            row_dict = {}
-            
-            # Row 객체의 keys()와 values()를 사용하여 안전하게 변환
+        patched = sql_repair_cache.lookup(failed_sql, error)
+        if patched is not None:
+            source = "cache"
+            sql_query = patched
+            print(f"캐시된 SQL 패치 적용: {sql_query}")  # 디버깅용
+        else:
+            if attempts >= SQL_REPAIR_MAX_ATTEMPTS:
+                break
+            tier = tier or model_router.select("sql", question)
+            if attempts > 0:
+                tier = model_router.escalate("sql", tier, f"SQL 수정 실패: {error}") or tier
+            attempts += 1
+            source = "llm"
             try:
-                # BigQuery Row 객체를 딕셔너리로 변환하는 안전한 방법
-                if hasattr(row, 'keys') and hasattr(row, 'values'):
-                    for key, value in zip(row.keys(), row.values()):
-                        # BigQuery의 특수 타입들을 JSON 직렬화 가능한 형태로 변환
-                        if isinstance(value, datetime):
-                            row_dict[key] = value.isoformat()
-                        elif hasattr(value, 'isoformat'):  # date, time 객체
-                            row_dict[key] = value.isoformat()
-                        else:
-                            row_dict[key] = value
-                else:
-                    # 대안적인 변환 방법
-                    row_dict = dict(row)
-                    # 타입 변환 처리
-                    for key, value in row_dict.items():
-                        if isinstance(value, datetime):
-                            row_dict[key] = value.isoformat()
-                        elif hasattr(value, 'isoformat'):
-                            row_dict[key] = value.isoformat()
-                        
+                sql_query = repair_sql(question, failed_sql, error, tier)
+            except AdmissionRejected:
+                raise
             except Exception as e:
-                print(f"Row 변환 중 오류: {e}")
-                # 최후의 수단으로 문자열 변환
+                print(f"SQL 수정 요청 중 오류: {str(e)}")
+                break
+        
+        metrics.increment(f"sql_repair.attempt.{source}")
+        _report_progress(progress, "query_execution")
+        query_result = execute_query_plan(sql_query, execute, **execute_kwargs)
+        
+        if query_result["success"]:
+            metrics.increment(f"sql_repair.success.{source}")
+            if source == "llm":
+                sql_repair_cache.learn(failed_sql, error, sql_query)
+        elif source == "cache":
+            # 맞지 않는 패치는 다시 쓰지 않음
+            sql_repair_cache.forget(error)
+    
+    if template is not None:
+        query_result["sql_template"] = template.to_dict()
+    if query_result["success"] and followup is None:
+        # 직전 결과에 따라 뜻이 달라지는 후속 질문의 SQL은 보관하지 않음
+        sql_cache.put(question, decompose, sql_query)
+    _remember_result(session_id, question, sql_query, query_result)
+    return sql_query, query_result
+
+def convert_bigquery_row(row):
+    """BigQuery Row 객체를 JSON 직렬화 가능한 딕셔너리로 변환"""
+    row_dict = {}
+    
+    # Row 객체의 keys()와 values()를 사용하여 안전하게 변환
+    try:
+        # BigQuery Row 객체를 딕셔너리로 변환하는 안전한 방법
+        if hasattr(row, 'keys') and hasattr(row, 'values'):
+            for key, value in zip(row.keys(), row.values()):
+                # BigQuery의 특수 타입들을 JSON 직렬화 가능한 형태로 변환
+                if isinstance(value, datetime):
+                    row_dict[key] = value.isoformat()
+                elif hasattr(value, 'isoformat'):  # date, time 객체
+                    row_dict[key] = value.isoformat()
+                else:
+                    row_dict[key] = value
+        else:
+            # 대안적인 변환 방법
+            row_dict = dict(row)
+            # 타입 변환 처리
+            for key, value in row_dict.items():
+                if isinstance(value, datetime):
+                    row_dict[key] = value.isoformat()
+                elif hasattr(value, 'isoformat'):
+                    row_dict[key] = value.isoformat()
+                
+    except Exception as e:
+        print(f"Row 변환 중 오류: {e}")
+        # 최후의 수단으로 문자열 변환
+        try:
+            row_dict = {f"col_{i}": str(val) for i, val in enumerate(row)}
+        except Exception as inner_e:
+            print(f"문자열 변환 중 오류: {inner_e}")
+            row_dict = {"error": f"Row 변환 실패: {str(e)}"}
+    
+    return row_dict
+
+def _query_job_config(stage, timeout=None, **options):
+    """작업 라벨(모드/질문 해시/단계), 청구 바이트 한도, 서버 측 실행 시간 한도를 적용한 작업 설정"""
+    options.setdefault("maximum_bytes_billed", BIGQUERY_MAX_BYTES_BILLED or None)
+    job_config = bigquery.QueryJobConfig(labels=query_labels(stage), **options)
+    if timeout:
+        job_config.job_timeout_ms = int(timeout * 1000)
+    return job_config
+
+def wait_for_query_job(query_job, timeout):
+    """쿼리 작업 완료 대기
+
+    timeout초 안에 끝나지 않으면 작업을 취소하고 TimeoutError, 기다리는 동안 요청이
+    취소 조건(클라이언트 연결 종료, 작업 취소, 요청 마감 시간)이 되면 작업을 취소하고 QueryCancelled
+    """
+    return wait_for_job(query_job, timeout, poll_interval=BIGQUERY_POLL_INTERVAL_SECONDS)
+
+def _run_preview(sql_query, timer, full_done, on_preview):
+    """미리보기 쿼리 실행 → 전체 결과보다 먼저 받으면 on_preview로 전달
+
+    전체 쿼리가 PREVIEW_DELAY_SECONDS 안에 끝나면 실행하지 않고, 기다리는 동안 전체 결과가
+    준비되거나 요청이 취소되면 미리보기 작업을 취소한다. 미리보기는 BigQuery 슬롯이 바로
+    비어 있을 때만 실행하며, 실패해도 전체 쿼리에는 영향을 주지 않는다.
+    """
+    if full_done.wait(PREVIEW_DELAY_SECONDS):
+        metrics.increment("preview.skipped.fast")
+        return
+    
+    preview_sql, strategy = build_preview_sql(sql_query, PREVIEW_ROWS, PREVIEW_SAMPLE_PERCENT)
+    if preview_sql is None:
+        metrics.increment(f"preview.skipped.{strategy}")
+        return
+    
+    context = current_query_context()
+    try:
+        with admission.slot("bigquery", deadline=time.monotonic()):
+            print(f"미리보기 SQL ({strategy}): {preview_sql}")  # 디버깅용
+            job_config = _query_job_config(
+                "preview", effective_timeout(None),
+                maximum_bytes_billed=PREVIEW_MAX_BYTES_BILLED or None
+            )
+            preview_job = bigquery_client.query(preview_sql, job_config=job_config)
+            while True:
+                if full_done.is_set() or (context is not None and context.cancel_reason()):
+                    preview_job.cancel()
+                    metrics.increment("preview.superseded")
+                    return
                 try:
-                    row_dict = {f"col_{i}": str(val) for i, val in enumerate(row)}
-                except Exception as inner_e:
-                    print(f"문자열 변환 중 오류: {inner_e}")
-                    row_dict = {"error": f"Row 변환 실패: {str(e)}"}
+                    results = preview_job.result(timeout=BIGQUERY_POLL_INTERVAL_SECONDS)
+                    break
+                except TimeoutError:
+                    continue
+            rows = [convert_bigquery_row(row) for row in results]
+    except AdmissionRejected:
+        metrics.increment("preview.skipped.admission")
+        return
+    except Exception as e:
+        metrics.increment("preview.failed")
+        print(f"미리보기 쿼리 실패 (전체 결과만 사용): {e}")
+        return
+    
+    if full_done.is_set() or not timer.first_row("preview"):
+        metrics.increment("preview.superseded")
+        return
+    metrics.increment(f"preview.delivered.{strategy}")
+    on_preview({
+        "complete": False,
+        "sampled": strategy == "tablesample",
+        "rows": rows,
+        "row_count": len(rows),
+        "seconds": timer.to_dict()["first_row_seconds"]
+    })
+
+def execute_bigquery(sql_query, collect_stats=False, preview=True):
+    """BigQuery에서 SQL 쿼리 실행
+
+    collect_stats가 True이면 결과 페이지를 받는 동안 스트리밍 통계를 누적하여
+    마지막 페이지 도착과 동시에 분석 결과("analysis")와 행 샘플("sample")을 함께 반환
+
+    preview가 True이고 요청에 미리보기를 받을 곳(비동기 작업)이 있으면 미리보기 쿼리를
+    동시에 실행해 먼저 전달하고, 전체 결과가 준비되면 그 앞부분으로 교체한다.
+    첫 행까지 시간/완료 시간은 "timing"으로 반환된다.
+    """
+    try:
+        with admission.slot("bigquery"), _bigquery_guard("query") as timeout:
+            print(f"실행할 SQL: {sql_query}")  # 디버깅용
+            print(f"사용 중인 프로젝트 ID: {bigquery_client.project}")  # 디버깅용
             
-            rows.append(row_dict)
-        
-        print(f"변환된 행 수: {len(rows)}")  # 디버깅용
-        if rows:
-            print(f"첫 번째 행 타입: {type(rows[0])}")  # 디버깅용
-            print(f"첫 번째 행 키: {list(rows[0].keys()) if isinstance(rows[0], dict) else 'Not a dict'}")  # 디버깅용
+            # 쿼리 실행 (적응형 타임아웃/모드별 한도/요청 마감 시간 중 짧은 쪽, 초과 또는 취소 시 작업 취소)
+            timeout = effective_timeout(timeout)
+            query_job = bigquery_client.query(sql_query, job_config=_query_job_config("query", timeout))
+            
+            # 미리보기 쿼리 (결과를 받을 곳이 있을 때만)
+            timer = FirstRowTimer()
+            full_done = threading.Event()
+            context = current_query_context()
+            on_preview = context.preview if preview and context is not None else None
+            if on_preview is not None:
+                preview_executor.submit(
+                    contextvars.copy_context().run, _run_preview, sql_query, timer, full_done, on_preview
+                )
+            
+            try:
+                results = wait_for_query_job(query_job, timeout)
+                
+                accumulator = StreamingStatsAccumulator(
+                    sample_size=STREAMING_STATS_SAMPLE_ROWS,
+                    max_counters=STREAMING_STATS_MAX_COUNTERS,
+                    max_distinct=STREAMING_STATS_MAX_DISTINCT,
+                    tdigest_compression=SKETCH_TDIGEST_COMPRESSION
+                ) if collect_stats else None
+                
+                # 결과를 페이지 단위로 변환하여 열 우선 ResultSet에 누적
+                # (페이지의 딕셔너리 행은 임시로만 사용, 요청 메모리 한도를 넘으면 디스크로 내려 씀)
+                with SpillingResultBuilder(results.schema, RESULT_SPILL_DIR) as builder:
+                    for page in results.pages:
+                        check_cancelled()
+                        page_rows = [convert_bigquery_row(row) for row in page]
+                        if accumulator is not None:
+                            accumulator.add_page(page_rows)
+                        builder.append_rows(page_rows)
+                    rows = builder.build()
+            finally:
+                full_done.set()
+            
+            timer.complete()
+            if on_preview is not None and timer.first_row_source == "preview":
+                # 먼저 보여준 미리보기를 전체 결과 앞부분으로 교체
+                on_preview({
+                    "complete": True,
+                    "sampled": False,
+                    "rows": rows.head(PREVIEW_ROWS),
+                    "row_count": len(rows)
+                })
+            
+            print(f"변환된 행 수: {len(rows)}")  # 디버깅용
+            if rows:
+                print(f"컬럼: {rows.columns}")  # 디버깅용
+            
+            result = {
+                "success": True,
+                "data": rows,
+                "row_count": len(rows),
+                "bytes_processed": query_job.total_bytes_processed,
+                "timing": timer.to_dict()
+            }
+            if accumulator is not None:
+                result["analysis"] = accumulator.result()
+                result["sample"] = accumulator.sample()
+            
+            return result
         
+    except (AdmissionRejected, QueryCancelled):
+        raise
+    except Exception as e:
+        _raise_if_backend_overloaded("bigquery", e)
+        print(f"BigQuery 실행 중 오류: {str(e)}")
         return {
-            "success": True,
-            "data": rows,
-            "row_count": len(rows)
+            "success": False,
+            "error": str(e),
+            "data": []
         }
+
+def execute_bigquery_with_stats(sql_query, sample_rows=STATS_PUSHDOWN_SAMPLE_ROWS):
+    """요약 통계는 BigQuery에서 계산하고 제한된 샘플 행만 다운로드"""
+    try:
+        with admission.slot("bigquery"), _bigquery_guard("pushdown") as timeout:
+            print(f"푸시다운 통계 모드로 실행할 SQL: {sql_query}")  # 디버깅용
+            
+            # 드라이런으로 결과 스키마 확인 (과금 없음)
+            dry_run_config = _query_job_config("dry_run", dry_run=True, use_query_cache=False)
+            dry_run_job = bigquery_client.query(sql_query, job_config=dry_run_config)
+            schema = dry_run_job.schema or []
+            
+            # 메인 쿼리 + 통계 집계 + 샘플을 하나의 스크립트로 실행
+            script = build_stats_pushdown_script(
+                sql_query, schema, sample_rows=sample_rows, top_k=STATS_PUSHDOWN_TOP_K
+            )
+            timeout = effective_timeout(timeout)
+            script_job = bigquery_client.query(script, job_config=_query_job_config("pushdown", timeout))
+            result_row = next(iter(wait_for_query_job(script_job, timeout)), None)
+            
+            if result_row is None:
+                raise Exception("푸시다운 통계 스크립트가 결과를 반환하지 않았습니다.")
+            
+            analysis = build_analysis_from_pushdown(result_row["stats"], schema)
+            rows = ResultSet.from_rows(
+                convert_bigquery_row(dict(row)) for row in (result_row["sample_rows"] or [])
+            )
+            
+            print(f"전체 행 수: {analysis['row_count']}, 다운로드한 샘플 행 수: {len(rows)}")  # 디버깅용
+            
+            return {
+                "success": True,
+                "data": rows,
+                "row_count": analysis["row_count"],
+                "analysis": analysis,
+                "sampled": len(rows) < analysis["row_count"]
+            }
         
+    except (AdmissionRejected, QueryCancelled):
+        raise
     except Exception as e:
-        print(f"BigQuery 실행 중 오류: {str(e)}")
+        _raise_if_backend_overloaded("bigquery", e)
+        print(f"BigQuery 푸시다운 통계 실행 중 오류: {str(e)}")
         return {
             "success": False,
             "error": str(e),
             "data": []
         }
 
-def generate_analysis_report(question, sql_query, query_results, max_rows_for_analysis=100):
-    """Claude Console 스타일의 분석 리포트 생성"""
+def generate_analysis_report(question, sql_query, query_results, max_rows_for_analysis=100, data_analysis=None, sample_rows=None):
+    """Claude Console 스타일의 분석 리포트 생성
+
+    data_analysis가 주어지면 (예: BigQuery 푸시다운 통계, 스트리밍 통계) 전체 결과에
+    대한 통계로 사용하고, sample_rows가 주어지면 프롬프트의 샘플 행으로 사용한다.
+    """
     if not anthropic_client:
         raise Exception("Anthropic 클라이언트가 초기화되지 않았습니다.")
     
     if not query_results or len(query_results) == 0:
-        return {"report": "분석할 데이터가 없습니다.", "chart_config": None, "data_summary": None}
+        return {"report": "분석할 데이터가 없습니다.", "chart_config": None, "chart_data": None, "data_summary": None}
     
     # 데이터 구조 분석
-    data_analysis = analyze_data_structure(query_results)
+    if data_analysis is None:
+        data_analysis = analyze_data_structure(query_results)
     summary_insights = generate_summary_insights(data_analysis, question)
     
     # 샘플링
     sample_data = query_results[:max_rows_for_analysis] if len(query_results) > max_rows_for_analysis else query_results
     columns = list(sample_data[0].keys()) if sample_data else []
     
-    # 차트 설정 제안
-    chart_config = suggest_chart_config(query_results, columns)
+    # 차트 설정 및 차트용 배열 (전체 결과로 타입 추론, 다운샘플링/상위 N개 묶음)
+    chart = prepare_chart(query_results, columns, max_points=CHART_MAX_POINTS, top_n=CHART_TOP_N)
     
     # Claude Console 스타일 데이터 요약 생성
     data_summary = {
         "overview": {
-            "total_rows": len(query_results),
+            "total_rows": data_analysis["row_count"],
             "columns_count": len(columns),
             "data_types": {col: stats["type"] for col, stats in data_analysis["columns"].items()}
         },
@@ -182,31 +1109,177 @@ def generate_analysis_report(question, sql_query, query_results, max_rows_for_an
     }
     
     analysis_prompt = get_analysis_report_prompt(
-        question, sql_query, data_analysis, summary_insights, query_results, max_rows_for_analysis
+        question, sql_query, data_analysis, summary_insights,
+        sample_rows or query_results, max_rows_for_analysis
     )
 
     try:
-        response = anthropic_client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=2500,
-            messages=[
-                {"role": "user", "content": analysis_prompt}
-            ]
-        )
-        
-        analysis_report = response.content[0].text.strip()
+        tier = model_router.select("report", question)
+        while True:
+            analysis_report = call_claude(
+                "report", tier,
+                max_tokens=2500,
+                messages=[
+                    {"role": "user", "content": analysis_prompt}
+                ]
+            )
+            
+            # 빠른 모델의 리포트가 기준 점수에 못 미치면 다음 등급으로 재생성
+            validation = validate_analysis_report(analysis_report)
+            if validation["score"] >= REPORT_MIN_QUALITY_SCORE:
+                break
+            next_tier = model_router.escalate(
+                "report", tier, f"리포트 검증 점수 {validation['score']} {validation['issues']}"
+            )
+            if next_tier is None:
+                break
+            tier = next_tier
         
         return {
             "report": analysis_report,
-            "chart_config": chart_config,
+            "chart_config": chart["config"] if chart else None,
+            "chart_data": chart["data"] if chart else None,
             "data_summary": data_summary
         }
         
+    except AdmissionRejected:
+        raise
     except Exception as e:
         raise Exception(f"분석 리포트 생성 중 오류 발생: {str(e)}")
 
-def generate_html_analysis_report(question, sql_query, query_results):
-    """Claude가 완전한 HTML 분석 리포트 생성 (검증 포함)"""
+def _extract_html(html_content):
+    """Claude 응답에서 HTML 본문 추출 (마크다운 코드 블록 제거)"""
+    if not html_content.startswith('<!DOCTYPE') and not html_content.startswith('<html'):
+        # Claude가 마크다운 블록으로 감쌌을 수 있음
+        if '```html' in html_content:
+            html_content = html_content.split('```html')[1].split('```')[0].strip()
+        elif '```' in html_content:
+            html_content = html_content.split('```')[1].strip()
+    return html_content
+
+def _generate_html_candidate(analysis_prompt, tier, temperature=None, cancel_event=None):
+    """HTML 후보 하나 생성 → (HTML, 검증 결과)"""
+    options = {} if temperature is None else {"temperature": temperature}
+    html_content = call_claude(
+        "html", tier,
+        cancel_event=cancel_event,
+        max_tokens=HTML_MAX_TOKENS,
+        messages=[
+            {"role": "user", "content": analysis_prompt}
+        ],
+        **options
+    )
+    html_content = _extract_html(html_content)
+    return html_content, validate_claude_html(html_content)
+
+def _html_passes(validation):
+    return validation["is_valid"] or validation["score"] >= HTML_MIN_QUALITY_SCORE
+
+def _html_race_variants(base_tier, fan_out):
+    """후보 변형 목록 [(등급, temperature), ...] (HTML_RACE_VARIANTS 순서대로 fan_out개)"""
+    variants = []
+    for item in HTML_RACE_VARIANTS[:fan_out]:
+        tier_name, _, temperature = item.partition(":")
+        if tier_name == "base":
+            tier = base_tier
+        elif tier_name == "next":
+            tier = model_router.next_tier(base_tier) or base_tier
+        else:
+            tier = tier_name if tier_name in model_router.tier_names else base_tier
+        variants.append((tier, float(temperature) if temperature else None))
+    return variants or [(base_tier, None)]
+
+def _race_html_generation(question, analysis_prompt, fan_out=None):
+    """HTML 후보 여러 개를 동시에 생성하고 처음 검증을 통과한 후보 채택 → 결과 또는 None
+
+    후보 수는 요청 값/설정 값을 HTML_RACE_MAX_FAN_OUT과 출력 토큰 상한
+    (HTML_RACE_MAX_OUTPUT_TOKENS)으로 제한하고, 첫 후보를 제외한 추가 후보는
+    프로세스 전체 상한(HTML_RACE_MAX_EXTRA_INFLIGHT)이 남아 있을 때만 실행한다.
+    """
+    requested = int(fan_out or HTML_RACE_FAN_OUT)
+    fan_out = max(1, min(requested, HTML_RACE_MAX_FAN_OUT, HTML_RACE_MAX_OUTPUT_TOKENS // HTML_MAX_TOKENS))
+    variants = _html_race_variants(model_router.select("html", question), fan_out)
+    
+    # 추가 후보 실행 슬롯 확보 (없으면 후보 수 축소)
+    extra_slots = 0
+    while extra_slots < len(variants) - 1 and html_race_extra_slots.acquire(blocking=False):
+        extra_slots += 1
+    variants = variants[:extra_slots + 1]
+    
+    def make_task(tier, temperature):
+        return lambda cancel_event: _generate_html_candidate(analysis_prompt, tier, temperature, cancel_event)
+    
+    try:
+        winner, results = race_candidates(
+            [make_task(tier, temperature) for tier, temperature in variants],
+            accept=lambda candidate: _html_passes(candidate[1]),
+            executor=html_race_executor,
+            timeout=ANTHROPIC_TIMEOUT_MAX_SECONDS + ADMISSION_MAX_WAIT_SECONDS
+        )
+    finally:
+        for _ in range(extra_slots):
+            html_race_extra_slots.release()
+    
+    metrics.increment("html.race.candidates", len(variants))
+    for index, value in results:
+        if isinstance(value, Exception) and not isinstance(value, CandidateCancelled):
+            print(f"HTML 후보 {index + 1} 생성 실패: {str(value)}")
+    
+    race_info = {
+        "candidates": len(variants),
+        "completed": len(results),
+        "variants": [{"tier": tier, "temperature": temperature} for tier, temperature in variants]
+    }
+    if winner is None:
+        print(f"HTML 후보 {len(variants)}개 중 검증 통과 없음")
+        return None, race_info
+    
+    index, (html_content, validation) = winner
+    race_info["winner"] = index
+    metrics.increment(f"html.race.winner.{index}")
+    return {
+        "html_content": html_content,
+        "quality_score": validation["score"],
+        "attempts": len(results),
+        "issues": validation.get("issues", []),
+        "fallback": False,
+        "race": race_info
+    }, race_info
+
+def _sequential_html_generation(question, analysis_prompt, max_attempts=2):
+    """생성 → 검증 → (미달 시) 재시도 순차 실행 → 결과 또는 None"""
+    tier = model_router.select("html", question)
+    
+    for attempt in range(max_attempts):
+        if attempt > 0:
+            # 재시도는 가능하면 한 단계 위 모델로
+            tier = model_router.escalate("html", tier, "이전 시도 품질 미달") or tier
+        try:
+            html_content, validation = _generate_html_candidate(analysis_prompt, tier)
+            
+            if _html_passes(validation):
+                return {
+                    "html_content": html_content,
+                    "quality_score": validation["score"],
+                    "attempts": attempt + 1,
+                    "issues": validation.get("issues", []),
+                    "fallback": False
+                }
+            
+            if attempt < max_attempts - 1:
+                print(f"HTML 품질 개선 필요 (점수: {validation['score']}), 재시도 중...")
+                
+        except Exception as e:
+            print(f"HTML 생성 시도 {attempt + 1} 실패: {str(e)}")
+    
+    return None
+
+def generate_html_analysis_report(question, sql_query, query_results, race=False, fan_out=None):
+    """Claude가 완전한 HTML 분석 리포트 생성 (검증 포함)
+
+    race가 True이면 후보 여러 개를 동시에 생성해 먼저 검증을 통과한 후보를 쓰고
+    나머지는 취소한다. 두 방식의 전체 소요 시간은 html.race / html.sequential 지표로 기록된다.
+    """
     if not anthropic_client:
         raise Exception("Anthropic 클라이언트가 초기화되지 않았습니다.")
     
@@ -214,7 +1287,7 @@ def generate_html_analysis_report(question, sql_query, query_results):
     try:
         if not query_results:
             query_results = []
-        elif not isinstance(query_results, list):
+        elif not isinstance(query_results, (list, ResultSet)):
             print(f"경고: query_results가 리스트가 아닙니다: {type(query_results)}")
             query_results = []
         
@@ -227,7 +1300,7 @@ def generate_html_analysis_report(question, sql_query, query_results):
             }
         
         # 첫 번째 행 검증
-        if query_results and not isinstance(query_results[0], dict):
+        if query_results and not isinstance(query_results[0], Mapping):
             print(f"경고: 첫 번째 데이터 행이 딕셔너리가 아닙니다: {type(query_results[0])}")
             return {
                 "html_content": generate_fallback_html(question, query_results),
@@ -238,52 +1311,24 @@ def generate_html_analysis_report(question, sql_query, query_results):
         
         analysis_prompt = get_html_generation_prompt(question, sql_query, query_results)
 
-        max_attempts = 2
+        start = time.monotonic()
+        race_info = None
+        if race:
+            result, race_info = _race_html_generation(question, analysis_prompt, fan_out)
+        else:
+            result = _sequential_html_generation(question, analysis_prompt)
+        metrics.observe("html.race" if race else "html.sequential", time.monotonic() - start)
         
-        for attempt in range(max_attempts):
-            try:
-                response = anthropic_client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=4000,
-                    messages=[
-                        {"role": "user", "content": analysis_prompt}
-                    ]
-                )
-                
-                html_content = response.content[0].text.strip()
-                
-                # HTML 태그 확인 및 정리
-                if not html_content.startswith('<!DOCTYPE') and not html_content.startswith('<html'):
-                    # Claude가 마크다운 블록으로 감쌌을 수 있음
-                    if '```html' in html_content:
-                        html_content = html_content.split('```html')[1].split('```')[0].strip()
-                    elif '```' in html_content:
-                        html_content = html_content.split('```')[1].strip()
-                
-                # HTML 품질 검증
-                validation = validate_claude_html(html_content)
-                
-                if validation["is_valid"] or validation["score"] >= 70:
-                    return {
-                        "html_content": html_content,
-                        "quality_score": validation["score"],
-                        "attempts": attempt + 1,
-                        "issues": validation.get("issues", []),
-                        "fallback": False
-                    }
-                
-                if attempt < max_attempts - 1:
-                    print(f"HTML 품질 개선 필요 (점수: {validation['score']}), 재시도 중...")
-                    
-            except Exception as e:
-                print(f"HTML 생성 시도 {attempt + 1} 실패: {str(e)}")
+        if result is not None:
+            return result
         
         # 모든 시도 실패 시 폴백
         return {
             "html_content": generate_fallback_html(question, query_results),
             "quality_score": 60,
-            "attempts": max_attempts,
-            "fallback": True
+            "attempts": race_info["completed"] if race_info else 2,
+            "fallback": True,
+            "race": race_info
         }
         
     except Exception as e:
@@ -295,6 +1340,387 @@ def generate_html_analysis_report(question, sql_query, query_results):
             "fallback": True
         }
 
+# 분석 파이프라인 (엔드포인트와 비동기 작업에서 공통 사용)
+
+def _report_progress(progress, stage):
+    """파이프라인 진행 단계 알림 (요청이 취소 조건이면 다음 단계로 진행하지 않고 QueryCancelled)"""
+    check_cancelled()
+    if progress is not None:
+        progress(stage)
+
+def _cached_report(mode, question, data, row_count, generate, cacheable=None):
+    """같은 질문/결과 데이터/프롬프트 버전의 저장된 리포트 재사용 → (리포트, 캐시 사용 여부)"""
+    if not report_cache.enabled:
+        return generate(), False
+    
+    key = report_cache.key(mode, question, result_fingerprint(data, row_count))
+    report = report_cache.get(key)
+    if report is not None:
+        metrics.increment(f"report_cache.{mode}.hit")
+        print(f"저장된 리포트 사용 ({mode})")
+        return report, True
+    
+    metrics.increment(f"report_cache.{mode}.miss")
+    report = generate()
+    if cacheable is None or cacheable(report):
+        report_cache.put(key, mode, question, report)
+    return report, False
+
+def _session_id(options):
+    """요청 옵션의 대화 세션 ID (없거나 형식이 맞지 않으면 None)"""
+    session_id = (options or {}).get('session_id')
+    if isinstance(session_id, str) and 0 < len(session_id) <= 128:
+        return session_id
+    return None
+
+def _response_data(data):
+    """응답에 넣을 결과 행 → (행, 잘렸는지)
+
+    디스크로 내려 쓴 큰 결과는 앞쪽 RESULT_SPILL_RESPONSE_ROWS행만 응답에 넣는다
+    (전체는 /export로 다운로드).
+    """
+    if isinstance(data, ResultSet) and data.spill is not None and len(data) > RESULT_SPILL_RESPONSE_ROWS:
+        # 응답/대체 응답 캐시가 매핑된 파일을 붙잡지 않도록 앞부분은 메모리로 복사
+        return ResultSet.from_rows(data.head(RESULT_SPILL_RESPONSE_ROWS)), True
+    return data, False
+
+def run_quick_pipeline(question, options=None, progress=None):
+    """빠른 조회 파이프라인: SQL 생성 → 데이터 조회"""
+    sql_query, query_result = generate_and_execute_sql(
+        question, progress=progress, session_id=_session_id(options)
+    )
+    
+    if not query_result["success"]:
+        return {
+            "success": False,
+            "error": query_result["error"],
+            "mode": "quick",
+            "original_question": question,
+            "generated_sql": sql_query
+        }, 500
+    
+    data, truncated = _response_data(query_result["data"])
+    return {
+        "success": True,
+        "mode": "quick",
+        "original_question": question,
+        "generated_sql": sql_query,
+        "export_token": _export_token(sql_query, options),
+        "data": data,
+        "data_truncated": truncated,
+        "row_count": query_result.get("row_count", 0),
+        "answered_locally": query_result.get("local", False),
+        "query_plan": query_result.get("query_plan"),
+        "sql_template": query_result.get("sql_template")
+    }, 200
+
+def run_structured_pipeline(question, options=None, progress=None):
+    """구조화된 분석 파이프라인: SQL 생성 → 데이터 조회 → 분석 리포트"""
+    options = options or {}
+    
+    # 요약 통계 푸시다운 여부 (요청별로 재정의 가능)
+    pushdown_stats = bool(options.get('pushdown_stats', STATS_PUSHDOWN_ENABLED))
+    
+    # SQL 생성 및 데이터 조회
+    if pushdown_stats:
+        sql_query, query_result = generate_and_execute_sql(
+            question, execute=execute_bigquery_with_stats, progress=progress,
+            session_id=_session_id(options)
+        )
+    else:
+        sql_query, query_result = generate_and_execute_sql(
+            question, progress=progress, session_id=_session_id(options), collect_stats=True
+        )
+    
+    if not query_result["success"]:
+        return {
+            "success": False,
+            "error": query_result["error"],
+            "mode": "structured",
+            "original_question": question,
+            "generated_sql": sql_query
+        }, 500
+    
+    # 구조화된 분석 리포트 생성 (같은 결과 데이터면 저장된 리포트 사용)
+    _report_progress(progress, "report_generation")
+    analysis_result, report_cached = _cached_report(
+        "structured", question, query_result["data"], query_result.get("row_count"),
+        lambda: generate_analysis_report(
+            question, 
+            sql_query, 
+            query_result["data"],
+            data_analysis=query_result.get("analysis"),
+            sample_rows=query_result.get("sample")
+        ),
+        cacheable=lambda report: report["data_summary"] is not None
+    )
+    
+    data, truncated = _response_data(query_result["data"])
+    return {
+        "success": True,
+        "mode": "structured",
+        "original_question": question,
+        "generated_sql": sql_query,
+        "data": data,
+        "data_truncated": truncated,
+        "row_count": query_result.get("row_count", 0),
+        "data_sampled": query_result.get("sampled", False),
+        "answered_locally": query_result.get("local", False),
+        "query_plan": query_result.get("query_plan"),
+        "sql_template": query_result.get("sql_template"),
+        "analysis_report": analysis_result["report"],
+        "chart_config": analysis_result["chart_config"],
+        "chart_data": analysis_result["chart_data"],
+        "data_summary": analysis_result["data_summary"],
+        "report_cached": report_cached
+    }, 200
+
+def run_creative_html_pipeline(question, options=None, progress=None):
+    """창의적 HTML 분석 파이프라인: SQL 생성 → 데이터 조회 → HTML 리포트"""
+    # SQL 생성 및 데이터 조회
+    try:
+        sql_query, query_result = generate_and_execute_sql(
+            question, progress=progress, session_id=_session_id(options)
+        )
+    except (AdmissionRejected, QueryCancelled):
+        raise
+    except Exception as e:
+        return {
+            "success": False,
+            "error": f"SQL 변환 중 오류: {str(e)}",
+            "mode": "creative_html",
+            "original_question": question
+        }, 500
+    
+    if not query_result["success"]:
+        return {
+            "success": False,
+            "error": query_result["error"],
+            "mode": "creative_html",
+            "original_question": question,
+            "generated_sql": sql_query
+        }, 500
+    
+    # 데이터 타입 및 구조 검증
+    data = query_result.get("data", [])
+    if not isinstance(data, (list, ResultSet)):
+        print(f"경고: 쿼리 결과 데이터가 리스트가 아닙니다: {type(data)}")
+        data = []
+    
+    # Claude HTML 생성 (race 옵션: 후보 동시 생성, 같은 결과 데이터면 저장된 HTML 사용)
+    _report_progress(progress, "html_generation")
+    options = options or {}
+    html_cached = False
+    try:
+        html_result, html_cached = _cached_report(
+            "creative_html", question, data, query_result.get("row_count", len(data)),
+            lambda: generate_html_analysis_report(
+                question, 
+                sql_query, 
+                data,
+                race=bool(options.get('race', HTML_RACE_ENABLED)),
+                fan_out=options.get('race_fan_out')
+            ),
+            cacheable=lambda result: not result.get("fallback", False)
+        )
+    except Exception as e:
+        print(f"HTML 생성 중 오류: {str(e)}")
+        # 오류 시 폴백 HTML 생성
+        html_result = {
+            "html_content": generate_fallback_html(question, data),
+            "quality_score": 50,
+            "attempts": 1,
+            "fallback": True
+        }
+    
+    return {
+        "success": True,
+        "mode": "creative_html",
+        "original_question": question,
+        "generated_sql": sql_query,
+        "row_count": query_result.get("row_count", len(data)),
+        "answered_locally": query_result.get("local", False),
+        "query_plan": query_result.get("query_plan"),
+        "sql_template": query_result.get("sql_template"),
+        "html_content": html_result["html_content"],
+        "quality_score": html_result["quality_score"],
+        "attempts": html_result["attempts"],
+        "is_fallback": html_result.get("fallback", False),
+        "race": html_result.get("race"),
+        "report_cached": html_cached
+    }, 200
+
+PIPELINES = {
+    "quick": run_quick_pipeline,
+    "structured": run_structured_pipeline,
+    "creative_html": run_creative_html_pipeline
+}
+
+def run_pipeline(mode, question, options=None, progress=None, cancel_check=None, preview=None):
+    """모드에 맞는 분석 파이프라인 실행 → (응답 본문, HTTP 상태 코드)
+
+    백엔드 장애(서킷 open)나 포화로 거절되면 같은 질문의 최근 성공 응답을
+    stale 표시와 함께 대신 반환한다. 직전 결과에 따라 뜻이 달라지는 세션의 후속 질문은
+    대체 응답으로 쓰지도, 보관하지도 않는다.
+
+    BigQuery 결과는 요청별 메모리 한도(RESULT_MEMORY_BUDGET_MB)와 동시 요청 전체의 한도
+    (RESULT_PROCESS_MEMORY_BUDGET_MB) 안에서만 메모리에 두고,
+    넘으면 디스크로 내려 쓴다. 응답의 "memory"에 요청 동안의 최대 RSS와 내려 쓴 양을 담는다.
+
+    파이프라인의 BigQuery 작업에는 모드/질문 해시 라벨과 모드별 마감 시간이 적용되고,
+    cancel_check가 취소 사유를 반환하면(클라이언트 연결 종료, 작업 취소) 실행 중인 작업을
+    취소하고 499 응답을 반환한다. 마감 시간 초과는 504.
+
+    preview 콜백이 주어지면(비동기 작업) 결과가 늦게 나오는 쿼리는 미리보기 행을 먼저
+    전달한다 (요청 옵션 "preview"로 끌 수 있음).
+    """
+    options = options or {}
+    if not bool(options.get('preview', PREVIEW_ENABLED)):
+        preview = None
+    contextual = FOLLOWUP_LOCAL_ENABLED and session_results.get(_session_id(options)) is not None
+    try:
+        with query_context(
+            mode, question,
+            timeout=REQUEST_DEADLINE_SECONDS.get(mode),
+            job_timeout=BIGQUERY_JOB_TIMEOUT_SECONDS.get(mode),
+            cancel_check=cancel_check,
+            preview=preview
+        ), request_memory(RESULT_MEMORY_BUDGET_BYTES, result_memory_budget) as memory:
+            payload, status_code = PIPELINES[mode](question, options=options, progress=progress)
+            payload["memory"] = memory.report()
+    except QueryCancelled as e:
+        print(f"요청 취소 ({mode}, {e.reason}): {question}")
+        return {
+            "success": False,
+            "error": str(e),
+            "mode": mode,
+            "original_question": question,
+            "cancelled": True,
+            "cancel_reason": e.reason
+        }, e.status_code
+    except AdmissionRejected as e:
+        cached = stale_cache.get(mode, question) if e.status_code == 503 and not contextual else None
+        if cached is None:
+            raise
+        payload, age = cached
+        print(f"백엔드 거절로 이전 응답 반환 ({mode}, {age:.0f}초 전): {e}")
+        return {**payload, "stale": True, "stale_age_seconds": round(age), "stale_reason": str(e)}, 200
+    
+    if status_code == 200 and not contextual:
+        _remember_stale(mode, question, payload)
+    return payload, status_code
+
+def _bounded_payload(payload, max_rows):
+    """결과 행을 앞쪽 max_rows행만 복사한 응답 (보관용, 넘지 않으면 그대로)"""
+    data = payload.get("data")
+    if data is None or len(data) <= max_rows:
+        return payload
+    head = data.head(max_rows) if isinstance(data, ResultSet) else data[:max_rows]
+    # 원래 결과 저장소를 붙잡지 않도록 복사
+    return {**payload, "data": ResultSet.from_rows(head), "data_truncated": True}
+
+def _remember_stale(mode, question, payload):
+    """대체 응답용으로 응답 보관 (결과 행은 앞쪽 STALE_CACHE_MAX_ROWS행만 복사해 보관)"""
+    payload = _bounded_payload(payload, STALE_CACHE_MAX_ROWS)
+    try:
+        size = len(json_dumps_bytes(payload))
+    except Exception as e:
+        print(f"대체 응답 크기 계산 실패, 보관하지 않음: {e}")
+        return
+    stale_cache.put(mode, question, payload, size)
+
+def _warm(mode, kind, text):
+    """예열 실행 → (성공 여부, BigQuery 처리 바이트)
+
+    인기 질문은 최근 SQL만 실행해 BigQuery 결과 캐시(모든 인스턴스 공유)를 채우고,
+    예시 질문은 파이프라인 전체를 실행한다.
+    """
+    if kind == "sql":
+        with admission.slot("bigquery"), _bigquery_guard("warmup") as timeout:
+            timeout = effective_timeout(timeout)
+            query_job = bigquery_client.query(text, job_config=_query_job_config("warmup", timeout))
+            wait_for_query_job(query_job, timeout)
+        return True, query_job.total_bytes_processed or 0
+    payload, status_code = run_pipeline(mode, text, {"preview": False})
+    query_plan = payload.get("query_plan") or {}
+    return status_code == 200 and payload.get("success", False), query_plan.get("bytes_processed") or 0
+
+def _run_jobs_query(sql_query):
+    """작업 이력 조회 → 행 딕셔너리 목록"""
+    query_job = bigquery_client.query(sql_query, job_config=_query_job_config("job_history"))
+    return [dict(row.items()) for row in query_job.result()]
+
+# 인기 질문 (모든 인스턴스의 BigQuery 작업 이력에서 모드/질문 해시 라벨별 실행 횟수)
+popular_questions = SharedPopularity(
+    _run_jobs_query,
+    lambda k: popular_queries_sql(
+        jobs_view(bigquery_client.project, BIGQUERY_JOBS_REGION), WARMUP_POPULARITY_LOOKBACK_DAYS, k, WARMUP_MODES
+    ),
+    cache_seconds=WARMUP_POPULARITY_CACHE_SECONDS,
+    enabled=WARMUP_ENABLED and bigquery_client is not None
+)
+
+def _warmup_candidates():
+    """예열 대상 (인기 질문 상위 K개의 최근 SQL → 스키마 예시 질문 순)"""
+    popular = [(item["mode"], "sql", item["sql_query"]) for item in popular_questions.top(WARMUP_TOP_K)]
+    samples = [
+        (WARMUP_SAMPLE_MODE, "question", question)
+        for table in TABLE_SCHEMA.values() for question in table.get("sample_queries", [])
+    ]
+    return popular + samples
+
+def _data_version():
+    """데이터 버전 (샤드 테이블 중 가장 최근 수정 시각, 새 데이터가 적재되면 바뀜)
+
+    샤드 메타데이터는 샤드별 집계 캐시가 TTL 동안 보관한 값을 함께 사용한다.
+    """
+    if SHARD_PREFIX:
+        metadata = incremental_aggregator.current_metadata()
+        return max(metadata.values(), default=None) if metadata else None
+    return _base_table_modified()
+
+# 캐시 예열 (새 데이터 적재 후/정해진 시각에 인기/예시 질문을 백그라운드 스레드에서 미리 실행)
+# 외부 스케줄러 토큰이 있으면 인스턴스마다 주기 확인/시작 예열을 하지 않고 /internal/warmup 호출로만 예열
+warmup_scheduler = WarmupScheduler(
+    _warm,
+    _warmup_candidates,
+    data_version=None if WARMUP_TRIGGER_TOKEN else _data_version,
+    schedule_hours=() if WARMUP_TRIGGER_TOKEN else WARMUP_SCHEDULE_HOURS,
+    check_seconds=WARMUP_CHECK_SECONDS,
+    max_concurrent=WARMUP_CONCURRENCY,
+    max_questions=WARMUP_MAX_QUESTIONS,
+    max_bytes=WARMUP_MAX_BYTES or None,
+    is_busy=lambda: any(gate.stats()["waiting"] for gate in admission.gates.values()),
+    warm_on_start=WARMUP_ON_START and not WARMUP_TRIGGER_TOKEN,
+    startup_max_questions=WARMUP_STARTUP_MAX_QUESTIONS,
+    enabled=WARMUP_ENABLED and bigquery_client is not None and anthropic_client is not None
+)
+
+@app.before_request
+def start_warmup_scheduler():
+    """첫 요청에서 예열 스케줄러 시작 (스크립트의 app import로는 스레드를 만들지 않음)"""
+    warmup_scheduler.start()
+
+def _read_question(mode):
+    """요청 본문에서 질문 추출 → (질문, 오류 응답)"""
+    if not request.json or 'question' not in request.json:
+        return None, (jsonify({
+            "success": False,
+            "error": "요청 본문에 'question' 필드가 필요합니다.",
+            "mode": mode
+        }), 400)
+    
+    question = request.json['question'].strip()
+    
+    if not question:
+        return None, (jsonify({
+            "success": False,
+            "error": "질문이 비어있습니다.",
+            "mode": mode
+        }), 400)
+    
+    return question, None
+
 # API 엔드포인트들
 
 @app.route('/quick', methods=['POST'])
@@ -302,44 +1728,18 @@ def quick_query():
     """빠른 조회 - 데이터만 반환"""
     try:
         # 요청 검증
-        if not request.json or 'question' not in request.json:
-            return jsonify({
-                "success": False,
-                "error": "요청 본문에 'question' 필드가 필요합니다.",
-                "mode": "quick"
-            }), 400
-
-        question = request.json['question'].strip()
+        question, error_response = _read_question("quick")
+        if error_response:
+            return error_response
         
-        if not question:
-            return jsonify({
-                "success": False,
-                "error": "질문이 비어있습니다.",
-                "mode": "quick"
-            }), 400
-        
-        # SQL 생성 및 데이터 조회
-        sql_query = natural_language_to_sql(question)
-        query_result = execute_bigquery(sql_query)
-        
-        if not query_result["success"]:
-            return jsonify({
-                "success": False,
-                "error": query_result["error"],
-                "mode": "quick",
-                "original_question": question,
-                "generated_sql": sql_query
-            }), 500
-        
-        return jsonify({
-            "success": True,
-            "mode": "quick",
-            "original_question": question,
-            "generated_sql": sql_query,
-            "data": query_result["data"],
-            "row_count": query_result.get("row_count", 0)
-        })
+        payload, status_code = run_pipeline(
+            "quick", question, request.json,
+            cancel_check=socket_disconnect_checker(request.environ)
+        )
+        return jsonify(payload), status_code
         
+    except AdmissionRejected:
+        raise  # 429/503 응답은 errorhandler에서 처리
     except Exception as e:
         print(f"빠른 조회 중 오류: {str(e)}")
         return jsonify({
@@ -353,54 +1753,18 @@ def structured_analysis():
     """구조화된 분석 - 차트와 분석 리포트 포함"""
     try:
         # 요청 검증
-        if not request.json or 'question' not in request.json:
-            return jsonify({
-                "success": False,
-                "error": "요청 본문에 'question' 필드가 필요합니다.",
-                "mode": "structured"
-            }), 400
-
-        question = request.json['question'].strip()
-        
-        if not question:
-            return jsonify({
-                "success": False,
-                "error": "질문이 비어있습니다.",
-                "mode": "structured"
-            }), 400
-        
-        # SQL 생성 및 데이터 조회
-        sql_query = natural_language_to_sql(question)
-        query_result = execute_bigquery(sql_query)
-        
-        if not query_result["success"]:
-            return jsonify({
-                "success": False,
-                "error": query_result["error"],
-                "mode": "structured",
-                "original_question": question,
-                "generated_sql": sql_query
-            }), 500
+        question, error_response = _read_question("structured")
+        if error_response:
+            return error_response
         
-        # 구조화된 분석 리포트 생성
-        analysis_result = generate_analysis_report(
-            question, 
-            sql_query, 
-            query_result["data"]
+        payload, status_code = run_pipeline(
+            "structured", question, request.json,
+            cancel_check=socket_disconnect_checker(request.environ)
         )
+        return jsonify(payload), status_code
         
-        return jsonify({
-            "success": True,
-            "mode": "structured",
-            "original_question": question,
-            "generated_sql": sql_query,
-            "data": query_result["data"],
-            "row_count": query_result.get("row_count", 0),
-            "analysis_report": analysis_result["report"],
-            "chart_config": analysis_result["chart_config"],
-            "data_summary": analysis_result["data_summary"]
-        })
-        
+    except AdmissionRejected:
+        raise  # 429/503 응답은 errorhandler에서 처리
     except Exception as e:
         print(f"구조화된 분석 중 오류: {str(e)}")
         return jsonify({
@@ -414,79 +1778,18 @@ def creative_html_analysis():
     """창의적 HTML 분석 - Claude가 완전한 HTML 생성"""
     try:
         # 요청 데이터 검증
-        if not request.json or 'question' not in request.json:
-            return jsonify({
-                "success": False,
-                "error": "요청 본문에 'question' 필드가 필요합니다.",
-                "mode": "creative_html"
-            }), 400
-
-        question = request.json['question'].strip()
-        
-        if not question:
-            return jsonify({
-                "success": False,
-                "error": "질문이 비어있습니다.",
-                "mode": "creative_html"
-            }), 400
-        
-        # SQL 생성 및 데이터 조회
-        try:
-            sql_query = natural_language_to_sql(question)
-        except Exception as e:
-            return jsonify({
-                "success": False,
-                "error": f"SQL 변환 중 오류: {str(e)}",
-                "mode": "creative_html",
-                "original_question": question
-            }), 500
+        question, error_response = _read_question("creative_html")
+        if error_response:
+            return error_response
         
-        query_result = execute_bigquery(sql_query)
-        
-        if not query_result["success"]:
-            return jsonify({
-                "success": False,
-                "error": query_result["error"],
-                "mode": "creative_html",
-                "original_question": question,
-                "generated_sql": sql_query
-            }), 500
-        
-        # 데이터 타입 및 구조 검증
-        data = query_result.get("data", [])
-        if not isinstance(data, list):
-            print(f"경고: 쿼리 결과 데이터가 리스트가 아닙니다: {type(data)}")
-            data = []
-        
-        # Claude HTML 생성
-        try:
-            html_result = generate_html_analysis_report(
-                question, 
-                sql_query, 
-                data
-            )
-        except Exception as e:
-            print(f"HTML 생성 중 오류: {str(e)}")
-            # 오류 시 폴백 HTML 생성
-            html_result = {
-                "html_content": generate_fallback_html(question, data),
-                "quality_score": 50,
-                "attempts": 1,
-                "fallback": True
-            }
-        
-        return jsonify({
-            "success": True,
-            "mode": "creative_html",
-            "original_question": question,
-            "generated_sql": sql_query,
-            "row_count": query_result.get("row_count", len(data)),
-            "html_content": html_result["html_content"],
-            "quality_score": html_result["quality_score"],
-            "attempts": html_result["attempts"],
-            "is_fallback": html_result.get("fallback", False)
-        })
+        payload, status_code = run_pipeline(
+            "creative_html", question, request.json,
+            cancel_check=socket_disconnect_checker(request.environ)
+        )
+        return jsonify(payload), status_code
         
+    except AdmissionRejected:
+        raise  # 429/503 응답은 errorhandler에서 처리
     except Exception as e:
         print(f"창의적 HTML 분석 중 예상치 못한 오류: {str(e)}")
         return jsonify({
@@ -495,12 +1798,230 @@ def creative_html_analysis():
             "mode": "creative_html"
         }), 500
 
+# 비동기 작업 API (오래 걸리는 분석용)
+
+def _run_job(job_id, mode, question, options):
+    """작업 워커에서 파이프라인 실행 (작업 저장소에는 결과 행을 앞쪽 JOB_RESULT_MAX_ROWS행만 보관)"""
+    progress = lambda stage: job_manager.update_stage(job_id, stage)
+    try:
+        payload, status_code = run_pipeline(
+            mode, question, options, progress=progress,
+            cancel_check=lambda: job_manager.cancel_reason(job_id),
+            preview=lambda data: job_manager.update_preview(job_id, data)
+        )
+    except AdmissionRejected as e:
+        return _admission_payload(e, mode), e.status_code
+    return _bounded_payload(payload, JOB_RESULT_MAX_ROWS), status_code
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """분석 작업 등록 - 작업 ID를 즉시 반환"""
+    mode = (request.json or {}).get('mode', 'structured')
+    if mode not in PIPELINES:
+        return jsonify({
+            "success": False,
+            "error": f"지원하지 않는 모드입니다: {mode}",
+            "supported_modes": list(PIPELINES.keys())
+        }), 400
+    
+    question, error_response = _read_question(mode)
+    if error_response:
+        return error_response
+    
+    try:
+        job_id = job_manager.submit(mode, question, request.json, _run_job)
+    except JobQueueFullError as e:
+        response = jsonify({
+            "success": False,
+            "error": str(e),
+            "mode": mode
+        })
+        response.headers['Retry-After'] = str(JOB_RETRY_AFTER_SECONDS)
+        return response, 429
+    
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "mode": mode,
+        "status_url": f"/jobs/{job_id}"
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """분석 작업 상태/단계/결과 조회 (조회가 끊긴 작업은 클라이언트 이탈로 보고 취소됨)"""
+    job_manager.touch(job_id)
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": "작업을 찾을 수 없습니다. (만료되었거나 존재하지 않는 작업)"
+        }), 404
+    
+    return jsonify({"success": True, **job})
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """분석 작업 취소 요청 - 실행 중인 BigQuery 작업도 취소됨"""
+    if not job_manager.cancel(job_id):
+        return jsonify({
+            "success": False,
+            "error": "취소할 수 있는 작업이 없습니다. (이미 끝났거나 존재하지 않는 작업)"
+        }), 404
+    
+    return jsonify({"success": True, "job_id": job_id, "status": "cancelling"}), 202
+
+# 결과 파일 내보내기 (CSV/Parquet 스트리밍)
+
+def _export_error(message, status_code=400):
+    return jsonify({"success": False, "error": message, "mode": "export"}), status_code
+
+def _export_token(sql_query, options):
+    """조회 응답에 넣을 내보내기 토큰 (로컬 SQL은 결과를 가진 세션에서만 유효)"""
+    session_id = _session_id(options) if is_local_sql(sql_query) else None
+    return sign_export_token(_export_secret, sql_query, session_id, EXPORT_TOKEN_TTL_SECONDS)
+
+def _export_sql(options):
+    """내보낼 SQL (조회 응답의 서명된 토큰, 없거나 무효하면 질문으로 새로 생성) → (SQL, 오류 메시지)
+
+    클라이언트가 보낸 SQL 문자열은 사용하지 않는다.
+    """
+    token = options.get('export_token')
+    sql_query = verify_export_token(_export_secret, token, _session_id(options)) if token else None
+    if sql_query is not None and is_local_sql(sql_query):
+        return sql_query, None
+    if sql_query is None:
+        if token:
+            metrics.increment("export.invalid_token")
+        question = (options.get('question') or '').strip()
+        if not question:
+            return None, "내보내기 토큰이 만료되었거나 유효하지 않습니다. 질문을 다시 실행해주세요."
+        template = intent_router.match(question)
+        sql_query = template.sql if template is not None else generate_sql(question)[0]
+        if is_local_sql(sql_query):
+            return None, "이전 결과에 대한 질문은 조회 응답에서만 내보낼 수 있습니다."
+    
+    for _, part in split_subqueries(sql_query) or [(None, sql_query)]:
+        issues = lint_sql(part, PROJECT_ID)
+        if issues:
+            return None, f"내보낼 수 없는 SQL입니다: {', '.join(issues)}"
+    return sql_query, None
+
+def _export_in_memory(sql_query, options):
+    """직전 결과 조회(로컬 SQL)나 하위 쿼리 병합처럼 이미 메모리에 있는 결과 → (ResultSet, 오류 메시지)"""
+    if is_local_sql(sql_query):
+        followup = session_results.get(_session_id(options))
+        if followup is None:
+            return None, "이전 조회 결과가 만료되어 내보낼 수 없습니다. 질문을 다시 실행해주세요."
+        result = execute_local_followup(followup, sql_query)
+    else:
+        result = execute_decomposed(split_subqueries(sql_query))
+    if not result["success"]:
+        return None, result["error"]
+    return result["data"], None
+
+def _run_export_query(sql_query):
+    """내보내기용 쿼리 실행 → 페이지 단위 결과 반복자 (완료까지만 승인 슬롯 점유)"""
+    with admission.slot("bigquery"), _bigquery_guard("export") as timeout:
+        timeout = effective_timeout(timeout)
+        query_job = bigquery_client.query(sql_query, job_config=_query_job_config("export", timeout))
+        wait_for_query_job(query_job, timeout)
+    # 완료된 작업의 결과는 페이지를 요청할 때마다 받아 옴 (같은 SQL은 BigQuery 쿼리 캐시 사용)
+    return query_job.result(page_size=EXPORT_PAGE_SIZE)
+
+@app.route('/export', methods=['POST'])
+def export_results():
+    """조회 결과 파일 내보내기 - JSON 변환 없이 CSV/Parquet으로 스트리밍
+
+    요청 본문(JSON 또는 폼): format(csv|parquet), export_token(조회 응답의 서명된 토큰) 또는
+    question, session_id. 결과 페이지를 받는 대로 인코딩해 전송하므로 서버 메모리 사용량은
+    EXPORT_PAGE_SIZE 행으로 제한된다.
+    """
+    options = request.get_json(silent=True) or request.form.to_dict()
+    fmt = (options.get('format') or 'csv').lower()
+    if fmt not in available_formats():
+        return _export_error(f"지원하지 않는 형식입니다: {fmt} (지원: {', '.join(available_formats())})")
+    question = options.get('question') or ''
+    
+    start = time.monotonic()
+    try:
+        with query_context(
+            "export", question,
+            job_timeout=BIGQUERY_JOB_TIMEOUT_SECONDS.get("export"),
+            cancel_check=socket_disconnect_checker(request.environ)
+        ):
+            sql_query, error = _export_sql(options)
+            if error:
+                return _export_error(error)
+            
+            if is_local_sql(sql_query) or split_subqueries(sql_query):
+                data, error = _export_in_memory(sql_query, options)
+                if error:
+                    return _export_error(error, 500)
+                source, row_count = "memory", len(data)
+                if fmt == "csv":
+                    chunks = stream_csv_result(data, EXPORT_PAGE_SIZE)
+                else:
+                    chunks = stream_parquet_result(data, EXPORT_PAGE_SIZE, EXPORT_PARQUET_COMPRESSION)
+            else:
+                rows = _run_export_query(sql_query)
+                source, row_count = "bigquery", rows.total_rows
+                if fmt == "csv":
+                    chunks = stream_csv_pages(rows.schema, rows.pages)
+                else:
+                    chunks = stream_parquet_batches(
+                        rows.to_arrow_iterable(), [field.name for field in rows.schema],
+                        EXPORT_PARQUET_COMPRESSION
+                    )
+    except AdmissionRejected:
+        raise
+    except QueryCancelled as e:
+        return _export_error(str(e), e.status_code)
+    except Exception as e:
+        _raise_if_backend_overloaded("bigquery", e)
+        print(f"내보내기 중 오류: {str(e)}")
+        return _export_error(f"내보내기 중 오류: {str(e)}", 500)
+    
+    def on_finish(total_bytes, completed):
+        outcome = "completed" if completed else "aborted"
+        metrics.increment(f"export.{fmt}.{outcome}")
+        metrics.increment(f"export.{fmt}.bytes", total_bytes)
+        if completed:
+            metrics.observe(f"export.{fmt}", time.monotonic() - start)
+        print(f"내보내기 {outcome} ({fmt}, {source}, {row_count}행, {total_bytes / 1024:.0f}KB)")
+    
+    response = Response(counted(chunks, on_finish), mimetype=EXPORT_MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(question, fmt)}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Row-Count'] = str(row_count)
+    return response
+
 # 기존 엔드포인트들 (하위 호환성)
 @app.route('/query', methods=['POST'])
 def legacy_query():
     """기존 호환성을 위한 엔드포인트 - 구조화된 분석으로 리다이렉트"""
     return structured_analysis()
 
+# 캐시 예열 트리거 (Cloud Scheduler 등 외부 스케줄러용)
+@app.route('/internal/warmup', methods=['POST'])
+def trigger_warmup():
+    """예열 한 번 실행 - WARMUP_TRIGGER_TOKEN을 Bearer 토큰으로 보내야 함 (미설정 시 사용 안 함)
+
+    Cloud Run은 요청 처리 중에만 CPU를 할당하므로 응답 전에 예열을 끝까지 실행한다.
+    """
+    if not WARMUP_TRIGGER_TOKEN:
+        return jsonify({"success": False, "error": "예열 트리거가 설정되지 않았습니다."}), 404
+    
+    expected = f"Bearer {WARMUP_TRIGGER_TOKEN}".encode("utf-8")
+    if not hmac.compare_digest(request.headers.get('Authorization', '').encode("utf-8"), expected):
+        return jsonify({"success": False, "error": "인증에 실패했습니다."}), 401
+    
+    if not warmup_scheduler.enabled:
+        return jsonify({"success": False, "error": "캐시 예열이 비활성화되어 있습니다."}), 503
+    # 다른 예열이 실행 중이면 끝나기를 기다렸다가 실행
+    record = warmup_scheduler.run_once("trigger", wait=True)
+    return jsonify({"success": True, "run": record})
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """헬스 체크 엔드포인트"""
@@ -516,7 +2037,46 @@ def health_check():
             "anthropic": "configured" if ANTHROPIC_API_KEY else "not configured",
             "bigquery": "configured (using ADC)" if bigquery_client else "not configured"
         },
-        "supported_modes": ["quick", "structured", "creative_html"]
+        "supported_modes": ["quick", "structured", "creative_html"],
+        "jobs": job_manager.stats(),
+        "model_routing": model_router.stats(),
+        "prompt_tokens": metrics.snapshot("prompt.")["counters"],
+        "admission": admission.stats(),
+        "circuit_breakers": {name: breaker.stats() for name, breaker in circuit_breakers.items()},
+        "stale_cache": stale_cache.stats(),
+        "query_plans": metrics.snapshot("query_plan."),
+        "intent_templates": {**intent_router.stats(), **metrics.snapshot("intent.")},
+        "export": {"formats": available_formats(), **metrics.snapshot("export.")},
+        "preview": {"enabled": PREVIEW_ENABLED, "rows": PREVIEW_ROWS, **preview_stats()},
+        "summary_tables": {
+            **summary_router.stats(),
+            "history": query_history.stats(),
+            "savings": {
+                key: value for key, value in query_history.savings_report().items() if key != "shapes"
+            }
+        },
+        "incremental_shards": incremental_aggregator.stats(),
+        "sql_cache": sql_cache.stats(),
+        "warmup": {**warmup_scheduler.stats(), "popularity": popular_questions.stats()},
+        "result_memory": memory_stats(RESULT_MEMORY_BUDGET_BYTES, RESULT_SPILL_DIR, result_memory_budget),
+        "bigquery_jobs": {
+            **lifecycle_stats(),
+            "job_timeout_seconds": BIGQUERY_JOB_TIMEOUT_SECONDS,
+            "request_deadline_seconds": REQUEST_DEADLINE_SECONDS,
+            "max_bytes_billed": BIGQUERY_MAX_BYTES_BILLED or None
+        },
+        "followup": {
+            "enabled": FOLLOWUP_LOCAL_ENABLED,
+            "sessions": session_results.stats(),
+            **metrics.snapshot("followup.")
+        },
+        "report_cache": {**report_cache.stats(), "counters": metrics.snapshot("report_cache.")["counters"]},
+        "html_generation": metrics.snapshot("html."),
+        "sql_repair": {
+            "enabled": SQL_REPAIR_ENABLED,
+            "cache": sql_repair_cache.stats(),
+            "counters": metrics.snapshot("sql_repair.")["counters"]
+        }
     })
 
 @app.route('/schema', methods=['GET'])
@@ -531,6 +2091,34 @@ def get_schema():
         "schema": TABLE_SCHEMA
     })
 
+def _client_id():
+    """속도 제한용 클라이언트 식별자 (프록시 뒤에서는 X-Forwarded-For의 첫 주소)"""
+    forwarded = request.headers.get('X-Forwarded-For', '')
+    return forwarded.split(',')[0].strip() or request.remote_addr or "unknown"
+
+@app.before_request
+def admit_client():
+    """Claude/BigQuery를 호출하는 요청에 클라이언트별 속도 제한 적용"""
+    if request.method == 'POST' and request.endpoint in RATE_LIMITED_ENDPOINTS:
+        admission.check_client(_client_id())
+
+def _admission_payload(error, mode=None):
+    payload = {
+        "success": False,
+        "error": str(error),
+        "retry_after": error.retry_after
+    }
+    if mode:
+        payload["mode"] = mode
+    return payload
+
+@app.errorhandler(AdmissionRejected)
+def admission_rejected(error):
+    """승인 제어 거절 → 429(클라이언트 속도 초과) / 503(백엔드 포화) + Retry-After"""
+    response = jsonify(_admission_payload(error))
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, error.status_code
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({
@@ -557,6 +2145,7 @@ if __name__ == '__main__':
     print(f"프로젝트 ID: {PROJECT_ID}")
     print(f"테이블: {get_full_table_name()}")
     print("지원 모드: 빠른 조회(/quick), 구조화된 분석(/analyze), 창의적 HTML(/creative-html)")
+    print("비동기 작업: POST /jobs, GET /jobs/<job_id>")
     
     # Cloud Run에서는 PORT 환경변수 사용
     port = int(os.getenv('PORT', 8080))
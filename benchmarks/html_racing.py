@@ -0,0 +1,86 @@
+# benchmarks/html_racing.py
+"""
+/creative-html 생성 방식 비교 벤치마크 (순차 재시도 vs 후보 동시 생성)
+
+실제 Claude 호출 대신 지연 시간(로그 정규 분포, 가끔 긴 꼬리)과 품질 통과 확률을
+흉내 낸 생성기를 써서, 같은 조건에서 전체 소요 시간의 p50/p95와 요청당 생성 호출 수를
+비교한다. 저장소 루트에서 실행:
+
+    python -m benchmarks.html_racing [요청 수] [후보 수]
+"""
+
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import percentile
+from utils.racing import race_candidates, CandidateCancelled
+
+# 시뮬레이션 파라미터 (초 단위를 SCALE만큼 축소해 실행)
+SCALE = 0.01
+MEDIAN_SECONDS = 20.0
+SIGMA = 0.35
+TAIL_PROBABILITY = 0.1
+TAIL_MULTIPLIER = 3.0
+PASS_PROBABILITY = 0.7
+
+def simulated_generation(rng, cancel_event=None):
+    """생성 한 번 흉내 → 품질 통과 여부 (cancel_event가 설정되면 중단)"""
+    seconds = MEDIAN_SECONDS * rng.lognormvariate(0, SIGMA)
+    if rng.random() < TAIL_PROBABILITY:
+        seconds *= TAIL_MULTIPLIER
+    passed = rng.random() < PASS_PROBABILITY
+
+    deadline = time.monotonic() + seconds * SCALE
+    while time.monotonic() < deadline:
+        if cancel_event is not None and cancel_event.is_set():
+            raise CandidateCancelled()
+        time.sleep(0.002)
+    return passed
+
+def run_sequential(rng, max_attempts=2):
+    """생성 → 검증 → 미달 시 재시도 → 생성 호출 수"""
+    for attempt in range(max_attempts):
+        if simulated_generation(rng):
+            break
+    return attempt + 1
+
+def run_race(rng, executor, fan_out):
+    """후보 fan_out개 동시 생성, 첫 통과 후보 채택 → 생성 호출 수"""
+    seeds = [rng.random() for _ in range(fan_out)]
+    tasks = [
+        (lambda cancel_event, seed=seed: simulated_generation(random.Random(seed), cancel_event))
+        for seed in seeds
+    ]
+    race_candidates(tasks, accept=bool, executor=executor)
+    return fan_out
+
+def measure(label, func, request_count):
+    """요청별 소요 시간의 p50/p95와 평균 생성 호출 수 출력"""
+    elapsed = []
+    calls = 0
+    for _ in range(request_count):
+        start = time.perf_counter()
+        calls += func()
+        elapsed.append((time.perf_counter() - start) / SCALE)
+    elapsed.sort()
+    p50 = percentile(elapsed, 50)
+    p95 = percentile(elapsed, 95)
+    print(f"{label:<24} p50 {p50:6.1f}초  p95 {p95:6.1f}초  요청당 생성 {calls / request_count:.2f}회")
+    return p95
+
+def main():
+    request_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    fan_out = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    print(f"요청 수: {request_count:,}, 후보 수: {fan_out} (시간은 실제 호출 기준으로 환산)")
+    rng = random.Random(42)
+    sequential = measure("순차 (최대 2회)", lambda: run_sequential(rng), request_count)
+    rng = random.Random(42)
+    with ThreadPoolExecutor(max_workers=fan_out) as executor:
+        race = measure(f"동시 생성 ({fan_out}개)", lambda: run_race(rng, executor, fan_out), request_count)
+    print(f"p95 개선: {sequential / race:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/json_encoding.py
+"""
+10만 행 결과에 대한 JSON 인코딩 경로 비교 벤치마크
+
+기존 경로(재귀 safe_json_serialize + 표준 json 인코더)와 공통 인코더(json_utils)를
+같은 데이터로 측정한다. 저장소 루트에서 실행:
+
+    python -m benchmarks.json_encoding [행 수]
+"""
+
+import json
+import random
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from utils.json_utils import dumps_bytes, orjson
+from utils.result_set import ResultSet
+
+EVENT_NAMES = ["page_view", "session_start", "user_engagement", "scroll", "purchase", "add_to_cart"]
+COUNTRIES = ["United States", "India", "Canada", "United Kingdom", "South Korea", "Japan"]
+
+def make_rows(row_count, seed=42):
+    """GA4 조회 결과와 비슷한 형태의 행 생성"""
+    rng = random.Random(seed)
+    return [
+        {
+            "event_date": date(2020, 11, 21),
+            "event_timestamp": datetime(2020, 11, 21, rng.randrange(24), rng.randrange(60)),
+            "event_name": rng.choice(EVENT_NAMES),
+            "country": rng.choice(COUNTRIES),
+            "user_pseudo_id": f"{rng.randrange(10**9)}.{rng.randrange(10**9)}",
+            "event_count": rng.randrange(1, 5000),
+            "revenue": Decimal(f"{rng.uniform(0, 500):.2f}"),
+            "engagement_rate": rng.random() if rng.random() > 0.05 else None
+        }
+        for _ in range(row_count)
+    ]
+
+def legacy_safe_json_serialize(obj):
+    """변경 전 data_utils.safe_json_serialize (재귀 재구성)"""
+    if isinstance(obj, dict):
+        return {str(k): legacy_safe_json_serialize(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [legacy_safe_json_serialize(item) for item in obj]
+    elif isinstance(obj, (datetime, )):
+        return obj.isoformat()
+    elif hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    elif isinstance(obj, (int, float, str, bool)) or obj is None:
+        return obj
+    else:
+        return str(obj)
+
+def legacy_encode(rows):
+    """기존 경로: 재귀 정리 후 jsonify(표준 인코더, 키 정렬)"""
+    return json.dumps(legacy_safe_json_serialize(rows), sort_keys=True).encode('utf-8')
+
+def measure(label, func, repeat=3):
+    """최소 실행 시간과 출력 크기 출력"""
+    best = None
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        size = len(output)
+    print(f"{label:<40} {best * 1000:9.1f} ms  {size / 1024 / 1024:7.2f} MB")
+    return best
+
+def main():
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = make_rows(row_count)
+    result_set = ResultSet.from_rows(rows)
+
+    print(f"행 수: {row_count:,}, 인코더: {'orjson' if orjson is not None else 'json (표준 라이브러리)'}")
+    legacy = measure("기존 (safe_json_serialize + jsonify)", lambda: legacy_encode(rows))
+    fast = measure("json_utils.dumps_bytes (list[dict])", lambda: dumps_bytes(rows))
+    measure("json_utils.dumps_bytes (ResultSet)", lambda: dumps_bytes(result_set))
+    print(f"속도 향상 (list[dict]): {legacy / fast:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -3,11 +3,149 @@
 설정 패키지 초기화
 """
 
-from .schema_config import PROJECT_ID, TABLE_SCHEMA, get_schema_prompt, get_full_table_name
+from .schema_config import PROJECT_ID, TABLE_SCHEMA, get_schema_prompt, get_full_table_name, get_wildcard_table_name
 from .prompts import (
     get_sql_generation_system_prompt,
     get_analysis_report_prompt,
-    get_html_generation_prompt
+    get_html_generation_prompt,
+    get_sql_repair_prompt,
+    PROMPT_VERSION,
+    get_followup_sql_prompt
+)
+from .performance_config import (
+    STATS_PUSHDOWN_ENABLED,
+    STATS_PUSHDOWN_SAMPLE_ROWS,
+    STATS_PUSHDOWN_TOP_K,
+    STREAMING_STATS_SAMPLE_ROWS,
+    STREAMING_STATS_MAX_COUNTERS,
+    STREAMING_STATS_MAX_DISTINCT,
+    SKETCH_STATS_MIN_ROWS,
+    SKETCH_HLL_PRECISION,
+    SKETCH_TDIGEST_COMPRESSION,
+    SKETCH_TOP_K_COUNTERS,
+    COMPRESSION_ENABLED,
+    COMPRESSION_MIN_BYTES,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_BROTLI_QUALITY,
+    STATIC_DIST_DIR,
+    JOB_WORKERS,
+    JOB_MAX_QUEUE_DEPTH,
+    JOB_TTL_SECONDS,
+    JOB_RETRY_AFTER_SECONDS,
+    JOB_STORE_PATH,
+    MODEL_ROUTING_ENABLED,
+    MODEL_FAST,
+    MODEL_STANDARD,
+    MODEL_TIERS,
+    MODEL_FAST_MAX_COMPLEXITY,
+    MODEL_STAGE_MIN_TIER,
+    REPORT_MIN_QUALITY_SCORE,
+    SQL_REPAIR_ENABLED,
+    SQL_REPAIR_MAX_ATTEMPTS,
+    SQL_REPAIR_TIME_BUDGET_SECONDS,
+    SQL_REPAIR_CACHE_SIZE,
+    CHART_MAX_POINTS,
+    CHART_TOP_N,
+    PROMPT_SAMPLE_ROWS,
+    PROMPT_SAMPLE_TOKEN_BUDGET,
+    PROMPT_HTML_SAMPLE_ROWS,
+    PROMPT_HTML_SAMPLE_TOKEN_BUDGET,
+    PROMPT_CHART_POINTS,
+    ADMISSION_ENABLED,
+    ANTHROPIC_MAX_CONCURRENT,
+    BIGQUERY_MAX_CONCURRENT,
+    ADMISSION_MAX_WAITING,
+    ADMISSION_MAX_WAIT_SECONDS,
+    CLIENT_REQUESTS_PER_MINUTE,
+    CLIENT_BURST,
+    BACKEND_DEFAULT_BACKOFF_SECONDS,
+    BREAKER_WINDOW,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_FAILURE_RATE,
+    BREAKER_OPEN_SECONDS,
+    TIMEOUT_LATENCY_MULTIPLIER,
+    ANTHROPIC_TIMEOUT_MIN_SECONDS,
+    ANTHROPIC_TIMEOUT_MAX_SECONDS,
+    BIGQUERY_TIMEOUT_MIN_SECONDS,
+    BIGQUERY_TIMEOUT_MAX_SECONDS,
+    STALE_CACHE_MAX_ENTRIES,
+    STALE_CACHE_MAX_AGE_SECONDS,
+    STALE_CACHE_MAX_MB,
+    STALE_CACHE_MAX_ROWS,
+    HTML_MAX_TOKENS,
+    HTML_MIN_QUALITY_SCORE,
+    HTML_RACE_ENABLED,
+    HTML_RACE_FAN_OUT,
+    HTML_RACE_MAX_FAN_OUT,
+    HTML_RACE_MAX_OUTPUT_TOKENS,
+    HTML_RACE_MAX_EXTRA_INFLIGHT,
+    HTML_RACE_VARIANTS,
+    REPORT_CACHE_ENABLED,
+    REPORT_CACHE_PATH,
+    REPORT_CACHE_MAX_MB,
+    REPORT_CACHE_MAX_ENTRIES,
+    REPORT_CACHE_MAX_AGE_SECONDS,
+    FOLLOWUP_LOCAL_ENABLED,
+    SESSION_RESULT_MAX_SESSIONS,
+    SESSION_RESULT_MAX_ROWS,
+    SESSION_RESULT_TTL_SECONDS,
+    QUERY_DECOMPOSITION_ENABLED,
+    QUERY_DECOMPOSITION_MAX_SUBQUERIES,
+    BIGQUERY_JOB_TIMEOUT_SECONDS,
+    REQUEST_DEADLINE_SECONDS,
+    BIGQUERY_MAX_BYTES_BILLED,
+    BIGQUERY_POLL_INTERVAL_SECONDS,
+    JOB_ABANDON_SECONDS,
+    EXPORT_PAGE_SIZE,
+    EXPORT_PARQUET_COMPRESSION,
+    INTENT_TEMPLATES_ENABLED,
+    INTENT_MODEL_PATH,
+    INTENT_MIN_CONFIDENCE,
+    RESULT_MEMORY_BUDGET_MB,
+    RESULT_SPILL_DIR,
+    RESULT_SPILL_RESPONSE_ROWS,
+    PREVIEW_ENABLED,
+    PREVIEW_ROWS,
+    PREVIEW_DELAY_SECONDS,
+    PREVIEW_SAMPLE_PERCENT,
+    PREVIEW_MAX_BYTES_BILLED,
+    QUERY_HISTORY_ENABLED,
+    QUERY_HISTORY_PATH,
+    SUMMARY_ROUTING_ENABLED,
+    SUMMARY_TABLE_DATASET,
+    SUMMARY_MIN_QUERIES,
+    SUMMARY_APPROXIMATE_DISTINCT,
+    SUMMARY_STALENESS_CHECK_SECONDS,
+    INCREMENTAL_SHARDS_ENABLED,
+    INCREMENTAL_STORE_PATH,
+    INCREMENTAL_METADATA_TTL_SECONDS,
+    INCREMENTAL_APPROXIMATE_DISTINCT,
+    SQL_CACHE_ENABLED,
+    SQL_CACHE_MAX_ENTRIES,
+    SQL_CACHE_MAX_AGE_SECONDS,
+    WARMUP_ENABLED,
+    WARMUP_POPULARITY_LOOKBACK_DAYS,
+    WARMUP_POPULARITY_CACHE_SECONDS,
+    WARMUP_TOP_K,
+    WARMUP_MODES,
+    WARMUP_SAMPLE_MODE,
+    WARMUP_SCHEDULE_HOURS,
+    WARMUP_CHECK_SECONDS,
+    WARMUP_CONCURRENCY,
+    WARMUP_MAX_QUESTIONS,
+    WARMUP_MAX_BYTES,
+    SESSION_RESULT_MAX_MB,
+    FOLLOWUP_LOCAL_TIMEOUT_SECONDS,
+    EXPORT_TOKEN_SECRET,
+    EXPORT_TOKEN_TTL_SECONDS,
+    JOB_QUICK_WORKERS,
+    JOB_RESULT_MAX_ROWS,
+    WARMUP_ON_START,
+    WARMUP_STARTUP_MAX_QUESTIONS,
+    WARMUP_TRIGGER_TOKEN,
+    RESULT_PROCESS_MEMORY_BUDGET_MB,
+    RESULT_SPILL_ORPHAN_SECONDS,
+    BIGQUERY_JOBS_REGION
 )
 
 __all__ = [
@@ -15,7 +153,144 @@ __all__ = [
     'TABLE_SCHEMA',
     'get_schema_prompt',
     'get_full_table_name',
+    'get_wildcard_table_name',
     'get_sql_generation_system_prompt',
     'get_analysis_report_prompt',
-    'get_html_generation_prompt'
+    'get_html_generation_prompt',
+    'STATS_PUSHDOWN_ENABLED',
+    'STATS_PUSHDOWN_SAMPLE_ROWS',
+    'STATS_PUSHDOWN_TOP_K',
+    'STREAMING_STATS_SAMPLE_ROWS',
+    'STREAMING_STATS_MAX_COUNTERS',
+    'STREAMING_STATS_MAX_DISTINCT',
+    'SKETCH_STATS_MIN_ROWS',
+    'SKETCH_HLL_PRECISION',
+    'SKETCH_TDIGEST_COMPRESSION',
+    'SKETCH_TOP_K_COUNTERS',
+    'COMPRESSION_ENABLED',
+    'COMPRESSION_MIN_BYTES',
+    'COMPRESSION_GZIP_LEVEL',
+    'COMPRESSION_BROTLI_QUALITY',
+    'STATIC_DIST_DIR',
+    'JOB_WORKERS',
+    'JOB_MAX_QUEUE_DEPTH',
+    'JOB_TTL_SECONDS',
+    'JOB_RETRY_AFTER_SECONDS',
+    'JOB_STORE_PATH',
+    'MODEL_ROUTING_ENABLED',
+    'MODEL_FAST',
+    'MODEL_STANDARD',
+    'MODEL_TIERS',
+    'MODEL_FAST_MAX_COMPLEXITY',
+    'MODEL_STAGE_MIN_TIER',
+    'REPORT_MIN_QUALITY_SCORE',
+    'get_sql_repair_prompt',
+    'SQL_REPAIR_ENABLED',
+    'SQL_REPAIR_MAX_ATTEMPTS',
+    'SQL_REPAIR_TIME_BUDGET_SECONDS',
+    'SQL_REPAIR_CACHE_SIZE',
+    'CHART_MAX_POINTS',
+    'CHART_TOP_N',
+    'PROMPT_SAMPLE_ROWS',
+    'PROMPT_SAMPLE_TOKEN_BUDGET',
+    'PROMPT_HTML_SAMPLE_ROWS',
+    'PROMPT_HTML_SAMPLE_TOKEN_BUDGET',
+    'PROMPT_CHART_POINTS',
+    'ADMISSION_ENABLED',
+    'ANTHROPIC_MAX_CONCURRENT',
+    'BIGQUERY_MAX_CONCURRENT',
+    'ADMISSION_MAX_WAITING',
+    'ADMISSION_MAX_WAIT_SECONDS',
+    'CLIENT_REQUESTS_PER_MINUTE',
+    'CLIENT_BURST',
+    'BACKEND_DEFAULT_BACKOFF_SECONDS',
+    'BREAKER_WINDOW',
+    'BREAKER_FAILURE_THRESHOLD',
+    'BREAKER_FAILURE_RATE',
+    'BREAKER_OPEN_SECONDS',
+    'TIMEOUT_LATENCY_MULTIPLIER',
+    'ANTHROPIC_TIMEOUT_MIN_SECONDS',
+    'ANTHROPIC_TIMEOUT_MAX_SECONDS',
+    'BIGQUERY_TIMEOUT_MIN_SECONDS',
+    'BIGQUERY_TIMEOUT_MAX_SECONDS',
+    'STALE_CACHE_MAX_ENTRIES',
+    'STALE_CACHE_MAX_AGE_SECONDS',
+    'STALE_CACHE_MAX_MB',
+    'STALE_CACHE_MAX_ROWS',
+    'HTML_MAX_TOKENS',
+    'HTML_MIN_QUALITY_SCORE',
+    'HTML_RACE_ENABLED',
+    'HTML_RACE_FAN_OUT',
+    'HTML_RACE_MAX_FAN_OUT',
+    'HTML_RACE_MAX_OUTPUT_TOKENS',
+    'HTML_RACE_MAX_EXTRA_INFLIGHT',
+    'HTML_RACE_VARIANTS',
+    'PROMPT_VERSION',
+    'REPORT_CACHE_ENABLED',
+    'REPORT_CACHE_PATH',
+    'REPORT_CACHE_MAX_MB',
+    'REPORT_CACHE_MAX_ENTRIES',
+    'REPORT_CACHE_MAX_AGE_SECONDS',
+    'get_followup_sql_prompt',
+    'FOLLOWUP_LOCAL_ENABLED',
+    'SESSION_RESULT_MAX_SESSIONS',
+    'SESSION_RESULT_MAX_ROWS',
+    'SESSION_RESULT_TTL_SECONDS',
+    'QUERY_DECOMPOSITION_ENABLED',
+    'QUERY_DECOMPOSITION_MAX_SUBQUERIES',
+    'BIGQUERY_JOB_TIMEOUT_SECONDS',
+    'REQUEST_DEADLINE_SECONDS',
+    'BIGQUERY_MAX_BYTES_BILLED',
+    'BIGQUERY_POLL_INTERVAL_SECONDS',
+    'JOB_ABANDON_SECONDS',
+    'EXPORT_PAGE_SIZE',
+    'EXPORT_PARQUET_COMPRESSION',
+    'INTENT_TEMPLATES_ENABLED',
+    'INTENT_MODEL_PATH',
+    'INTENT_MIN_CONFIDENCE',
+    'RESULT_MEMORY_BUDGET_MB',
+    'RESULT_SPILL_DIR',
+    'RESULT_SPILL_RESPONSE_ROWS',
+    'PREVIEW_ENABLED',
+    'PREVIEW_ROWS',
+    'PREVIEW_DELAY_SECONDS',
+    'PREVIEW_SAMPLE_PERCENT',
+    'PREVIEW_MAX_BYTES_BILLED',
+    'QUERY_HISTORY_ENABLED',
+    'QUERY_HISTORY_PATH',
+    'SUMMARY_ROUTING_ENABLED',
+    'SUMMARY_TABLE_DATASET',
+    'SUMMARY_MIN_QUERIES',
+    'SUMMARY_APPROXIMATE_DISTINCT',
+    'SUMMARY_STALENESS_CHECK_SECONDS',
+    'INCREMENTAL_SHARDS_ENABLED',
+    'INCREMENTAL_STORE_PATH',
+    'INCREMENTAL_METADATA_TTL_SECONDS',
+    'INCREMENTAL_APPROXIMATE_DISTINCT',
+    'SQL_CACHE_ENABLED',
+    'SQL_CACHE_MAX_ENTRIES',
+    'SQL_CACHE_MAX_AGE_SECONDS',
+    'WARMUP_ENABLED',
+    'WARMUP_POPULARITY_LOOKBACK_DAYS',
+    'WARMUP_POPULARITY_CACHE_SECONDS',
+    'WARMUP_TOP_K',
+    'WARMUP_MODES',
+    'WARMUP_SAMPLE_MODE',
+    'WARMUP_SCHEDULE_HOURS',
+    'WARMUP_CHECK_SECONDS',
+    'WARMUP_CONCURRENCY',
+    'WARMUP_MAX_QUESTIONS',
+    'WARMUP_MAX_BYTES',
+    'SESSION_RESULT_MAX_MB',
+    'FOLLOWUP_LOCAL_TIMEOUT_SECONDS',
+    'EXPORT_TOKEN_SECRET',
+    'EXPORT_TOKEN_TTL_SECONDS',
+    'JOB_QUICK_WORKERS',
+    'JOB_RESULT_MAX_ROWS',
+    'WARMUP_ON_START',
+    'WARMUP_STARTUP_MAX_QUESTIONS',
+    'WARMUP_TRIGGER_TOKEN',
+    'RESULT_PROCESS_MEMORY_BUDGET_MB',
+    'RESULT_SPILL_ORPHAN_SECONDS',
+    'BIGQUERY_JOBS_REGION'
 ]
\ No newline at end of file
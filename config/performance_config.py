@@ -0,0 +1,274 @@
+# config/performance_config.py
+"""
+성능 관련 설정 (환경 변수로 조정 가능)
+"""
+
+import os
+import tempfile
+
+def _env_bool(name, default):
+    """환경 변수를 불리언으로 읽기"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def _env_int(name, default):
+    """환경 변수를 정수로 읽기"""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+# BigQuery 요약 통계 푸시다운
+# 활성화 시 통계는 BigQuery에서 계산하고 리포트용 샘플 행만 다운로드
+STATS_PUSHDOWN_ENABLED = _env_bool('STATS_PUSHDOWN_ENABLED', False)
+STATS_PUSHDOWN_SAMPLE_ROWS = _env_int('STATS_PUSHDOWN_SAMPLE_ROWS', 100)
+STATS_PUSHDOWN_TOP_K = _env_int('STATS_PUSHDOWN_TOP_K', 5)
+
+# 스트리밍 통계 누적기 (행 조회 중 페이지 단위 갱신)
+STREAMING_STATS_SAMPLE_ROWS = _env_int('STREAMING_STATS_SAMPLE_ROWS', 100)
+STREAMING_STATS_MAX_COUNTERS = _env_int('STREAMING_STATS_MAX_COUNTERS', 1000)
+STREAMING_STATS_MAX_DISTINCT = _env_int('STREAMING_STATS_MAX_DISTINCT', 10000)
+
+# 스케치 기반 근사 통계 (대용량 결과의 고유값 수/중앙값/상위값)
+# 행 수가 SKETCH_STATS_MIN_ROWS 미만이면 정확 통계 사용
+SKETCH_STATS_MIN_ROWS = _env_int('SKETCH_STATS_MIN_ROWS', 50000)
+SKETCH_HLL_PRECISION = _env_int('SKETCH_HLL_PRECISION', 12)
+SKETCH_TDIGEST_COMPRESSION = _env_int('SKETCH_TDIGEST_COMPRESSION', 100)
+SKETCH_TOP_K_COUNTERS = _env_int('SKETCH_TOP_K_COUNTERS', 100)
+
+# 응답 압축 (Accept-Encoding 협상)
+COMPRESSION_ENABLED = _env_bool('COMPRESSION_ENABLED', True)
+COMPRESSION_MIN_BYTES = _env_int('COMPRESSION_MIN_BYTES', 1024)
+COMPRESSION_GZIP_LEVEL = _env_int('COMPRESSION_GZIP_LEVEL', 6)
+COMPRESSION_BROTLI_QUALITY = _env_int('COMPRESSION_BROTLI_QUALITY', 4)
+
+# 빌드된 정적 파일 (scripts/build_static_assets.py 출력 위치)
+STATIC_DIST_DIR = os.getenv('STATIC_DIST_DIR', os.path.join('static', 'dist'))
+
+# 비동기 작업 API (/jobs) - 작업은 받은 인스턴스에서만 실행/조회 (배포 시 세션 어피니티 + CPU 상시 할당 필요)
+JOB_WORKERS = _env_int('JOB_WORKERS', 2)
+JOB_MAX_QUEUE_DEPTH = _env_int('JOB_MAX_QUEUE_DEPTH', 20)
+# 빠른 조회 작업 전용 워커 수 (대기 한도도 공용 풀과 따로 적용)
+JOB_QUICK_WORKERS = _env_int('JOB_QUICK_WORKERS', 4)
+# 작업 저장소에 보관하는 결과 행 수 (상태 조회마다 다시 인코딩되므로 앞부분만, 전체는 /export)
+JOB_RESULT_MAX_ROWS = _env_int('JOB_RESULT_MAX_ROWS', 1000)
+JOB_TTL_SECONDS = _env_int('JOB_TTL_SECONDS', 3600)
+JOB_RETRY_AFTER_SECONDS = _env_int('JOB_RETRY_AFTER_SECONDS', 10)
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', os.path.join('/tmp', 'nlq_jobs.sqlite3'))
+
+# 모델 등급 라우팅 (빠른 모델 우선, 실패/저품질 시 큰 모델로 escalation)
+MODEL_ROUTING_ENABLED = _env_bool('MODEL_ROUTING_ENABLED', True)
+MODEL_FAST = os.getenv('MODEL_FAST', 'claude-3-5-haiku-20241022')
+MODEL_STANDARD = os.getenv('MODEL_STANDARD', 'claude-3-5-sonnet-20241022')
+MODEL_TIERS = [("fast", MODEL_FAST), ("standard", MODEL_STANDARD)]
+# 복잡도 점수가 이 값 이하인 질문은 빠른 모델로 시작
+MODEL_FAST_MAX_COMPLEXITY = _env_int('MODEL_FAST_MAX_COMPLEXITY', 2)
+# 단계별 최소 등급 (HTML 생성은 품질 요구가 높아 큰 모델부터)
+MODEL_STAGE_MIN_TIER = {
+    "sql": os.getenv('MODEL_SQL_MIN_TIER', 'fast'),
+    "report": os.getenv('MODEL_REPORT_MIN_TIER', 'fast'),
+    "html": os.getenv('MODEL_HTML_MIN_TIER', 'standard')
+}
+# 리포트 검증 점수가 이 값 미만이면 escalation
+REPORT_MIN_QUALITY_SCORE = _env_int('REPORT_MIN_QUALITY_SCORE', 60)
+
+# BigQuery 오류 기반 SQL 자동 수정 (시도 횟수/시간 예산, 수정 패턴 캐시 크기)
+SQL_REPAIR_ENABLED = _env_bool('SQL_REPAIR_ENABLED', True)
+SQL_REPAIR_MAX_ATTEMPTS = _env_int('SQL_REPAIR_MAX_ATTEMPTS', 2)
+SQL_REPAIR_TIME_BUDGET_SECONDS = _env_int('SQL_REPAIR_TIME_BUDGET_SECONDS', 30)
+SQL_REPAIR_CACHE_SIZE = _env_int('SQL_REPAIR_CACHE_SIZE', 256)
+
+# 서버 측 차트 데이터 준비 (시계열 LTTB 목표 점 개수, 범주형 상위 N개)
+CHART_MAX_POINTS = _env_int('CHART_MAX_POINTS', 1000)
+CHART_TOP_N = _env_int('CHART_TOP_N', 20)
+
+# 프롬프트 샘플 행 (대표 샘플 최대 행 수와 토큰 예산, HTML 프롬프트 차트 점 개수)
+PROMPT_SAMPLE_ROWS = _env_int('PROMPT_SAMPLE_ROWS', 30)
+PROMPT_SAMPLE_TOKEN_BUDGET = _env_int('PROMPT_SAMPLE_TOKEN_BUDGET', 1500)
+PROMPT_HTML_SAMPLE_ROWS = _env_int('PROMPT_HTML_SAMPLE_ROWS', 10)
+PROMPT_HTML_SAMPLE_TOKEN_BUDGET = _env_int('PROMPT_HTML_SAMPLE_TOKEN_BUDGET', 600)
+PROMPT_CHART_POINTS = _env_int('PROMPT_CHART_POINTS', 30)
+
+# 승인 제어 (백엔드별 동시 실행/대기열, 클라이언트별 요청 속도 제한)
+ADMISSION_ENABLED = _env_bool('ADMISSION_ENABLED', True)
+ANTHROPIC_MAX_CONCURRENT = _env_int('ANTHROPIC_MAX_CONCURRENT', 4)
+BIGQUERY_MAX_CONCURRENT = _env_int('BIGQUERY_MAX_CONCURRENT', 4)
+ADMISSION_MAX_WAITING = _env_int('ADMISSION_MAX_WAITING', 16)
+ADMISSION_MAX_WAIT_SECONDS = _env_int('ADMISSION_MAX_WAIT_SECONDS', 15)
+CLIENT_REQUESTS_PER_MINUTE = _env_int('CLIENT_REQUESTS_PER_MINUTE', 30)
+CLIENT_BURST = _env_int('CLIENT_BURST', 10)
+# Retry-After 헤더가 없는 429/할당량 오류의 기본 백오프
+BACKEND_DEFAULT_BACKOFF_SECONDS = _env_int('BACKEND_DEFAULT_BACKOFF_SECONDS', 5)
+
+# 서킷 브레이커와 적응형 타임아웃 (작업/요청 모드별 최근 성공 지연 시간 p99 × 배수, 범위 제한,
+# BigQuery는 모드별 작업 최대 실행 시간보다 짧게 자르지 않음)
+BREAKER_WINDOW = _env_int('BREAKER_WINDOW', 20)
+BREAKER_FAILURE_THRESHOLD = _env_int('BREAKER_FAILURE_THRESHOLD', 5)
+BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', '0.5'))
+BREAKER_OPEN_SECONDS = _env_int('BREAKER_OPEN_SECONDS', 30)
+TIMEOUT_LATENCY_MULTIPLIER = float(os.getenv('TIMEOUT_LATENCY_MULTIPLIER', '2.0'))
+ANTHROPIC_TIMEOUT_MIN_SECONDS = _env_int('ANTHROPIC_TIMEOUT_MIN_SECONDS', 15)
+ANTHROPIC_TIMEOUT_MAX_SECONDS = _env_int('ANTHROPIC_TIMEOUT_MAX_SECONDS', 120)
+BIGQUERY_TIMEOUT_MIN_SECONDS = _env_int('BIGQUERY_TIMEOUT_MIN_SECONDS', 10)
+BIGQUERY_TIMEOUT_MAX_SECONDS = _env_int('BIGQUERY_TIMEOUT_MAX_SECONDS', 300)
+# 장애 시 대체 응답으로 쓸 최근 성공 응답
+STALE_CACHE_MAX_ENTRIES = _env_int('STALE_CACHE_MAX_ENTRIES', 200)
+STALE_CACHE_MAX_AGE_SECONDS = _env_int('STALE_CACHE_MAX_AGE_SECONDS', 86400)
+# 보관하는 응답 크기 합계 상한과 응답당 결과 행 수 (넘는 행은 잘라서 보관)
+STALE_CACHE_MAX_MB = _env_int('STALE_CACHE_MAX_MB', 32)
+STALE_CACHE_MAX_ROWS = _env_int('STALE_CACHE_MAX_ROWS', 1000)
+
+# /creative-html 후보 동시 생성(race) 모드
+HTML_MAX_TOKENS = _env_int('HTML_MAX_TOKENS', 4000)
+HTML_MIN_QUALITY_SCORE = _env_int('HTML_MIN_QUALITY_SCORE', 70)
+HTML_RACE_ENABLED = _env_bool('HTML_RACE_ENABLED', False)
+HTML_RACE_FAN_OUT = _env_int('HTML_RACE_FAN_OUT', 2)
+# 비용 상한: 요청당 최대 후보 수, 요청당 최대 출력 토큰 합, 프로세스 전체 추가 후보 동시 실행 수
+HTML_RACE_MAX_FAN_OUT = _env_int('HTML_RACE_MAX_FAN_OUT', 3)
+HTML_RACE_MAX_OUTPUT_TOKENS = _env_int('HTML_RACE_MAX_OUTPUT_TOKENS', 12000)
+HTML_RACE_MAX_EXTRA_INFLIGHT = _env_int('HTML_RACE_MAX_EXTRA_INFLIGHT', 4)
+# 후보 변형 ("등급:temperature", base = 선택된 등급, next = 한 단계 위 등급)
+HTML_RACE_VARIANTS = [
+    item.strip() for item in os.getenv('HTML_RACE_VARIANTS', 'base:1.0,next:0.7,base:0.4').split(',') if item.strip()
+]
+
+# 생성된 리포트 캐시 (질문 + 결과 데이터 해시 + 프롬프트 버전 기준, 크기 제한 LRU, SQLite 파일)
+# Cloud Run의 임시 디렉터리는 메모리 기반이라 인스턴스 메모리를 쓰고 인스턴스가 바뀌면 사라지므로
+# 기본 한도는 작게 두고, 결과 내려 쓰기 볼륨(RESULT_SPILL_DIR)을 마운트하면 그 볼륨에 두고 한도를 늘림 (deploy.sh)
+REPORT_CACHE_ENABLED = _env_bool('REPORT_CACHE_ENABLED', True)
+REPORT_CACHE_PATH = os.getenv('REPORT_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'nlq_report_cache.sqlite3'))
+REPORT_CACHE_MAX_MB = _env_int('REPORT_CACHE_MAX_MB', 32)
+REPORT_CACHE_MAX_ENTRIES = _env_int('REPORT_CACHE_MAX_ENTRIES', 5000)
+REPORT_CACHE_MAX_AGE_SECONDS = _env_int('REPORT_CACHE_MAX_AGE_SECONDS', 30 * 86400)
+
+# 후속 질문 로컬 처리 (세션별 직전 결과를 프로세스 내 SQL 엔진으로 조회)
+FOLLOWUP_LOCAL_ENABLED = _env_bool('FOLLOWUP_LOCAL_ENABLED', True)
+SESSION_RESULT_MAX_SESSIONS = _env_int('SESSION_RESULT_MAX_SESSIONS', 200)
+SESSION_RESULT_MAX_ROWS = _env_int('SESSION_RESULT_MAX_ROWS', 200000)
+SESSION_RESULT_TTL_SECONDS = _env_int('SESSION_RESULT_TTL_SECONDS', 1800)
+# 보관 결과 전체의 추정 메모리 상한 (결과 + 로컬 엔진 사본)
+SESSION_RESULT_MAX_MB = _env_int('SESSION_RESULT_MAX_MB', 64)
+# 로컬 후속 쿼리 하나의 최대 실행 시간 (넘으면 BigQuery로 처리)
+FOLLOWUP_LOCAL_TIMEOUT_SECONDS = float(os.getenv('FOLLOWUP_LOCAL_TIMEOUT_SECONDS', '5'))
+
+# 복합 질문 하위 쿼리 분해 (독립 지표를 별도 BigQuery 작업으로 동시에 실행 후 로컬 병합)
+QUERY_DECOMPOSITION_ENABLED = _env_bool('QUERY_DECOMPOSITION_ENABLED', True)
+QUERY_DECOMPOSITION_MAX_SUBQUERIES = _env_int('QUERY_DECOMPOSITION_MAX_SUBQUERIES', 4)
+
+# BigQuery 작업 수명 관리
+# 모드별 작업 하나의 최대 실행 시간 (적응형 타임아웃과 작은 쪽 적용, 서버 측 job_timeout_ms로도 설정)
+BIGQUERY_JOB_TIMEOUT_SECONDS = {
+    "quick": _env_int('BIGQUERY_QUICK_JOB_TIMEOUT_SECONDS', 60),
+    "structured": _env_int('BIGQUERY_STRUCTURED_JOB_TIMEOUT_SECONDS', 120),
+    "creative_html": _env_int('BIGQUERY_CREATIVE_HTML_JOB_TIMEOUT_SECONDS', 120),
+    "export": _env_int('BIGQUERY_EXPORT_JOB_TIMEOUT_SECONDS', 300)
+}
+# 모드별 요청 전체 마감 시간 (지나면 실행 중인 작업을 취소하고 다음 단계로 진행하지 않음)
+REQUEST_DEADLINE_SECONDS = {
+    "quick": _env_int('QUICK_REQUEST_DEADLINE_SECONDS', 120),
+    "structured": _env_int('STRUCTURED_REQUEST_DEADLINE_SECONDS', 300),
+    "creative_html": _env_int('CREATIVE_HTML_REQUEST_DEADLINE_SECONDS', 420)
+}
+# 작업 하나가 청구할 수 있는 최대 바이트 (0이면 제한 없음)
+BIGQUERY_MAX_BYTES_BILLED = _env_int('BIGQUERY_MAX_BYTES_BILLED', 10 * 1024 ** 3)
+# 쿼리 작업이 실행되는 리전 (조회 테이블 데이터셋 위치, 작업 이력 INFORMATION_SCHEMA.JOBS 조회용)
+BIGQUERY_JOBS_REGION = os.getenv('BIGQUERY_JOBS_REGION', 'us')
+# 실행 중인 작업의 취소 조건 확인 주기
+BIGQUERY_POLL_INTERVAL_SECONDS = float(os.getenv('BIGQUERY_POLL_INTERVAL_SECONDS', '1.0'))
+# 비동기 작업 상태 조회가 이 시간 동안 없으면 클라이언트가 떠난 것으로 보고 취소 (0이면 사용 안 함)
+JOB_ABANDON_SECONDS = _env_int('JOB_ABANDON_SECONDS', 60)
+
+# 결과 파일 내보내기 (/export, CSV/Parquet 스트리밍)
+# 한 번에 메모리에 두는 행 수 (BigQuery 결과 페이지 크기)
+EXPORT_PAGE_SIZE = _env_int('EXPORT_PAGE_SIZE', 10000)
+EXPORT_PARQUET_COMPRESSION = os.getenv('EXPORT_PARQUET_COMPRESSION', 'zstd')
+# 조회 응답의 내보내기 토큰 서명 키와 유효 시간 (내보낼 SQL은 서명된 토큰으로만 받음)
+EXPORT_TOKEN_SECRET = os.getenv('EXPORT_TOKEN_SECRET', '')
+EXPORT_TOKEN_TTL_SECONDS = _env_int('EXPORT_TOKEN_TTL_SECONDS', 3600)
+
+# 자주 들어오는 질문 형태의 템플릿 SQL (의도 분류기 + 규칙, 확신이 높을 때만 Claude 생략)
+INTENT_TEMPLATES_ENABLED = _env_bool('INTENT_TEMPLATES_ENABLED', True)
+# scripts/train_intent_model.py로 학습한 분류기 가중치
+INTENT_MODEL_PATH = os.getenv('INTENT_MODEL_PATH', os.path.join('config', 'intent_model.json'))
+# 템플릿 형태일 확률 기준: 학습 스크립트의 보류 예시에서 오처리 0건을 유지하는 범위 중
+# 처리율이 떨어지기 직전 값 (조건/값 필터 질문은 0.6 이하, 짧은 "X별 Y 수" 질문은 0.8 이상)
+INTENT_MIN_CONFIDENCE = float(os.getenv('INTENT_MIN_CONFIDENCE', '0.75'))
+
+# 요청별 결과 메모리 한도 (넘으면 BigQuery 결과를 Arrow IPC 파일로 내려 쓰고 메모리 매핑으로 읽음)
+# 0이면 제한 없음 (항상 메모리)
+RESULT_MEMORY_BUDGET_MB = _env_int('RESULT_MEMORY_BUDGET_MB', 64)
+# 동시에 처리 중인 요청 전체의 결과 메모리 한도 (512Mi 인스턴스 기준, 인스턴스 메모리보다 충분히 작게)
+RESULT_PROCESS_MEMORY_BUDGET_MB = _env_int('RESULT_PROCESS_MEMORY_BUDGET_MB', 128)
+# 내려 쓸 디렉터리 (Cloud Run의 /tmp는 메모리 기반이므로 실제 디스크 볼륨을 마운트해 지정)
+RESULT_SPILL_DIR = os.getenv('RESULT_SPILL_DIR', os.path.join(tempfile.gettempdir(), 'nlq_spill'))
+# 시작 시 이보다 오래된 결과 파일만 정리 (여러 인스턴스가 같은 볼륨을 쓰는 경우 사용 중인 파일 보호)
+RESULT_SPILL_ORPHAN_SECONDS = _env_int('RESULT_SPILL_ORPHAN_SECONDS', 3600)
+# 내려 쓴 결과를 응답에 포함할 최대 행 수 (전체는 /export로 다운로드)
+RESULT_SPILL_RESPONSE_ROWS = _env_int('RESULT_SPILL_RESPONSE_ROWS', 1000)
+
+# 미리보기 우선 실행 (비동기 작업에서 전체 쿼리와 동시에 작은 미리보기 쿼리를 실행해 먼저 표시)
+PREVIEW_ENABLED = _env_bool('PREVIEW_ENABLED', True)
+PREVIEW_ROWS = _env_int('PREVIEW_ROWS', 100)
+# 전체 쿼리가 이 시간 안에 끝나면 미리보기 쿼리를 실행하지 않음
+PREVIEW_DELAY_SECONDS = float(os.getenv('PREVIEW_DELAY_SECONDS', '1.0'))
+# 단순 행 조회 미리보기의 TABLESAMPLE 비율 (0이면 항상 바깥 LIMIT만 사용)
+PREVIEW_SAMPLE_PERCENT = float(os.getenv('PREVIEW_SAMPLE_PERCENT', '1'))
+# 미리보기 작업의 청구 바이트 한도 (넘는 쿼리는 미리보기 없이 전체 결과만 기다림)
+PREVIEW_MAX_BYTES_BILLED = _env_int('PREVIEW_MAX_BYTES_BILLED', 1024 ** 3)
+
+# 쿼리 형태별 실행 이력 (요약 테이블 추천과 절약량 보고에 사용)
+QUERY_HISTORY_ENABLED = _env_bool('QUERY_HISTORY_ENABLED', True)
+QUERY_HISTORY_PATH = os.getenv('QUERY_HISTORY_PATH', os.path.join(tempfile.gettempdir(), 'nlq_query_history.sqlite3'))
+# 반복 집계 쿼리를 요약 테이블로 재작성 (scripts/advise_summary_tables.py로 생성한 테이블만 사용)
+SUMMARY_ROUTING_ENABLED = _env_bool('SUMMARY_ROUTING_ENABLED', True)
+# 요약 테이블을 만들 데이터셋 (비우면 원본 테이블과 같은 데이터셋)
+SUMMARY_TABLE_DATASET = os.getenv('SUMMARY_TABLE_DATASET', '')
+# 이 횟수 이상 실행된 형태만 요약 테이블 추천
+SUMMARY_MIN_QUERIES = _env_int('SUMMARY_MIN_QUERIES', 20)
+# 요약 단위와 맞지 않는 고유 수(사용자/세션)를 HLL 스케치로 근사 (False면 원본 테이블에서 정확히 계산)
+SUMMARY_APPROXIMATE_DISTINCT = _env_bool('SUMMARY_APPROXIMATE_DISTINCT', False)
+# 요약 테이블 목록(데이터셋 테이블 라벨)과 원본 테이블 수정 시각(메타데이터) 확인 주기
+SUMMARY_STALENESS_CHECK_SECONDS = _env_int('SUMMARY_STALENESS_CHECK_SECONDS', 300)
+
+# 와일드카드 샤드 테이블(events_*) 집계 쿼리의 샤드별 부분 집계 캐시 (새로 추가/수정된 샤드만 조회 후 병합)
+INCREMENTAL_SHARDS_ENABLED = _env_bool('INCREMENTAL_SHARDS_ENABLED', True)
+INCREMENTAL_STORE_PATH = os.getenv('INCREMENTAL_STORE_PATH', os.path.join(tempfile.gettempdir(), 'nlq_shard_aggregates.sqlite3'))
+# 샤드 메타데이터(__TABLES__ 수정 시각) 재조회 주기
+INCREMENTAL_METADATA_TTL_SECONDS = _env_int('INCREMENTAL_METADATA_TTL_SECONDS', 60)
+# 여러 샤드에 걸친 고유 수(사용자/세션)를 샤드별 HLL 스케치 병합으로 근사 (False면 원본 쿼리로 정확히 계산)
+INCREMENTAL_APPROXIMATE_DISTINCT = _env_bool('INCREMENTAL_APPROXIMATE_DISTINCT', True)
+
+# 질문 → 실행에 성공한 SQL 캐시 (같은 질문은 Claude 호출 없이 같은 SQL을 재사용, BigQuery 결과 캐시도 적중)
+SQL_CACHE_ENABLED = _env_bool('SQL_CACHE_ENABLED', True)
+SQL_CACHE_MAX_ENTRIES = _env_int('SQL_CACHE_MAX_ENTRIES', 500)
+SQL_CACHE_MAX_AGE_SECONDS = _env_int('SQL_CACHE_MAX_AGE_SECONDS', 86400)
+
+# 캐시 예열 (인기 질문 상위 K개 + 스키마 예시 질문을 새 데이터 적재 후/정해진 시각에 미리 실행)
+WARMUP_ENABLED = _env_bool('WARMUP_ENABLED', True)
+# 인기 질문: 최근 N일 동안의 BigQuery 작업 이력(INFORMATION_SCHEMA.JOBS) 기준, 조회 결과 보관 시간
+WARMUP_POPULARITY_LOOKBACK_DAYS = _env_int('WARMUP_POPULARITY_LOOKBACK_DAYS', 7)
+WARMUP_POPULARITY_CACHE_SECONDS = _env_int('WARMUP_POPULARITY_CACHE_SECONDS', 3600)
+WARMUP_TOP_K = _env_int('WARMUP_TOP_K', 10)
+# 예열할 모드 (creative_html은 비용이 커서 기본 제외), 예시 질문은 WARMUP_SAMPLE_MODE로 실행
+WARMUP_MODES = [
+    item.strip() for item in os.getenv('WARMUP_MODES', 'quick,structured').split(',') if item.strip()
+]
+WARMUP_SAMPLE_MODE = os.getenv('WARMUP_SAMPLE_MODE', 'structured')
+# 정해진 시각 (서버 현지 시각 기준 시, 쉼표 구분, 비우면 새 데이터 적재 시에만)
+WARMUP_SCHEDULE_HOURS = [
+    int(item) for item in os.getenv('WARMUP_SCHEDULE_HOURS', '').split(',') if item.strip()
+]
+# 새 데이터 적재(테이블 메타데이터 수정 시각) 확인 주기
+WARMUP_CHECK_SECONDS = _env_int('WARMUP_CHECK_SECONDS', 300)
+# 한 번의 예열에서 동시에 실행할 질문 수, 최대 질문 수, 최대 BigQuery 처리 바이트
+WARMUP_CONCURRENCY = _env_int('WARMUP_CONCURRENCY', 2)
+WARMUP_MAX_QUESTIONS = _env_int('WARMUP_MAX_QUESTIONS', 20)
+WARMUP_MAX_BYTES = _env_int('WARMUP_MAX_BYTES', 20 * 1024 ** 3)
+# 프로세스 첫 요청 직후 한 번 예열 (인스턴스마다 실행되므로 작은 예산, 외부 스케줄러 토큰이 있으면 항상 끔)
+WARMUP_ON_START = _env_bool('WARMUP_ON_START', False)
+WARMUP_STARTUP_MAX_QUESTIONS = _env_int('WARMUP_STARTUP_MAX_QUESTIONS', 5)
+# 외부 스케줄러(Cloud Scheduler)가 POST /internal/warmup 호출 시 Bearer로 보내는 토큰
+# 설정하면 인스턴스별 주기 확인(새 데이터/정해진 시각)은 끄고 호출받은 인스턴스 하나만 예열
+WARMUP_TRIGGER_TOKEN = os.getenv('WARMUP_TRIGGER_TOKEN', '')
@@ -4,10 +4,33 @@ AI 프롬프트 설정 모음
 """
 
 from .schema_config import PROJECT_ID, get_schema_prompt
-
-def get_sql_generation_system_prompt():
-    """SQL 생성을 위한 시스템 프롬프트"""
+from .performance_config import (
+    PROMPT_SAMPLE_ROWS,
+    PROMPT_SAMPLE_TOKEN_BUDGET,
+    PROMPT_HTML_SAMPLE_ROWS,
+    PROMPT_HTML_SAMPLE_TOKEN_BUDGET,
+    PROMPT_CHART_POINTS
+)
+
+# 프롬프트 버전 (리포트 캐시 키에 포함, 리포트/HTML 프롬프트를 바꾸면 함께 올릴 것)
+PROMPT_VERSION = "2026.10.1"
+
+def get_sql_generation_system_prompt(max_subqueries=0):
+    """SQL 생성을 위한 시스템 프롬프트
+
+    max_subqueries가 2 이상이면 독립적인 지표를 묻는 복합 질문을 최대 그 수만큼의
+    하위 쿼리로 나누어 반환하도록 안내한다.
+    """
     schema_prompt = get_schema_prompt()
+    decomposition_rules = ""
+    if max_subqueries >= 2:
+        decomposition_rules = f"""
+
+복합 질문 분해 규칙:
+- 질문이 서로 다른 기준의 독립적인 지표 여러 개를 함께 묻는다면 (예: "국가별 사용자 수와 기기별 구매 매출을 비교해줘"), 교차 조인이나 큰 다중 CTE로 합치지 말고 최대 {max_subqueries}개의 독립적인 SELECT 문으로 나누세요.
+- 각 SELECT 문 바로 앞 줄에 "-- SUBQUERY: 영문_이름" 주석을 붙이고, 각 문장은 세미콜론(;)으로 끝내세요.
+- 같은 기준을 공유하는 지표는 기준 컬럼 별칭을 같게 쓰세요 (예: country). 결과는 그 컬럼으로 합쳐집니다.
+- 하나의 쿼리로 자연스럽게 답할 수 있는 질문은 나누지 마세요."""
     
     return f"""당신은 BigQuery SQL 전문가이며, GA4 (Google Analytics 4) 데이터 분석에 특화되어 있습니다. 
 사용자의 자연어 질문을 BigQuery SQL 쿼리로 변환해주세요.
@@ -16,7 +39,7 @@ def get_sql_generation_system_prompt():
 
 중요한 규칙:
 1. BigQuery 표준 SQL 문법을 사용해주세요.
-2. 테이블 참조 시 반드시 백틱(`)을 사용하여 `{PROJECT_ID}.test_dataset.events_20201121` 형식으로 사용하세요.
+2. 테이블 참조 시 반드시 백틱(`)을 사용하여 `{PROJECT_ID}.test_dataset.events_20201121` 형식으로 사용하세요. 날짜/기간 질문은 `{PROJECT_ID}.test_dataset.events_*`와 _TABLE_SUFFIX 조건을 사용하세요.
 3. GA4의 중첩된 구조체 접근 시 올바른 문법을 사용하세요 (예: device.category, geo.country).
 4. event_params 배열에서 값을 추출할 때는 UNNEST와 서브쿼리를 사용하세요.
 5. 타임스탬프 변환 시 TIMESTAMP_MICROS() 함수를 사용하세요.
@@ -39,32 +62,73 @@ GA4 일반적인 쿼리 패턴:
 답변: SELECT event_name, COUNT(*) as event_count FROM `{PROJECT_ID}.test_dataset.events_20201121` GROUP BY event_name ORDER BY event_count DESC LIMIT 5;
 
 질문: "국가별 고유 사용자 수를 보여주세요"
-답변: SELECT geo.country, COUNT(DISTINCT user_pseudo_id) as unique_users FROM `{PROJECT_ID}.test_dataset.events_20201121` GROUP BY geo.country ORDER BY unique_users DESC;"""
+답변: SELECT geo.country, COUNT(DISTINCT user_pseudo_id) as unique_users FROM `{PROJECT_ID}.test_dataset.events_20201121` GROUP BY geo.country ORDER BY unique_users DESC;
+
+질문: "2020년 11월 1일부터 7일까지 purchase 이벤트 수를 보여주세요"
+답변: SELECT COUNT(*) as event_count FROM `{PROJECT_ID}.test_dataset.events_*` WHERE _TABLE_SUFFIX BETWEEN '20201101' AND '20201107' AND event_name = 'purchase';{decomposition_rules}"""
+
+def get_sql_repair_prompt(question, sql_query, error_message):
+    """BigQuery 오류로 실패한 SQL 수정을 위한 프롬프트 (짧게 유지)"""
+    return f"""다음 BigQuery SQL이 실행 중 오류로 실패했습니다. 오류를 고친 SQL을 작성해주세요.
+
+원래 질문: {question}
+
+실패한 SQL:
+{sql_query}
+
+BigQuery 오류:
+{error_message}
+
+규칙:
+1. 질문의 의도는 유지하고 오류가 난 부분만 최소한으로 수정하세요.
+2. 테이블 참조는 `{PROJECT_ID}.test_dataset.events_20201121` (날짜/기간 질문은 `{PROJECT_ID}.test_dataset.events_*`와 _TABLE_SUFFIX 조건) 형식을 유지하세요.
+3. 수정된 SQL만 세미콜론(;)으로 끝내어 반환하고, 다른 설명은 포함하지 마세요.
+4. "-- SUBQUERY:" 주석으로 나뉜 SQL이면 주석과 오류가 없는 하위 쿼리도 그대로 유지하세요."""
+
+def get_followup_sql_prompt(question, previous_question, previous_sql, columns, row_count, dialect):
+    """직전 결과가 있는 세션의 SQL 생성 요청 (직전 결과만으로 답할 수 있으면 로컬 SQL)"""
+    column_lines = "\n".join(f"- {col}" for col in columns)
+    return f"""직전 질문: {previous_question}
+
+직전 SQL:
+{previous_sql}
+
+직전 결과는 previous_result 테이블({row_count}행)로 로컬 {dialect}에 있습니다. 컬럼:
+{column_lines}
+
+새 질문: {question}
+
+새 질문이 직전 결과를 좁히거나 정렬/집계하는 후속 질문이고 위 컬럼만으로 답할 수 있으면,
+첫 줄에 "-- LOCAL"을 쓰고 previous_result 테이블만 조회하는 {dialect} SELECT 문을 반환하세요.
+직전 결과에 없는 컬럼이나 행이 필요하면 평소처럼 BigQuery SQL만 반환하세요."""
 
 def get_analysis_report_prompt(question, sql_query, data_analysis, summary_insights, query_results, max_rows_for_analysis=100):
-    """분석 리포트 생성을 위한 프롬프트"""
-    import json
+    """분석 리포트 생성을 위한 프롬프트 (통계는 컬럼당 한 줄, 샘플은 토큰 예산 내 TSV)"""
+    from utils.prompt_utils import build_sample_block, encode_column_stats, log_prompt_tokens
     
-    # 샘플링
-    sample_data = query_results[:max_rows_for_analysis] if len(query_results) > max_rows_for_analysis else query_results
+    # 대표 샘플 (층화/등간격, 토큰 예산 내)
+    sample_block, sample_info = build_sample_block(
+        query_results,
+        max_rows=min(max_rows_for_analysis, PROMPT_SAMPLE_ROWS),
+        token_budget=PROMPT_SAMPLE_TOKEN_BUDGET
+    )
     
-    return f"""다음은 GA4 데이터 분석 결과입니다. Claude Console과 같은 스타일로 구조화된 분석 리포트를 작성해주세요.
+    prompt = f"""다음은 GA4 데이터 분석 결과입니다. Claude Console과 같은 스타일로 구조화된 분석 리포트를 작성해주세요.
 
 **원본 질문:** {question}
 
 **데이터 개요:**
 - 총 레코드 수: {data_analysis['row_count']:,}개
-- 컬럼 수: {len(sample_data[0].keys()) if sample_data else 0}개
-- 컬럼 구성: {', '.join([f"{col}({stats['type']})" for col, stats in data_analysis['columns'].items()])}
+- 컬럼 수: {len(data_analysis['columns'])}개
 
-**핵심 통계:**
-{json.dumps(data_analysis['columns'], indent=2, ensure_ascii=False, default=str)}
+**핵심 통계 (컬럼당 한 줄: 이름 [타입] 통계):**
+{encode_column_stats(data_analysis['columns'])}
 
 **자동 생성된 인사이트:**
 {chr(10).join(summary_insights)}
 
-**샘플 데이터 (상위 5개 행):**
-{json.dumps(query_results[:5], indent=2, ensure_ascii=False, default=str)}
+**샘플 데이터 ({sample_info['rows']}개 행, 탭 구분, 추출 방식 {sample_info['strategy']}):**
+{sample_block}
 
 다음과 같은 Claude Console 스타일로 리포트를 작성해주세요:
 
@@ -91,65 +155,62 @@ def get_analysis_report_prompt(question, sql_query, data_analysis, summary_insig
 - 이모지를 활용한 시각적 구분
 - 업무에 바로 적용 가능한 내용 위주
 - 차트가 있다면 차트 해석 포함"""
+    
+    log_prompt_tokens("analysis_report", prompt)
+    return prompt
 
 def get_html_generation_prompt(question, sql_query, query_results):
-    """HTML 생성을 위한 프롬프트"""
-    import json
-    from ..utils.data_utils import safe_json_serialize
+    """HTML 생성을 위한 프롬프트 (샘플은 토큰 예산 내 TSV, 차트 데이터는 서버에서 집계/축소)"""
+    from collections.abc import Mapping
+    from utils.json_utils import dumps
+    from utils.result_set import ResultSet
+    from utils.chart_utils import prepare_chart
+    from utils.prompt_utils import build_sample_block, log_prompt_tokens
     
     # 안전한 데이터 타입 검증
     try:
         if not query_results:
             query_results = []
-        elif not isinstance(query_results, list):
+        elif not isinstance(query_results, (list, ResultSet)):
             query_results = []
         
-        if query_results and not isinstance(query_results[0], dict):
+        if query_results and not isinstance(query_results[0], Mapping):
             query_results = []
         
-        # 데이터 준비 (안전하게)
-        sample_data = query_results[:10] if len(query_results) > 10 else query_results
-        columns = list(sample_data[0].keys()) if sample_data and isinstance(sample_data[0], dict) else []
+        columns = query_results.columns if isinstance(query_results, ResultSet) else (
+            list(query_results[0].keys()) if query_results else []
+        )
         
-        # Chart.js용 데이터 변환 (안전하게)
-        chart_data = []
-        chart_labels = []
+        # 대표 샘플 (층화/등간격, 토큰 예산 내)
+        sample_block, sample_info = build_sample_block(
+            query_results,
+            max_rows=PROMPT_HTML_SAMPLE_ROWS,
+            token_budget=PROMPT_HTML_SAMPLE_TOKEN_BUDGET
+        )
         
-        if len(columns) >= 2 and sample_data:
-            try:
-                for row in sample_data:
-                    if isinstance(row, dict) and columns[0] in row:
-                        # 라벨 처리
-                        label_value = row[columns[0]]
-                        chart_labels.append(str(label_value) if label_value is not None else "")
-                        
-                        # 값 처리
-                        if len(columns) >= 2 and columns[1] in row:
-                            value = row[columns[1]]
-                            if isinstance(value, (int, float)):
-                                chart_data.append(value)
-                            else:
-                                try:
-                                    chart_data.append(float(value))
-                                except (ValueError, TypeError):
-                                    chart_data.append(0)
-                        else:
-                            chart_data.append(0)
-            except Exception as e:
-                chart_data = []
-                chart_labels = []
-        
-        # 안전한 JSON 직렬화를 위한 데이터 정리
-        safe_sample_data = safe_json_serialize(sample_data[:3])
-        safe_chart_labels = safe_json_serialize(chart_labels[:5])
-        safe_chart_data = safe_json_serialize(chart_data[:5])
+        # Chart.js용 데이터 (전체 결과 기준 집계 + 상위 N개/LTTB)
+        chart = prepare_chart(
+            query_results, columns, max_points=PROMPT_CHART_POINTS, top_n=PROMPT_CHART_POINTS
+        ) if query_results else None
+        if chart:
+            chart_type = chart["config"]["type"]
+            safe_chart_labels = dumps(chart["data"]["labels"])
+            safe_chart_data = dumps({
+                d["label"]: [round(v, 2) for v in d["data"]] for d in chart["data"]["datasets"]
+            })
+        else:
+            chart_type = "bar"
+            safe_chart_labels = "[]"
+            safe_chart_data = "{}"
         
     except Exception as e:
-        safe_sample_data = []
-        safe_chart_labels = []
-        safe_chart_data = []
+        columns = []
+        sample_block, sample_info = "(데이터 없음)", {"rows": 0, "strategy": "empty"}
+        chart_type = "bar"
+        safe_chart_labels = "[]"
+        safe_chart_data = "{}"
     
-    return f"""다음 GA4 데이터 분석 결과를 완전한 HTML 페이지로 생성해주세요.
+    prompt = f"""다음 GA4 데이터 분석 결과를 완전한 HTML 페이지로 생성해주세요.
 
 **원본 질문:** {question}
 
@@ -162,12 +223,12 @@ def get_html_generation_prompt(question, sql_query, query_results):
 - 총 행 수: {len(query_results)}개
 - 컬럼: {', '.join(columns) if columns else '없음'}
 
-**샘플 데이터 (상위 3개):**
-{json.dumps(safe_sample_data, indent=2, ensure_ascii=False)}
+**샘플 데이터 ({sample_info['rows']}개 행, 탭 구분, 추출 방식 {sample_info['strategy']}):**
+{sample_block}
 
-**차트 데이터:**
+**차트 데이터 (권장 타입 {chart_type}, 전체 결과 기준으로 집계됨):**
 - Labels: {safe_chart_labels}
-- Data: {safe_chart_data}
+- Datasets: {safe_chart_data}
 
 다음 요구사항에 맞는 완전한 HTML을 생성해주세요:
 
@@ -206,4 +267,7 @@ HTML 구조:
 - 한국어로 자연스러운 분석 내용 작성
 - 비즈니스 관점의 실용적인 제안사항 포함
 
-완전한 HTML 코드만 반환해주세요."""
\ No newline at end of file
+완전한 HTML 코드만 반환해주세요."""
+    
+    log_prompt_tokens("html_generation", prompt)
+    return prompt
\ No newline at end of file
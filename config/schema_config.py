@@ -50,15 +50,27 @@ def get_full_table_name():
     """완전한 테이블 이름 반환"""
     return f"`{PROJECT_ID}.test_dataset.events_20201121`"
 
+def get_wildcard_table_name():
+    """일 단위 샤드(events_YYYYMMDD) 전체를 가리키는 와일드카드 테이블 이름 (날짜/기간 질문용)"""
+    return f"`{PROJECT_ID}.test_dataset.events_*`"
+
 def get_schema_prompt():
     """GA4 테이블 스키마 정보를 프롬프트 형태로 변환"""
     full_table_name = get_full_table_name()
+    wildcard_table_name = get_wildcard_table_name()
     
     schema_text = f"""다음은 BigQuery GA4 이벤트 데이터의 테이블 스키마 정보입니다 (프로젝트: {PROJECT_ID}):
 
 테이블: {full_table_name}
 설명: Google Analytics 4 이벤트 데이터 (2020년 11월 21일)
 
+날짜/기간 테이블: {wildcard_table_name}
+설명: 일 단위 샤드 테이블(events_YYYYMMDD) 전체, 샤드 접미사 _TABLE_SUFFIX = event_date
+- 특정 날짜나 기간을 묻는 질문은 이 테이블에서 _TABLE_SUFFIX 조건으로 샤드를 거르세요:
+  WHERE _TABLE_SUFFIX BETWEEN '20201101' AND '20201130' (하루면 _TABLE_SUFFIX = '20201121')
+- _TABLE_SUFFIX 조건 없이 와일드카드 테이블을 조회하지 마세요 (모든 샤드를 읽음).
+- 날짜를 언급하지 않은 질문은 위 기본 테이블을 사용하세요.
+
 주요 컬럼:
 - event_date (STRING): 이벤트 날짜 (YYYYMMDD 형식)
 - event_timestamp (INTEGER): 이벤트 타임스탬프 (마이크로초)
@@ -59,6 +59,16 @@ else
     echo "$ANTHROPIC_API_KEY" | gcloud secrets create anthropic-api-key --data-file=-
 fi
 
+# 내보내기 토큰 서명 키 (모든 인스턴스가 같은 키를 쓰도록 한 번만 생성)
+if ! gcloud secrets describe export-token-secret > /dev/null 2>&1; then
+    openssl rand -hex 32 | gcloud secrets create export-token-secret --data-file=-
+fi
+
+# 캐시 예열 트리거 토큰 (Cloud Scheduler가 /internal/warmup 호출 시 사용)
+if ! gcloud secrets describe warmup-trigger-token > /dev/null 2>&1; then
+    openssl rand -hex 32 | gcloud secrets create warmup-trigger-token --data-file=-
+fi
+
 # 4. 서비스 계정 생성 및 권한 부여
 print_info "서비스 계정 생성 중..."
 SA_NAME="flask-bigquery-sa"
@@ -81,12 +91,37 @@ gcloud projects add-iam-policy-binding $PROJECT_ID \
     --member="serviceAccount:$SA_EMAIL" \
     --role="roles/bigquery.dataViewer"
 
+# 작업 이력(INFORMATION_SCHEMA.JOBS_BY_PROJECT) 조회 권한 (인기 질문 예열)
+gcloud projects add-iam-policy-binding $PROJECT_ID \
+    --member="serviceAccount:$SA_EMAIL" \
+    --role="roles/bigquery.resourceViewer"
+
 # Secret Manager 접근 권한 부여
 gcloud projects add-iam-policy-binding $PROJECT_ID \
     --member="serviceAccount:$SA_EMAIL" \
     --role="roles/secretmanager.secretAccessor"
 
+# 결과 내려 쓰기 + 리포트 캐시 볼륨 (Cloud Run의 /tmp는 메모리 기반이므로 Filestore NFS 공유를 마운트)
+# SPILL_NFS_SERVER=<Filestore IP> [SPILL_NFS_PATH=/share] [VPC_NETWORK=default] [VPC_SUBNET=default]
+SPILL_FLAGS=()
+if [ -n "$SPILL_NFS_SERVER" ]; then
+    SPILL_FLAGS=(
+        --execution-environment gen2
+        --network "${VPC_NETWORK:-default}"
+        --subnet "${VPC_SUBNET:-default}"
+        --add-volume "name=spill,type=nfs,location=${SPILL_NFS_SERVER}:${SPILL_NFS_PATH:-/nlq_spill}"
+        --add-volume-mount "volume=spill,mount-path=/mnt/spill"
+        --update-env-vars "RESULT_SPILL_DIR=/mnt/spill,REPORT_CACHE_PATH=/mnt/spill/nlq_report_cache.sqlite3,REPORT_CACHE_MAX_MB=256"
+    )
+else
+    print_warning "SPILL_NFS_SERVER 미설정: 큰 결과와 리포트 캐시(최대 32MB)는 메모리 기반 /tmp에 씁니다 (인스턴스 메모리 사용)."
+fi
+
 # 6. Cloud Run 서비스 배포
+# 비동기 작업(/jobs)은 작업을 받은 인스턴스의 워커 풀과 로컬 저장소에서만 실행/조회되므로
+# --session-affinity로 상태 조회를 같은 인스턴스로 보내고, 조회 사이에도 워커가 CPU를 쓰도록
+# --no-cpu-throttling을 지정해야 한다 (둘 중 하나라도 빠지면 다른 인스턴스가 404를 돌려주거나
+# 작업을 받은 인스턴스가 상태 조회가 끊긴 것으로 보고 작업을 취소함)
 print_info "Cloud Run 서비스 배포 중..."
 gcloud run deploy $SERVICE_NAME \
     --source . \
@@ -94,13 +129,16 @@ gcloud run deploy $SERVICE_NAME \
     --region $REGION \
     --allow-unauthenticated \
     --service-account $SA_EMAIL \
-    --set-secrets ANTHROPIC_API_KEY=anthropic-api-key:latest \
+    --set-secrets ANTHROPIC_API_KEY=anthropic-api-key:latest,EXPORT_TOKEN_SECRET=export-token-secret:latest,WARMUP_TRIGGER_TOKEN=warmup-trigger-token:latest \
     --memory 512Mi \
     --cpu 1 \
     --concurrency 80 \
     --timeout 300 \
+    --session-affinity \
+    --no-cpu-throttling \
     --min-instances 0 \
-    --max-instances 10
+    --max-instances 10 \
+    "${SPILL_FLAGS[@]}"
 
 # 7. 배포 결과 확인
 print_info "배포 결과 확인 중..."
@@ -111,6 +149,27 @@ SERVICE_URL=$(gcloud run services describe $SERVICE_NAME \
 print_info "배포 완료!"
 print_info "서비스 URL: $SERVICE_URL"
 
+# 캐시 예열 스케줄 (인스턴스마다 예열하지 않고 Cloud Scheduler가 한 번 호출, 기본 매일 오전 9시)
+print_info "캐시 예열 스케줄 설정 중..."
+gcloud services enable cloudscheduler.googleapis.com
+WARMUP_SCHEDULE=${WARMUP_SCHEDULE:-"0 9 * * *"}
+WARMUP_TOKEN=$(gcloud secrets versions access latest --secret=warmup-trigger-token)
+if gcloud scheduler jobs describe ${SERVICE_NAME}-warmup --location $REGION > /dev/null 2>&1; then
+    SCHEDULER_COMMAND=update
+    HEADERS_FLAG=--update-headers
+else
+    SCHEDULER_COMMAND=create
+    HEADERS_FLAG=--headers
+fi
+gcloud scheduler jobs $SCHEDULER_COMMAND http ${SERVICE_NAME}-warmup \
+    --location $REGION \
+    --schedule "$WARMUP_SCHEDULE" \
+    --time-zone "Asia/Seoul" \
+    --uri "$SERVICE_URL/internal/warmup" \
+    --http-method POST \
+    --attempt-deadline 300s \
+    $HEADERS_FLAG "Authorization=Bearer $WARMUP_TOKEN"
+
 # 8. 헬스 체크
 print_info "헬스 체크 수행 중..."
 if curl -f -s "$SERVICE_URL/health" > /dev/null; then
@@ -0,0 +1,109 @@
+# scripts/advise_summary_tables.py
+"""
+BigQuery 작업 이력 기반 요약 테이블 추천/생성
+
+모든 인스턴스가 실행한 쿼리(INFORMATION_SCHEMA.JOBS의 app=nlq 라벨 작업)에서 자주 실행된
+집계 쿼리 형태를 차원별로 묶어 요약 테이블 후보와 생성 SQL을 보여주고, --create를 주면 후보
+테이블을 만든다. 만든 테이블은 라벨(생성 시점 원본 수정 시각)로 식별되어 실행 중인 모든
+인스턴스가 staleness 확인 주기 안에 재작성 대상으로 읽는다. --refresh는 원본 테이블이
+바뀌어 사용하지 않는 요약 테이블을 다시 만든다. 마지막에 요약 테이블(또는 샤드별 캐시)로 처리한 쿼리의
+절약량(원본 테이블 실행 평균 대비)을 출력한다. 저장소 루트에서 실행:
+
+    python scripts/advise_summary_tables.py [--create] [--refresh] [--days N]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import bigquery
+
+from config.performance_config import BIGQUERY_JOBS_REGION, SUMMARY_MIN_QUERIES, SUMMARY_TABLE_DATASET
+from config.schema_config import PROJECT_ID, get_full_table_name
+from utils.bigquery_jobs import jobs_view
+from utils.query_history import JobHistory
+from utils.summary_tables import SummaryAdvisor, list_summary_tables, summary_dataset, summary_table_sql
+
+client = bigquery.Client(project=PROJECT_ID)
+
+def _job_config(stage):
+    return bigquery.QueryJobConfig(labels={"app": "nlq", "stage": stage})
+
+def _run_query(sql_query):
+    return [dict(row.items()) for row in client.query(sql_query, job_config=_job_config("job_history")).result()]
+
+def _base_table_modified():
+    """원본 테이블 마지막 수정 시각 (테이블 메타데이터, 과금 없음)"""
+    return client.get_table(get_full_table_name().strip("`")).modified.timestamp()
+
+def _option(name, default):
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return default
+
+def create_table(key, table_name):
+    """요약 테이블 생성 (생성 직전 원본 테이블 수정 시각을 테이블 라벨에 기록)"""
+    base_modified = _base_table_modified()
+    start = time.monotonic()
+    create_sql = summary_table_sql(key, get_full_table_name(), table_name, base_modified)
+    query_job = client.query(create_sql, job_config=_job_config("summary_table"))
+    query_job.result()
+    print(
+        f"  생성 {table_name}: 처리 {(query_job.total_bytes_processed or 0) / 1024 / 1024:.1f} MB, "
+        f"{time.monotonic() - start:.1f}초"
+    )
+
+def main():
+    create = "--create" in sys.argv
+    refresh = "--refresh" in sys.argv
+    days = float(_option("--days", "30"))
+
+    base_table = get_full_table_name()
+    project, dataset = summary_dataset(base_table, SUMMARY_TABLE_DATASET)
+    history = JobHistory(_run_query, jobs_view(client.project, BIGQUERY_JOBS_REGION))
+    since = time.time() - days * 86400
+    advisor = SummaryAdvisor(history, base_table, project, dataset, min_queries=SUMMARY_MIN_QUERIES)
+    proposals = advisor.propose(since=since)
+    existing = list_summary_tables(client, project, dataset)
+
+    print(f"요약 테이블 후보 (최근 {days:g}일, {SUMMARY_MIN_QUERIES}회 이상): {len(proposals)}개")
+    for proposal in proposals:
+        status = "생성됨" if proposal["key"] in existing else "미생성"
+        print(
+            f"\n  {proposal['table_name']} ({status})  쿼리 {proposal['queries']}회  "
+            f"처리 {proposal['bytes_total'] / 1024 / 1024:.1f} MB  {proposal['seconds_total']:.1f}초"
+        )
+        for shape in proposal["shapes"][:5]:
+            print(f"    {shape['count']:>5}회  {shape['shape'][:120]}")
+        if create and proposal["key"] not in existing:
+            create_table(proposal["key"], proposal["table_name"])
+        elif not create:
+            print(proposal["create_sql"])
+
+    if refresh:
+        base_modified = _base_table_modified()
+        for key, entry in existing.items():
+            if base_modified > entry["base_modified"]:
+                create_table(key, entry["table_name"])
+
+    report = history.savings_report(since=since)
+    print(
+        f"\n요약 테이블/샤드별 캐시로 처리한 쿼리 {report['routed_queries']}회: "
+        f"절약 {report['bytes_saved'] / 1024 / 1024:.1f} MB, {report['seconds_saved']:.1f}초"
+    )
+    for shape in report["shapes"][:10]:
+        if shape["bytes_saved"] is None:
+            print(f"  {shape['routed_queries']:>5}회  (원본 실행 기록 없음)  {shape['shape'][:100]}")
+        else:
+            print(
+                f"  {shape['routed_queries']:>5}회  평균 {shape['base_avg_bytes'] / 1024 / 1024:.1f} → "
+                f"{shape['routed_avg_bytes'] / 1024 / 1024:.1f} MB, {shape['base_avg_seconds']:.2f} → "
+                f"{shape['routed_avg_seconds']:.2f}초  {shape['shape'][:80]}"
+            )
+
+if __name__ == '__main__':
+    main()
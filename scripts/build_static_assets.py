@@ -0,0 +1,98 @@
+# scripts/build_static_assets.py
+"""
+정적 파일 빌드: 내용 해시 지문을 붙인 사본과 gzip/brotli 사전 압축본 생성
+
+    python scripts/build_static_assets.py
+
+static/ 아래 CSS/JS를 static/dist/에 `이름.<해시>.확장자`로 복사하고,
+index.html의 참조를 지문 경로로 바꾼 사본과 manifest.json을 함께 만든다.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:  # brotli가 없으면 gzip 사전 압축본만 생성
+    brotli = None
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC_DIR = os.path.join(ROOT_DIR, "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+ASSET_EXTENSIONS = (".js", ".css", ".svg", ".map")
+COMPRESS_MIN_BYTES = 512
+
+def fingerprint(data):
+    """내용 해시 앞 10자리"""
+    return hashlib.sha256(data).hexdigest()[:10]
+
+def write_precompressed(path, data):
+    """gzip/brotli 사전 압축본 작성 (작은 파일은 생략)"""
+    if len(data) < COMPRESS_MIN_BYTES:
+        return
+    with open(path + ".gz", 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+def build_assets():
+    """CSS/JS 지문 사본 생성, {원래 URL: 지문 URL} 반환"""
+    assets = {}
+    for dirpath, dirnames, filenames in os.walk(STATIC_DIR):
+        if os.path.abspath(dirpath).startswith(DIST_DIR):
+            continue
+        for filename in sorted(filenames):
+            if not filename.endswith(ASSET_EXTENSIONS):
+                continue
+            source = os.path.join(dirpath, filename)
+            relative = os.path.relpath(source, STATIC_DIR)
+            with open(source, 'rb') as f:
+                data = f.read()
+
+            stem, ext = os.path.splitext(relative)
+            target_relative = f"{stem}.{fingerprint(data)}{ext}"
+            target = os.path.join(DIST_DIR, target_relative)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data)
+            write_precompressed(target, data)
+
+            url = "/static/" + relative.replace(os.sep, "/")
+            assets[url] = "/static/dist/" + target_relative.replace(os.sep, "/")
+    return assets
+
+def build_index(assets):
+    """index.html의 정적 파일 참조를 지문 경로로 바꾼 사본 생성"""
+    with open(os.path.join(ROOT_DIR, "index.html"), encoding='utf-8') as f:
+        html = f.read()
+    # 긴 경로부터 바꿔 접두사가 겹치는 경로를 보호
+    for url in sorted(assets, key=len, reverse=True):
+        html = html.replace(f'"{url}"', f'"{assets[url]}"')
+
+    data = html.encode('utf-8')
+    target = os.path.join(DIST_DIR, "index.html")
+    with open(target, 'wb') as f:
+        f.write(data)
+    write_precompressed(target, data)
+    return "/static/dist/index.html"
+
+def main():
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    os.makedirs(DIST_DIR)
+
+    assets = build_assets()
+    index = build_index(assets)
+    with open(os.path.join(DIST_DIR, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump({"index": index, "assets": assets}, f, ensure_ascii=False, indent=2)
+
+    print(f"정적 파일 {len(assets)}개 빌드 완료: {DIST_DIR}")
+    if brotli is None:
+        print("경고: brotli 모듈이 없어 gzip 사전 압축본만 생성했습니다.", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
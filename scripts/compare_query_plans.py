@@ -0,0 +1,58 @@
+# scripts/compare_query_plans.py
+"""
+복합 질문의 단일 쿼리 계획과 하위 쿼리 분해 계획 비교
+
+같은 질문에 대해 SQL을 두 방식으로 생성하고, 드라이런(과금 없음)으로 처리 바이트를,
+--execute를 주면 실제 실행으로 전체 소요 시간을 비교한다. 저장소 루트에서 실행:
+
+    python scripts/compare_query_plans.py ["질문" ...] [--execute]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.cloud import bigquery
+
+from app import bigquery_client, execute_bigquery, execute_query_plan, generate_sql
+from utils.query_decomposition import split_subqueries
+
+DEFAULT_QUESTIONS = [
+    "국가별 사용자 수와 기기별 구매 매출을 비교해줘",
+    "이벤트 유형별 발생 수와 시간대별 활성 사용자 수를 함께 보여줘",
+    "국가별 세션 수와 국가별 구매 매출을 보여줘"
+]
+
+def dry_run_bytes(sql_query):
+    """드라이런 처리 예상 바이트 (하위 쿼리로 나뉜 SQL은 합계)"""
+    config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+    parts = split_subqueries(sql_query) or [("single", sql_query)]
+    return sum(bigquery_client.query(part, job_config=config).total_bytes_processed or 0 for _, part in parts)
+
+def measure(sql_query, execute):
+    """실행 소요 시간 (초) → (초, 성공 여부)"""
+    start = time.monotonic()
+    result = execute_query_plan(sql_query, execute_bigquery) if execute else {"success": True}
+    return time.monotonic() - start, result["success"]
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    execute = "--execute" in sys.argv
+    questions = args or DEFAULT_QUESTIONS
+
+    for question in questions:
+        print(f"\n질문: {question}")
+        for label, decompose in (("단일 쿼리", False), ("하위 쿼리 분해", True)):
+            sql_query, _ = generate_sql(question, decompose=decompose)
+            parts = split_subqueries(sql_query)
+            scanned = dry_run_bytes(sql_query)
+            line = f"  {label:<12} 쿼리 {max(1, len(parts))}개  처리 {scanned / 1024 / 1024:9.1f} MB"
+            if execute:
+                seconds, success = measure(sql_query, execute)
+                line += f"  실행 {seconds:6.2f}초{'' if success else ' (실패)'}"
+            print(line)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,333 @@
+# scripts/train_intent_model.py
+"""
+템플릿 SQL용 의도 분류기 학습 (오프라인)
+
+아래 예시 질문과 TABLE_SCHEMA의 sample_queries로 문자 n-gram 나이브 베이즈 분류기를 학습해
+config/intent_model.json에 저장하고, 교차 검증 정확도, 학습에 쓰지 않은 보류 예시의 정확도와
+기준 확신도별 템플릿 처리율(INTENT_MIN_CONFIDENCE 조정용), 예시별 템플릿 SQL 결과를 출력한다.
+예시를 추가하거나 고친 뒤 저장소 루트에서 실행:
+
+    python scripts/train_intent_model.py [출력 경로]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.performance_config import INTENT_MODEL_PATH, INTENT_MIN_CONFIDENCE
+from config.schema_config import TABLE_SCHEMA, get_full_table_name, get_wildcard_table_name
+from utils.intent_templates import IntentClassifier, IntentTemplateRouter
+
+# 지표 하나 (차원 없음)
+TOTAL_EXAMPLES = [
+    "오늘 이벤트 수를 알려주세요",
+    "오늘 총 이벤트 수를 알려주세요",
+    "전체 이벤트 수는 몇 개인가요",
+    "이벤트가 총 몇 건 발생했나요",
+    "총 사용자 수를 알려줘",
+    "전체 사용자 수는?",
+    "고유 사용자 수를 알려주세요",
+    "방문자 수가 몇 명이야",
+    "purchase 이벤트의 총 매출을 보여주세요",
+    "총 매출은 얼마인가요",
+    "전체 구매 매출 합계를 알려줘",
+    "오늘 매출을 알려주세요",
+    "page_view 이벤트 수를 알려주세요",
+    "페이지뷰는 모두 몇 번이야",
+    "구매 이벤트는 몇 건인가요",
+    "장바구니 담기 이벤트 수",
+    "add_to_cart 이벤트가 몇 번 발생했나요",
+    "session_start 이벤트 수를 세어줘",
+    "총 세션 수를 알려주세요",
+    "세션은 몇 개야",
+    "구매한 사용자 수를 알려줘",
+    "purchase 이벤트를 발생시킨 사용자 수",
+    "first_visit 이벤트 수를 보여주세요",
+    "첫 방문 사용자 수는 몇 명인가요",
+    "scroll 이벤트는 모두 몇 건이야",
+    "20201121 이벤트 수를 알려주세요",
+    "2020-11-21 총 매출을 알려줘",
+    "전체 이벤트 개수",
+    "total events count",
+    "how many users",
+    "이벤트 건수 합계",
+    "page_view를 발생시킨 사용자는 몇 명이야",
+    "사용자 수",
+    "세션 수",
+    "이벤트 수",
+    "매출",
+    "총 매출",
+    "전체 세션 수를 보여줘",
+    "사용자는 모두 몇 명이야",
+    "유저 수 알려줘",
+    "이용자 수는 몇 명인가요",
+    "구매 건수",
+    "purchase 이벤트 수",
+    "페이지뷰 수를 알려줘",
+    "총 방문자 수",
+    "매출 합계를 보여주세요",
+    "전체 이벤트는 몇 건이야",
+    "2020-11-21 사용자 수",
+    "add_to_cart 이벤트를 발생시킨 사용자 수를 알려주세요",
+    "스크롤 이벤트 수",
+    "how many sessions",
+    "total revenue"
+]
+
+# 차원 하나로 나눈 지표
+BREAKDOWN_EXAMPLES = [
+    "가장 많이 발생한 이벤트 유형을 보여주세요",
+    "가장 많이 발생한 이벤트 유형 상위 5개를 보여주세요",
+    "이벤트 유형별 발생 수를 보여줘",
+    "이벤트별 건수를 알려주세요",
+    "top 10 이벤트를 보여줘",
+    "어떤 이벤트가 가장 많이 발생했나요",
+    "이벤트 종류별 횟수",
+    "이벤트 이름별 사용자 수",
+    "국가별 사용자 수를 보여주세요",
+    "국가별 고유 사용자 수를 보여주세요",
+    "사용자가 가장 많은 국가 상위 10개",
+    "나라별 이벤트 수를 알려줘",
+    "국가별 매출을 보여줘",
+    "매출이 가장 높은 국가 5곳",
+    "도시별 사용자 수 상위 20개",
+    "지역별 이벤트 수를 보여주세요",
+    "모바일과 데스크톱 사용자 비율을 보여주세요",
+    "기기별 사용자 수를 보여줘",
+    "디바이스 카테고리별 이벤트 수",
+    "기기 유형별 매출 비중",
+    "운영체제별 사용자 분포를 보여주세요",
+    "OS별 사용자 수를 알려줘",
+    "운영체제별 세션 수",
+    "플랫폼별 이벤트 수를 보여주세요",
+    "트래픽 소스별 이벤트 수를 보여주세요",
+    "트래픽 소스별 사용자 수 상위 10개",
+    "유입 채널별 매출을 보여줘",
+    "매체별 세션 수를 알려주세요",
+    "page_view 이벤트가 가장 많은 시간대를 보여주세요",
+    "시간대별 페이지뷰 수를 보여줘",
+    "시간별 이벤트 수를 알려주세요",
+    "시간대별 사용자 수",
+    "구매가 가장 많은 시간대는 언제야",
+    "국가별 구매 건수를 보여줘",
+    "기기별 purchase 이벤트 수",
+    "사용자가 가장 적은 국가 5개",
+    "국가별 세션 비중을 보여줘",
+    "users by country",
+    "events by hour",
+    "운영체제별 매출 점유율",
+    "국가별 사용자 수",
+    "국가별 이벤트 수",
+    "국가별 세션 수",
+    "국가별 매출",
+    "기기별 사용자 수",
+    "기기별 세션 수",
+    "기기별 이벤트 수",
+    "기기별 매출",
+    "도시별 세션 수",
+    "도시별 매출",
+    "지역별 사용자 수",
+    "OS별 세션 수",
+    "운영체제별 이벤트 수",
+    "플랫폼별 사용자 수",
+    "플랫폼별 매출",
+    "매체별 사용자 수",
+    "트래픽 소스별 세션 수",
+    "시간대별 세션 수",
+    "시간대별 매출",
+    "이벤트 유형별 사용자 수",
+    "나라별 사용자 수를 알려줘",
+    "디바이스별 세션 수를 보여주세요",
+    "국가별로 사용자 수를 알려줘",
+    "기기 카테고리별로 세션이 몇 개인지 보여줘",
+    "사용자 수를 국가별로 보여줘",
+    "세션 수를 기기별로 나눠서 보여줘",
+    "매출을 국가별로 정리해줘",
+    "국가별 사용자 수 상위 5개",
+    "세션이 가장 많은 기기",
+    "이벤트가 가장 많은 도시 상위 10곳",
+    "구매 건수가 가장 많은 국가",
+    "sessions by device",
+    "revenue by country"
+]
+
+# 템플릿으로 답하지 않는 질문 (복합, 조건, 상대 기간, 상세 목록, 직전 결과 지칭, 분석 외 질문)
+OTHER_EXAMPLES = [
+    "국가별 사용자 수와 기기별 구매 매출을 비교해줘",
+    "이벤트 유형별 발생 수와 시간대별 활성 사용자 수를 함께 보여줘",
+    "국가별 세션 수와 국가별 구매 매출을 보여줘",
+    "지난 7일간 일별 사용자 추이를 보여줘",
+    "최근 한 달 동안 매출 변화를 알려줘",
+    "어제 대비 오늘 이벤트 수 증가율",
+    "사용자당 평균 세션 수를 계산해줘",
+    "구매 전환율이 가장 높은 트래픽 소스",
+    "장바구니에서 구매까지 퍼널 분석을 해줘",
+    "재방문 사용자 비율을 알려줘",
+    "세션당 평균 페이지뷰를 보여줘",
+    "가장 많이 팔린 상품 목록을 보여줘",
+    "상품명별 매출 상위 10개",
+    "페이지 제목별 조회수 상위 10개",
+    "랜딩 페이지별 이탈률",
+    "매출이 100달러 이상인 사용자 목록",
+    "그중에서 상위 3개만 보여줘",
+    "방금 결과를 매출 순으로 정렬해줘",
+    "위 결과에서 한국만 보여줘",
+    "한국을 제외한 국가별 사용자 수",
+    "iOS 사용자와 Android 사용자의 구매 금액 비교",
+    "사용자 코호트별 리텐션을 보여줘",
+    "첫 방문 후 구매까지 걸린 시간 분포",
+    "이 데이터셋에는 어떤 컬럼이 있나요",
+    "안녕하세요",
+    "리포트를 만들어줘",
+    "이 결과를 요약해줘",
+    "사용자별 이벤트 시퀀스를 보여줘",
+    "user_pseudo_id별 구매 횟수 목록",
+    "국가와 기기 조합별 사용자 수",
+    "시간대별 국가별 이벤트 수",
+    "매출과 사용자 수의 상관관계",
+    "다음 주 매출을 예측해줘",
+    "브라우저 버전별 오류 이벤트",
+    "event_params에서 page_location을 추출해줘",
+    "세션 길이 중앙값을 알려줘",
+    "구매한 사용자의 평균 구매 금액",
+    "광고 캠페인별 성과를 분석해줘",
+    "신규 사용자와 기존 사용자 비교",
+    "주말과 평일 트래픽 차이",
+    "한국 사용자 수",
+    "미국의 세션 수는 몇 개야",
+    "서울 사용자 매출",
+    "모바일 사용자 수",
+    "iOS 세션 수를 알려줘",
+    "사용자 수가 100명 이상인 국가",
+    "세션 수가 가장 많은 사용자 목록",
+    "방금 결과를 기기별로 나눠줘",
+    "이 쿼리는 왜 느린가요"
+]
+
+# 평가 전용 보류 예시 (학습 예시에 없는 표현, 학습에 넣지 않음)
+HELD_OUT_EXAMPLES = [
+    ("이벤트가 전부 몇 건이지", "total"),
+    ("사용자 몇 명이야", "total"),
+    ("세션 개수를 알려줄래", "total"),
+    ("총 매출액 알려줘", "total"),
+    ("구매는 총 몇 번 있었어", "total"),
+    ("첫 방문 이벤트는 몇 건이야", "total"),
+    ("유저가 몇 명인지 궁금해", "total"),
+    ("page_view 건수는?", "total"),
+    ("2020-11-21 세션 수를 보여줘", "total"),
+    ("전체 방문자는 몇 명인가요", "total"),
+    ("국가별 사용자", "breakdown"),
+    ("나라별 세션 수 보여줘", "breakdown"),
+    ("기기별 사용자 수 알려줘", "breakdown"),
+    ("디바이스별 사용자 수", "breakdown"),
+    ("기기별로 매출 보여줘", "breakdown"),
+    ("OS별 이벤트 수", "breakdown"),
+    ("도시별 사용자 수를 보여줘", "breakdown"),
+    ("지역별 세션 수를 알려주세요", "breakdown"),
+    ("플랫폼별 세션 수", "breakdown"),
+    ("채널별 사용자 수", "breakdown"),
+    ("매체별 매출을 알려줘", "breakdown"),
+    ("시간대별 구매 건수", "breakdown"),
+    ("사용자를 국가별로 세어줘", "breakdown"),
+    ("국가마다 사용자 수", "breakdown"),
+    ("사용자가 제일 많은 나라 3개", "breakdown"),
+    ("매출 상위 5개 국가", "breakdown"),
+    ("이벤트 유형별 건수 상위 10개", "breakdown"),
+    ("기기별 purchase 이벤트 비중", "breakdown"),
+    ("sessions by country", "breakdown"),
+    ("users by device", "breakdown"),
+    ("일본 사용자 수", "other"),
+    ("데스크톱 세션 수", "other"),
+    ("Android 사용자 매출", "other"),
+    ("지난달 국가별 매출", "other"),
+    ("최근 3일 기기별 사용자 수", "other"),
+    ("국가별 사용자 수와 매출을 같이 보여줘", "other"),
+    ("기기와 국가별 세션 수", "other"),
+    ("세션이 10개 이상인 국가", "other"),
+    ("사용자당 매출을 국가별로", "other"),
+    ("위 결과를 그래프로 그려줘", "other"),
+    ("상품별 조회수 목록", "other"),
+    ("이탈률이 높은 기기", "other"),
+    ("고마워요", "other"),
+    ("테이블 스키마를 설명해줘", "other")
+]
+
+def training_examples():
+    """(질문, 의도) 목록 (sample_queries는 현재 규칙/분류 형태로 라벨링된 예시와 중복되어도 그대로 포함)"""
+    examples = [(q, "total") for q in TOTAL_EXAMPLES]
+    examples += [(q, "breakdown") for q in BREAKDOWN_EXAMPLES]
+    examples += [(q, "other") for q in OTHER_EXAMPLES]
+    labeled = {question for question, _ in examples}
+    for table in TABLE_SCHEMA.values():
+        for question in table.get("sample_queries", []):
+            if question not in labeled:
+                print(f"경고: 라벨이 없는 sample_query (예시 목록에 추가 필요): {question}")
+    for question, _ in HELD_OUT_EXAMPLES:
+        if question in labeled:
+            print(f"경고: 보류 예시가 학습 예시에 포함됨: {question}")
+    return examples
+
+def cross_validate(examples, folds=5):
+    """k-fold 교차 검증 정확도 (템플릿 형태인지 / other인지 판정 기준)"""
+    correct = 0
+    for fold in range(folds):
+        train = [example for i, example in enumerate(examples) if i % folds != fold]
+        test = [example for i, example in enumerate(examples) if i % folds == fold]
+        model = IntentClassifier.train(train)
+        for question, intent in test:
+            predicted, _ = model.predict(question)
+            correct += (predicted == "other") == (intent == "other")
+    return correct / len(examples)
+
+def evaluate_held_out(model, model_path, thresholds=(0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9)):
+    """보류 예시 정확도와 기준 확신도별 템플릿 처리율/오처리 수
+
+    처리율: total/breakdown 보류 예시 중 템플릿으로 답한 비율 (나머지는 Claude가 처리하므로 느릴 뿐 틀리지 않음)
+    오처리: other 보류 예시를 템플릿으로 답한 수 (잘못된 답이 되므로 0이어야 함)
+    """
+    correct = sum(
+        (model.predict(question)[0] == "other") == (intent == "other") for question, intent in HELD_OUT_EXAMPLES
+    )
+    print(f"보류 예시 {len(HELD_OUT_EXAMPLES)}개, 정확도 {correct / len(HELD_OUT_EXAMPLES):.1%}")
+
+    templated = [question for question, intent in HELD_OUT_EXAMPLES if intent != "other"]
+    others = [question for question, intent in HELD_OUT_EXAMPLES if intent == "other"]
+    for threshold in thresholds:
+        router = IntentTemplateRouter(
+            model_path, get_full_table_name(), min_confidence=threshold, wildcard_table=get_wildcard_table_name()
+        )
+        hits = sum(router.match(question) is not None for question in templated)
+        false_hits = [question for question in others if router.match(question) is not None]
+        marker = " <- INTENT_MIN_CONFIDENCE" if abs(threshold - INTENT_MIN_CONFIDENCE) < 1e-9 else ""
+        print(f"  기준 {threshold:.2f}: 처리 {hits}/{len(templated)}, 오처리 {len(false_hits)} {false_hits}{marker}")
+
+def main():
+    output_path = sys.argv[1] if len(sys.argv) > 1 else INTENT_MODEL_PATH
+    examples = training_examples()
+    print(f"학습 예시 {len(examples)}개, 교차 검증 정확도 {cross_validate(examples):.1%}")
+
+    model = IntentClassifier.train(examples)
+    model.save(output_path)
+    print(f"저장: {output_path} (어휘 {model.vocabulary_size}개, {os.path.getsize(output_path) / 1024:.0f}KB)")
+    evaluate_held_out(model, output_path)
+
+    # 학습 예시별 템플릿 결과 확인
+    router = IntentTemplateRouter(
+        output_path, get_full_table_name(), min_confidence=INTENT_MIN_CONFIDENCE, wildcard_table=get_wildcard_table_name()
+    )
+    hits = 0
+    start = time.perf_counter()
+    for question, intent in examples:
+        match = router.match(question)
+        if match is not None:
+            hits += 1
+            print(f"  [{match.intent} {match.confidence:.2f}] {question}\n      {match.sql}")
+        elif intent != "other":
+            print(f"  [LLM] {question}")
+    elapsed = (time.perf_counter() - start) / len(examples)
+    print(f"템플릿 처리 {hits}/{len(examples)}개, 질문당 평균 {elapsed * 1000:.2f}ms")
+
+if __name__ == '__main__':
+    main()
@@ -26,6 +26,7 @@ function displayStructuredResults(data) {
             <div class="table-container">
                 ${createTableWithPagination(data.data)}
             </div>
+            ${truncatedDataNote(data)}
         </div>
 
         <div class="tab-content" id="tab-query">
@@ -67,7 +68,7 @@ function displayStructuredResults(data) {
     
     // 차트 생성
     if (data.chart_config) {
-        setTimeout(() => createChart(data.data, data.chart_config), 100);
+        setTimeout(() => createChart(data.data, data.chart_config, data.chart_data), 100);
     }
 }
 
@@ -197,9 +198,23 @@ function showTab(tabName) {
 }
 
 // 차트 생성 함수
-function createChart(data, config) {
+// chartPayload: 서버에서 준비한 차트용 배열 (labels/datasets, 다운샘플링 완료)
+function createChart(data, config, chartPayload) {
     const canvas = document.getElementById('analysisChart');
-    if (!canvas || !data || data.length === 0) return;
+    if (!canvas) return;
+    if (!chartPayload && (!data || data.length === 0)) return;
+    
+    // 라벨/시리즈 값 (서버 준비 데이터 우선, 없으면 원본 행에서 추출)
+    const chartLabels = limit => chartPayload
+        ? chartPayload.labels.map(label => String(label))
+        : data.slice(0, limit).map(row => String(row[config.label_column]));
+    const chartValues = (col, limit) => {
+        if (chartPayload) {
+            const dataset = chartPayload.datasets.find(d => d.label === col);
+            return dataset ? dataset.data.map(v => Number(v) || 0) : [];
+        }
+        return data.slice(0, limit).map(row => Number(row[col]) || 0);
+    };
     
     // 기존 차트 제거
     if (currentChart) {
@@ -245,15 +260,17 @@ function createChart(data, config) {
         }
     };
     
-    if (config.type === 'bar' && config.label_column && config.value_column) {
+    const valueColumns = config.value_columns || (config.value_column ? [config.value_column] : []);
+    
+    if (config.type === 'bar' && config.label_column && valueColumns.length === 1) {
         // 막대 차트
-        const labels = data.slice(0, 20).map(row => String(row[config.label_column])); // 상위 20개만
-        const values = data.slice(0, 20).map(row => Number(row[config.value_column]) || 0);
+        const labels = chartLabels(20); // 상위 20개만
+        const values = chartValues(valueColumns[0], 20);
         
         chartData = {
             labels: labels,
             datasets: [{
-                label: config.value_column,
+                label: valueColumns[0],
                 data: values,
                 backgroundColor: [
                     'rgba(66, 133, 244, 0.8)',
@@ -328,10 +345,11 @@ function createChart(data, config) {
             }
         };
         
-    } else if (config.type === 'line' && config.label_column && config.value_columns) {
-        // 선 차트 (다중 데이터)
-        const labels = data.slice(0, 50).map(row => String(row[config.label_column])); // 상위 50개
-        const datasets = config.value_columns.map((col, index) => {
+    } else if (config.label_column && valueColumns.length > 0) {
+        // 선 차트 (시계열) 또는 다중 시리즈 차트
+        const labels = chartLabels(50); // 상위 50개
+        const dense = labels.length > 100; // 점이 많으면 점 표시 생략
+        const datasets = valueColumns.map((col, index) => {
             const colors = [
                 'rgba(66, 133, 244, 1)',
                 'rgba(52, 168, 83, 1)',
@@ -342,7 +360,7 @@ function createChart(data, config) {
             
             return {
                 label: col,
-                data: data.slice(0, 50).map(row => Number(row[col]) || 0),
+                data: chartValues(col, 50),
                 borderColor: colors[index % colors.length],
                 backgroundColor: colors[index % colors.length].replace('1)', '0.1)'),
                 tension: 0.4,
@@ -350,7 +368,7 @@ function createChart(data, config) {
                 pointBackgroundColor: colors[index % colors.length],
                 pointBorderColor: '#fff',
                 pointBorderWidth: 2,
-                pointRadius: 4,
+                pointRadius: dense ? 0 : 4,
                 pointHoverRadius: 6
             };
         });
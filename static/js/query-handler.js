@@ -1,6 +1,25 @@
 // query-handler.js - 쿼리 실행 및 분석 처리
 
-// 단순 조회 실행
+// 대화 세션 ID (후속 질문을 직전 결과에서 처리하기 위해 요청마다 전송)
+const SESSION_ID = (window.crypto && crypto.randomUUID)
+    ? crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
+// 직전 결과에서 처리된 응답 표시
+function localAnswerNote(data) {
+    return data.answered_locally
+        ? '<div class="text-xs text-gray-500 mt-2">⚡ 이전 조회 결과에서 바로 처리했습니다.</div>'
+        : '';
+}
+
+// 결과가 커서 앞부분만 응답에 포함된 경우 안내
+function truncatedDataNote(data) {
+    return data.data_truncated
+        ? `<div class="text-xs text-gray-500 mt-2">📄 결과가 커서 앞 ${data.data.length.toLocaleString()}행만 표시합니다. 전체 ${data.row_count.toLocaleString()}행은 CSV/Parquet으로 다운로드하세요.</div>`
+        : '';
+}
+
+// 단순 조회 실행 (캐시/템플릿 적중은 수십 ms에 끝나므로 동기 엔드포인트로 바로 요청)
 async function executeSimpleQuery(question) {
     const messageId = addAssistantMessage('', true);
     
@@ -10,29 +29,26 @@ async function executeSimpleQuery(question) {
         const response = await fetch('/quick', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ question: question })
+            body: JSON.stringify({ question: question, session_id: SESSION_ID })
         });
         
         const data = await response.json();
         
         if (response.ok && data.success) {
-            updateMessage(messageId, `
-                ✅ SQL 쿼리가 생성되었습니다:
-                <div class="bg-gray-100 border border-gray-200 rounded-lg p-3 my-3 overflow-x-auto">
-                    <code class="text-sm font-mono whitespace-pre-wrap">${escapeHtml(data.generated_sql)}</code>
-                </div>
-                데이터를 조회하고 있습니다...
-            `);
-            
-            await sleep(1000);
-            
             updateMessage(messageId, `
                 ✅ 조회가 완료되었습니다. (총 ${data.row_count}개 결과)
                 <div class="bg-gray-100 border border-gray-200 rounded-lg p-3 my-3 overflow-x-auto">
                     <code class="text-sm font-mono whitespace-pre-wrap">${escapeHtml(data.generated_sql)}</code>
                 </div>
                 <div class="mt-4">${createTable(data.data)}</div>
+                ${localAnswerNote(data)}
+                ${truncatedDataNote(data)}
+                <div class="flex gap-2 my-4">
+                    <button onclick="exportResults('${messageId}', 'csv')" class="analysis-btn">📥 CSV 다운로드</button>
+                    <button onclick="exportResults('${messageId}', 'parquet')" class="analysis-btn">📦 Parquet 다운로드</button>
+                </div>
             `);
+            exportRequests[messageId] = { question: question, token: data.export_token };
             
         } else {
             updateMessage(messageId, `❌ 오류가 발생했습니다: ${data.error || '쿼리 생성에 실패했습니다.'}`);
@@ -43,6 +59,15 @@ async function executeSimpleQuery(question) {
     }
 }
 
+// 미리보기 안내 문구
+function previewLabel(preview) {
+    if (preview.complete) {
+        return `조회가 끝났습니다. 전체 ${preview.row_count.toLocaleString()}개 중 앞부분을 표시합니다. 결과를 정리하고 있습니다...`;
+    }
+    const source = preview.sampled ? '일부 데이터 표본의 ' : '';
+    return `미리보기: ${source}처음 ${preview.row_count.toLocaleString()}개 행입니다. 전체 결과를 기다리고 있습니다...`;
+}
+
 // 구조화 분석 실행
 async function executeStructuredAnalysis(question) {
     const messageId = addAssistantMessage('', true);
@@ -53,7 +78,7 @@ async function executeStructuredAnalysis(question) {
         const response = await fetch('/analyze', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ question: question })
+            body: JSON.stringify({ question: question, session_id: SESSION_ID })
         });
         
         const data = await response.json();
@@ -66,6 +91,7 @@ async function executeStructuredAnalysis(question) {
                     <div class="text-sm leading-relaxed">${parseMarkdown(data.analysis_report)}</div>
                 </div>
                 <div class="mt-4">${createTable(data.data)}</div>
+                ${localAnswerNote(data)}
             `);
         } else {
             updateMessage(messageId, `❌ 분석 오류: ${data.error || '구조화 분석에 실패했습니다.'}`);
@@ -83,15 +109,20 @@ async function executeCreativeAnalysis(question) {
     try {
         updateMessage(messageId, '창의적 HTML 리포트를 생성하고 있습니다...');
         
-        const response = await fetch('/creative-html', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ question: question })
+        // 오래 걸리는 작업이므로 비동기 작업으로 등록 후 상태를 폴링
+        // (조회가 늦으면 미리보기 행을 먼저 보여 주고 리포트가 준비되면 교체)
+        let previewRows = '';
+        const data = await runAnalysisJob(question, 'creative_html', stage => {
+            updateMessage(messageId, `창의적 HTML 리포트를 생성하고 있습니다... (${JOB_STAGE_LABELS[stage] || stage})${previewRows}`);
+        }, 1500, preview => {
+            previewRows = `
+                <div class="text-xs text-gray-500 mt-4">⏳ ${previewLabel(preview)}</div>
+                <div class="mt-2">${createTable(preview.rows)}</div>
+            `;
+            updateMessage(messageId, `창의적 HTML 리포트를 생성하고 있습니다...${previewRows}`);
         });
         
-        const data = await response.json();
-        
-        if (response.ok && data.success) {
+        if (data.success) {
             updateMessage(messageId, `
                 ✅ 창의적 HTML 리포트가 생성되었습니다.
                 <div class="flex gap-2 my-4">
@@ -123,6 +154,91 @@ async function executeCreativeAnalysis(question) {
     }
 }
 
+// 비동기 작업 단계 표시 문구
+const JOB_STAGE_LABELS = {
+    queued: '대기 중',
+    started: '시작',
+    sql_generation: 'SQL 생성',
+    query_execution: '데이터 조회',
+    sql_repair: 'SQL 자동 수정',
+    local_query: '이전 결과에서 조회',
+    report_generation: '리포트 작성',
+    html_generation: 'HTML 생성',
+    completed: '완료',
+    cancelled: '취소됨'
+};
+
+// 진행 중인 비동기 작업 (페이지를 떠나면 취소 요청을 보내 BigQuery 작업도 중단)
+const activeJobIds = new Set();
+
+window.addEventListener('pagehide', () => {
+    activeJobIds.forEach(jobId => navigator.sendBeacon(`/jobs/${jobId}/cancel`));
+});
+
+// 비동기 작업 등록 후 완료될 때까지 폴링하여 결과 반환
+// (실행 중 미리보기 행이 새로 오면 onPreview 호출)
+async function runAnalysisJob(question, mode, onStage, pollIntervalMs = 1500, onPreview = null) {
+    const response = await fetch('/jobs', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ question: question, mode: mode, session_id: SESSION_ID })
+    });
+    const job = await response.json();
+    if (!response.ok || !job.success) {
+        return { success: false, error: job.error || '작업 등록에 실패했습니다.' };
+    }
+    
+    activeJobIds.add(job.job_id);
+    let lastPreview = null;
+    try {
+        while (true) {
+            await sleep(pollIntervalMs);
+            const statusResponse = await fetch(job.status_url);
+            const status = await statusResponse.json();
+            if (!statusResponse.ok || !status.success) {
+                return { success: false, error: status.error || '작업 상태 조회에 실패했습니다.' };
+            }
+            if (['completed', 'failed', 'cancelled'].includes(status.status)) {
+                return status.result || { success: false, error: status.error };
+            }
+            if (onStage) onStage(status.stage);
+            if (onPreview && status.preview) {
+                const key = `${status.preview.complete}:${status.preview.row_count}`;
+                if (key !== lastPreview) {
+                    lastPreview = key;
+                    onPreview(status.preview);
+                }
+            }
+        }
+    } finally {
+        activeJobIds.delete(job.job_id);
+    }
+}
+
+// 결과 파일 내보내기 (응답 메시지 ID별 질문/내보내기 토큰)
+const exportRequests = {};
+
+// 폼 제출로 /export를 호출하여 브라우저가 스트리밍 응답을 바로 파일로 저장하도록 함
+window.exportResults = function(messageId, format) {
+    const target = exportRequests[messageId];
+    if (!target) return;
+    
+    const form = document.createElement('form');
+    form.method = 'POST';
+    form.action = '/export';
+    const fields = { format: format, export_token: target.token || '', question: target.question, session_id: SESSION_ID };
+    Object.entries(fields).forEach(([name, value]) => {
+        const input = document.createElement('input');
+        input.type = 'hidden';
+        input.name = name;
+        input.value = value;
+        form.appendChild(input);
+    });
+    document.body.appendChild(form);
+    form.submit();
+    document.body.removeChild(form);
+};
+
 // HTML 리포트 관련 함수들
 window.openHtmlInNewWindow = function() {
     if (window.currentHtmlReport) {
@@ -0,0 +1,163 @@
+# tests/test_summary_tables.py
+"""
+요약 테이블 SQL 매칭(parse_aggregate_sql)과 재작성(rewrite_sql) 테스트
+
+템플릿 SQL(intent_templates.build_sql)로 만든 쿼리는 인식하고, 조금이라도 다른 쿼리는
+재작성하지 않는지 확인한다.
+"""
+
+import pytest
+
+from utils.intent_templates import build_sql, extract_slots
+from utils.summary_tables import parse_aggregate_sql, rewrite_sql, summary_key
+
+BASE = "`proj.analytics_1.events_20201121`"
+WILDCARD = "`proj.analytics_1.events_*`"
+SUMMARY = "proj.analytics_1.nlq_summary_country"
+
+def template_sql(question, table=BASE, wildcard_table=None):
+    slots = extract_slots(question)
+    assert slots is not None, question
+    return build_sql(slots, table, wildcard_table)
+
+def test_parses_breakdown_template():
+    parsed = parse_aggregate_sql(template_sql("국가별 사용자 수 상위 5개"), BASE)
+    assert parsed == {
+        "metric": "users",
+        "metric_out": "users",
+        "dimension": "country",
+        "dimension_out": "country",
+        "share_out": None,
+        "event": None,
+        "dates": None,
+        "order": ("users", "DESC"),
+        "limit": 5
+    }
+    assert summary_key(parsed) == "country"
+
+def test_parses_total_with_event_and_date_range():
+    sql = template_sql("2020-11-01부터 2020-11-07까지 purchase 이벤트의 총 매출")
+    parsed = parse_aggregate_sql(sql, BASE)
+    assert parsed["metric"] == "revenue_usd"
+    assert parsed["dimension"] is None
+    assert parsed["event"] == "purchase"
+    assert parsed["dates"] == ["20201101", "20201107"]
+    assert summary_key(parsed) == "event"
+
+def test_parses_share_and_hour_dimension():
+    sql = (
+        f"SELECT EXTRACT(HOUR FROM TIMESTAMP_MICROS(event_timestamp)) AS hour, COUNT(*) AS event_count, "
+        f"ROUND(100 * COUNT(*) / SUM(COUNT(*)) OVER (), 2) AS share_pct FROM {BASE} "
+        f"WHERE event_name = 'page_view' GROUP BY hour ORDER BY hour;"
+    )
+    parsed = parse_aggregate_sql(sql, BASE)
+    assert parsed["dimension"] == "hour"
+    assert parsed["share_out"] == "share_pct"
+    assert parsed["event"] == "page_view"
+    assert parsed["order"] == ("hour", "ASC")
+
+def test_ignores_comments_whitespace_and_case():
+    sql = f"-- 국가별 사용자\nselect geo.country as country,\n  count(distinct user_pseudo_id) as users\nfrom {BASE}\ngroup by 1"
+    parsed = parse_aggregate_sql(sql, BASE)
+    assert parsed is not None
+    assert parsed["dimension"] == "country"
+    assert parsed["order"] is None
+
+@pytest.mark.parametrize("sql", [
+    # 다른 테이블
+    "SELECT COUNT(*) AS event_count FROM `proj.analytics_1.events_20201122`",
+    # 조인
+    f"SELECT COUNT(*) AS event_count FROM {BASE} JOIN `proj.other.t` USING (user_pseudo_id)",
+    # 식이 붙은 LIMIT / OFFSET
+    f"SELECT geo.country AS country, COUNT(*) AS event_count FROM {BASE} GROUP BY country LIMIT 5 OFFSET 5",
+    # 별칭 없는 지표
+    f"SELECT COUNT(*) FROM {BASE}",
+    # 인식하지 못하는 조건
+    f"SELECT COUNT(*) AS event_count FROM {BASE} WHERE platform = 'WEB'",
+    f"SELECT COUNT(*) AS event_count FROM {BASE} WHERE event_name = 'purchase' OR event_name = 'page_view'",
+    # 차원과 GROUP BY 불일치
+    f"SELECT geo.country AS country, COUNT(*) AS event_count FROM {BASE} GROUP BY geo.city",
+    # 차원 없이 GROUP BY
+    f"SELECT COUNT(*) AS event_count FROM {BASE} GROUP BY event_name",
+    # 지표 두 개
+    f"SELECT COUNT(*) AS event_count, COUNT(DISTINCT user_pseudo_id) AS users FROM {BASE}",
+    # 정렬 기준이 출력 컬럼이 아님
+    f"SELECT geo.country AS country, COUNT(*) AS event_count FROM {BASE} GROUP BY country ORDER BY geo.city",
+    # 서브쿼리/CTE
+    f"WITH t AS (SELECT * FROM {BASE}) SELECT COUNT(*) AS event_count FROM t",
+    f"SELECT COUNT(*) AS event_count FROM (SELECT * FROM {BASE})"
+])
+def test_rejects_unsupported_shapes(sql):
+    assert parse_aggregate_sql(sql, BASE) is None
+
+def test_table_suffix_only_on_wildcard_table():
+    sql = (
+        f"SELECT COUNT(*) AS event_count FROM {WILDCARD} "
+        f"WHERE _TABLE_SUFFIX BETWEEN '20201101' AND '20201130'"
+    )
+    assert parse_aggregate_sql(sql, WILDCARD) is None
+    parsed = parse_aggregate_sql(sql, WILDCARD, sharded=True)
+    assert parsed["dates"] == ["20201101", "20201130"]
+
+def test_dated_template_targets_wildcard_table():
+    sql = template_sql("2020-11-01부터 2020-11-07까지 국가별 purchase 이벤트 수", BASE, WILDCARD)
+    assert f"FROM {WILDCARD} WHERE event_name = 'purchase' AND _TABLE_SUFFIX BETWEEN" in sql
+    parsed = parse_aggregate_sql(sql, WILDCARD, sharded=True)
+    assert parsed["dates"] == ["20201101", "20201107"]
+    assert parsed["event"] == "purchase"
+    assert parse_aggregate_sql(template_sql("국가별 이벤트 수", BASE, WILDCARD), BASE) is not None
+
+def test_rewrite_breakdown_uses_all_events_rows():
+    parsed = parse_aggregate_sql(template_sql("국가별 이벤트 수 상위 10개"), BASE)
+    sql, exact = rewrite_sql(parsed, SUMMARY)
+    assert exact
+    assert sql == (
+        f"SELECT country AS country, COALESCE(SUM(event_count), 0) AS event_count FROM `{SUMMARY}` "
+        f"WHERE all_events = 1 GROUP BY country ORDER BY event_count DESC LIMIT 10;"
+    )
+
+def test_rewrite_event_filter_uses_event_rows():
+    parsed = parse_aggregate_sql(template_sql("국가별 purchase 이벤트 수"), BASE)
+    sql, exact = rewrite_sql(parsed, SUMMARY)
+    assert exact
+    assert "all_events = 0 AND event_name = 'purchase'" in sql
+
+def test_rewrite_revenue_keeps_null_semantics():
+    parsed = parse_aggregate_sql(template_sql("purchase 이벤트의 총 매출"), BASE)
+    sql, exact = rewrite_sql(parsed, "proj.analytics_1.nlq_summary_event")
+    assert exact
+    assert "SUM(revenue_usd) AS revenue_usd" in sql
+    assert "COALESCE" not in sql
+
+def test_rewrite_distinct_needs_single_date_or_approximation():
+    parsed = parse_aggregate_sql(template_sql("국가별 사용자 수"), BASE)
+    assert rewrite_sql(parsed, SUMMARY) == (None, False)
+
+    sql, exact = rewrite_sql(parsed, SUMMARY, single_date=True)
+    assert exact
+    assert "COALESCE(SUM(users), 0) AS users" in sql
+
+    sql, exact = rewrite_sql(parsed, SUMMARY, approximate_distinct=True)
+    assert not exact
+    assert "HLL_COUNT.MERGE(users_sketch)" in sql
+
+def test_rewrite_distinct_exact_for_one_date_filter():
+    sql = template_sql("2020-11-21 국가별 사용자 수")
+    parsed = parse_aggregate_sql(sql, BASE)
+    routed, exact = rewrite_sql(parsed, SUMMARY)
+    assert exact
+    assert "event_date = '20201121'" in routed
+
+def test_rewrite_share_and_range_filter():
+    parsed = parse_aggregate_sql(
+        f"SELECT geo.country AS country, COUNT(*) AS event_count, "
+        f"ROUND(100 * COUNT(*) / SUM(COUNT(*)) OVER (), 2) AS share_pct FROM {BASE} "
+        f"WHERE event_date BETWEEN '20201101' AND '20201107' GROUP BY country",
+        BASE
+    )
+    sql, exact = rewrite_sql(parsed, SUMMARY)
+    assert exact
+    assert (
+        "ROUND(100 * COALESCE(SUM(event_count), 0) / SUM(COALESCE(SUM(event_count), 0)) OVER (), 2) AS share_pct"
+    ) in sql
+    assert "event_date BETWEEN '20201101' AND '20201107'" in sql
@@ -0,0 +1,220 @@
+# utils/admission.py
+"""
+외부 백엔드(Anthropic, BigQuery) 호출 앞단의 승인 제어(admission control)
+
+- 백엔드별 전역 동시 실행 수 제한 (세마포어) + 크기가 제한된 대기열과 대기 마감 시간
+- 클라이언트별 토큰 버킷 요청 속도 제한
+- 백엔드가 429/할당량 오류를 돌려주면 Retry-After 동안 모든 스레드가 새 호출을 멈춤
+
+처리할 수 없는 요청은 스레드에 쌓아두지 않고 AdmissionRejected(429/503)로 바로 거절한다.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .metrics import metrics
+
+class AdmissionRejected(Exception):
+    """요청을 받아들일 수 없을 때 발생 (status_code: 429 또는 503)"""
+
+    def __init__(self, message, status_code=503, retry_after=1):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = max(1, int(round(retry_after)))
+
+def parse_retry_after(value, default=5.0):
+    """Retry-After 헤더 값(초 또는 HTTP 날짜) → 대기 초"""
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        from email.utils import parsedate_to_datetime
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+class TokenBucket:
+    """초당 rate개씩 채워지는 최대 capacity개 토큰 버킷"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def try_acquire(self, now=None):
+        """토큰 하나 사용 → (성공 여부, 다음 토큰까지 대기 초)"""
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+class ClientRateLimiter:
+    """클라이언트(IP 등)별 토큰 버킷 (최근 사용 max_clients개만 보관)"""
+
+    def __init__(self, requests_per_minute=30, burst=10, max_clients=10000):
+        self.rate = requests_per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, client_id):
+        """요청 허용 여부 확인 (초과 시 AdmissionRejected 429)"""
+        with self._lock:
+            bucket = self._buckets.get(client_id)
+            if bucket is None:
+                bucket = self._buckets[client_id] = TokenBucket(self.rate, self.burst)
+                while len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client_id)
+            allowed, wait = bucket.try_acquire()
+
+        if not allowed:
+            metrics.increment("admission.client.rejected")
+            raise AdmissionRejected(
+                "요청이 너무 많습니다. 잠시 후 다시 시도해주세요.", status_code=429, retry_after=wait
+            )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tracked_clients": len(self._buckets),
+                "requests_per_minute": round(self.rate * 60, 1),
+                "burst": self.burst
+            }
+
+class BackendGate:
+    """백엔드 하나의 동시 실행 제한 + 제한된 대기열 + Retry-After 백오프"""
+
+    def __init__(self, name, max_concurrent=4, max_waiting=16, max_wait_seconds=15.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self._cooldown_until = 0.0
+
+    def _reject(self, reason, retry_after):
+        metrics.increment(f"admission.{self.name}.rejected.{reason}")
+        raise AdmissionRejected(
+            f"{self.name} 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            status_code=503, retry_after=retry_after
+        )
+
+    def acquire(self, deadline=None):
+        """실행 슬롯 획득
+
+        마감 시간 안에 슬롯이 나거나 백오프가 끝날 때까지만 기다리고, 대기열이 가득
+        찼거나 마감 시간 안에 처리할 수 없으면 바로 AdmissionRejected(503)를 발생시킨다.
+        """
+        now = started = time.monotonic()
+        deadline = min(deadline or float("inf"), now + self.max_wait_seconds)
+
+        with self._cond:
+            if self._cooldown_until >= deadline:
+                self._reject("cooldown", self._cooldown_until - now)
+            if self._cooldown_until <= now and self._running < self.max_concurrent and self._waiting == 0:
+                self._running += 1
+                return
+            if self._waiting >= self.max_waiting:
+                self._reject("queue_full", self.max_wait_seconds)
+
+            self._waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._cooldown_until >= deadline:
+                        self._reject("cooldown", self._cooldown_until - now)
+                    if self._cooldown_until <= now and self._running < self.max_concurrent:
+                        break
+                    if now >= deadline:
+                        self._reject("timeout", self.max_wait_seconds)
+                    wake_at = self._cooldown_until if self._cooldown_until > now else deadline
+                    self._cond.wait(min(wake_at, deadline) - now)
+                self._running += 1
+            finally:
+                self._waiting -= 1
+            metrics.observe(f"admission.{self.name}.wait", time.monotonic() - started)
+
+    def release(self):
+        with self._cond:
+            self._running -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self, deadline=None):
+        """with 문으로 실행 슬롯 사용"""
+        self.acquire(deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def note_backoff(self, seconds):
+        """백엔드의 429/할당량 응답 → seconds 동안 새 호출 차단"""
+        with self._cond:
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + seconds)
+        metrics.increment(f"admission.{self.name}.backoff")
+        print(f"{self.name} 백오프: {seconds:.1f}초 동안 새 호출 중단")
+
+    def cooldown_remaining(self):
+        return max(0.0, self._cooldown_until - time.monotonic())
+
+    def stats(self):
+        with self._cond:
+            return {
+                "running": self._running,
+                "waiting": self._waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_waiting": self.max_waiting,
+                "cooldown_seconds": round(self.cooldown_remaining(), 1)
+            }
+
+class AdmissionController:
+    """백엔드 게이트와 클라이언트 속도 제한 모음"""
+
+    def __init__(self, gates, client_limiter=None, enabled=True):
+        self.gates = {gate.name: gate for gate in gates}
+        self.client_limiter = client_limiter
+        self.enabled = enabled
+
+    def check_client(self, client_id):
+        if self.enabled and self.client_limiter is not None:
+            self.client_limiter.check(client_id)
+
+    @contextmanager
+    def slot(self, backend, deadline=None):
+        """백엔드 실행 슬롯 (비활성화 시 제한 없음)"""
+        if not self.enabled:
+            yield
+            return
+        with self.gates[backend].slot(deadline):
+            yield
+
+    def note_backoff(self, backend, seconds):
+        if self.enabled:
+            self.gates[backend].note_backoff(seconds)
+
+    def stats(self):
+        snapshot = metrics.snapshot("admission.")
+        return {
+            "enabled": self.enabled,
+            "backends": {name: gate.stats() for name, gate in self.gates.items()},
+            "clients": self.client_limiter.stats() if self.client_limiter else None,
+            "counters": snapshot["counters"],
+            "wait": snapshot["latency"]
+        }
@@ -0,0 +1,266 @@
+# utils/bigquery_jobs.py
+"""
+BigQuery 작업 수명 관리: 요청 단위 마감 시간, 취소, 작업 라벨
+
+요청(또는 비동기 작업)마다 QueryContext를 contextvars로 설정해 두면, 그 안에서 실행되는
+BigQuery 작업은
+- 모드/질문 해시/단계 라벨이 붙어 슬롯 사용량을 요청 종류별로 집계할 수 있고
+  (요약 테이블/샤드별 캐시로 처리한 실행에는 원래 쿼리 형태와 실행 ID 라벨이 더 붙는다)
+- 결과를 기다리는 동안 poll_interval마다 취소 조건(클라이언트 연결 종료, 작업 취소 요청,
+  요청 마감 시간 초과)을 확인하여 해당하면 작업을 취소하고 QueryCancelled를 발생시킨다.
+"""
+
+import contextvars
+import hashlib
+import re
+import select
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+
+from .circuit_breaker import CallTimeout
+from .metrics import metrics
+from .stale_cache import normalize_question
+
+# 취소 사유별 HTTP 상태 코드 (499: 클라이언트가 요청을 닫음)
+_STATUS_BY_REASON = {"deadline": 504, "client_disconnected": 499, "job_cancelled": 499, "job_abandoned": 499}
+
+_MESSAGE_BY_REASON = {
+    "deadline": "요청 처리 시간 한도를 넘어 BigQuery 작업을 취소했습니다. 질문 범위를 좁혀 다시 시도해주세요.",
+    "client_disconnected": "클라이언트 연결이 끊어져 BigQuery 작업을 취소했습니다.",
+    "job_cancelled": "작업 취소 요청으로 BigQuery 작업을 취소했습니다.",
+    "job_abandoned": "작업 상태 조회가 끊겨 (클라이언트 이탈) BigQuery 작업을 취소했습니다."
+}
+
+_LABEL_INVALID = re.compile(r"[^a-z0-9_-]")
+
+class QueryCancelled(Exception):
+    """취소 조건(클라이언트 연결 종료, 작업 취소, 요청 마감 시간)으로 쿼리를 중단했을 때 발생"""
+
+    def __init__(self, reason):
+        super().__init__(_MESSAGE_BY_REASON.get(reason, f"BigQuery 작업을 취소했습니다. ({reason})"))
+        self.reason = reason
+        self.status_code = _STATUS_BY_REASON.get(reason, 499)
+
+def label_value(text):
+    """BigQuery 라벨 값 형식으로 변환 (소문자/숫자/_/-, 최대 63자)"""
+    return _LABEL_INVALID.sub("_", str(text or "").lower())[:63] or "none"
+
+def question_hash(question):
+    """라벨용 질문 해시 (정규화된 질문 sha256 앞 16자리)"""
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()[:16]
+
+class QueryContext:
+    """요청 하나의 BigQuery 작업 라벨, 마감 시간, 작업별 최대 실행 시간, 취소 조건
+
+    preview는 결과를 받을 수 있는 곳(비동기 작업 상태)이 있을 때 미리보기 행을 전달할 콜백이다.
+    """
+
+    def __init__(self, mode, question, timeout=None, job_timeout=None, cancel_check=None, preview=None):
+        self.mode = mode
+        self.question = question
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.job_timeout = job_timeout
+        self.cancel_check = cancel_check
+        self.preview = preview
+
+    def labels(self, stage):
+        return {
+            "app": "nlq",
+            "mode": label_value(self.mode),
+            "question_hash": question_hash(self.question),
+            "stage": label_value(stage)
+        }
+
+    def remaining(self):
+        """마감 시간까지 남은 초 (마감 시간이 없으면 None)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel_reason(self):
+        """취소해야 하면 사유, 아니면 None"""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return "deadline"
+        if self.cancel_check is not None:
+            reason = self.cancel_check()
+            if reason:
+                return reason if isinstance(reason, str) else "client_disconnected"
+        return None
+
+    def check(self):
+        """취소 조건이면 QueryCancelled"""
+        reason = self.cancel_reason()
+        if reason:
+            metrics.increment(f"request.cancelled.{reason}")
+            raise QueryCancelled(reason)
+
+_current = contextvars.ContextVar("bigquery_query_context", default=None)
+_route = contextvars.ContextVar("bigquery_route_labels", default=None)
+
+def current_query_context():
+    """현재 요청의 QueryContext (없으면 None)"""
+    return _current.get()
+
+@contextmanager
+def query_context(mode, question, timeout=None, job_timeout=None, cancel_check=None, preview=None):
+    """with 문 안에서 실행되는 BigQuery 작업에 적용할 QueryContext 설정"""
+    context = QueryContext(mode, question, timeout, job_timeout, cancel_check, preview)
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+@contextmanager
+def routed_execution(shape):
+    """with 문 안에서 실행되는 작업에 원래 쿼리 형태(routed_from)와 실행 ID(route_id) 라벨을 붙임
+
+    요약 테이블/샤드별 캐시로 처리한 실행 한 번은 작업이 여러 개일 수 있으므로, 작업 이력에서
+    실행 ID로 묶어 원본 테이블 실행 한 번과 비교한다.
+    """
+    token = _route.set({"routed_from": label_value(shape), "route_id": uuid.uuid4().hex[:16]})
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+def query_labels(stage, context=None):
+    """작업 라벨 (컨텍스트가 없으면 단계 라벨만)"""
+    context = context or current_query_context()
+    if context is None:
+        labels = {"app": "nlq", "stage": label_value(stage)}
+    else:
+        labels = context.labels(stage)
+    return {**labels, **(_route.get() or {})}
+
+def effective_timeout(timeout, context=None):
+    """작업 타임아웃, 모드별 작업 최대 실행 시간, 요청 마감 시간 중 가장 짧은 값 (초)"""
+    context = context or current_query_context()
+    if context is None:
+        return timeout
+    limits = [value for value in (timeout, context.job_timeout, context.remaining()) if value is not None]
+    return min(limits) if limits else None
+
+def check_cancelled(context=None):
+    """현재 요청이 취소 조건이면 QueryCancelled (단계 사이에서 호출)"""
+    context = context or current_query_context()
+    if context is not None:
+        context.check()
+
+def _cancel_job(query_job, reason):
+    try:
+        query_job.cancel()
+    except Exception as e:
+        print(f"BigQuery 작업 취소 실패 ({getattr(query_job, 'job_id', '?')}): {e}")
+    metrics.increment(f"bigquery.cancelled.{reason}")
+    print(f"BigQuery 작업 취소 ({getattr(query_job, 'job_id', '?')}): {reason}")
+
+def wait_for_job(query_job, timeout, poll_interval=1.0, context=None):
+    """작업 완료 대기 → 결과 반복자
+
+    poll_interval마다 요청의 취소 조건을 확인하고, 취소해야 하면 작업을 취소한 뒤
+    QueryCancelled를 발생시킨다. timeout초 안에 끝나지 않으면 작업을 취소하고
+    CallTimeout을 발생시킨다(서킷 브레이커에 백엔드 장애가 아닌 자체 타임아웃으로 기록됨).
+    """
+    context = context or current_query_context()
+    timeout_at = time.monotonic() + timeout if timeout else None
+
+    while True:
+        reason = context.cancel_reason() if context is not None else None
+        if reason:
+            _cancel_job(query_job, reason)
+            raise QueryCancelled(reason)
+
+        now = time.monotonic()
+        if timeout_at is not None and now >= timeout_at:
+            _cancel_job(query_job, "timeout")
+            raise CallTimeout(f"BigQuery 쿼리가 {timeout:.0f}초 안에 끝나지 않아 취소했습니다.")
+
+        wait = poll_interval if timeout_at is None else max(0.05, min(poll_interval, timeout_at - now))
+        try:
+            return query_job.result(timeout=wait)
+        except TimeoutError:
+            continue
+
+def socket_disconnect_checker(environ):
+    """WSGI 환경의 클라이언트 소켓으로 연결 종료 여부를 확인하는 함수 (확인할 수 없으면 None)
+
+    gunicorn은 environ["gunicorn.socket"]에 클라이언트 소켓을 넣어 준다. 요청 본문을 다 읽은
+    뒤 소켓이 읽기 가능한데 MSG_PEEK로 0바이트가 읽히면 클라이언트가 연결을 닫은 것이다.
+    프록시 뒤에서는 프록시가 연결을 유지하면 감지되지 않을 수 있다.
+    """
+    sock = environ.get("gunicorn.socket")
+    if sock is None:
+        return None
+
+    def disconnected():
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+            if not readable:
+                return False
+            return sock.recv(1, socket.MSG_PEEK) == b""
+        except (OSError, ValueError):
+            return True
+
+    return disconnected
+
+def lifecycle_stats():
+    """헬스 체크용 취소 횟수 (사유별: 실행 중 BigQuery 작업 취소 / 단계 사이 요청 중단)"""
+    def by_reason(prefix):
+        counters = metrics.snapshot(prefix)["counters"]
+        return {name[len(prefix):]: count for name, count in counters.items()}
+
+    return {
+        "jobs_cancelled": by_reason("bigquery.cancelled."),
+        "requests_cancelled": by_reason("request.cancelled.")
+    }
+
+def jobs_view(project, region):
+    """프로젝트의 작업 이력 뷰 (INFORMATION_SCHEMA.JOBS_BY_PROJECT, 작업이 실행된 리전 기준)"""
+    return f"`{project}`.`region-{label_value(region)}`.INFORMATION_SCHEMA.JOBS_BY_PROJECT"
+
+def labeled_jobs_sql(view, days, stage="query"):
+    """최근 days일 동안 이 앱이 실행해 성공한 작업 (라벨을 컬럼으로 펼침, 지정한 단계만)"""
+    def label(key):
+        return f"(SELECT value FROM UNNEST(labels) WHERE key = '{key}')"
+
+    return f"""
+SELECT * FROM (
+  SELECT
+    creation_time,
+    query,
+    total_bytes_processed,
+    TIMESTAMP_DIFF(end_time, start_time, MILLISECOND) / 1000 AS seconds,
+    {label('app')} AS app,
+    {label('mode')} AS mode,
+    {label('question_hash')} AS question_hash,
+    {label('stage')} AS stage,
+    {label('routed_from')} AS routed_from,
+    {label('route_id')} AS route_id
+  FROM {view}
+  WHERE creation_time >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {int(days)} DAY)
+    AND job_type = 'QUERY' AND state = 'DONE' AND error_result IS NULL
+)
+WHERE app = 'nlq' AND stage = '{label_value(stage)}'
+""".strip()
+
+def popular_queries_sql(view, days, limit, modes):
+    """모드/질문 해시별 실행 횟수 상위 limit개와 가장 최근 SQL (모든 인스턴스의 실행 기준)
+
+    요약 테이블/샤드별 캐시로 재작성한 작업은 앱이 실행하는 원래 SQL이 아니므로 제외한다.
+    """
+    mode_list = ", ".join(f"'{label_value(mode)}'" for mode in modes) or "''"
+    return f"""
+SELECT
+  mode,
+  question_hash,
+  COUNT(*) AS runs,
+  ARRAY_AGG(query ORDER BY creation_time DESC LIMIT 1)[OFFSET(0)] AS sql_query
+FROM ({labeled_jobs_sql(view, days)})
+WHERE question_hash IS NOT NULL AND routed_from IS NULL AND mode IN ({mode_list})
+GROUP BY mode, question_hash
+ORDER BY runs DESC
+LIMIT {int(limit)}
+""".strip()
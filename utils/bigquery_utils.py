@@ -0,0 +1,170 @@
+# utils/bigquery_utils.py
+"""
+BigQuery 쿼리 작성 및 결과 변환 유틸리티 함수들
+"""
+
+import re
+from decimal import Decimal
+
+# 스크립트 내부에서 메인 쿼리 결과를 담는 임시 테이블 이름
+PUSHDOWN_RESULT_TABLE = "__nlq_result"
+
+NUMERIC_FIELD_TYPES = {"INTEGER", "INT64", "FLOAT", "FLOAT64", "NUMERIC", "BIGNUMERIC"}
+CATEGORICAL_FIELD_TYPES = {"STRING", "BOOLEAN", "BOOL", "DATE", "DATETIME", "TIME", "TIMESTAMP"}
+
+def strip_trailing_semicolon(sql_query):
+    """쿼리 끝의 세미콜론 제거 (서브쿼리/스크립트 조합용)"""
+    return sql_query.strip().rstrip(';').strip()
+
+def _quote_identifier(name):
+    """컬럼 이름을 백틱으로 감싸기"""
+    return "`" + str(name).replace("`", "\\`") + "`"
+
+def classify_field(field):
+    """BigQuery 스키마 필드를 분석 타입(numeric/categorical/unknown)으로 분류"""
+    if getattr(field, 'mode', None) == 'REPEATED':
+        return "unknown"
+    field_type = (getattr(field, 'field_type', None) or "").upper()
+    if field_type in NUMERIC_FIELD_TYPES:
+        return "numeric"
+    if field_type in CATEGORICAL_FIELD_TYPES:
+        return "categorical"
+    return "unknown"
+
+def build_stats_aggregate_expressions(schema, top_k=5):
+    """결과 스키마로부터 컬럼별 집계 식 목록 생성"""
+    expressions = ["COUNT(*) AS row_count"]
+
+    for i, field in enumerate(schema):
+        col = _quote_identifier(field.name)
+        kind = classify_field(field)
+
+        if field.mode != 'REPEATED':
+            expressions.append(f"COUNTIF({col} IS NULL) AS c{i}_nulls")
+
+        if kind == "numeric":
+            expressions.extend([
+                f"MIN({col}) AS c{i}_min",
+                f"MAX({col}) AS c{i}_max",
+                f"AVG({col}) AS c{i}_mean",
+                f"SUM({col}) AS c{i}_sum",
+                f"APPROX_QUANTILES({col}, 2)[OFFSET(1)] AS c{i}_median"
+            ])
+        elif kind == "categorical":
+            value_expr = col if field.field_type.upper() == "STRING" else f"CAST({col} AS STRING)"
+            expressions.extend([
+                f"APPROX_COUNT_DISTINCT({value_expr}) AS c{i}_distinct",
+                f"APPROX_TOP_COUNT({value_expr}, {int(top_k)}) AS c{i}_top"
+            ])
+
+    return expressions
+
+def build_stats_pushdown_script(sql_query, schema, sample_rows=100, top_k=5):
+    """메인 쿼리와 요약 통계 집계를 하나의 BigQuery 스크립트로 구성
+
+    메인 쿼리 결과는 임시 테이블에 한 번만 저장되고, 마지막 문장이
+    통계(STRUCT)와 제한된 샘플 행(ARRAY<STRUCT>)을 한 행으로 반환한다.
+    임시 테이블을 거치므로 샘플 행의 순서는 보장되지 않는다.
+    """
+    aggregates = ",\n    ".join(build_stats_aggregate_expressions(schema, top_k))
+
+    return f"""CREATE TEMP TABLE {PUSHDOWN_RESULT_TABLE} AS
+{strip_trailing_semicolon(sql_query)};
+
+SELECT
+  (SELECT AS STRUCT
+    {aggregates}
+   FROM {PUSHDOWN_RESULT_TABLE}) AS stats,
+  ARRAY(SELECT AS STRUCT * FROM {PUSHDOWN_RESULT_TABLE} LIMIT {int(sample_rows)}) AS sample_rows;"""
+
+def _to_number(value):
+    """Decimal 등 BigQuery 숫자 값을 float/int로 변환"""
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def build_analysis_from_pushdown(stats, schema):
+    """푸시다운 통계 행을 analyze_data_structure와 같은 형태로 변환"""
+    stats = dict(stats) if stats is not None else {}
+    row_count = stats.get("row_count") or 0
+
+    analysis = {
+        "row_count": row_count,
+        "columns": {},
+        "summary_stats": {},
+        "patterns": [],
+        "source": "bigquery_pushdown"
+    }
+
+    for i, field in enumerate(schema):
+        kind = classify_field(field)
+        null_count = stats.get(f"c{i}_nulls") or 0
+        non_null_count = row_count - null_count
+
+        col_analysis = {
+            "type": kind if non_null_count > 0 else "unknown",
+            "non_null_count": non_null_count,
+            "null_count": null_count,
+            "null_percentage": round((null_count / row_count) * 100, 1) if row_count > 0 else 0
+        }
+
+        try:
+            if kind == "numeric" and non_null_count > 0:
+                mean = _to_number(stats.get(f"c{i}_mean"))
+                median = _to_number(stats.get(f"c{i}_median"))
+                col_analysis.update({
+                    "min": _to_number(stats.get(f"c{i}_min")),
+                    "max": _to_number(stats.get(f"c{i}_max")),
+                    "mean": round(mean, 2) if mean is not None else None,
+                    "median": round(median, 2) if median is not None else None,
+                    "sum": _to_number(stats.get(f"c{i}_sum"))
+                })
+            elif kind == "categorical" and non_null_count > 0:
+                top = stats.get(f"c{i}_top") or []
+                top_values = {}
+                for entry in top:
+                    entry = dict(entry)
+                    top_values[entry.get("value")] = entry.get("count")
+                col_analysis.update({
+                    "unique_count": stats.get(f"c{i}_distinct") or 0,
+                    "most_common": next(iter(top_values), None),
+                    "top_values": top_values
+                })
+        except Exception as e:
+            print(f"푸시다운 통계 변환 중 오류 ({field.name}): {e}")
+
+        analysis["columns"][field.name] = col_analysis
+
+    return analysis
+
+# 생성된 SQL에 허용하지 않는 문장 (읽기 전용 조회만 허용)
+_FORBIDDEN_STATEMENTS = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|DROP|CREATE|ALTER|TRUNCATE|GRANT|REVOKE)\b", re.IGNORECASE
+)
+
+def _strip_sql_comments(sql_query):
+    """SQL 주석 제거"""
+    sql_query = re.sub(r"/\*.*?\*/", " ", sql_query, flags=re.DOTALL)
+    return re.sub(r"--[^\n]*", " ", sql_query)
+
+def lint_sql(sql_query, project_id=None):
+    """생성된 SQL의 기본 형식 검사 → 문제 목록 (빈 목록이면 통과)"""
+    issues = []
+    body = _strip_sql_comments(sql_query or "").strip()
+
+    if not body:
+        return ["SQL이 비어 있음"]
+    if not re.match(r"^\(?\s*(SELECT|WITH)\b", body, re.IGNORECASE):
+        issues.append("SELECT/WITH로 시작하지 않음")
+    if _FORBIDDEN_STATEMENTS.search(body):
+        issues.append("읽기 전용이 아닌 문장 포함")
+    if body.count("(") != body.count(")"):
+        issues.append("괄호 짝이 맞지 않음")
+    if body.count("`") % 2 != 0:
+        issues.append("백틱 짝이 맞지 않음")
+    if project_id and project_id not in body:
+        issues.append("프로젝트 테이블 참조 없음")
+    if "```" in (sql_query or ""):
+        issues.append("마크다운 코드 블록 포함")
+
+    return issues
@@ -0,0 +1,235 @@
+# utils/chart_utils.py
+"""
+서버 측 차트 데이터 준비 유틸리티
+
+첫 행만 보고 차트 타입을 정하는 대신 전체 결과로 컬럼 타입을 추론하고,
+범주형 데이터는 라벨별로 합산한 뒤 상위 N개 + '기타'로 묶으며,
+시계열은 LTTB(Largest-Triangle-Three-Buckets)로 목표 점 개수까지 줄인다.
+프론트엔드는 반환된 labels/datasets 배열만 그리면 되므로 응답 크기와
+렌더링 시간이 결과 행 수와 무관하게 제한된다.
+"""
+
+import re
+from datetime import datetime
+from decimal import Decimal
+
+from .result_set import ResultSet
+
+# 시간 축으로 볼 수 있는 문자열 (ISO 날짜/시각, GA4 event_date 형식 YYYYMMDD)
+_ISO_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?([+-]\d{2}:?\d{2}|Z)?)?$")
+_COMPACT_DATE_PATTERN = re.compile(r"^\d{8}$")
+
+# 숫자지만 순서가 있는 시간 단위로 볼 컬럼 이름 (예: hour, event_date)
+# 이름 전체가 시간 단위이거나 _date로 끝날 때만 해당 (day_count, hour_users, engagement_time_msec 같은
+# 측정값이 축이 되지 않도록)
+_TIME_LIKE_NAME = re.compile(
+    r"^(event_)?(hour|day|day_of_week|week|month|year|date|minute)$|_date$|(시간대|날짜|일자|주차)$",
+    re.IGNORECASE
+)
+
+OTHERS_LABEL = "기타"
+
+def _column_values(data, col):
+    if isinstance(data, ResultSet):
+        return data.column(col)
+    return [row.get(col) for row in data]
+
+def _is_number(value):
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+def infer_column_type(values, storage_kind=None, name=""):
+    """전체 값으로 컬럼 타입 추론 → numeric / temporal / categorical / empty
+
+    ResultSet의 정수/실수 컬럼은 저장 타입만으로 바로 결정한다.
+    """
+    if storage_kind in ("int", "float"):
+        return "temporal" if _TIME_LIKE_NAME.search(name or "") and storage_kind == "int" else "numeric"
+
+    non_null = [v for v in values if v is not None]
+    if not non_null:
+        return "empty"
+
+    if all(_is_number(v) for v in non_null):
+        if _TIME_LIKE_NAME.search(name or "") and all(float(v).is_integer() for v in non_null):
+            return "temporal"
+        return "numeric"
+
+    if all(isinstance(v, datetime) for v in non_null):
+        return "temporal"
+    if all(isinstance(v, str) for v in non_null):
+        if all(_ISO_DATE_PATTERN.match(v) for v in non_null):
+            return "temporal"
+        if _TIME_LIKE_NAME.search(name or "") and all(_COMPACT_DATE_PATTERN.match(v) for v in non_null):
+            return "temporal"
+    return "categorical"
+
+def infer_column_types(data, columns):
+    """컬럼별 타입 추론 (전체 결과 기준)"""
+    types = {}
+    for col in columns:
+        kind = data.column_kind(col) if isinstance(data, ResultSet) else None
+        values = () if kind in ("int", "float") else _column_values(data, col)
+        types[col] = infer_column_type(values, kind, col)
+    return types
+
+def _time_key(value):
+    """시간 축 정렬/간격 계산용 숫자 키"""
+    if _is_number(value):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    text = str(value)
+    try:
+        if _COMPACT_DATE_PATTERN.match(text):
+            return datetime.strptime(text, "%Y%m%d").timestamp()
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+def lttb_indices(xs, ys, threshold):
+    """LTTB 다운샘플링 → 유지할 점의 인덱스 목록
+
+    첫 점과 마지막 점은 항상 유지하고, 나머지 구간을 threshold - 2개 버킷으로 나눠
+    버킷마다 이전 선택 점과 다음 버킷 평균 점으로 만든 삼각형 넓이가 가장 큰 점을 고른다.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # 다음 버킷의 평균 점
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / count
+        avg_y = sum(ys[next_start:next_end]) / count
+
+        # 현재 버킷에서 삼각형 넓이가 가장 큰 점
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+def top_n_buckets(labels, series, n):
+    """라벨별 합산 후 첫 번째 시리즈 기준 상위 n-1개 + '기타'로 묶기
+
+    series: {컬럼 이름: 값 목록} → (라벨 목록, {컬럼 이름: 값 목록}, 묶인 라벨 수)
+    """
+    names = list(series)
+    totals = {}
+    for i, label in enumerate(labels):
+        key = "(없음)" if label is None else str(label)
+        bucket = totals.get(key)
+        if bucket is None:
+            bucket = totals[key] = [0.0] * len(names)
+        for k, name in enumerate(names):
+            value = series[name][i]
+            if value is not None:
+                bucket[k] += float(value)
+
+    ordered = sorted(totals.items(), key=lambda item: item[1][0] if names else 0, reverse=True)
+    others = []
+    if len(ordered) > n:
+        ordered, others = ordered[:n - 1], ordered[n - 1:]
+
+    out_labels = [label for label, _ in ordered]
+    out_series = {name: [sums[k] for _, sums in ordered] for k, name in enumerate(names)}
+    if others:
+        out_labels.append(OTHERS_LABEL)
+        for k, name in enumerate(names):
+            out_series[name].append(sum(sums[k] for _, sums in others))
+    return out_labels, out_series, len(others)
+
+def prepare_chart(data, columns=None, max_points=1000, top_n=20, max_series=5):
+    """차트 설정과 차트용 배열 생성 → {"config": ..., "data": ...} (차트 불가 시 None)"""
+    if not data or len(data) == 0:
+        return None
+    if columns is None:
+        columns = data.columns if isinstance(data, ResultSet) else list(data[0].keys())
+    if len(columns) < 2:
+        return None  # 단일 컬럼은 차트로 표현하기 어려움
+
+    types = infer_column_types(data, columns)
+
+    # 라벨 축: 시간 컬럼 우선, 없으면 첫 번째 범주형 컬럼
+    label_col = next((c for c in columns if types[c] == "temporal"), None)
+    if label_col is None:
+        label_col = next((c for c in columns if types[c] == "categorical"), None)
+    value_cols = [c for c in columns if c != label_col and types[c] == "numeric"][:max_series]
+    if label_col is None or not value_cols:
+        return None
+
+    labels = _column_values(data, label_col)
+    series = {col: _column_values(data, col) for col in value_cols}
+    total_points = len(labels)
+
+    if types[label_col] == "temporal":
+        chart_type, method = "line", None
+        # 같은 시점의 행은 합산 (키를 만들 수 없는 행은 제외)
+        points = {}
+        for i, label in enumerate(labels):
+            key = _time_key(label) if label is not None else None
+            if key is None:
+                continue
+            point = points.get(key)
+            if point is None:
+                point = points[key] = [label, [0.0] * len(value_cols)]
+            for k, col in enumerate(value_cols):
+                value = series[col][i]
+                if value is not None:
+                    point[1][k] += float(value)
+        grouped = total_points - len(points)
+
+        # 시간 순 정렬
+        xs = sorted(points)
+        if len(xs) > max_points:
+            # 첫 번째 시리즈 모양을 기준으로 고른 점을 모든 시리즈에 공통 적용
+            ys = [points[x][1][0] for x in xs]
+            xs = [xs[i] for i in lttb_indices(xs, ys, max_points)]
+            method = "lttb"
+        elif grouped:
+            method = "aggregate"
+        out_labels = [points[x][0] for x in xs]
+        out_series = {col: [points[x][1][k] for x in xs] for k, col in enumerate(value_cols)}
+    else:
+        chart_type = "bar"
+        out_labels, out_series, grouped = top_n_buckets(labels, series, top_n)
+        method = "top_n" if grouped else "aggregate"
+
+    config = {
+        "type": chart_type,
+        "label_column": label_col,
+        "title": f"{label_col}별 {value_cols[0]}" if len(value_cols) == 1 else f"{label_col}별 데이터 비교"
+    }
+    if len(value_cols) == 1:
+        config["value_column"] = value_cols[0]
+    else:
+        config["value_columns"] = value_cols
+
+    return {
+        "config": config,
+        "data": {
+            "labels": out_labels,
+            "datasets": [{"label": col, "data": out_series[col]} for col in value_cols],
+            "column_types": types,
+            "total_points": total_points,
+            "points": len(out_labels),
+            "reduction": method,
+            "grouped_labels": grouped
+        }
+    }
@@ -0,0 +1,214 @@
+# utils/circuit_breaker.py
+"""
+외부 백엔드 호출용 서킷 브레이커와 적응형 타임아웃
+
+- closed: 정상. 최근 호출 창에서 실패가 기준을 넘으면 open으로 전환
+- open: open_seconds 동안 호출하지 않고 바로 CircuitOpenError (빠른 실패)
+- half_open: open 시간이 지나면 소수의 탐색 호출만 허용, 성공하면 closed / 실패하면 다시 open
+
+타임아웃은 작업(operation)별로 최근 성공 호출 지연 시간의 백분위수 × 배수로 정하고
+[min_timeout, max_timeout] 범위로 제한한다. 샘플이 적을 때는 max_timeout을 쓴다.
+호출하는 쪽이 floor(예: 모드별 작업 최대 실행 시간)를 주면 그보다 짧게 자르지 않는다.
+호출하는 쪽이 정한 타임아웃으로 중단한 호출(CallTimeout)은 백엔드 장애가 아니므로 실패로 세지
+않고 작업별 자체 타임아웃 횟수로 따로 기록한다.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from .admission import AdmissionRejected
+from .metrics import LatencyStats
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 백엔드 장애로 볼 예외 이름 (Anthropic SDK, google-api-core, requests)
+_FAILURE_ERROR_NAMES = {
+    "APITimeoutError", "APIConnectionError", "InternalServerError", "ServiceUnavailable",
+    "GatewayTimeout", "DeadlineExceeded", "BadGateway", "ConnectionError",
+    "ConnectTimeout", "ReadTimeout", "RetryError"
+}
+
+class CircuitOpenError(AdmissionRejected):
+    """서킷이 열려 있어 백엔드를 호출하지 않고 거절할 때 발생 (503)"""
+
+    def __init__(self, backend, retry_after):
+        super().__init__(
+            f"{backend} 서비스 응답이 불안정하여 잠시 요청을 중단했습니다. 잠시 후 다시 시도해주세요.",
+            status_code=503, retry_after=retry_after
+        )
+        self.backend = backend
+
+class CallTimeout(TimeoutError):
+    """호출하는 쪽이 정한 타임아웃(적응형 타임아웃, 작업 최대 실행 시간)으로 호출을 중단했을 때 발생"""
+
+def is_backend_failure(error):
+    """타임아웃/연결 오류/5xx 등 백엔드 장애로 볼 오류인지 여부 (쿼리 오류, 자체 타임아웃 등은 제외)"""
+    if isinstance(error, CallTimeout):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status >= 500:
+        return True
+    return type(error).__name__ in _FAILURE_ERROR_NAMES
+
+class CircuitBreaker:
+    """백엔드 하나의 서킷 상태와 작업별 적응형 타임아웃"""
+
+    def __init__(self, name, window=20, failure_threshold=5, failure_rate=0.5, open_seconds=30,
+                 half_open_max_calls=1, min_timeout=10.0, max_timeout=120.0,
+                 timeout_percentile=99, timeout_multiplier=2.0, min_samples=20):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_percentile = timeout_percentile
+        self.timeout_multiplier = timeout_multiplier
+        self.min_samples = min_samples
+
+        self._outcomes = deque(maxlen=window)  # True = 실패
+        self._latency = {}
+        self._call_timeouts = {}
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._open_count = 0
+        self._last_failure = None
+        self._lock = threading.Lock()
+
+    # ---- 상태 ----
+
+    def _current_state(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def before_call(self):
+        """호출 허용 여부 확인 (허용되지 않으면 CircuitOpenError)"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == OPEN:
+                raise CircuitOpenError(self.name, self.open_seconds - (now - self._opened_at))
+            if state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    raise CircuitOpenError(self.name, 1)
+                self._probes += 1
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._open_count += 1
+        print(f"서킷 브레이커 open ({self.name}): {self.open_seconds}초 동안 호출 중단, 마지막 오류: {self._last_failure}")
+
+    def record_success(self, operation=None, seconds=None):
+        """성공 (또는 백엔드 장애가 아닌 오류) 기록"""
+        if operation is not None and seconds is not None:
+            self._latency_for(operation).observe(seconds)
+        with self._lock:
+            self._outcomes.append(False)
+            if self._state == HALF_OPEN:
+                # 탐색 호출 성공 → 정상 복귀
+                self._state = CLOSED
+                self._outcomes.clear()
+                print(f"서킷 브레이커 closed ({self.name}): 탐색 호출 성공")
+
+    def record_failure(self, error):
+        """백엔드 장애 기록"""
+        now = time.monotonic()
+        with self._lock:
+            self._last_failure = f"{type(error).__name__}: {error}"[:300]
+            self._outcomes.append(True)
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+            failures = sum(self._outcomes)
+            if (self._state == CLOSED and failures >= self.failure_threshold
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._open(now)
+
+    # ---- 타임아웃 ----
+
+    def _latency_for(self, operation):
+        with self._lock:
+            stats = self._latency.get(operation)
+            if stats is None:
+                stats = self._latency[operation] = LatencyStats()
+            return stats
+
+    def timeout(self, operation, floor=None):
+        """작업별 적응형 타임아웃 (초, floor보다 짧게 자르지 않음)"""
+        stats = self._latency_for(operation)
+        if len(stats.samples) < self.min_samples:
+            timeout = self.max_timeout
+        else:
+            observed = stats.percentile(self.timeout_percentile) * self.timeout_multiplier
+            timeout = min(self.max_timeout, max(self.min_timeout, observed))
+        return max(timeout, floor) if floor else timeout
+
+    def record_call_timeout(self, operation, seconds):
+        """자체 타임아웃으로 중단한 호출 기록 (실패로 세지 않음)
+
+        걸린 시간은 적어도 그만큼 걸렸다는 뜻이므로 지연 시간 샘플에 넣어, 느린 호출이 모두
+        잘려 나가 타임아웃이 점점 짧아지지 않게 한다.
+        """
+        self._latency_for(operation).observe(seconds)
+        with self._lock:
+            self._call_timeouts[operation] = self._call_timeouts.get(operation, 0) + 1
+
+    @contextmanager
+    def guard(self, operation, floor=None):
+        """with 문으로 호출 보호 → 적용할 타임아웃(초)을 넘겨줌
+
+        예외가 백엔드 장애(is_backend_failure)이면 실패로, 자체 타임아웃(CallTimeout)이면
+        자체 타임아웃으로, 그 외 예외는 백엔드가 응답한 것이므로 성공으로 기록한다
+        (지연 시간은 성공 호출과 자체 타임아웃만 반영).
+        """
+        self.before_call()
+        start = time.monotonic()
+        try:
+            yield self.timeout(operation, floor)
+        except CallTimeout:
+            self.record_call_timeout(operation, time.monotonic() - start)
+            raise
+        except Exception as e:
+            if is_backend_failure(e):
+                self.record_failure(e)
+            else:
+                self.record_success()
+            raise
+        self.record_success(operation, time.monotonic() - start)
+
+    def stats(self):
+        """헬스 체크용 상태"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            outcomes = list(self._outcomes)
+            operations = list(self._latency)
+            call_timeouts = dict(self._call_timeouts)
+            info = {
+                "state": state,
+                "recent_calls": len(outcomes),
+                "recent_failures": sum(outcomes),
+                "open_count": self._open_count,
+                "last_failure": self._last_failure
+            }
+            if state == OPEN:
+                info["retry_after_seconds"] = round(self.open_seconds - (now - self._opened_at), 1)
+        info["timeouts"] = {op: round(self.timeout(op), 1) for op in operations}
+        info["call_timeouts"] = call_timeouts
+        return info
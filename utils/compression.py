@@ -0,0 +1,127 @@
+# utils/compression.py
+"""
+Accept-Encoding 협상 기반 응답 압축 (gzip / brotli)
+
+JSON, HTML 등 텍스트 응답을 클라이언트가 지원하는 방식으로 압축한다.
+스트리밍 응답은 청크 단위 압축기로 감싸서 전체를 메모리에 모으지 않는다.
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli는 선택 의존성
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/html",
+    "text/css",
+    "text/csv",
+    "text/plain",
+    "text/javascript",
+    "image/svg+xml"
+}
+
+def parse_accept_encoding(header):
+    """Accept-Encoding 헤더를 {인코딩: q값} 딕셔너리로 변환"""
+    encodings = {}
+    for part in (header or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name.strip().lower()] = q
+    return encodings
+
+def negotiate_encoding(header):
+    """지원 가능한 인코딩 중 클라이언트가 선호하는 것 선택 (br > gzip, 없으면 None)"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+
+    candidates = []
+    if brotli is not None:
+        candidates.append("br")
+    candidates.append("gzip")
+
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress_bytes(data, encoding, gzip_level=6, brotli_quality=4):
+    """바이트 전체 압축"""
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # wbits=31: gzip 헤더
+    return compressor.compress(data) + compressor.flush()
+
+def compress_stream(chunks, encoding, gzip_level=6, brotli_quality=4):
+    """청크 이터레이터를 압축된 청크 이터레이터로 변환"""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=brotli_quality)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            out = compressor.process(chunk)
+            # 청크 경계마다 flush하여 스트리밍 지연을 줄임
+            out += compressor.flush()
+            if out:
+                yield out
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if out:
+                yield out
+        yield compressor.flush()
+
+def _add_vary(response):
+    vary = response.headers.get("Vary", "")
+    if "accept-encoding" not in vary.lower():
+        response.headers["Vary"] = (vary + ", " if vary else "") + "Accept-Encoding"
+
+def compress_response(response, accept_encoding, min_bytes=1024, gzip_level=6, brotli_quality=4):
+    """after_request 훅용: 조건에 맞는 응답을 협상된 인코딩으로 압축"""
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return response
+    if response.direct_passthrough or "Content-Encoding" in response.headers:
+        # 파일 응답(send_from_directory)이나 사전 압축된 응답은 그대로 둠
+        return response
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+
+    _add_vary(response)
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(
+            response.response, encoding, gzip_level=gzip_level, brotli_quality=brotli_quality
+        )
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < min_bytes:
+            return response
+        response.set_data(compress_bytes(
+            data, encoding, gzip_level=gzip_level, brotli_quality=brotli_quality
+        ))
+
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -3,79 +3,122 @@
 데이터 처리 및 분석 유틸리티 함수들
 """
 
-from datetime import datetime
+from collections import Counter
+from collections.abc import Mapping
+from itertools import islice
+
+from config.performance_config import (
+    SKETCH_STATS_MIN_ROWS,
+    SKETCH_HLL_PRECISION,
+    SKETCH_TDIGEST_COMPRESSION,
+    SKETCH_TOP_K_COUNTERS
+)
+from .sketches import HyperLogLog, TDigest, MisraGries
+from .result_set import ResultSet
+from .json_utils import to_jsonable
+from .chart_utils import prepare_chart
 
 def safe_json_serialize(obj):
-    """JSON 직렬화를 안전하게 수행하는 함수"""
+    """JSON 직렬화를 안전하게 수행하는 함수
+
+    재귀적으로 값을 다시 만드는 대신 공통 인코더(json_utils)로 한 번 직렬화/파싱하여
+    JSON 기본 타입만으로 구성된 객체를 얻는다.
+    """
     try:
-        if isinstance(obj, dict):
-            return {str(k): safe_json_serialize(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [safe_json_serialize(item) for item in obj]
-        elif isinstance(obj, (datetime, )):
-            return obj.isoformat()
-        elif hasattr(obj, 'isoformat'):
-            return obj.isoformat()
-        elif isinstance(obj, (int, float, str, bool)) or obj is None:
-            return obj
-        else:
-            return str(obj)
+        return to_jsonable(obj)
     except Exception as e:
         print(f"JSON 직렬화 오류: {e}")
         return str(obj)
 
 def suggest_chart_config(data, columns):
-    """데이터 구조를 분석하여 적절한 차트 설정 제안"""
-    if not data or len(data) == 0:
-        return None
-    
-    # 컬럼 개수에 따른 차트 타입 결정
-    if len(columns) == 1:
-        return None  # 단일 컬럼은 차트로 표현하기 어려움
-    
-    if len(columns) == 2:
-        # 2개 컬럼인 경우
-        col1, col2 = columns[0], columns[1]
-        
-        # 첫 번째 값으로 데이터 타입 판단
-        first_val1 = data[0][col1] if data[0][col1] is not None else ""
-        first_val2 = data[0][col2] if data[0][col2] is not None else 0
-        
-        # 두 번째 컬럼이 숫자인 경우
-        if isinstance(first_val2, (int, float)):
-            # 첫 번째 컬럼이 카테고리인 경우
-            if isinstance(first_val1, str):
-                return {
-                    "type": "bar",
-                    "label_column": col1,
-                    "value_column": col2,
-                    "title": f"{col1}별 {col2}"
-                }
-    
-    # 3개 이상 컬럼인 경우 첫 번째는 라벨, 나머지는 값으로 가정
-    if len(columns) >= 3:
-        label_col = columns[0]
-        value_cols = columns[1:]
-        
-        # 모든 값 컬럼이 숫자인지 확인
-        all_numeric = True
-        for col in value_cols:
-            if data[0][col] is not None and not isinstance(data[0][col], (int, float)):
-                all_numeric = False
-                break
-        
-        if all_numeric:
-            return {
-                "type": "line" if len(value_cols) > 1 else "bar",
-                "label_column": label_col,
-                "value_columns": value_cols,
-                "title": f"{label_col}별 데이터 비교"
-            }
-    
-    return None
+    """데이터 구조를 분석하여 적절한 차트 설정 제안
+
+    첫 행이 아닌 전체 결과로 컬럼 타입을 추론한다 (차트용 배열은 prepare_chart 참고).
+    """
+    chart = prepare_chart(data, columns)
+    return chart["config"] if chart else None
+
+def _analyze_numeric_exact(values):
+    """숫자형 컬럼 정확 통계"""
+    numeric_values = [float(v) for v in values if isinstance(v, (int, float))]
+    if not numeric_values:
+        return {}
+    return {
+        "min": min(numeric_values),
+        "max": max(numeric_values),
+        "mean": round(sum(numeric_values) / len(numeric_values), 2),
+        "median": round(sorted(numeric_values)[len(numeric_values)//2], 2),
+        "sum": sum(numeric_values)
+    }
+
+def _analyze_categorical_exact(values):
+    """범주형 컬럼 정확 통계"""
+    counts = Counter(values)
+    top_values = dict(counts.most_common(5))
+    return {
+        "unique_count": len(counts),
+        "most_common": next(iter(top_values), None),
+        "top_values": top_values
+    }
+
+def _analyze_numeric_sketch(values):
+    """숫자형 컬럼 스케치 통계 (t-digest 중앙값)"""
+    digest = TDigest(compression=SKETCH_TDIGEST_COMPRESSION)
+    count = 0
+    total = 0.0
+    min_val = max_val = None
+    for v in values:
+        if not isinstance(v, (int, float)):
+            continue
+        x = float(v)
+        digest.add(x)
+        count += 1
+        total += x
+        if min_val is None or x < min_val:
+            min_val = x
+        if max_val is None or x > max_val:
+            max_val = x
+    if count == 0:
+        return {}
+    return {
+        "min": min_val,
+        "max": max_val,
+        "mean": round(total / count, 2),
+        "median": round(digest.quantile(0.5), 2),
+        "sum": total,
+        "approximate": ["median"]
+    }
 
-def analyze_data_structure(data):
-    """데이터 구조를 분석하여 통계 요약 생성"""
+def _analyze_categorical_sketch(values):
+    """범주형 컬럼 스케치 통계 (HyperLogLog 고유값 수, Misra-Gries 상위값)"""
+    hll = HyperLogLog(p=SKETCH_HLL_PRECISION)
+    heavy_hitters = MisraGries(k=SKETCH_TOP_K_COUNTERS)
+    for v in values:
+        hll.add(v)
+        heavy_hitters.add(v)
+    top_values = dict(heavy_hitters.top(5))
+    return {
+        "unique_count": hll.count(),
+        "most_common": next(iter(top_values), None),
+        "top_values": top_values,
+        "top_values_max_error": heavy_hitters.error_bound(),
+        "approximate": ["unique_count", "top_values"]
+    }
+
+def _non_null(data, col):
+    """컬럼의 non-null 값 반복자 (ResultSet은 컬럼 저장소에서 바로 조회, 행 목록은 행을 순회)"""
+    values = data.column(col) if isinstance(data, ResultSet) else (
+        row.get(col) if isinstance(row, dict) else None for row in data
+    )
+    return (val for val in values if val is not None)
+
+def analyze_data_structure(data, mode="auto"):
+    """데이터 구조를 분석하여 통계 요약 생성
+
+    mode: "exact"는 전체 값을 정렬/집계, "sketch"는 HyperLogLog/t-digest/Misra-Gries로
+    고정 메모리 근사 (컬럼 값 목록을 만들지 않고 컬럼을 순회하며 스케치에 바로 넣음),
+    "auto"는 행 수가 SKETCH_STATS_MIN_ROWS 이상일 때만 스케치 사용
+    """
     if not data or len(data) == 0:
         return {
             "row_count": 0,
@@ -84,8 +127,8 @@ def analyze_data_structure(data):
             "patterns": []
         }
     
-    # 데이터 타입 검증
-    if not isinstance(data, list):
+    # 데이터 타입 검증 (딕셔너리 행 목록 또는 ResultSet)
+    if not isinstance(data, (list, ResultSet)):
         print(f"경고: 데이터가 리스트가 아닙니다: {type(data)}")
         return {
             "row_count": 0,
@@ -95,7 +138,7 @@ def analyze_data_structure(data):
         }
     
     # 첫 번째 행 검증
-    if not data or not isinstance(data[0], dict):
+    if not data or not isinstance(data[0], Mapping):
         print(f"경고: 첫 번째 행이 딕셔너리가 아닙니다: {type(data[0]) if data else 'None'}")
         return {
             "row_count": len(data),
@@ -104,25 +147,29 @@ def analyze_data_structure(data):
             "patterns": ["데이터 구조 오류"]
         }
     
+    use_sketch = mode == "sketch" or (mode == "auto" and len(data) >= SKETCH_STATS_MIN_ROWS)
+    
     analysis = {
         "row_count": len(data),
         "columns": {},
         "summary_stats": {},
-        "patterns": []
+        "patterns": [],
+        "stats_mode": "sketch" if use_sketch else "exact"
     }
     
     # 각 컬럼별 분석
     try:
         for col in data[0].keys():
-            # 안전한 값 추출
-            values = []
-            for row in data:
-                if isinstance(row, dict) and col in row:
-                    val = row[col]
-                    if val is not None:
-                        values.append(val)
+            if use_sketch:
+                # 값 목록 없이 순회: non-null 수, 첫 값(타입 판단), 스케치 입력
+                non_null_count = sum(1 for _ in _non_null(data, col))
+                first_val = next(_non_null(data, col), None)
+                values = _non_null(data, col)
+            else:
+                values = list(_non_null(data, col))
+                non_null_count = len(values)
+                first_val = values[0] if values else None
             
-            non_null_count = len(values)
             null_count = len(data) - non_null_count
             
             col_analysis = {
@@ -132,39 +179,28 @@ def analyze_data_structure(data):
                 "null_percentage": round((null_count / len(data)) * 100, 1) if len(data) > 0 else 0
             }
             
-            if values:
+            if non_null_count:
                 # 데이터 타입 판단
-                first_val = values[0]
                 if isinstance(first_val, (int, float)):
                     col_analysis["type"] = "numeric"
                     try:
-                        numeric_values = [float(v) for v in values if isinstance(v, (int, float))]
-                        if numeric_values:
-                            col_analysis.update({
-                                "min": min(numeric_values),
-                                "max": max(numeric_values),
-                                "mean": round(sum(numeric_values) / len(numeric_values), 2),
-                                "median": round(sorted(numeric_values)[len(numeric_values)//2], 2),
-                                "sum": sum(numeric_values)
-                            })
+                        if use_sketch:
+                            col_analysis.update(_analyze_numeric_sketch(values))
+                        else:
+                            col_analysis.update(_analyze_numeric_exact(values))
                     except Exception as e:
                         print(f"숫자 분석 중 오류: {e}")
                         
                 elif isinstance(first_val, str):
                     col_analysis["type"] = "categorical"
                     try:
-                        unique_values = list(set(values))
-                        col_analysis.update({
-                            "unique_count": len(unique_values),
-                            "most_common": max(set(values), key=values.count) if values else None,
-                            "top_values": dict(sorted(
-                                [(v, values.count(v)) for v in set(values[:100])], # 성능을 위해 상위 100개만 처리
-                                key=lambda x: x[1], reverse=True
-                            )[:5])
-                        })
+                        if use_sketch:
+                            col_analysis.update(_analyze_categorical_sketch(values))
+                        else:
+                            col_analysis.update(_analyze_categorical_exact(values))
                     except Exception as e:
                         print(f"카테고리 분석 중 오류: {e}")
-                        col_analysis["unique_count"] = len(set(str(v) for v in values[:100]))
+                        col_analysis["unique_count"] = len(set(str(v) for v in islice(values, 100)))
             
             analysis["columns"][col] = col_analysis
             
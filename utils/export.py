@@ -0,0 +1,238 @@
+# utils/export.py
+"""
+조회 결과 파일 내보내기 (CSV / Parquet 스트리밍)
+
+BigQuery 결과 페이지(CSV)나 Arrow 레코드 배치(Parquet)를 받는 즉시 파일 청크로 인코딩해
+내보낸다. 행을 JSON용 딕셔너리로 변환하지 않고 한 번에 한 페이지만 메모리에 두므로,
+결과 크기와 관계없이 서버 메모리 사용량은 페이지 크기로 제한된다.
+
+내보낼 SQL은 클라이언트에게서 받지 않는다. 조회 응답에 서버가 생성한 SQL과 세션 ID, 만료 시각을
+HMAC으로 서명한 내보내기 토큰을 넣어 주고, /export는 서명이 맞는 토큰의 SQL만 실행한다.
+"""
+
+import base64
+import binascii
+import csv
+import hashlib
+import hmac
+import io
+import json
+import re
+import time
+from datetime import date, datetime, time as dt_time
+from itertools import islice
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow는 선택 의존성 (없으면 CSV만 지원)
+    pyarrow = None
+
+EXPORT_MIMETYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+# 스프레드시트 프로그램이 한글을 UTF-8로 인식하도록 CSV 앞에 BOM
+_CSV_BOM = "\ufeff"
+
+_FILENAME_INVALID = re.compile(r"[^A-Za-z0-9._-]+")
+
+class ExportError(Exception):
+    """요청한 형식/SQL로 내보낼 수 없을 때 발생"""
+
+def available_formats():
+    """지원하는 내보내기 형식 (Parquet은 pyarrow가 있을 때만)"""
+    return [fmt for fmt in EXPORT_MIMETYPES if fmt == "csv" or pyarrow is not None]
+
+def sign_export_token(secret, sql_query, session_id=None, ttl_seconds=3600):
+    """서버가 생성한 SQL → 내보내기 토큰 (본문.서명, 세션 ID와 만료 시각 포함)"""
+    body = json.dumps(
+        {"sql": sql_query, "sid": session_id, "exp": int(time.time() + ttl_seconds)},
+        ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+    encoded = base64.urlsafe_b64encode(body).decode("ascii")
+    signature = hmac.new(secret, encoded.encode("ascii"), hashlib.sha256).hexdigest()
+    return f"{encoded}.{signature}"
+
+def verify_export_token(secret, token, session_id=None):
+    """내보내기 토큰 → SQL (서명이 틀리거나 만료되었거나 다른 세션의 토큰이면 None)"""
+    if not isinstance(token, str) or "." not in token:
+        return None
+    encoded, signature = token.rsplit(".", 1)
+    expected = hmac.new(secret, encoded.encode("ascii", "replace"), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(signature.encode("utf-8"), expected.encode("ascii")):
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+    except (ValueError, binascii.Error):
+        return None
+    if payload.get("exp", 0) < time.time() or payload.get("sid") != session_id:
+        return None
+    return payload.get("sql")
+
+def export_filename(question, fmt, today=None):
+    """다운로드 파일 이름 (ASCII만 사용, 질문에 영문/숫자가 없으면 result)"""
+    slug = _FILENAME_INVALID.sub("-", question or "").strip("-")[:60] or "result"
+    return f"ga4-{slug}-{(today or date.today()).isoformat()}.{fmt}"
+
+def _json_cell(value):
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+def _bytes_cell(value):
+    return base64.b64encode(value).decode("ascii")
+
+def _iso_cell(value):
+    return value.isoformat()
+
+def _generic_cell(value):
+    """스키마를 모르는 값의 CSV 표현 (로컬/병합 결과용)"""
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return _bytes_cell(value)
+    if isinstance(value, (dict, list, tuple)):
+        return _json_cell(value)
+    return value
+
+def _cell_converters(schema):
+    """BigQuery 스키마에서 CSV 변환이 필요한 컬럼만 [(위치, 변환 함수)]
+
+    문자열/숫자/불리언 컬럼은 csv 모듈이 그대로 쓰므로 셀 단위 변환을 건너뛴다.
+    """
+    converters = []
+    for i, field in enumerate(schema):
+        if field.mode == "REPEATED" or field.field_type in ("RECORD", "STRUCT", "JSON"):
+            converters.append((i, _json_cell))
+        elif field.field_type == "BYTES":
+            converters.append((i, _bytes_cell))
+        elif field.field_type in ("TIMESTAMP", "DATETIME", "DATE", "TIME"):
+            converters.append((i, _iso_cell))
+    return converters
+
+def _csv_chunks(header, batches, converters):
+    """행 묶음(값 튜플의 반복자) → CSV 바이트 청크 (묶음마다 하나)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+    yield (_CSV_BOM + buffer.getvalue()).encode("utf-8")
+
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        if converters:
+            for values in rows:
+                values = list(values)
+                for i, convert in converters:
+                    if values[i] is not None:
+                        values[i] = convert(values[i])
+                writer.writerow(values)
+        else:
+            writer.writerows(rows)
+        chunk = buffer.getvalue()
+        if chunk:
+            yield chunk.encode("utf-8")
+
+def stream_csv_pages(schema, pages):
+    """BigQuery 결과 페이지 반복자 → CSV 바이트 청크"""
+    return _csv_chunks(
+        [field.name for field in schema],
+        ((row.values() for row in page) for page in pages),
+        _cell_converters(schema)
+    )
+
+def _result_batches(data, batch_rows):
+    columns = list(data.columns)
+    rows = iter(data)
+    while True:
+        batch = list(islice(rows, batch_rows))
+        if not batch:
+            return
+        yield [tuple(row[col] for col in columns) for row in batch]
+
+def stream_csv_result(data, batch_rows=10000):
+    """메모리에 있는 ResultSet(로컬/병합 결과) → CSV 바이트 청크"""
+    columns = list(data.columns)
+    converters = [(i, _generic_cell) for i in range(len(columns))]
+    return _csv_chunks(columns, _result_batches(data, batch_rows), converters)
+
+class _ChunkSink(io.RawIOBase):
+    """ParquetWriter 출력 버퍼 (쓴 바이트를 청크로 꺼내 감)"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def stream_parquet_batches(batches, columns=(), compression="zstd"):
+    """Arrow 레코드 배치 반복자 → Parquet 바이트 청크 (배치마다 행 그룹 하나)
+
+    배치가 하나도 없으면 columns 이름의 문자열 컬럼으로 빈 파일을 만든다.
+    """
+    if pyarrow is None:
+        raise ExportError("Parquet 내보내기에는 pyarrow가 필요합니다.")
+
+    sink = _ChunkSink()
+    writer = None
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(sink, batch.schema, compression=compression)
+            elif batch.num_rows == 0:
+                continue
+            writer.write_batch(batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+        if writer is None:
+            schema = pyarrow.schema([(name, pyarrow.string()) for name in columns])
+            writer = pyarrow.parquet.ParquetWriter(sink, schema, compression=compression)
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+def _arrow_array(values):
+    try:
+        return pyarrow.array(values)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        # 타입이 섞인 컬럼은 문자열로
+        return pyarrow.array([None if v is None else str(_generic_cell(v)) for v in values], pyarrow.string())
+
+def stream_parquet_result(data, batch_rows=10000, compression="zstd"):
+    """메모리에 있는 ResultSet(로컬/병합 결과) → Parquet 바이트 청크"""
+    if pyarrow is None:
+        raise ExportError("Parquet 내보내기에는 pyarrow가 필요합니다.")
+
+    columns = list(data.columns)
+    table = pyarrow.table({name: _arrow_array(data.column(name)) for name in columns})
+    return stream_parquet_batches(table.to_batches(max_chunksize=batch_rows), columns, compression)
+
+def counted(chunks, on_finish):
+    """청크를 그대로 내보내면서 끝났을 때 on_finish(총 바이트, 완료 여부) 호출"""
+    total = 0
+    completed = False
+    try:
+        for chunk in chunks:
+            total += len(chunk)
+            yield chunk
+        completed = True
+    finally:
+        on_finish(total, completed)
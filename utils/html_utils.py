@@ -3,6 +3,10 @@
 HTML 생성 및 검증 관련 유틸리티 함수들
 """
 
+from collections.abc import Mapping
+
+from .result_set import ResultSet
+
 def validate_claude_html(html_content):
     """Claude 생성 HTML 품질 검증"""
     issues = []
@@ -31,17 +35,41 @@ def validate_claude_html(html_content):
         "score": max(0, 100 - len(issues) * 20)  # 품질 점수
     }
 
+# 분석 리포트(마크다운)에 있어야 하는 섹션
+REPORT_REQUIRED_SECTIONS = ["핵심 인사이트", "주요 통계", "비즈니스 시사점"]
+
+def validate_analysis_report(report):
+    """Claude 생성 분석 리포트(마크다운) 품질 검증"""
+    issues = []
+    text = report or ""
+    
+    for section in REPORT_REQUIRED_SECTIONS:
+        if section not in text:
+            issues.append(f"섹션 누락: {section}")
+    
+    if len(text) < 300:
+        issues.append("리포트가 너무 짧음")
+    
+    if not any(ch.isdigit() for ch in text):
+        issues.append("구체적인 수치 없음")
+    
+    return {
+        "is_valid": len(issues) == 0,
+        "issues": issues,
+        "score": max(0, 100 - len(issues) * 20)  # 품질 점수
+    }
+
 def generate_fallback_html(question, query_results):
     """HTML 생성 실패 시 폴백 HTML"""
     # 안전한 데이터 처리
-    if not isinstance(query_results, list):
+    if not isinstance(query_results, (list, ResultSet)):
         query_results = []
     
     result_count = len(query_results)
     
     # 테이블 생성 (안전하게)
     table_html = ""
-    if result_count > 0 and isinstance(query_results[0], dict):
+    if result_count > 0 and isinstance(query_results[0], Mapping):
         try:
             headers = list(query_results[0].keys())
             
@@ -0,0 +1,328 @@
+# utils/incremental.py
+"""
+일 단위 샤드 테이블(events_YYYYMMDD)의 샤드별 집계 캐시와 증분 실행
+
+GA4 내보내기는 하루에 샤드 하나씩 추가되므로, "최근 30일" 집계 질문을 반복할 때마다
+30개 샤드를 모두 다시 읽을 필요가 없다. 와일드카드 테이블(events_*)에 대한 집계 쿼리를
+샤드별 부분 집계로 나누어 (쿼리 형태, 샤드) 단위로 저장하고, 다음 실행에서는 새로 추가되었거나
+수정된 샤드만 BigQuery에서 집계한 뒤 저장된 부분 집계와 병합한다.
+
+- 합산 가능한 지표(이벤트 수, 매출): 로컬에서 합산
+- 고유 수(사용자, 세션): 샤드 하나면 저장된 정확한 값, 여러 샤드면 샤드별 HLL 스케치를
+  병합 (BigQuery 스케치 형식은 로컬에서 해석할 수 없으므로 테이블을 읽지 않는 작은 쿼리로
+  HLL_COUNT.MERGE, approximate_distinct가 True일 때만)
+- 샤드 무효화: 데이터셋 __TABLES__ 메타데이터의 샤드별 마지막 수정 시각이 저장 시점보다
+  새로우면 다시 집계, 사라진 샤드의 부분 집계는 삭제
+
+쿼리 매칭은 요약 테이블과 같은 보수적인 파서(summary_tables.parse_aggregate_sql)를 사용하며,
+날짜 조건(event_date 또는 _TABLE_SUFFIX)은 샤드 범위로 해석한다 (GA4에서 샤드 접미사 = event_date).
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+from .intent_templates import DIMENSION_EXPRESSIONS
+from .json_utils import dumps, loads
+from .metrics import metrics
+from .summary_tables import distinct_argument, parse_aggregate_sql
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shard_aggregates (
+    query_key TEXT NOT NULL,
+    shard TEXT NOT NULL,
+    modified REAL NOT NULL,
+    partial TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (query_key, shard)
+)
+"""
+
+# 지표 → 샤드별 부분 집계 식 (None이면 고유 수: 정확한 값 + 스케치)
+_PARTIALS = {
+    "event_count": "COUNT(*)",
+    "revenue_usd": "SUM(ecommerce.purchase_revenue_in_usd)",
+    "users": None,
+    "sessions": None
+}
+
+# 스케치 정밀도 (HLL_COUNT.INIT 기본값 15보다 작게 하여 병합 쿼리에 인라인하는 크기를 줄임, 표준 오차 약 0.8%)
+_SKETCH_PRECISION = 14
+# 병합 쿼리에 인라인할 스케치 총 크기 (base64 문자 수, 쿼리 길이 한도 1MB 이내)
+_MAX_INLINE_SKETCH_CHARS = 700000
+
+_SHARD_SUFFIX = re.compile(r"^\d{8}$")
+
+def shard_prefix(table_name):
+    """샤드 테이블 이름 → 접두사 (project.dataset.events_), 샤드/와일드카드 테이블이 아니면 None"""
+    match = re.match(r"^(?P<prefix>.+_)(?:\d{8}|\*)$", table_name.strip("`"))
+    return match.group("prefix") if match else None
+
+def _sql_literal(value):
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+def _sort_key(value):
+    # BigQuery와 같이 NULL은 오름차순에서 처음, 내림차순에서 마지막
+    return (value is not None, value)
+
+class IncrementalAggregator:
+    """와일드카드 테이블 집계 쿼리의 샤드별 부분 집계 캐시 (로컬 SQLite 파일)
+
+    shard_metadata는 {샤드 접미사: 마지막 수정 시각(epoch 초)}를 돌려주는 함수로
+    metadata_ttl_seconds 동안 결과를 재사용한다. run_query는 SQL을 실행해 execute_bigquery와
+    같은 형식의 결과를 돌려주는 함수다.
+    """
+
+    def __init__(self, store_path, prefix, shard_metadata, run_query, metadata_ttl_seconds=60,
+                 approximate_distinct=True, enabled=True):
+        self.store_path = store_path
+        self.prefix = prefix
+        self.wildcard_table = f"{prefix}*"
+        self.shard_metadata = shard_metadata
+        self.run_query = run_query
+        self.metadata_ttl_seconds = metadata_ttl_seconds
+        self.approximate_distinct = approximate_distinct
+        self.enabled = enabled and prefix is not None
+        self._lock = threading.Lock()
+        self._metadata = None
+        self._metadata_at = 0.0
+
+        if self.enabled:
+            try:
+                with self._connect() as conn:
+                    conn.execute(_SCHEMA)
+            except sqlite3.Error as e:
+                print(f"샤드별 집계 캐시 초기화 실패, 증분 실행 비활성화: {e}")
+                self.enabled = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.store_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def plan(self, sql_query):
+        """증분 실행할 수 있는 쿼리면 구조 딕셔너리 (아니면 None, BigQuery 호출 없음)"""
+        if not self.enabled:
+            return None
+        return parse_aggregate_sql(sql_query, self.wildcard_table, sharded=True)
+
+    def current_metadata(self):
+        """샤드별 마지막 수정 시각 (metadata_ttl_seconds 동안 캐시, 조회 실패 시 None)"""
+        now = time.monotonic()
+        with self._lock:
+            if self._metadata is not None and now - self._metadata_at < self.metadata_ttl_seconds:
+                return self._metadata
+        try:
+            metadata = {
+                shard: modified for shard, modified in self.shard_metadata().items() if _SHARD_SUFFIX.match(shard)
+            }
+        except Exception as e:
+            print(f"샤드 메타데이터 조회 실패: {e}")
+            return None
+        with self._lock:
+            self._metadata, self._metadata_at = metadata, now
+        return metadata
+
+    def _query_key(self, parsed):
+        key = dumps([self.prefix, parsed["metric"], parsed["dimension"], parsed["event"]])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+    def _load(self, query_key, metadata, shards):
+        """저장된 부분 집계 중 샤드 수정 시각이 바뀌지 않은 것 {샤드: 부분 집계}"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT shard, modified, partial FROM shard_aggregates WHERE query_key = ?", (query_key,)
+            ).fetchall()
+            gone = [row["shard"] for row in rows if row["shard"] not in metadata]
+            if gone:
+                conn.executemany(
+                    "DELETE FROM shard_aggregates WHERE query_key = ? AND shard = ?",
+                    [(query_key, shard) for shard in gone]
+                )
+        return {
+            row["shard"]: loads(row["partial"])
+            for row in rows
+            if row["shard"] in shards and row["modified"] >= metadata[row["shard"]]
+        }
+
+    def _store(self, query_key, metadata, partials):
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO shard_aggregates (query_key, shard, modified, partial, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(query_key, shard, metadata[shard], dumps(partial), now) for shard, partial in partials.items()]
+            )
+
+    def partial_sql(self, parsed, shards):
+        """샤드별 부분 집계 SQL (샤드 × 차원 단위, 고유 수는 정확한 값과 base64 스케치)"""
+        columns = ["_TABLE_SUFFIX AS shard"]
+        group = ["shard"]
+        if parsed["dimension"]:
+            columns.append(f"{DIMENSION_EXPRESSIONS[parsed['dimension']]} AS dim")
+            group.append("dim")
+        partial = _PARTIALS[parsed["metric"]]
+        if partial is None:
+            argument = distinct_argument(parsed["metric"])
+            columns.append(f"COUNT(DISTINCT {argument}) AS value")
+            columns.append(f"TO_BASE64(HLL_COUNT.INIT({argument}, {_SKETCH_PRECISION})) AS sketch")
+        else:
+            columns.append(f"{partial} AS value")
+
+        filters = [f"_TABLE_SUFFIX IN ({', '.join(_sql_literal(shard) for shard in shards)})"]
+        if parsed["event"]:
+            filters.append(f"event_name = {_sql_literal(parsed['event'])}")
+        return (
+            f"SELECT {', '.join(columns)} FROM `{self.wildcard_table}` "
+            f"WHERE {' AND '.join(filters)} GROUP BY {', '.join(group)}"
+        )
+
+    def _query_partials(self, parsed, shards):
+        """샤드들의 부분 집계 실행 → ({샤드: [[차원 값, 값, 스케치], ...]}, 처리 바이트) (실패 시 (None, 0))"""
+        result = self.run_query(self.partial_sql(parsed, shards))
+        if not result["success"]:
+            print(f"샤드별 부분 집계 실패: {result.get('error')}")
+            return None, 0
+        partials = {shard: [] for shard in shards}
+        distinct = _PARTIALS[parsed["metric"]] is None
+        for row in result["data"]:
+            partials[row["shard"]].append([
+                row["dim"] if parsed["dimension"] else None,
+                row["value"],
+                row["sketch"] if distinct else None
+            ])
+        return partials, result.get("bytes_processed") or 0
+
+    def _merge_sketches(self, groups):
+        """{차원 값: [base64 스케치, ...]} → ({차원 값: 추정 고유 수}, 처리 바이트) (불가능하면 (None, 0))"""
+        keys = list(groups)
+        items = [(index, sketch) for index, key in enumerate(keys) for sketch in groups[key] if sketch]
+        if sum(len(sketch) for _, sketch in items) > _MAX_INLINE_SKETCH_CHARS:
+            metrics.increment("incremental.skipped.sketch_size")
+            return None, 0
+        values = {key: 0 for key in keys}
+        if not items:
+            return values, 0
+
+        structs = ", ".join(f"STRUCT({index} AS g, FROM_BASE64('{sketch}') AS s)" for index, sketch in items)
+        result = self.run_query(
+            f"SELECT g, HLL_COUNT.MERGE(s) AS value FROM UNNEST([{structs}]) GROUP BY g"
+        )
+        if not result["success"]:
+            print(f"스케치 병합 실패: {result.get('error')}")
+            return None, 0
+        for row in result["data"]:
+            values[keys[row["g"]]] = row["value"]
+        return values, result.get("bytes_processed") or 0
+
+    def execute(self, parsed):
+        """증분 실행 → execute_bigquery와 같은 형식의 결과 (증분으로 답할 수 없으면 None)"""
+        start = time.monotonic()
+        metadata = self.current_metadata()
+        if metadata is None:
+            metrics.increment("incremental.skipped.metadata")
+            return None
+        shards = sorted(
+            shard for shard in metadata
+            if parsed["dates"] is None or parsed["dates"][0] <= shard <= parsed["dates"][1]
+        )
+        distinct = _PARTIALS[parsed["metric"]] is None
+        if distinct and len(shards) > 1 and not self.approximate_distinct:
+            metrics.increment("incremental.skipped.inexact")
+            return None
+
+        query_key = self._query_key(parsed)
+        try:
+            cached = self._load(query_key, metadata, set(shards))
+        except sqlite3.Error as e:
+            print(f"샤드별 집계 캐시 조회 실패: {e}")
+            cached = {}
+        missing = [shard for shard in shards if shard not in cached]
+
+        bytes_processed = 0
+        partials = dict(cached)
+        if missing:
+            fresh, bytes_processed = self._query_partials(parsed, missing)
+            if fresh is None:
+                metrics.increment("incremental.fallback")
+                return None
+            partials.update(fresh)
+            try:
+                self._store(query_key, metadata, fresh)
+            except sqlite3.Error as e:
+                print(f"샤드별 집계 캐시 저장 실패: {e}")
+
+        # 샤드별 부분 집계 병합 (차원 값 단위)
+        if distinct and len(shards) > 1:
+            groups = {}
+            for shard in shards:
+                for dim, _, sketch in partials[shard]:
+                    groups.setdefault(dim, []).append(sketch)
+            totals, merge_bytes = self._merge_sketches(groups)
+            if totals is None:
+                metrics.increment("incremental.fallback")
+                return None
+            bytes_processed += merge_bytes
+        else:
+            totals = {}
+            for shard in shards:
+                for dim, value, _ in partials[shard]:
+                    if value is None:
+                        totals.setdefault(dim, None)
+                    else:
+                        totals[dim] = (totals.get(dim) or 0) + value
+        if parsed["dimension"] is None and not totals:
+            # 집계 함수만 있는 쿼리는 행이 없어도 한 행 (COUNT는 0, SUM은 NULL)
+            totals = {None: 0 if parsed["metric"] != "revenue_usd" else None}
+
+        rows = []
+        for dim, value in totals.items():
+            row = {parsed["dimension_out"]: dim} if parsed["dimension"] else {}
+            row[parsed["metric_out"]] = value
+            rows.append(row)
+        if parsed["share_out"]:
+            total = sum(row[parsed["metric_out"]] or 0 for row in rows)
+            for row in rows:
+                value = row[parsed["metric_out"]]
+                row[parsed["share_out"]] = None if value is None or not total else round(100 * value / total, 2)
+        if parsed["order"]:
+            column, direction = parsed["order"]
+            rows.sort(key=lambda row: _sort_key(row[column]), reverse=direction == "DESC")
+        if parsed["limit"] is not None:
+            rows = rows[:parsed["limit"]]
+
+        metrics.observe("incremental.execute", time.monotonic() - start)
+        metrics.increment("incremental.shards.cached", len(shards) - len(missing))
+        metrics.increment("incremental.shards.queried", len(missing))
+        metrics.increment("incremental.bytes_processed", bytes_processed)
+        return {
+            "success": True,
+            "data": rows,
+            "row_count": len(rows),
+            "bytes_processed": bytes_processed,
+            "incremental": {
+                "shards": len(shards),
+                "cached_shards": len(shards) - len(missing),
+                "queried_shards": missing,
+                "exact": not distinct or len(shards) <= 1
+            }
+        }
+
+    def stats(self):
+        """헬스 체크용 샤드별 집계 캐시 현황"""
+        if not self.enabled:
+            return {"enabled": False}
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS entries, COUNT(DISTINCT query_key) AS shapes FROM shard_aggregates"
+            ).fetchone()
+        return {
+            "enabled": True,
+            "table": self.wildcard_table,
+            "approximate_distinct": self.approximate_distinct,
+            "entries": row["entries"],
+            "shapes": row["shapes"],
+            **metrics.snapshot("incremental.")
+        }
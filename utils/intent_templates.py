@@ -0,0 +1,395 @@
+# utils/intent_templates.py
+"""
+자주 들어오는 질문 형태의 LLM 없는 SQL 생성 (의도 분류 + 매개변수화 템플릿)
+
+"국가별 사용자 수", "가장 많이 발생한 이벤트 유형 상위 5개", "page_view가 가장 많은 시간대",
+"purchase 이벤트의 총 매출"처럼 지표 하나를 차원 하나로 나누어 보는 질문은
+1. 오프라인에서 학습한 문자 n-gram 나이브 베이즈 분류기로 형태(total / breakdown / other)를 판정하고
+2. 규칙으로 슬롯(지표, 차원, 상위 N, 이벤트 이름, 날짜, 정렬, 비율 여부)을 추출한 뒤
+3. 분류와 규칙이 일치하고 확신도가 기준 이상이면 템플릿으로 SQL을 바로 만든다.
+조금이라도 애매하면(복합 질문, 상대 기간, 조건/비교, 직전 결과 지칭 등) None을 반환해 Claude가 처리한다.
+분류기 가중치는 scripts/train_intent_model.py로 만든 JSON 파일에서 읽는다.
+"""
+
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+
+from .metrics import metrics
+from .stale_cache import normalize_question
+
+INTENTS = ("total", "breakdown", "other")
+
+# 차원: (패턴, 컬럼 식, 별칭)
+_DIMENSIONS = (
+    (
+        r"이벤트\s*(유형|종류|이름|별|순위)|event[_ ]?name|어떤\s*이벤트|많이\s*발생한\s*이벤트|"
+        r"(상위|top|탑)\s*\d*\s*(개\s*)?이벤트",
+        "event_name", "event_name"
+    ),
+    (r"국가|나라|country", "geo.country", "country"),
+    (r"도시|city", "geo.city", "city"),
+    (r"지역|region", "geo.region", "region"),
+    (r"운영\s*체제|\bos(?![a-z])|operating", "device.operating_system", "operating_system"),
+    (r"기기|디바이스|device", "device.category", "device_category"),
+    (r"플랫폼|platform", "platform", "platform"),
+    (r"매체|medium", "traffic_source.medium", "medium"),
+    (r"트래픽\s*소스|유입\s*(경로|채널|소스)|source", "traffic_source.source", "source"),
+    (r"시간대|시간\s*별|hour", "EXTRACT(HOUR FROM TIMESTAMP_MICROS(event_timestamp))", "hour")
+)
+
+_SESSION_EXPR = (
+    "COUNT(DISTINCT CONCAT(user_pseudo_id, CAST((SELECT value.int_value FROM UNNEST(event_params) "
+    "WHERE key = 'ga_session_id') AS STRING)))"
+)
+
+# 지표: (패턴, 집계 식, 별칭, 함께 적용되는 이벤트)
+_METRICS = (
+    (r"매출|수익|revenue|판매\s*금액|구매\s*금액", "SUM(ecommerce.purchase_revenue_in_usd)", "revenue_usd", "purchase"),
+    (r"세션(?!\s*시작)|sessions?(?!_start)", _SESSION_EXPR, "sessions", None),
+    (r"사용자|유저|이용자|방문자|users?\b", "COUNT(DISTINCT user_pseudo_id)", "users", None)
+)
+_EVENT_COUNT = ("COUNT(*)", "event_count")
+
+# 별칭 → 식 (요약 테이블 정의/SQL 매칭에서 템플릿과 같은 식을 쓰기 위함)
+DIMENSION_EXPRESSIONS = {alias: expr for _, expr, alias in _DIMENSIONS}
+METRIC_EXPRESSIONS = {
+    _EVENT_COUNT[1]: _EVENT_COUNT[0],
+    **{alias: expr for _, expr, alias, _ in _METRICS}
+}
+_EVENT_COUNT_CUE = re.compile(r"이벤트|건수|횟수|발생|조회\s*수|몇\s*(번|건|개)|events?\b|count")
+
+# 이벤트 이름: 한국어 별칭 → GA4 이벤트 이름
+_EVENT_ALIASES = (
+    (r"page_view|페이지\s*(뷰|조회)", "page_view"),
+    (r"purchase|구매", "purchase"),
+    (r"add_to_cart|장바구니", "add_to_cart"),
+    (r"session_start|세션\s*시작", "session_start"),
+    (r"first_visit|첫\s*방문", "first_visit"),
+    (r"view_item(?!_)|상품\s*(상세\s*)?조회", "view_item"),
+    (r"begin_checkout|결제\s*시작", "begin_checkout"),
+    (r"\bscroll\b|스크롤", "scroll"),
+    (r"user_engagement", "user_engagement")
+)
+_EVENT_NAME = re.compile(r"\b[a-z]+(?:_[a-z]+)+\b")
+_NOT_EVENTS = {
+    "event_name", "event_date", "event_timestamp", "event_params", "event_value_in_usd",
+    "user_id", "user_pseudo_id", "user_properties", "traffic_source", "app_info", "stream_id",
+    "purchase_revenue", "purchase_revenue_in_usd", "operating_system", "mobile_brand_name"
+}
+
+_TOP_N = re.compile(r"(?:상위|top|탑|하위|bottom)\s*(\d{1,4})|(\d{1,4})\s*(?:개|위|곳|가지)")
+_RANK_DESC = re.compile(r"가장|많은|많이|상위|top|탑|순위|인기|최다|최대")
+_RANK_ASC = re.compile(r"적은|하위|최저|최소|bottom")
+_SHARE = re.compile(r"비율|비중|점유율|분포|퍼센트|%")
+_DATE = re.compile(r"(20\d{2})[-./]?(\d{2})[-./]?(\d{2})|(20\d{2})\s*년\s*(\d{1,2})\s*월\s*(\d{1,2})\s*일")
+# 해석하지 못한 날짜/기간 표현 (있으면 템플릿으로 답하지 않음)
+_DATE_LIKE = re.compile(r"\d+\s*(년|월|일)|요일|분기|주말|평일|오전|오후|새벽|저녁")
+
+# 기기 카테고리 값: 두 가지 이상이나 비율을 물으면 기기별 분류, 하나만 말하면 필터라서 템플릿 대상 아님
+_DEVICE_VALUES = re.compile(r"모바일|데스크[톱탑]|태블릿|mobile|desktop|tablet")
+
+# 템플릿으로 답하지 않는 질문 (상대 기간, 비교/조건, 복합, 직전 결과 지칭)
+_UNSUPPORTED = re.compile(
+    r"어제|그저께|지난|최근|이번\s*(주|달|월)|전주|전월|주간|월간|일별|주별|월별|추이|트렌드|"
+    r"비교|대비|평균|중앙값|전환|퍼널|코호트|재방문|리텐션|이탈|제외|빼고|이상|이하|초과|미만|보다|"
+    r"증가|감소|변화|상관|예측|그리고|및|함께|동시에|각각|그중|그 중|거기|여기서|방금|앞의|해당|그 결과|"
+    r"위 결과|이전 결과|상세|목록|리스트|아이템|상품명|페이지\s*제목|랜딩"
+)
+
+def _features(question):
+    """분류기 입력 특징 (정규화한 질문의 문자 1~3-gram, 숫자/이벤트 이름은 자리표시자로)"""
+    text = normalize_question(question)
+    text = _EVENT_NAME.sub("§", text)
+    text = re.sub(r"\d+", "0", text)
+    padded = f" {text} "
+    grams = set()
+    for n in (1, 2, 3):
+        grams.update(padded[i:i + n] for i in range(len(padded) - n + 1))
+    grams.discard(" ")
+    return grams
+
+class IntentClassifier:
+    """문자 n-gram 나이브 베이즈 분류기 (특징 존재 여부 기반, 오프라인 학습, JSON 저장)"""
+
+    def __init__(self, priors, likelihoods, defaults, vocabulary_size=0, trained_at=None):
+        self.priors = priors
+        self.likelihoods = likelihoods
+        self.defaults = defaults
+        self.vocabulary_size = vocabulary_size
+        self.trained_at = trained_at
+
+    @classmethod
+    def train(cls, examples, alpha=0.5):
+        """[(질문, 의도), ...] 로 학습"""
+        doc_counts = Counter(intent for _, intent in examples)
+        feature_counts = {intent: Counter() for intent in doc_counts}
+        for question, intent in examples:
+            feature_counts[intent].update(_features(question))
+
+        vocabulary = set()
+        for counts in feature_counts.values():
+            vocabulary.update(counts)
+
+        total = sum(doc_counts.values())
+        priors = {intent: math.log(count / total) for intent, count in doc_counts.items()}
+        likelihoods = {}
+        defaults = {}
+        for intent, counts in feature_counts.items():
+            denominator = doc_counts[intent] + 2 * alpha
+            likelihoods[intent] = {
+                feature: round(math.log((count + alpha) / denominator), 4)
+                for feature, count in counts.items()
+            }
+            defaults[intent] = round(math.log(alpha / denominator), 4)
+        return cls(priors, likelihoods, defaults, len(vocabulary), time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+    def probabilities(self, question):
+        """→ ({의도: 확률}, 학습 어휘에 있는 특징 비율)
+
+        로그 우도 합을 특징 수의 제곱근으로 나누어 소프트맥스를 계산하여 긴 질문에서
+        확률이 극단값으로 쏠리지 않게 한다.
+        """
+        features = _features(question)
+        if not features:
+            return {"other": 1.0}, 0.0
+
+        known = set()
+        scores = {}
+        for intent, prior in self.priors.items():
+            table = self.likelihoods[intent]
+            default = self.defaults[intent]
+            log_likelihood = 0.0
+            for feature in features:
+                value = table.get(feature)
+                if value is None:
+                    value = default
+                else:
+                    known.add(feature)
+                log_likelihood += value
+            scores[intent] = prior + log_likelihood / math.sqrt(len(features))
+
+        top = max(scores.values())
+        exp_scores = {intent: math.exp(score - top) for intent, score in scores.items()}
+        total = sum(exp_scores.values())
+        return {intent: value / total for intent, value in exp_scores.items()}, len(known) / len(features)
+
+    def predict(self, question):
+        """→ (가장 가능성 높은 의도, 확률)"""
+        probabilities, _ = self.probabilities(question)
+        intent = max(probabilities, key=probabilities.get)
+        return intent, probabilities[intent]
+
+    def to_dict(self):
+        return {
+            "priors": self.priors,
+            "likelihoods": self.likelihoods,
+            "defaults": self.defaults,
+            "vocabulary_size": self.vocabulary_size,
+            "trained_at": self.trained_at
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["priors"], data["likelihoods"], data["defaults"],
+            data.get("vocabulary_size", 0), data.get("trained_at")
+        )
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+def _find_all(patterns, text):
+    return [item for item in patterns if re.search(item[0], text)]
+
+def extract_slots(question):
+    """규칙 기반 슬롯 추출 → 슬롯 딕셔너리 (템플릿으로 답할 수 없는 질문이면 None)"""
+    text = normalize_question(question)
+    if _UNSUPPORTED.search(text):
+        return None
+
+    dimensions = _find_all(_DIMENSIONS, text)
+    device_values = set(_DEVICE_VALUES.findall(text))
+    if device_values:
+        if len(device_values) < 2 and not _SHARE.search(text):
+            return None
+        if not any(dimension[2] == "device_category" for dimension in dimensions):
+            dimensions.append(next(item for item in _DIMENSIONS if item[2] == "device_category"))
+    metrics_found = _find_all(_METRICS, text)
+    if len(dimensions) > 1 or len(metrics_found) > 1:
+        return None
+
+    events = {event for pattern, event in _EVENT_ALIASES if re.search(pattern, text)}
+    events.update(name for name in _EVENT_NAME.findall(text) if name not in _NOT_EVENTS)
+    if metrics_found and metrics_found[0][3]:
+        implied = metrics_found[0][3]
+        if events - {implied}:
+            return None
+        events = {implied}
+    if len(events) > 1:
+        return None
+    event = next(iter(events), None)
+
+    dimension = dimensions[0] if dimensions else None
+    if dimension is not None and dimension[2] == "event_name" and event is not None:
+        return None
+    if not metrics_found and not _EVENT_COUNT_CUE.search(text) and dimension is None:
+        return None
+
+    dates = set()
+    for match in _DATE.finditer(text):
+        if match.group(1):
+            dates.add(match.group(1) + match.group(2) + match.group(3))
+        else:
+            dates.add(f"{match.group(4)}{int(match.group(5)):02d}{int(match.group(6)):02d}")
+    dates = sorted(dates)
+    if len(dates) > 2 or _DATE_LIKE.search(_DATE.sub(" ", text)):
+        return None
+
+    top = _TOP_N.search(text)
+    limit = int(top.group(1) or top.group(2)) if top else None
+    if limit is not None and not 1 <= limit <= 1000:
+        return None
+    if limit is not None and dimension is None:
+        return None
+
+    if _RANK_ASC.search(text):
+        order = "asc"
+    elif _RANK_DESC.search(text) or limit is not None:
+        order = "desc"
+    else:
+        order = None
+
+    metric = metrics_found[0][1:3] if metrics_found else _EVENT_COUNT
+    return {
+        "metric": metric[1],
+        "metric_expr": metric[0],
+        "dimension": dimension[2] if dimension else None,
+        "dimension_expr": dimension[1] if dimension else None,
+        "event": event,
+        "dates": dates,
+        "limit": limit,
+        "order": order,
+        "share": bool(dimension) and bool(_SHARE.search(text))
+    }
+
+def build_sql(slots, table_name, wildcard_table=None):
+    """슬롯으로 SQL 생성 (total: 지표 하나, breakdown: 차원별 지표)
+
+    wildcard_table(events_*)이 있으면 날짜가 있는 질문은 그 테이블에서 _TABLE_SUFFIX로 샤드를 거른다.
+    """
+    filters = []
+    if slots["event"]:
+        filters.append(f"event_name = '{slots['event']}'")
+    dates = slots["dates"]
+    date_column = "event_date"
+    if dates and wildcard_table:
+        table_name, date_column = wildcard_table, "_TABLE_SUFFIX"
+    if len(dates) == 1:
+        filters.append(f"{date_column} = '{dates[0]}'")
+    elif len(dates) == 2:
+        filters.append(f"{date_column} BETWEEN '{dates[0]}' AND '{dates[1]}'")
+    where = f" WHERE {' AND '.join(filters)}" if filters else ""
+
+    metric, metric_expr = slots["metric"], slots["metric_expr"]
+    dimension = slots["dimension"]
+    if dimension is None:
+        return f"SELECT {metric_expr} AS {metric} FROM {table_name}{where};"
+
+    dimension_expr = slots["dimension_expr"]
+    columns = dimension if dimension_expr == dimension else f"{dimension_expr} AS {dimension}"
+    columns += f", {metric_expr} AS {metric}"
+    if slots["share"]:
+        columns += f", ROUND(100 * {metric_expr} / SUM({metric_expr}) OVER (), 2) AS share_pct"
+
+    if slots["order"] is None and dimension == "hour":
+        order_by = "hour"
+    else:
+        order_by = f"{metric} {'ASC' if slots['order'] == 'asc' else 'DESC'}"
+    limit = f" LIMIT {slots['limit']}" if slots["limit"] else ""
+    return f"SELECT {columns} FROM {table_name}{where} GROUP BY {dimension} ORDER BY {order_by}{limit};"
+
+class TemplateMatch:
+    """템플릿으로 만든 SQL과 판정 근거"""
+
+    __slots__ = ("intent", "slots", "sql", "confidence")
+
+    def __init__(self, intent, slots, sql, confidence):
+        self.intent = intent
+        self.slots = slots
+        self.sql = sql
+        self.confidence = confidence
+
+    def to_dict(self):
+        return {
+            "intent": self.intent,
+            "confidence": round(self.confidence, 3),
+            "slots": {key: value for key, value in self.slots.items() if not key.endswith("_expr")}
+        }
+
+class IntentTemplateRouter:
+    """질문 → 템플릿 SQL (확신이 없으면 None, Claude로 생성)"""
+
+    def __init__(self, model_path, table_name, min_confidence=0.9, min_coverage=0.6, enabled=True,
+                 wildcard_table=None):
+        self.model_path = model_path
+        self.table_name = table_name
+        self.wildcard_table = wildcard_table
+        self.min_confidence = min_confidence
+        self.min_coverage = min_coverage
+        self.classifier = None
+        self.enabled = enabled
+        if enabled:
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.model_path):
+            print(f"의도 분류 모델 없음, 템플릿 SQL 비활성화: {self.model_path}")
+            self.enabled = False
+            return
+        try:
+            self.classifier = IntentClassifier.load(self.model_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"의도 분류 모델 로드 실패, 템플릿 SQL 비활성화: {e}")
+            self.enabled = False
+
+    def match(self, question):
+        """확신도가 기준 이상인 템플릿 SQL → TemplateMatch (아니면 None)"""
+        if not self.enabled:
+            return None
+
+        start = time.perf_counter()
+        probabilities, coverage = self.classifier.probabilities(question)
+        # 확신도: 템플릿 형태(total/breakdown) 중 하나일 확률, 형태 자체는 규칙으로 추출한 슬롯이 결정
+        confidence = 1.0 - probabilities.get("other", 0.0)
+        slots = None
+        if confidence >= self.min_confidence and coverage >= self.min_coverage:
+            slots = extract_slots(question)
+
+        result = None
+        if slots is not None:
+            intent = "breakdown" if slots["dimension"] else "total"
+            result = TemplateMatch(intent, slots, build_sql(slots, self.table_name, self.wildcard_table), confidence)
+
+        metrics.observe("intent.match", time.perf_counter() - start)
+        metrics.increment(f"intent.{'hit.' + intent if result else 'miss'}")
+        return result
+
+    def stats(self):
+        """헬스 체크용 상태"""
+        return {
+            "enabled": self.enabled,
+            "model_path": self.model_path,
+            "trained_at": self.classifier.trained_at if self.classifier else None,
+            "vocabulary_size": self.classifier.vocabulary_size if self.classifier else 0,
+            "min_confidence": self.min_confidence
+        }
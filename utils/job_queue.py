@@ -0,0 +1,254 @@
+# utils/job_queue.py
+"""
+오래 걸리는 분석을 위한 비동기 작업 큐
+
+작업은 크기가 제한된 워커 풀에서 실행되고 (dedicated_workers로 지정한 모드는 전용 풀과
+전용 대기 한도를 사용해 오래 걸리는 다른 모드 작업 뒤에서 기다리지 않음), 상태/단계/결과는 로컬 SQLite 파일에
+저장되어 프로세스가 재시작되어도 완료된 결과를 조회할 수 있다.
+완료 후 TTL이 지난 작업은 주기적으로 삭제된다.
+실행 중에는 먼저 받은 결과 행(미리보기)을 저장해 두었다가 상태 조회에 함께 돌려준다.
+대기/실행 중인 작업은 취소 요청을 받거나 abandon_seconds 동안 상태 조회가 없으면
+(클라이언트가 떠난 것으로 보고) cancel_reason()이 취소 사유를 돌려준다.
+
+작업 상태와 실행은 작업을 받은 프로세스에만 있으므로 여러 인스턴스로 배포할 때는 상태 조회가
+같은 인스턴스로 가도록 세션 어피니티를, 조회 사이에도 워커가 실행되도록 CPU 상시 할당을
+설정해야 한다 (deploy.sh의 --session-affinity --no-cpu-throttling).
+"""
+
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .json_utils import dumps, loads
+
+class JobQueueFullError(Exception):
+    """대기 중인 작업 수가 상한에 도달했을 때 발생"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    question TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    status_code INTEGER,
+    result TEXT,
+    error TEXT,
+    preview TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+)
+"""
+
+class JobManager:
+    """워커 풀 + SQLite 저장소 기반 작업 관리자"""
+
+    def __init__(self, store_path, max_workers=2, max_queue_depth=20, ttl_seconds=3600,
+                 cleanup_interval=60, abandon_seconds=0, dedicated_workers=None):
+        self.store_path = store_path
+        self.max_queue_depth = max_queue_depth
+        self.ttl_seconds = ttl_seconds
+        self.cleanup_interval = cleanup_interval
+        self.abandon_seconds = abandon_seconds
+        self._cancel_requested = set()
+        self._last_polled = {}  # 작업 ID → 마지막 상태 조회 시각 (대기/실행 중 작업만)
+        # 풀 이름(None은 공용 풀, 그 외는 모드) → 워커 풀
+        self._executors = {None: ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")}
+        for mode, workers in (dedicated_workers or {}).items():
+            self._executors[mode] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"job-{mode}")
+        self._lock = threading.Lock()
+        self._active = dict.fromkeys(self._executors, 0)  # 풀별 대기 + 실행 중 작업 수
+        self._last_cleanup = 0.0
+
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "preview" not in columns:
+                # 미리보기 컬럼이 없던 저장소
+                conn.execute("ALTER TABLE jobs ADD COLUMN preview TEXT")
+            # 이전 프로세스에서 끝나지 못한 작업은 실패 처리
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ?, finished_at = ? "
+                "WHERE status IN ('queued', 'running')",
+                ("서버 재시작으로 작업이 중단되었습니다.", now, now)
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.store_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def submit(self, mode, question, options, runner):
+        """작업 등록 후 작업 ID 반환 (큐가 가득 차면 JobQueueFullError)"""
+        self._maybe_cleanup()
+
+        pool = mode if mode in self._executors else None
+        with self._lock:
+            if self._active[pool] >= self.max_queue_depth:
+                raise JobQueueFullError(
+                    f"대기 중인 작업이 너무 많습니다. (최대 {self.max_queue_depth}개) 잠시 후 다시 시도해주세요."
+                )
+            self._active[pool] += 1
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._last_polled[job_id] = time.monotonic()
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO jobs (id, mode, question, status, stage, created_at, updated_at) "
+                    "VALUES (?, ?, ?, 'queued', 'queued', ?, ?)",
+                    (job_id, mode, question, now, now)
+                )
+            self._executors[pool].submit(self._run, job_id, pool, mode, question, dict(options or {}), runner)
+        except Exception:
+            with self._lock:
+                self._active[pool] -= 1
+                self._last_polled.pop(job_id, None)
+            raise
+
+        return job_id
+
+    def _run(self, job_id, pool, mode, question, options, runner):
+        try:
+            reason = self.cancel_reason(job_id)
+            if reason:
+                # 시작 전에 취소된 작업은 실행하지 않음
+                self._update(
+                    job_id, status="cancelled", stage="cancelled", status_code=499,
+                    error=f"작업이 시작 전에 취소되었습니다. ({reason})", finished_at=time.time()
+                )
+                return
+
+            self._update(job_id, status="running", stage="started")
+            payload, status_code = runner(job_id, mode, question, options)
+            if status_code < 400:
+                status = "completed"
+            else:
+                status = "cancelled" if payload.get("cancelled") else "failed"
+            self._update(
+                job_id,
+                status=status,
+                stage="cancelled" if status == "cancelled" else "completed",
+                status_code=status_code,
+                result=dumps(payload),
+                preview=None,
+                error=None if status_code < 400 else payload.get("error"),
+                finished_at=time.time()
+            )
+        except Exception as e:
+            print(f"작업 {job_id} 실행 중 오류: {e}")
+            self._update(
+                job_id, status="failed", stage="failed", status_code=500, preview=None,
+                error=f"서버 오류: {str(e)}", finished_at=time.time()
+            )
+        finally:
+            with self._lock:
+                self._active[pool] -= 1
+                self._cancel_requested.discard(job_id)
+                self._last_polled.pop(job_id, None)
+
+    def touch(self, job_id):
+        """클라이언트가 작업 상태를 조회했음을 기록 (이탈 감지용)"""
+        with self._lock:
+            if job_id in self._last_polled:
+                self._last_polled[job_id] = time.monotonic()
+
+    def cancel(self, job_id):
+        """대기/실행 중인 작업 취소 요청 → 요청 접수 여부"""
+        with self._lock:
+            if job_id not in self._last_polled:
+                return False
+            self._cancel_requested.add(job_id)
+        return True
+
+    def cancel_reason(self, job_id):
+        """작업을 중단해야 하면 사유 (취소 요청 / 상태 조회 끊김), 아니면 None"""
+        with self._lock:
+            if job_id in self._cancel_requested:
+                return "job_cancelled"
+            last_polled = self._last_polled.get(job_id)
+        if self.abandon_seconds and last_polled is not None and time.monotonic() - last_polled > self.abandon_seconds:
+            return "job_abandoned"
+        return None
+
+    def update_stage(self, job_id, stage):
+        """파이프라인 진행 단계 기록"""
+        self._update(job_id, stage=stage)
+
+    def update_preview(self, job_id, preview):
+        """실행 중 먼저 받은 결과 행 기록 (완료되면 최종 결과로 대체되어 지워짐)"""
+        with self._lock, self._connect() as conn:
+            # 이미 끝난 작업에는 늦게 도착한 미리보기를 기록하지 않음
+            conn.execute(
+                "UPDATE jobs SET preview = ?, updated_at = ? WHERE id = ? AND status = 'running'",
+                (dumps(preview), time.time(), job_id)
+            )
+
+    def get(self, job_id):
+        """작업 상태 조회 (없으면 None)"""
+        self._maybe_cleanup()
+
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job = {
+            "job_id": row["id"],
+            "mode": row["mode"],
+            "question": row["question"],
+            "status": row["status"],
+            "stage": row["stage"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "finished_at": row["finished_at"]
+        }
+        if row["result"] is not None:
+            job["result"] = loads(row["result"])
+        if row["preview"] is not None:
+            job["preview"] = loads(row["preview"])
+        if row["error"]:
+            job["error"] = row["error"]
+        return job
+
+    def stats(self):
+        """헬스 체크용 작업 큐 현황"""
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        with self._lock:
+            active = dict(self._active)
+        return {
+            "active": sum(active.values()),
+            "active_by_pool": {pool or "shared": count for pool, count in active.items()},
+            "max_queue_depth": self.max_queue_depth,
+            "stored": counts
+        }
+
+    def _maybe_cleanup(self):
+        """TTL이 지난 완료/실패 작업 삭제 (cleanup_interval마다 최대 한 번)"""
+        now = time.time()
+        if now - self._last_cleanup < self.cleanup_interval:
+            return
+        self._last_cleanup = now
+        try:
+            with self._lock, self._connect() as conn:
+                deleted = conn.execute(
+                    "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                    (now - self.ttl_seconds,)
+                ).rowcount
+            if deleted:
+                print(f"만료된 작업 {deleted}개 삭제")
+        except Exception as e:
+            print(f"작업 정리 중 오류: {e}")
@@ -0,0 +1,85 @@
+# utils/json_utils.py
+"""
+응답과 프롬프트에서 공통으로 사용하는 JSON 인코딩 유틸리티
+
+orjson이 설치되어 있으면 C 구현으로 한 번에 직렬화하고, 없으면 표준 json 모듈로
+같은 결과를 만든다. datetime/date/time은 ISO 8601 문자열, Decimal은 문자열
+(Flask jsonify와 동일), bytes는 base64 문자열, NumPy 배열/스칼라는 일반 숫자
+목록으로 변환된다.
+"""
+
+import base64
+import json
+from collections.abc import Mapping
+from decimal import Decimal
+
+from .result_set import ResultSet, RowView
+
+try:
+    import orjson
+except ImportError:  # orjson은 선택 의존성
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:  # numpy는 선택 의존성
+    np = None
+
+def _default(obj):
+    """기본 인코더가 처리하지 못하는 타입 변환"""
+    if isinstance(obj, ResultSet):
+        return obj.to_records()
+    if isinstance(obj, RowView):
+        return obj.to_dict()
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(obj)).decode('ascii')
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    return str(obj)
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps_bytes(obj, indent=False):
+        """객체를 UTF-8 JSON 바이트로 직렬화"""
+        option = _ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else _ORJSON_OPTIONS
+        return orjson.dumps(obj, default=_default, option=option)
+
+    def loads(data):
+        """JSON 문자열/바이트 파싱"""
+        return orjson.loads(data)
+else:
+    def dumps_bytes(obj, indent=False):
+        """객체를 UTF-8 JSON 바이트로 직렬화"""
+        return dumps(obj, indent=indent).encode('utf-8')
+
+    def loads(data):
+        """JSON 문자열/바이트 파싱"""
+        return json.loads(data)
+
+def dumps(obj, indent=False):
+    """객체를 JSON 문자열로 직렬화 (indent=True면 2칸 들여쓰기)"""
+    if orjson is not None:
+        return dumps_bytes(obj, indent=indent).decode('utf-8')
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        default=_default,
+        indent=2 if indent else None,
+        separators=None if indent else (',', ':')
+    )
+
+def to_jsonable(obj):
+    """객체를 JSON 기본 타입(dict/list/str/숫자)만으로 구성된 형태로 변환"""
+    return loads(dumps_bytes(obj))
@@ -0,0 +1,217 @@
+# utils/local_query.py
+"""
+이전 조회 결과에 대한 프로세스 내 SQL 실행 (후속 질문용)
+
+DuckDB와 pyarrow가 설치되어 있으면 결과 컬럼을 Arrow 테이블로 만들어 DuckDB에 등록하고,
+없으면 표준 라이브러리 sqlite3 메모리 DB에 적재한다. 테이블은 처음 조회할 때 한 번만
+적재하고, 이후 후속 질문은 같은 연결에서 밀리초 단위로 실행된다.
+읽기 전용 SELECT 문만 허용하며 DuckDB는 외부 파일/네트워크 접근을 끈다.
+재귀 CTE 등으로 끝나지 않는 쿼리는 실행 시간 한도(sqlite는 진행 핸들러, DuckDB는 타이머의
+interrupt)와 결과 행 수 한도로 중단하고 LocalQueryError로 알린다.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+
+from .result_set import ResultSet, ResultSetBuilder
+
+try:
+    import duckdb
+    import pyarrow
+except ImportError:  # duckdb/pyarrow는 선택 의존성
+    duckdb = None
+    pyarrow = None
+
+LOCAL_TABLE = "previous_result"
+
+# sqlite 진행 핸들러 호출 간격 (가상 머신 명령 수)
+_PROGRESS_STEPS = 10000
+
+# 로컬 실행 SQL 표시 (모델이 첫 줄에 붙임)
+LOCAL_SQL_MARKER = "-- LOCAL"
+
+_FORBIDDEN = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|ATTACH|DETACH|PRAGMA|COPY|EXPORT|IMPORT|INSTALL|LOAD|"
+    r"CALL|VACUUM)\b|read_\w+\s*\(|\w+_scan\s*\(|load_extension\s*\(",
+    re.IGNORECASE
+)
+
+class LocalQueryError(Exception):
+    """로컬 SQL을 실행할 수 없을 때 발생"""
+
+def engine_name():
+    """사용할 로컬 엔진 이름 (프롬프트의 SQL 방언 안내용)"""
+    return "DuckDB" if duckdb is not None else "SQLite"
+
+def _strip_code_fence(text):
+    text = (text or "").strip()
+    if text.startswith("```"):
+        text = text.strip("`").split("\n", 1)[-1] if "\n" in text else ""
+    return text.strip()
+
+def is_local_sql(sql_query):
+    """모델이 이전 결과 조회용으로 표시한 SQL인지 여부"""
+    return _strip_code_fence(sql_query).upper().startswith(LOCAL_SQL_MARKER)
+
+def strip_local_marker(sql_query):
+    """표시 주석과 코드 블록 기호를 제거한 SQL"""
+    text = _strip_code_fence(sql_query)
+    lines = [line for line in text.splitlines() if not line.strip().upper().startswith(LOCAL_SQL_MARKER)]
+    return "\n".join(lines).strip().rstrip(";").strip()
+
+def validate_local_sql(sql_query):
+    """읽기 전용 단일 SELECT 문인지 확인 (아니면 LocalQueryError)"""
+    head = sql_query.lstrip("( \n\t").upper()
+    if not (head.startswith("SELECT") or head.startswith("WITH")):
+        raise LocalQueryError("SELECT 문만 실행할 수 있습니다.")
+    if ";" in sql_query:
+        raise LocalQueryError("하나의 SELECT 문만 실행할 수 있습니다.")
+    match = _FORBIDDEN.search(sql_query)
+    if match:
+        raise LocalQueryError(f"허용되지 않는 구문입니다: {match.group(0)}")
+
+def _sqlite_value(value):
+    """sqlite3에 넣을 수 있는 값으로 변환 (날짜는 ISO 문자열, 중첩 값은 JSON 문자열)"""
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return int(value) if isinstance(value, bool) else value
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+def _sqlite_type(kind, values):
+    if kind == "int":
+        return "INTEGER"
+    if kind == "float":
+        return "REAL"
+    sample = next((v for v in values if v is not None), None)
+    if isinstance(sample, int):
+        return "INTEGER"
+    if isinstance(sample, (float, Decimal)):
+        return "REAL"
+    return "TEXT"
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+class LocalResultTable:
+    """결과 하나를 적재한 로컬 SQL 연결 (처음 조회 시 적재)
+
+    쿼리 하나는 timeout_seconds 안에 끝나야 하고 결과는 max_result_rows행 이하여야 한다.
+    """
+
+    def __init__(self, data, timeout_seconds=5.0, max_result_rows=200000):
+        self.data = data if isinstance(data, ResultSet) else ResultSet.from_rows(data)
+        self.engine = engine_name()
+        self.timeout_seconds = timeout_seconds
+        self.max_result_rows = max_result_rows
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        data = self.data
+        if self.engine == "DuckDB":
+            conn = duckdb.connect()
+            arrays = {}
+            for name in data.columns:
+                values = data.column(name)
+                try:
+                    arrays[name] = pyarrow.array(values)
+                except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+                    # 타입이 섞인 컬럼은 문자열로
+                    arrays[name] = pyarrow.array([_sqlite_value(v) if v is not None else None for v in values], pyarrow.string())
+            conn.register(LOCAL_TABLE, pyarrow.table(arrays))
+            conn.execute("SET enable_external_access = false")
+            conn.execute("SET lock_configuration = true")
+            return conn
+
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        columns = data.columns
+        definitions = ", ".join(
+            f"{_quote(name)} {_sqlite_type(data.column_kind(name), data.column(name)[:100])}" for name in columns
+        )
+        conn.execute(f"CREATE TABLE {LOCAL_TABLE} ({definitions})")
+        # 컬럼 단위로 변환 후 행으로 묶어 적재 (숫자 컬럼은 변환 없이 그대로)
+        converted = [
+            data.column(name) if data.column_kind(name) in ("int", "float")
+            else [_sqlite_value(v) for v in data.column(name)]
+            for name in columns
+        ]
+        placeholders = ", ".join("?" for _ in columns)
+        conn.executemany(f"INSERT INTO {LOCAL_TABLE} VALUES ({placeholders})", zip(*converted))
+        return conn
+
+    def describe(self):
+        """프롬프트용 컬럼 설명 "이름 (타입)" 목록"""
+        described = []
+        for name in self.data.columns:
+            kind = self.data.column_kind(name)
+            if kind == "object":
+                sample = next((v for v in self.data.column(name)[:100] if v is not None), None)
+                kind = type(sample).__name__ if sample is not None else "null"
+            described.append(f"{name} ({kind})")
+        return described
+
+    def _execute(self, sql_query):
+        """실행 → (컬럼 이름 목록, 행 목록) (결과 행 수 한도 초과 시 LocalQueryError)"""
+        cursor = self._conn.execute(sql_query)
+        columns = [d[0] for d in cursor.description]
+        rows = cursor.fetchmany(self.max_result_rows + 1)
+        if len(rows) > self.max_result_rows:
+            raise LocalQueryError(f"로컬 결과가 너무 큽니다 ({self.max_result_rows}행 초과).")
+        return columns, rows
+
+    def query(self, sql_query):
+        """로컬 SQL 실행 → ResultSet (실패하거나 시간 한도를 넘으면 LocalQueryError)"""
+        validate_local_sql(sql_query)
+        with self._lock:
+            timer = None
+            timed_out = threading.Event()
+            try:
+                if self._conn is None:
+                    self._conn = self._load()
+                if self.engine == "DuckDB":
+                    def interrupt():
+                        timed_out.set()
+                        self._conn.interrupt()
+                    timer = threading.Timer(self.timeout_seconds, interrupt)
+                    timer.daemon = True
+                    timer.start()
+                else:
+                    deadline = time.monotonic() + self.timeout_seconds
+                    def past_deadline():
+                        if time.monotonic() < deadline:
+                            return 0
+                        timed_out.set()
+                        return 1  # 0이 아니면 sqlite가 실행을 중단
+                    self._conn.set_progress_handler(past_deadline, _PROGRESS_STEPS)
+                columns, rows = self._execute(sql_query)
+            except LocalQueryError:
+                raise
+            except Exception as e:
+                if timed_out.is_set():
+                    raise LocalQueryError(f"로컬 실행 시간 한도({self.timeout_seconds:g}초)를 넘었습니다.") from e
+                raise LocalQueryError(f"{self.engine} 실행 오류: {e}") from e
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                elif self._conn is not None and self.engine != "DuckDB":
+                    self._conn.set_progress_handler(None, 0)
+
+        builder = ResultSetBuilder(columns)
+        builder.append_rows(dict(zip(columns, row)) for row in rows)
+        return builder.build()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
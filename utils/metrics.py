@@ -0,0 +1,104 @@
+# utils/metrics.py
+"""
+프로세스 내 지연 시간/카운터 수집 유틸리티
+
+최근 샘플을 고정 크기 링 버퍼에 보관하여 백분위수를 계산하므로
+메모리 사용량이 요청 수와 무관하게 제한된다.
+"""
+
+import threading
+from collections import deque
+
+def percentile(sorted_values, q):
+    """정렬된 값 목록의 q 백분위수 (0 <= q <= 100, 선형 보간)"""
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lower = int(pos)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+class LatencyStats:
+    """최근 N개 샘플 기반 지연 시간 통계"""
+
+    def __init__(self, window=500):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """샘플 하나 기록 (초 단위)"""
+        with self._lock:
+            self.samples.append(value)
+            self.count += 1
+            self.total += value
+
+    def percentile(self, q):
+        """최근 샘플의 q 백분위수"""
+        with self._lock:
+            ordered = sorted(self.samples)
+        return percentile(ordered, q)
+
+    def snapshot(self):
+        """요약 통계 (밀리초)"""
+        with self._lock:
+            ordered = sorted(self.samples)
+            count, total = self.count, self.total
+
+        def ms(value):
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "count": count,
+            "mean_ms": ms(total / count) if count else None,
+            "p50_ms": ms(percentile(ordered, 50)),
+            "p95_ms": ms(percentile(ordered, 95)),
+            "p99_ms": ms(percentile(ordered, 99))
+        }
+
+class MetricsRegistry:
+    """이름별 지연 시간 통계와 카운터 모음"""
+
+    def __init__(self, window=500):
+        self.window = window
+        self._latencies = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def latency(self, name):
+        """이름에 해당하는 LatencyStats (없으면 생성)"""
+        with self._lock:
+            stats = self._latencies.get(name)
+            if stats is None:
+                stats = self._latencies[name] = LatencyStats(self.window)
+            return stats
+
+    def observe(self, name, seconds):
+        """지연 시간 기록"""
+        self.latency(name).observe(seconds)
+
+    def increment(self, name, amount=1):
+        """카운터 증가"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counter(self, name):
+        """카운터 값"""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self, prefix=""):
+        """접두사로 시작하는 지표들의 요약"""
+        with self._lock:
+            latencies = {k: v for k, v in self._latencies.items() if k.startswith(prefix)}
+            counters = {k: v for k, v in self._counters.items() if k.startswith(prefix)}
+        return {
+            "latency": {name: stats.snapshot() for name, stats in sorted(latencies.items())},
+            "counters": dict(sorted(counters.items()))
+        }
+
+# 프로세스 전역 지표 저장소
+metrics = MetricsRegistry()
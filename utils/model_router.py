@@ -0,0 +1,122 @@
+# utils/model_router.py
+"""
+질문 복잡도와 단계(SQL/리포트/HTML)에 따라 Claude 모델 등급을 고르는 라우터
+
+간단한 질문은 빠른(작은) 모델로 먼저 처리하고, SQL 검사/실행 실패나
+낮은 검증 점수가 나올 때만 큰 모델로 올린다(escalation).
+등급별 지연 시간과 escalation 비율을 기록하여 임계값 조정에 사용한다.
+"""
+
+import re
+
+from .metrics import metrics
+
+# 복잡도를 높이는 표현 (가중치)
+COMPLEXITY_PATTERNS = [
+    (r"비교|대비|차이", 2),
+    (r"추세|트렌드|증감|변화|성장률", 2),
+    (r"비율|비중|점유율|전환율|이탈률|%", 1),
+    (r"퍼널|코호트|리텐션|재방문|세션당|사용자당", 3),
+    (r"상관|분포|중앙값|백분위|평균", 1),
+    (r"누적|이동 ?평균|순위|랭킹", 2),
+    (r"event_params|파라미터|매개변수|items|상품", 2),
+    (r"그리고|및|와 함께|동시에|각각", 1),
+]
+
+# 차원(그룹 기준) 표현 - 여러 차원을 섞으면 복잡도 증가
+DIMENSION_PATTERN = re.compile(r"국가|지역|도시|기기|디바이스|운영체제|브라우저|플랫폼|소스|매체|시간대|요일|날짜|이벤트")
+
+def score_question_complexity(question):
+    """질문 복잡도 점수 (0 이상 정수, 높을수록 복잡)"""
+    text = question or ""
+    score = 0
+    for pattern, weight in COMPLEXITY_PATTERNS:
+        if re.search(pattern, text, re.IGNORECASE):
+            score += weight
+
+    dimensions = set(DIMENSION_PATTERN.findall(text))
+    if len(dimensions) >= 2:
+        score += len(dimensions) - 1
+
+    # 긴 질문은 대체로 조건이 많음
+    if len(text) > 60:
+        score += 1
+    if len(text) > 120:
+        score += 1
+    return score
+
+class ModelRouter:
+    """단계별 모델 등급 선택 및 escalation 기록"""
+
+    def __init__(self, tiers, stage_min_tier=None, fast_max_score=2, enabled=True):
+        # tiers: [(등급 이름, 모델 ID), ...] 빠른 모델부터 순서대로
+        self.tiers = list(tiers)
+        self.tier_names = [name for name, _ in self.tiers]
+        self.models = dict(self.tiers)
+        self.stage_min_tier = stage_min_tier or {}
+        self.fast_max_score = fast_max_score
+        self.enabled = enabled
+
+    def model_for(self, tier):
+        """등급에 해당하는 모델 ID"""
+        return self.models[tier]
+
+    def select(self, stage, question):
+        """단계와 질문 복잡도로 시작 등급 결정"""
+        if not self.enabled:
+            return self.tier_names[-1]
+
+        complexity = score_question_complexity(question)
+        tier_index = 0 if complexity <= self.fast_max_score else len(self.tier_names) - 1
+
+        # 단계별 최소 등급 (예: HTML 생성은 큰 모델부터)
+        min_tier = self.stage_min_tier.get(stage)
+        if min_tier in self.tier_names:
+            tier_index = max(tier_index, self.tier_names.index(min_tier))
+
+        tier = self.tier_names[tier_index]
+        metrics.increment(f"model.{stage}.selected.{tier}")
+        return tier
+
+    def next_tier(self, tier):
+        """한 단계 위 등급 (이미 최상위면 None)"""
+        index = self.tier_names.index(tier)
+        if index + 1 >= len(self.tier_names):
+            return None
+        return self.tier_names[index + 1]
+
+    def escalate(self, stage, tier, reason):
+        """다음 등급 반환 (이미 최상위면 None)"""
+        next_tier = self.next_tier(tier)
+        if next_tier is None:
+            return None
+        metrics.increment(f"model.{stage}.escalated.{tier}")
+        print(f"모델 escalation ({stage}): {tier} → {next_tier}, 사유: {reason}")
+        return next_tier
+
+    def record(self, stage, tier, seconds, success=True):
+        """호출 지연 시간/성공 여부 기록"""
+        metrics.observe(f"model.{stage}.{tier}", seconds)
+        if not success:
+            metrics.increment(f"model.{stage}.failed.{tier}")
+
+    def stats(self):
+        """단계/등급별 지연 시간과 escalation 비율"""
+        snapshot = metrics.snapshot("model.")
+        counters = snapshot["counters"]
+        escalation_rates = {}
+        for key, selected in counters.items():
+            parts = key.split(".")
+            if len(parts) == 4 and parts[2] == "selected" and selected:
+                stage, tier = parts[1], parts[3]
+                escalated = counters.get(f"model.{stage}.escalated.{tier}", 0)
+                escalation_rates[f"{stage}.{tier}"] = round(escalated / selected, 3)
+
+        return {
+            "enabled": self.enabled,
+            "tiers": self.models,
+            "fast_max_score": self.fast_max_score,
+            "latency": snapshot["latency"],
+            "counters": counters,
+            "escalation_rates": escalation_rates
+        }
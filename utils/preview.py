@@ -0,0 +1,129 @@
+# utils/preview.py
+"""
+미리보기 우선 실행: 전체 쿼리와 동시에 실행하는 작은 미리보기 쿼리
+
+결과가 큰 쿼리는 전체 작업이 끝나고 결과를 모두 받을 때까지 한 행도 보여줄 수 없다.
+전체 쿼리가 잠시 안에 끝나지 않으면 같은 SQL을 행 수를 제한한 미리보기 쿼리로 바꿔
+동시에 실행하고, 먼저 받은 행을 보여준 뒤 전체 결과가 준비되면 교체한다.
+
+- 집계/정렬/조인이 없는 단순 행 조회는 TABLESAMPLE로 일부 블록만 읽고 LIMIT
+  (읽는 바이트 자체가 줄어듦)
+- 그 밖의 쿼리는 결과를 바꾸지 않도록 바깥에서 LIMIT만 적용
+  (처리 바이트는 줄지 않으므로 미리보기 작업의 청구 바이트 한도로 비용을 제한)
+
+첫 행까지 걸린 시간(time to first row)과 전체 완료 시간은 따로 기록한다.
+"""
+
+import re
+import threading
+import time
+
+from .metrics import metrics
+
+# 행 단위 조회가 아님을 나타내는 구문 (하나라도 있으면 표본 추출 시 결과 의미가 달라짐)
+_NOT_ROW_LEVEL = re.compile(
+    r"\b(GROUP\s+BY|ORDER\s+BY|DISTINCT|OVER\s*\(|JOIN|UNION|INTERSECT|EXCEPT|WITH|HAVING|QUALIFY|"
+    r"COUNT|COUNTIF|SUM|AVG|MIN|MAX|ANY_VALUE|ARRAY_AGG|STRING_AGG|APPROX_\w+|HLL_COUNT\.\w+|"
+    r"LOGICAL_AND|LOGICAL_OR|STDDEV\w*|VARIANCE|VAR_\w+|CORR|COVAR_\w+)\b",
+    re.IGNORECASE
+)
+
+# 별칭 없는 단일 테이블 FROM 절 (바로 뒤에 WHERE/LIMIT이 오거나 끝)
+_SINGLE_FROM = re.compile(
+    r"\bFROM\s+(`[^`]+`|[A-Za-z_][\w.-]*)\s*(?=\bWHERE\b|\bLIMIT\b|$)",
+    re.IGNORECASE
+)
+
+_OUTER_LIMIT = re.compile(r"\bLIMIT\s+(\d+)\s*(?:OFFSET\s+\d+\s*)?$", re.IGNORECASE)
+
+_LINE_COMMENT = re.compile(r"--[^\n]*")
+
+def _strip_sql(sql_query):
+    return sql_query.strip().rstrip(";").strip()
+
+def _outer_limit(sql_query):
+    """바깥 쿼리의 LIMIT 값 (없으면 None, 괄호 안의 LIMIT은 무시)"""
+    match = _OUTER_LIMIT.search(sql_query)
+    if match is None:
+        return None
+    before = sql_query[:match.start()]
+    if before.count("(") != before.count(")"):
+        return None
+    return int(match.group(1))
+
+def build_preview_sql(sql_query, rows=100, sample_percent=1.0):
+    """미리보기 SQL → (SQL, 방식) (미리보기가 의미 없으면 (None, 사유))
+
+    방식은 "tablesample"(단순 행 조회를 일부 블록만 읽어 LIMIT) 또는 "limit"(바깥 LIMIT).
+    결과가 이미 rows행 이하로 제한된 쿼리는 미리보기하지 않는다.
+    """
+    body = _strip_sql(sql_query or "")
+    if not body:
+        return None, "empty"
+    code = _LINE_COMMENT.sub(" ", body)
+    if ";" in code:
+        return None, "script"
+
+    limit = _outer_limit(code)
+    if limit is not None and limit <= rows:
+        return None, "small_limit"
+
+    if sample_percent and not _NOT_ROW_LEVEL.search(code) and len(re.findall(r"\bFROM\b", code, re.IGNORECASE)) == 1:
+        match = _SINGLE_FROM.search(code)
+        # 별칭이 있거나 와일드카드 테이블(events_*)이면 TABLESAMPLE을 쓰지 않음
+        if match is not None and "*" not in match.group(1):
+            head, tail = code[:match.end(1)], code[match.end(1):].strip()
+            if limit is None:
+                tail = f"{tail} LIMIT {rows}"
+            else:
+                tail = _OUTER_LIMIT.sub(f"LIMIT {rows}", tail)
+            return f"{head} TABLESAMPLE SYSTEM ({sample_percent:g} PERCENT) {tail.strip()}", "tablesample"
+
+    return f"SELECT * FROM (\n{body}\n) LIMIT {rows}", "limit"
+
+class FirstRowTimer:
+    """쿼리 하나의 첫 행(미리보기 또는 전체 결과 첫 페이지)까지 시간과 완료 시간
+
+    여러 스레드(전체 결과 수신, 미리보기)에서 first_row()를 호출해도 가장 먼저 호출한
+    쪽만 기록된다.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.first_row_seconds = None
+        self.first_row_source = None
+        self.complete_seconds = None
+        self._lock = threading.Lock()
+
+    def first_row(self, source):
+        """source("preview" / "full")의 첫 행 도착 → 처음이면 True"""
+        with self._lock:
+            if self.first_row_seconds is not None:
+                return False
+            self.first_row_seconds = time.monotonic() - self.started
+            self.first_row_source = source
+            return True
+
+    def complete(self):
+        """전체 결과 수신 완료 (지표 기록)"""
+        with self._lock:
+            self.complete_seconds = time.monotonic() - self.started
+            if self.first_row_seconds is None:
+                self.first_row_seconds = self.complete_seconds
+                self.first_row_source = "full"
+            first_row_seconds, source = self.first_row_seconds, self.first_row_source
+        metrics.observe("preview.time_to_first_row", first_row_seconds)
+        metrics.observe(f"preview.time_to_first_row.{source}", first_row_seconds)
+        metrics.observe("preview.time_to_complete", self.complete_seconds)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "first_row_seconds": None if self.first_row_seconds is None else round(self.first_row_seconds, 3),
+                "first_row_source": self.first_row_source,
+                "complete_seconds": None if self.complete_seconds is None else round(self.complete_seconds, 3)
+            }
+
+def preview_stats():
+    """헬스 체크용 미리보기 지표 (첫 행/완료 시간, 실행/건너뜀 횟수)"""
+    return metrics.snapshot("preview.")
@@ -0,0 +1,178 @@
+# utils/prompt_utils.py
+"""
+프롬프트 페이로드 인코딩 유틸리티 (토큰 절약)
+
+들여쓰기된 JSON은 공백과 반복되는 키 이름에 입력 토큰을 많이 쓴다.
+여기서는 행 데이터를 헤더 + TSV 행으로, 컬럼 통계를 컬럼당 한 줄로 표현하고
+숫자는 유효 자릿수로 반올림한다. 샘플 행은 앞에서 N개가 아니라 범주별 층화
+(또는 등간격 + 극값) 방식으로 고르고, 명시한 토큰 예산 안에서만 포함한다.
+"""
+
+import math
+import random
+from collections.abc import Mapping
+from decimal import Decimal
+
+from .metrics import metrics
+from .result_set import ResultSet
+
+# 층화 기준으로 쓸 범주형 컬럼의 최대 고유값 수
+_MAX_STRATA = 50
+
+def estimate_tokens(text):
+    """토큰 수 추정 (ASCII는 약 4자당 1토큰, 한글 등 비ASCII는 글자당 약 1토큰)"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+
+def format_value(value, digits=4):
+    """프롬프트용 값 표현 (실수는 유효 자릿수로 반올림, null은 빈 문자열)"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, Decimal):
+        value = float(value)
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return str(value)
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return f"{value:.{digits}g}"
+    text = str(value)
+    # TSV 구분자와 줄바꿈 제거
+    return text.replace("\t", " ").replace("\r", " ").replace("\n", " ")
+
+def _columns_of(data):
+    if isinstance(data, ResultSet):
+        return data.columns
+    return list(data[0].keys()) if data and isinstance(data[0], Mapping) else []
+
+def encode_table(rows, columns, max_cell_chars=80):
+    """헤더 + TSV 행 형식으로 인코딩"""
+    lines = ["\t".join(columns)]
+    for row in rows:
+        cells = []
+        for col in columns:
+            cell = format_value(row.get(col))
+            if len(cell) > max_cell_chars:
+                cell = cell[:max_cell_chars - 1] + "…"
+            cells.append(cell)
+        lines.append("\t".join(cells))
+    return "\n".join(lines)
+
+def encode_column_stats(columns_stats, max_top_values=5):
+    """컬럼 통계를 컬럼당 한 줄로 인코딩 (예: "users [numeric] nulls=0 min=1 max=90 mean=12.5")"""
+    lines = []
+    for col, stats in columns_stats.items():
+        parts = [f"{col} [{stats.get('type', 'unknown')}]"]
+        if stats.get("null_count"):
+            parts.append(f"nulls={stats['null_count']}({format_value(stats.get('null_percentage'))}%)")
+        for key in ("min", "max", "mean", "median", "std", "sum", "unique_count"):
+            if stats.get(key) is not None:
+                parts.append(f"{key}={format_value(stats[key])}")
+        top_values = stats.get("top_values")
+        if top_values:
+            items = list(top_values.items())[:max_top_values]
+            parts.append("top=" + ", ".join(f"{format_value(k)}:{format_value(v)}" for k, v in items))
+        if stats.get("approximate"):
+            parts.append("approx=" + ",".join(stats["approximate"]))
+        lines.append(" ".join(parts))
+    return "\n".join(lines)
+
+def _pick_strata_column(data, columns):
+    """층화 기준 컬럼: 고유값이 적당히 적은 첫 번째 문자열 컬럼"""
+    for col in columns:
+        if isinstance(data, ResultSet) and data.column_kind(col) in ("int", "float"):
+            continue
+        values = data.column(col) if isinstance(data, ResultSet) else [row.get(col) for row in data]
+        non_null = [v for v in values if v is not None]
+        if not non_null or not all(isinstance(v, str) for v in non_null):
+            continue
+        distinct = len(set(non_null))
+        if 1 < distinct <= _MAX_STRATA and distinct < len(values):
+            return col, values
+    return None, None
+
+def _first_numeric_values(data, columns):
+    for col in columns:
+        if isinstance(data, ResultSet):
+            if data.column_kind(col) in ("int", "float"):
+                return data.column(col)
+            continue
+        values = [row.get(col) for row in data]
+        non_null = [v for v in values if v is not None]
+        if non_null and all(isinstance(v, (int, float, Decimal)) and not isinstance(v, bool) for v in non_null):
+            return values
+    return None
+
+def representative_sample_indices(data, n, columns=None, seed=0):
+    """대표 샘플 행 인덱스 → (인덱스 목록, 방식)
+
+    범주형 컬럼이 있으면 범주별 비율에 맞춰(범주마다 최소 1개) 뽑는 층화 샘플,
+    없으면 결과 전체에 등간격으로 뽑고 첫 숫자 컬럼의 최소/최대 행을 포함한다.
+    """
+    total = len(data)
+    if total <= n:
+        return list(range(total)), "all"
+
+    columns = columns or _columns_of(data)
+    rng = random.Random(seed)
+
+    strata_col, strata_values = _pick_strata_column(data, columns)
+    if strata_col is not None:
+        groups = {}
+        for i, value in enumerate(strata_values):
+            groups.setdefault(value, []).append(i)
+        # 큰 범주부터 비율 배분 (범주 수가 n보다 많으면 큰 범주 n개만)
+        ordered = sorted(groups.values(), key=len, reverse=True)[:n]
+        picked = []
+        remaining = n
+        for k, members in enumerate(ordered):
+            share = max(1, round(n * len(members) / total))
+            share = min(share, len(members), remaining - (len(ordered) - k - 1))
+            if share <= 0:
+                break
+            picked.extend(rng.sample(members, share))
+            remaining -= share
+        return sorted(picked), f"stratified:{strata_col}"
+
+    step = total / n
+    picked = {int(i * step) for i in range(n)}
+    numeric = _first_numeric_values(data, columns)
+    if numeric is not None:
+        present = [(v, i) for i, v in enumerate(numeric) if v is not None]
+        if present:
+            picked.add(min(present)[1])
+            picked.add(max(present)[1])
+    return sorted(picked)[:n + 2], "systematic"
+
+def build_sample_block(data, max_rows=30, token_budget=1500, columns=None, seed=0):
+    """토큰 예산 안에서 대표 샘플 행을 TSV 표로 인코딩 → (텍스트, 정보)"""
+    if not data or len(data) == 0:
+        return "(데이터 없음)", {"rows": 0, "strategy": "empty", "tokens": 0}
+
+    columns = columns or _columns_of(data)
+    indices, strategy = representative_sample_indices(data, max_rows, columns, seed)
+
+    header = encode_table([], columns)
+    lines = [header]
+    tokens = estimate_tokens(header)
+    for i in indices:
+        line = encode_table([data[i]], columns).split("\n", 1)[1]
+        line_tokens = estimate_tokens(line) + 1
+        if tokens + line_tokens > token_budget and len(lines) > 1:
+            break
+        lines.append(line)
+        tokens += line_tokens
+
+    return "\n".join(lines), {"rows": len(lines) - 1, "strategy": strategy, "tokens": tokens}
+
+def log_prompt_tokens(name, prompt):
+    """프롬프트 토큰 수 추정치 기록 및 로깅"""
+    tokens = estimate_tokens(prompt)
+    metrics.increment(f"prompt.{name}.count")
+    metrics.increment(f"prompt.{name}.estimated_tokens", tokens)
+    print(f"프롬프트 토큰 추정 ({name}): {tokens:,} (문자 수 {len(prompt):,})")
+    return tokens
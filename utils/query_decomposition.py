@@ -0,0 +1,102 @@
+# utils/query_decomposition.py
+"""
+복합 질문의 하위 쿼리 분해와 로컬 병합
+
+SQL 생성기가 서로 독립적인 지표를 "-- SUBQUERY: 이름" 주석으로 구분된 여러 SELECT 문으로
+반환하면 각각을 별도 BigQuery 작업으로 동시에 실행하고, 결과는 여기서 병합한다.
+
+- 모든 결과에 공통인 차원 컬럼(숫자가 아닌 컬럼)이 있고 각 결과에서 그 값이 유일하면
+  해당 컬럼 기준 완전 외부 조인 (예: 국가별 사용자 수 + 국가별 매출)
+- 그렇지 않으면 "subquery" 컬럼으로 출처를 표시해 세로로 이어 붙임
+  (예: 국가별 사용자 수 + 기기별 구매 매출)
+"""
+
+import re
+from decimal import Decimal
+
+from .result_set import ResultSet, ResultSetBuilder
+
+SUBQUERY_MARKER = "-- SUBQUERY:"
+
+SOURCE_COLUMN = "subquery"
+
+_MARKER_LINE = re.compile(r"^\s*--\s*SUBQUERY:\s*(.*)$", re.IGNORECASE | re.MULTILINE)
+
+def split_subqueries(sql_query):
+    """표시 주석으로 구분된 하위 쿼리 목록 [(이름, SQL), ...] (2개 미만이면 빈 목록)"""
+    markers = list(_MARKER_LINE.finditer(sql_query or ""))
+    if len(markers) < 2:
+        return []
+
+    parts = []
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(sql_query)
+        body = sql_query[marker.end():end].strip()
+        if not body:
+            continue
+        name = marker.group(1).strip() or f"q{i + 1}"
+        parts.append((name, body if body.endswith(";") else body + ";"))
+
+    # 이름 중복 방지
+    seen = {}
+    unique = []
+    for name, body in parts:
+        seen[name] = seen.get(name, 0) + 1
+        unique.append((name if seen[name] == 1 else f"{name}_{seen[name]}", body))
+    return unique if len(unique) >= 2 else []
+
+def _is_dimension(data, column):
+    if data.column_kind(column) in ("int", "float"):
+        return False
+    values = [v for v in data.column(column) if v is not None]
+    return not values or not all(isinstance(v, (int, float, Decimal)) and not isinstance(v, bool) for v in values)
+
+def _join_keys(results):
+    """모든 결과에 공통이고 각 결과에서 유일한 차원 컬럼 목록 (없으면 빈 목록)"""
+    first = results[0][1]
+    common = [col for col in first.columns if all(col in data.columns for _, data in results[1:])]
+    keys = [col for col in common if all(_is_dimension(data, col) for _, data in results)]
+    if not keys:
+        return []
+    for _, data in results:
+        seen = set(zip(*(data.column(col) for col in keys)))
+        if len(seen) != len(data):
+            return []
+    return keys
+
+def merge_results(results):
+    """하위 쿼리 결과 [(이름, ResultSet), ...] 병합 → (ResultSet, 병합 방식)"""
+    results = [
+        (name, data if isinstance(data, ResultSet) else ResultSet.from_rows(data))
+        for name, data in results
+    ]
+    if len(results) == 1:
+        return results[0][1], "single"
+
+    keys = _join_keys(results) if all(len(data) for _, data in results) else []
+    if keys:
+        merged = {}
+        order = []
+        for name, data in results:
+            # 키가 아닌 컬럼 이름이 겹치면 하위 쿼리 이름을 붙여 구분
+            taken = set(order)
+            for row in data:
+                key = tuple(row[col] for col in keys)
+                target = merged.get(key)
+                if target is None:
+                    target = merged[key] = {col: row[col] for col in keys}
+                for col in data.columns:
+                    if col in keys:
+                        continue
+                    out = col if col not in taken else f"{name}_{col}"
+                    target[out] = row[col]
+            order.extend(col if col not in taken else f"{name}_{col}" for col in data.columns if col not in keys)
+        builder = ResultSetBuilder(keys + order)
+        builder.append_rows(merged.values())
+        return builder.build(), "join:" + ",".join(keys)
+
+    builder = ResultSetBuilder([SOURCE_COLUMN])
+    for name, data in results:
+        for row in data:
+            builder.append_row({SOURCE_COLUMN: name, **row.to_dict()})
+    return builder.build(), "union"
@@ -0,0 +1,246 @@
+# utils/query_history.py
+"""
+실행한 쿼리의 형태별 이력
+
+리터럴(문자열/숫자)을 ?로 바꾸고 공백/대소문자를 정규화한 SQL을 쿼리 형태로 보고,
+형태별 실행 횟수/처리 바이트/소요 시간을 누적한다. 원본 테이블 대신 요약 테이블이나
+샤드별 부분 집계 캐시로 처리한(routed) 실행은 원래 형태와 같은 키에 따로 누적하여,
+원본 테이블 실행 평균과 비교해 절약한 바이트와 시간을 보고한다.
+
+- QueryHistory: 이 인스턴스가 실행한 쿼리 (로컬 SQLite 파일, /health 현황용)
+- JobHistory: 모든 인스턴스가 실행한 쿼리 (INFORMATION_SCHEMA.JOBS의 app=nlq 라벨 작업,
+  요약 테이블 추천과 절약량 보고용)
+"""
+
+import hashlib
+import math
+import re
+import sqlite3
+import threading
+import time
+
+from .bigquery_jobs import labeled_jobs_sql
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS query_shapes (
+    shape_hash TEXT NOT NULL,
+    routed INTEGER NOT NULL,
+    shape TEXT NOT NULL,
+    example_sql TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    bytes_total INTEGER NOT NULL,
+    seconds_total REAL NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (shape_hash, routed)
+)
+"""
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.`])\d+(?:\.\d+)?(?![\w`])")
+_LINE_COMMENT = re.compile(r"--[^\n]*")
+_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_shape(sql_query):
+    """SQL → 쿼리 형태 (주석 제거, 리터럴은 ?, 공백/대소문자 정규화)"""
+    text = _BLOCK_COMMENT.sub(" ", _LINE_COMMENT.sub(" ", sql_query or ""))
+    text = _STRING_LITERAL.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip().rstrip(";").strip()
+    return text.lower()
+
+def shape_hash(sql_query):
+    """쿼리 형태 해시 (sha256 앞 16자리)"""
+    return hashlib.sha256(normalize_shape(sql_query).encode("utf-8")).hexdigest()[:16]
+
+class QueryHistory:
+    """형태별 실행 횟수/처리 바이트/소요 시간 누적 저장소"""
+
+    def __init__(self, store_path, enabled=True):
+        self.store_path = store_path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+        if self.enabled:
+            try:
+                with self._connect() as conn:
+                    conn.execute(_SCHEMA)
+            except sqlite3.Error as e:
+                print(f"쿼리 이력 초기화 실패, 이력 기록 비활성화: {e}")
+                self.enabled = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.store_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def record(self, sql_query, bytes_processed, seconds, routed=False):
+        """실행 한 번 기록 (routed: 요약 테이블/샤드별 캐시로 처리한 실행, sql_query는 원래 SQL)"""
+        if not self.enabled:
+            return
+        shape = normalize_shape(sql_query)
+        key = hashlib.sha256(shape.encode("utf-8")).hexdigest()[:16]
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT INTO query_shapes (shape_hash, routed, shape, example_sql, count, bytes_total, "
+                    "seconds_total, first_seen, last_seen) VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?) "
+                    "ON CONFLICT (shape_hash, routed) DO UPDATE SET count = count + 1, "
+                    "bytes_total = bytes_total + excluded.bytes_total, "
+                    "seconds_total = seconds_total + excluded.seconds_total, "
+                    "example_sql = excluded.example_sql, last_seen = excluded.last_seen",
+                    (key, int(routed), shape, sql_query, int(bytes_processed or 0), seconds, now, now)
+                )
+        except sqlite3.Error as e:
+            print(f"쿼리 이력 기록 실패: {e}")
+
+    def hottest(self, min_count=1, limit=20, since=None):
+        """원본 테이블 실행 기준 자주 실행된 형태 (처리 바이트 합계 순)"""
+        if not self.enabled:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM query_shapes WHERE routed = 0 AND count >= ? AND last_seen >= ? "
+                "ORDER BY bytes_total DESC, count DESC LIMIT ?",
+                (min_count, since or 0, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def savings_report(self):
+        """요약 테이블로 보낸 실행의 절약량 (형태별, 원본 테이블 평균 대비)
+
+        원본 테이블에서 실행된 적이 없는 형태는 비교 기준이 없어 절약량이 None이다.
+        """
+        if not self.enabled:
+            return {"shapes": [], "bytes_saved": 0, "seconds_saved": 0.0, "routed_queries": 0}
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM query_shapes").fetchall()
+        base = {row["shape_hash"]: dict(row) for row in rows if not row["routed"]}
+        routed = {row["shape_hash"]: dict(row) for row in rows if row["routed"]}
+        return _savings(base, routed)
+
+    def stats(self):
+        """헬스 체크용 이력 현황"""
+        if not self.enabled:
+            return {"enabled": False}
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS shapes, COALESCE(SUM(count), 0) AS queries, "
+                "COALESCE(SUM(bytes_total), 0) AS bytes FROM query_shapes WHERE routed = 0"
+            ).fetchone()
+        return {"enabled": True, "shapes": row["shapes"], "queries": row["queries"], "bytes_processed": row["bytes"]}
+
+def _savings(base, routed):
+    """형태별 원본 실행 {shape_hash: {count, bytes_total, seconds_total}}과 재작성 실행 → 절약량 보고"""
+    shapes = []
+    bytes_saved = 0
+    seconds_saved = 0.0
+    for key, item in sorted(routed.items(), key=lambda pair: pair[1]["count"], reverse=True):
+        entry = {
+            "shape_hash": key,
+            "shape": item["shape"],
+            "routed_queries": item["count"],
+            "routed_avg_bytes": item["bytes_total"] // item["count"],
+            "routed_avg_seconds": round(item["seconds_total"] / item["count"], 3),
+            "base_avg_bytes": None,
+            "base_avg_seconds": None,
+            "bytes_saved": None,
+            "seconds_saved": None
+        }
+        reference = base.get(key)
+        if reference and reference["count"]:
+            base_bytes = reference["bytes_total"] / reference["count"]
+            base_seconds = reference["seconds_total"] / reference["count"]
+            entry["shape"] = reference["shape"]
+            entry["base_avg_bytes"] = int(base_bytes)
+            entry["base_avg_seconds"] = round(base_seconds, 3)
+            entry["bytes_saved"] = int(base_bytes * item["count"] - item["bytes_total"])
+            entry["seconds_saved"] = round(base_seconds * item["count"] - item["seconds_total"], 3)
+            bytes_saved += entry["bytes_saved"]
+            seconds_saved += entry["seconds_saved"]
+        shapes.append(entry)
+
+    return {
+        "shapes": shapes,
+        "bytes_saved": bytes_saved,
+        "seconds_saved": round(seconds_saved, 3),
+        "routed_queries": sum(entry["routed_queries"] for entry in shapes)
+    }
+
+class JobHistory:
+    """BigQuery 작업 이력(INFORMATION_SCHEMA.JOBS)에서 읽는 형태별 실행 이력
+
+    app=nlq, stage=query 라벨이 붙은 성공한 작업만 본다. routed_from 라벨이 있는 작업은
+    요약 테이블/샤드별 캐시로 처리한 실행이며, 실행 하나가 작업 여러 개일 수 있어 route_id로 묶는다.
+    run_query는 SQL을 실행해 행 딕셔너리 목록을 돌려주는 함수다.
+    """
+
+    def __init__(self, run_query, view, default_days=30):
+        self.run_query = run_query
+        self.view = view
+        self.default_days = default_days
+
+    def _days(self, since):
+        if since is None:
+            return self.default_days
+        return max(1, math.ceil((time.time() - since) / 86400))
+
+    def _aggregate(self, since):
+        """(원본 실행 형태별 집계, 재작성 실행 형태별 집계)"""
+        base = {}
+        routes = {}
+        for row in self.run_query(labeled_jobs_sql(self.view, self._days(since))):
+            seconds = float(row.get("seconds") or 0.0)
+            bytes_processed = int(row.get("total_bytes_processed") or 0)
+            if row.get("routed_from"):
+                route = routes.setdefault(
+                    row.get("route_id") or id(row),
+                    {"shape_hash": row["routed_from"], "bytes_total": 0, "seconds_total": 0.0}
+                )
+                route["bytes_total"] += bytes_processed
+                route["seconds_total"] += seconds
+                continue
+            key = shape_hash(row["query"])
+            item = base.get(key)
+            if item is None:
+                item = base[key] = {
+                    "shape_hash": key,
+                    "shape": normalize_shape(row["query"]),
+                    "example_sql": row["query"],
+                    "count": 0,
+                    "bytes_total": 0,
+                    "seconds_total": 0.0,
+                    "last_seen": None
+                }
+            item["count"] += 1
+            item["bytes_total"] += bytes_processed
+            item["seconds_total"] += seconds
+            created = row.get("creation_time")
+            created = created.timestamp() if hasattr(created, "timestamp") else created
+            if created is not None and (item["last_seen"] is None or created >= item["last_seen"]):
+                item["example_sql"], item["last_seen"] = row["query"], created
+
+        routed = {}
+        for route in routes.values():
+            item = routed.setdefault(
+                route["shape_hash"],
+                {"shape": f"(형태 {route['shape_hash']})", "count": 0, "bytes_total": 0, "seconds_total": 0.0}
+            )
+            item["count"] += 1
+            item["bytes_total"] += route["bytes_total"]
+            item["seconds_total"] += route["seconds_total"]
+        return base, routed
+
+    def hottest(self, min_count=1, limit=20, since=None):
+        """원본 테이블 실행 기준 자주 실행된 형태 (처리 바이트 합계 순)"""
+        base, _ = self._aggregate(since)
+        shapes = [item for item in base.values() if item["count"] >= min_count]
+        shapes.sort(key=lambda item: (item["bytes_total"], item["count"]), reverse=True)
+        return shapes[:limit]
+
+    def savings_report(self, since=None):
+        """요약 테이블로 보낸 실행의 절약량 (형태별, 원본 테이블 평균 대비)"""
+        base, routed = self._aggregate(since)
+        return _savings(base, routed)
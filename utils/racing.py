@@ -0,0 +1,47 @@
+# utils/racing.py
+"""
+여러 후보 생성을 동시에 실행하고 먼저 기준을 통과한 결과를 채택하는 유틸리티
+
+각 후보 작업은 취소 이벤트(threading.Event)를 인자로 받아, 이벤트가 설정되면
+가능한 빨리 중단해야 한다(예: 스트리밍 응답 읽기를 멈추고 연결 종료).
+"""
+
+import threading
+from concurrent.futures import as_completed, TimeoutError as FuturesTimeoutError
+
+class CandidateCancelled(Exception):
+    """다른 후보가 채택되어 생성이 중단되었을 때 발생"""
+
+def race_candidates(tasks, accept, executor, timeout=None):
+    """후보 작업들을 동시에 실행 → (채택된 (인덱스, 값) 또는 None, 완료된 결과 목록)
+
+    tasks: cancel_event를 받아 값을 반환하는 callable 목록
+    accept: 값이 채택 기준을 통과하는지 판단하는 함수
+    완료된 결과 목록은 (인덱스, 값 또는 예외)이며 완료 순서대로 담긴다.
+    채택되는 즉시 나머지 후보에 취소를 알린다.
+    """
+    cancel_event = threading.Event()
+    futures = {executor.submit(task, cancel_event): i for i, task in enumerate(tasks)}
+    results = []
+    winner = None
+
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            index = futures[future]
+            try:
+                value = future.result()
+            except Exception as e:
+                results.append((index, e))
+                continue
+            results.append((index, value))
+            if accept(value):
+                winner = (index, value)
+                break
+    except FuturesTimeoutError:
+        print(f"후보 생성 시간 초과 ({timeout}초), 완료된 후보 {len(results)}개")
+    finally:
+        cancel_event.set()
+        for future in futures:
+            future.cancel()
+
+    return winner, results
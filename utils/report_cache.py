@@ -0,0 +1,161 @@
+# utils/report_cache.py
+"""
+생성된 리포트 캐시 (SQLite 파일)
+
+같은 질문이라도 결과 데이터가 같을 때만 재사용하도록 키를
+(정규화된 질문, 모드, 결과 데이터 내용 해시, 프롬프트 버전)으로 만든다.
+일 단위 테이블처럼 데이터가 바뀌지 않으면 반복 요청은 Claude 호출 없이 바로 응답하고,
+데이터나 프롬프트가 바뀌면 키가 달라져 자연스럽게 새로 생성된다.
+저장 용량(압축 후 바이트)과 항목 수를 넘으면 가장 오래 사용하지 않은 항목부터 삭제한다.
+파일이 메모리 기반 임시 디렉터리에 있으면 프로세스/인스턴스와 함께 사라지고 그 크기만큼 메모리를 쓴다.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+
+from .json_utils import dumps_bytes, loads
+from .stale_cache import normalize_question
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    key TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    question TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+_INDEX = "CREATE INDEX IF NOT EXISTS reports_accessed_at ON reports (accessed_at)"
+
+def result_fingerprint(data, *extra):
+    """결과 데이터(와 추가 값) 내용 해시 (ResultSet/행 목록 모두 같은 JSON 인코딩 기준)
+
+    디스크로 내려 쓴 ResultSet은 JSON으로 만들지 않고 결과 파일 해시를 사용한다.
+    """
+    spill = getattr(data, "spill", None)
+    digest = hashlib.sha256(spill.digest.encode("ascii") if spill is not None else dumps_bytes(data))
+    for value in extra:
+        digest.update(b"\x00")
+        digest.update(dumps_bytes(value))
+    return digest.hexdigest()
+
+class ReportCache:
+    """SQLite 기반 크기 제한 LRU 리포트 캐시"""
+
+    def __init__(self, store_path, prompt_version, max_bytes=256 * 1024 * 1024, max_entries=5000,
+                 max_age_seconds=30 * 86400, enabled=True):
+        self.store_path = store_path
+        self.prompt_version = prompt_version
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.enabled:
+            try:
+                with self._connect() as conn:
+                    conn.execute(_SCHEMA)
+                    conn.execute(_INDEX)
+            except sqlite3.Error as e:
+                print(f"리포트 캐시 초기화 실패, 캐시 비활성화: {e}")
+                self.enabled = False
+
+    def _connect(self):
+        return sqlite3.connect(self.store_path, timeout=10)
+
+    def key(self, mode, question, fingerprint):
+        """캐시 키 (정규화된 질문, 모드, 결과 해시, 프롬프트 버전)"""
+        raw = "\x00".join((mode, normalize_question(question), fingerprint, self.prompt_version))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """저장된 리포트 → dict, 없거나 만료되었으면 None"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT payload, created_at FROM reports WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] > self.max_age_seconds:
+                    conn.execute("DELETE FROM reports WHERE key = ?", (key,))
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute(
+                    "UPDATE reports SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (now, key)
+                )
+                self.hits += 1
+            return loads(zlib.decompress(row[0]))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            print(f"리포트 캐시 조회 실패: {e}")
+            return None
+
+    def put(self, key, mode, question, report):
+        """리포트 저장 후 용량/항목 수 상한을 넘은 만큼 LRU 삭제"""
+        if not self.enabled:
+            return
+        payload = zlib.compress(dumps_bytes(report), 6)
+        if len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO reports "
+                    "(key, mode, question, payload, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, mode, question, payload, len(payload), now, now)
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            print(f"리포트 캐시 저장 실패: {e}")
+
+    def _evict(self, conn):
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM reports").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        excess_count = max(0, count - self.max_entries)
+        excess_bytes = total - self.max_bytes
+        removed = []
+        for key, size in conn.execute("SELECT key, size FROM reports ORDER BY accessed_at"):
+            if excess_count <= 0 and excess_bytes <= 0:
+                break
+            removed.append((key,))
+            excess_count -= 1
+            excess_bytes -= size
+        conn.executemany("DELETE FROM reports WHERE key = ?", removed)
+        print(f"리포트 캐시 LRU 삭제: {len(removed)}개")
+
+    def stats(self):
+        """헬스 체크용 상태"""
+        info = {
+            "enabled": self.enabled,
+            "prompt_version": self.prompt_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries
+        }
+        if self.enabled:
+            try:
+                with self._connect() as conn:
+                    count, total = conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM reports"
+                    ).fetchone()
+                info.update(entries=count, bytes=total)
+            except sqlite3.Error:
+                pass
+        return info
@@ -0,0 +1,344 @@
+# utils/result_set.py
+"""
+열 우선(column-major) 쿼리 결과 컨테이너
+
+행마다 컬럼 이름 키를 반복하는 list[dict] 대신, 스키마는 한 번만 두고 컬럼별로
+타입이 있는 배열(정수/실수는 array 모듈, 그 외는 리스트)에 값을 저장한다.
+head()/sample()/슬라이싱은 컬럼 저장소를 복사하지 않는 뷰를 반환하고,
+행은 필요할 때만 RowView(읽기 전용 Mapping)로 만들어진다.
+"""
+
+import random
+from array import array
+from collections.abc import Mapping
+
+try:
+    import numpy as np
+except ImportError:  # numpy는 선택 의존성
+    np = None
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+# 범주형 문자열 중복 제거용 캐시 상한 (컬럼별)
+_DEDUPE_LIMIT = 10000
+
+class _Column:
+    """단일 컬럼 저장소 (kind: int / float / object)"""
+
+    __slots__ = ("kind", "values", "nulls", "_dedupe")
+
+    def __init__(self):
+        self.kind = None
+        self.values = None
+        self.nulls = None  # bytearray, null 위치는 1
+        self._dedupe = {}
+
+    def _start(self, value, length):
+        # 첫 번째 non-null 값으로 저장 타입 결정
+        if isinstance(value, bool):
+            self.kind = "object"
+        elif isinstance(value, int) and _INT64_MIN <= value <= _INT64_MAX:
+            self.kind = "int"
+        elif isinstance(value, float):
+            self.kind = "float"
+        else:
+            self.kind = "object"
+
+        if self.kind == "int":
+            self.values = array('q', bytes(8 * length))
+        elif self.kind == "float":
+            self.values = array('d', bytes(8 * length))
+        else:
+            self.values = [None] * length
+
+    def _promote_to_object(self):
+        # 타입이 섞이면 object 리스트로 전환
+        nulls = self.nulls
+        self.values = [
+            None if nulls is not None and nulls[i] else v
+            for i, v in enumerate(self.values)
+        ]
+        self.kind = "object"
+
+    def append(self, value, length):
+        """값 추가 (length: 추가 전 행 수)"""
+        if self.kind is None:
+            if value is None:
+                if self.nulls is None:
+                    self.nulls = bytearray()
+                self.nulls.append(1)
+                return
+            self._start(value, length)
+
+        if value is None:
+            if self.kind == "object":
+                self.values.append(None)
+            else:
+                self.values.append(0)
+            if self.nulls is None:
+                self.nulls = bytearray(length)
+            self.nulls.append(1)
+            return
+
+        if self.kind == "int" and not (
+            isinstance(value, int) and not isinstance(value, bool) and _INT64_MIN <= value <= _INT64_MAX
+        ):
+            self._promote_to_object()
+        elif self.kind == "float" and not isinstance(value, float):
+            self._promote_to_object()
+
+        if self.kind == "object":
+            if isinstance(value, str) and len(self._dedupe) < _DEDUPE_LIMIT:
+                value = self._dedupe.setdefault(value, value)
+            self.values.append(value)
+        else:
+            self.values.append(value)
+
+        if self.nulls is not None:
+            self.nulls.append(0)
+
+    def finish(self, length):
+        """빌드 완료 처리 (전부 null인 컬럼 정리)"""
+        if self.kind is None:
+            self.kind = "object"
+            self.values = [None] * length
+            self.nulls = None
+        elif self.nulls is not None and not any(self.nulls):
+            self.nulls = None
+        self._dedupe = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def get(self, pos):
+        if self.nulls is not None and self.nulls[pos]:
+            return None
+        return self.values[pos]
+
+    def slice(self, start, stop):
+        """[start, stop) 범위 값 목록 (null은 None)"""
+        if self.nulls is None:
+            return self.values[start:stop]
+        return [self.get(pos) for pos in range(start, stop)]
+
+    def to_numpy(self, start, stop, index=None):
+        """숫자형 컬럼의 numpy 배열 (null은 NaN, 숫자형이 아니거나 numpy 미설치 시 None)"""
+        if np is None or self.kind not in ("int", "float"):
+            return None
+        data = np.frombuffer(self.values, dtype=np.int64 if self.kind == "int" else np.float64)
+        if index is None:
+            data = data[start:stop]
+            nulls = None if self.nulls is None else np.frombuffer(self.nulls, dtype=np.uint8)[start:stop]
+        else:
+            idx = np.frombuffer(index, dtype=np.int64)
+            data = data[idx]
+            nulls = None if self.nulls is None else np.frombuffer(self.nulls, dtype=np.uint8)[idx]
+        if nulls is not None and nulls.any():
+            data = data.astype(np.float64)
+            data[nulls.astype(bool)] = np.nan
+        return data
+
+    def nbytes(self):
+        """저장소의 대략적인 바이트 수"""
+        if self.kind in ("int", "float"):
+            total = self.values.itemsize * len(self.values)
+        else:
+            total = 8 * len(self.values)
+        return total + (len(self.nulls) if self.nulls is not None else 0)
+
+class RowView(Mapping):
+    """ResultSet의 한 행을 가리키는 읽기 전용 매핑 (값은 접근 시점에 조회)"""
+
+    __slots__ = ("_rs", "_pos")
+
+    def __init__(self, rs, pos):
+        self._rs = rs
+        self._pos = pos
+
+    def __getitem__(self, key):
+        idx = self._rs._col_index.get(key)
+        if idx is None:
+            raise KeyError(key)
+        return self._rs._columns[idx].get(self._pos)
+
+    def __iter__(self):
+        return iter(self._rs.schema)
+
+    def __len__(self):
+        return len(self._rs.schema)
+
+    def __contains__(self, key):
+        return key in self._rs._col_index
+
+    def to_dict(self):
+        """일반 딕셔너리로 변환"""
+        return {name: col.get(self._pos) for name, col in zip(self._rs.schema, self._rs._columns)}
+
+    def __repr__(self):
+        return f"RowView({self.to_dict()!r})"
+
+class ResultSet:
+    """공유 스키마와 컬럼별 타입 배열로 구성된 쿼리 결과"""
+
+    __slots__ = ("schema", "_columns", "_col_index", "_start", "_stop", "_index", "_spill")
+
+    def __init__(self, schema, columns, start=0, stop=None, index=None, spill=None):
+        self.schema = tuple(schema)
+        self._columns = columns
+        self._col_index = {name: i for i, name in enumerate(self.schema)}
+        self._start = start
+        self._stop = stop if stop is not None else (
+            len(columns[0]) if columns else 0
+        )
+        self._index = index  # 선택 벡터 (sample 등), 없으면 [start, stop) 범위
+        self._spill = spill  # 디스크로 내려 쓴 결과 파일 (뷰가 살아 있는 동안 매핑 유지)
+
+    # ---- 생성 ----
+
+    @classmethod
+    def from_rows(cls, rows):
+        """딕셔너리 행 목록으로부터 생성"""
+        builder = ResultSetBuilder()
+        builder.append_rows(rows)
+        return builder.build()
+
+    @classmethod
+    def empty(cls, schema=()):
+        """빈 결과"""
+        builder = ResultSetBuilder(schema)
+        return builder.build()
+
+    # ---- 위치 계산 ----
+
+    def _positions(self):
+        if self._index is not None:
+            return self._index
+        return range(self._start, self._stop)
+
+    def _view(self, positions):
+        if isinstance(positions, range) and positions.step == 1:
+            return ResultSet(self.schema, self._columns, positions.start, positions.stop, spill=self._spill)
+        return ResultSet(self.schema, self._columns, index=array('q', positions), spill=self._spill)
+
+    # ---- 시퀀스 프로토콜 ----
+
+    def __len__(self):
+        if self._index is not None:
+            return len(self._index)
+        return max(0, self._stop - self._start)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        for pos in self._positions():
+            yield RowView(self, pos)
+
+    def __getitem__(self, item):
+        positions = self._positions()
+        if isinstance(item, slice):
+            return self._view(positions[item])
+        return RowView(self, positions[item])
+
+    def __repr__(self):
+        return f"ResultSet(columns={list(self.schema)!r}, rows={len(self)})"
+
+    # ---- 뷰 ----
+
+    def head(self, n):
+        """앞에서 n개 행의 뷰 (복사 없음)"""
+        return self[:n]
+
+    def sample(self, n, seed=None):
+        """무작위 n개 행의 뷰 (원래 순서 유지)"""
+        if n >= len(self):
+            return self
+        positions = self._positions()
+        picked = sorted(random.Random(seed).sample(range(len(positions)), n))
+        return self._view([positions[i] for i in picked])
+
+    # ---- 컬럼 접근 ----
+
+    @property
+    def spill(self):
+        """디스크로 내려 쓴 결과면 파일 정보, 메모리 결과면 None"""
+        return self._spill
+
+    @property
+    def columns(self):
+        """컬럼 이름 목록"""
+        return list(self.schema)
+
+    def column_kind(self, name):
+        """컬럼 저장 타입 (int / float / object)"""
+        return self._columns[self._col_index[name]].kind
+
+    def column(self, name):
+        """컬럼 값 목록 (null은 None)"""
+        col = self._columns[self._col_index[name]]
+        if self._index is None:
+            return col.slice(self._start, self._stop)
+        return [col.get(pos) for pos in self._positions()]
+
+    def column_array(self, name):
+        """숫자형 컬럼을 numpy 배열로 반환 (null은 NaN, numpy 미설치 시 None)"""
+        return self._columns[self._col_index[name]].to_numpy(self._start, self._stop, self._index)
+
+    # ---- 변환 ----
+
+    def to_records(self):
+        """딕셔너리 행 목록으로 변환 (JSON 응답은 이 목록을 인코딩, 컬럼 단위로 값을 꺼내 행으로 묶음)"""
+        schema = self.schema
+        if not schema:
+            return [{} for _ in range(len(self))]
+        return [dict(zip(schema, values)) for values in zip(*(self.column(name) for name in schema))]
+
+    def memory_usage(self):
+        """컬럼 저장소의 대략적인 바이트 수 (공유 저장소 전체 기준, 메모리 매핑된 컬럼은 제외)"""
+        return sum(col.nbytes() for col in self._columns)
+
+class ResultSetBuilder:
+    """행 단위로 값을 받아 ResultSet을 만드는 빌더"""
+
+    def __init__(self, schema=()):
+        self.schema = list(schema)
+        self._columns = [_Column() for _ in self.schema]
+        self._col_index = {name: i for i, name in enumerate(self.schema)}
+        self.row_count = 0
+
+    def _add_column(self, name):
+        col = _Column()
+        # 중간에 나타난 컬럼은 앞선 행들을 null로 채움
+        for _ in range(self.row_count):
+            col.append(None, 0)
+        self._col_index[name] = len(self.schema)
+        self.schema.append(name)
+        self._columns.append(col)
+
+    def append_row(self, row):
+        """딕셔너리(또는 Mapping) 행 하나 추가"""
+        for key in row:
+            if key not in self._col_index:
+                self._add_column(key)
+        length = self.row_count
+        for name, col in zip(self.schema, self._columns):
+            col.append(row.get(name), length)
+        self.row_count += 1
+
+    def append_rows(self, rows):
+        """행 목록 추가"""
+        for row in rows:
+            self.append_row(row)
+
+    def build(self):
+        """ResultSet 생성"""
+        for col in self._columns:
+            col.finish(self.row_count)
+        return ResultSet(self.schema, self._columns, 0, self.row_count)
+
+def as_records(data):
+    """ResultSet이나 행 목록을 딕셔너리 행 목록으로 변환"""
+    if isinstance(data, ResultSet):
+        return data.to_records()
+    return [row.to_dict() if isinstance(row, RowView) else row for row in (data or [])]
@@ -0,0 +1,116 @@
+# utils/session_results.py
+"""
+대화 세션별 직전 조회 결과 보관 (후속 질문을 로컬에서 처리하기 위한 용도)
+
+세션마다 마지막으로 성공한 질문/SQL/결과 하나만 보관하고, 오래 사용하지 않은 세션은
+TTL이 지나거나 세션 수 상한 또는 전체 추정 바이트 상한을 넘으면 삭제한다. 샘플링된 결과나
+너무 큰 결과는 전체 데이터가 아니므로 보관하지 않는다. 결과 하나의 추정 바이트는 결과 자체와
+로컬 SQL 엔진에 적재되는 사본을 합쳐 결과 크기의 두 배로 잡는다.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from .local_query import LocalResultTable, engine_name
+from .spill import estimate_rows_bytes
+
+class SessionResult:
+    """세션의 직전 결과 (질문, SQL, 로컬 SQL 테이블)"""
+
+    __slots__ = ("question", "sql_query", "table", "stored_at", "size")
+
+    def __init__(self, question, sql_query, data, size=0, timeout_seconds=5.0):
+        self.question = question
+        self.sql_query = sql_query
+        self.table = LocalResultTable(data, timeout_seconds=timeout_seconds)
+        self.stored_at = time.time()
+        self.size = size
+
+    @property
+    def row_count(self):
+        return len(self.table.data)
+
+class SessionResultStore:
+    """세션 ID별 직전 결과 LRU"""
+
+    def __init__(self, max_sessions=200, max_rows=200000, ttl_seconds=1800, max_bytes=None,
+                 query_timeout_seconds=5.0):
+        self.max_sessions = max_sessions
+        self.max_rows = max_rows
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.query_timeout_seconds = query_timeout_seconds
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def _pop(self, session_id):
+        entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
+
+    def put(self, session_id, question, sql_query, data, complete=True):
+        """결과 보관 (샘플링되었거나 max_rows/max_bytes를 넘으면 이전 결과도 지움)"""
+        if not session_id:
+            return
+        if not complete or len(data) == 0 or len(data) > self.max_rows:
+            self.discard(session_id)
+            return
+        size = 2 * estimate_rows_bytes(data)
+        if self.max_bytes and size > self.max_bytes:
+            self.rejected += 1
+            self.discard(session_id)
+            return
+        entry = SessionResult(question, sql_query, data, size, self.query_timeout_seconds)
+        with self._lock:
+            previous = self._pop(session_id)
+            self._sessions[session_id] = entry
+            self._bytes += size
+            evicted = []
+            while len(self._sessions) > self.max_sessions or (self.max_bytes and self._bytes > self.max_bytes):
+                evicted.append(self._pop(next(iter(self._sessions))))
+        for old in filter(None, [previous, *evicted]):
+            old.table.close()
+
+    def get(self, session_id):
+        """세션의 직전 결과 → SessionResult 또는 None"""
+        if not session_id:
+            return None
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if time.time() - entry.stored_at > self.ttl_seconds:
+                self._pop(session_id)
+                expired = entry
+                entry = None
+            else:
+                self._sessions.move_to_end(session_id)
+        if entry is None:
+            expired.table.close()
+        return entry
+
+    def discard(self, session_id):
+        with self._lock:
+            entry = self._pop(session_id)
+        if entry is not None:
+            entry.table.close()
+
+    def stats(self):
+        with self._lock:
+            entries = list(self._sessions.values())
+            size = self._bytes
+        return {
+            "sessions": len(entries),
+            "max_sessions": self.max_sessions,
+            "rows": sum(entry.row_count for entry in entries),
+            "max_rows_per_session": self.max_rows,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "rejected": self.rejected,
+            "query_timeout_seconds": self.query_timeout_seconds,
+            "engine": engine_name()
+        }
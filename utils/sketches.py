@@ -0,0 +1,193 @@
+# utils/sketches.py
+"""
+고유값 수, 분위수, 빈도 상위값을 고정 메모리로 근사하는 스케치 자료구조
+
+- HyperLogLog: 고유값 수 추정. 레지스터 2^p개(기본 p=12, 4KB),
+  표준 오차 약 1.04 / sqrt(2^p) (p=12에서 약 1.6%)
+- TDigest: 중앙값/분위수 추정. 스케일 함수 k(q) = compression/(2π)·asin(2q-1)에서 센트로이드
+  하나가 k를 1 넘게 차지하지 않도록 병합하므로 센트로이드 수는 데이터 크기와 무관하게
+  compression 이하 (병합 직후 약 compression/2), 양 끝 분위수일수록 센트로이드가 작아 정확
+- MisraGries: 빈도 상위값. 카운터 k개, 각 값의 빈도는 실제보다 최대 N/(k+1)만큼
+  적게 집계됨 (N: 전체 값 수). 빈도가 N/(k+1)을 넘는 값은 반드시 포함
+
+해시는 프로세스 내부 hash()를 기반으로 하므로 스케치는 같은 프로세스 안에서만 병합 가능하다.
+"""
+
+import math
+
+_MASK64 = (1 << 64) - 1
+
+def _hash64(value):
+    """값을 64비트 정수로 해시 (splitmix64로 비트 분산)"""
+    x = hash(value) & _MASK64
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+class HyperLogLog:
+    """고유값 수 추정용 HyperLogLog 스케치"""
+
+    __slots__ = ("p", "m", "registers")
+
+    def __init__(self, p=12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, value):
+        """값 하나 반영"""
+        h = _hash64(value)
+        idx = h >> (64 - self.p)
+        remaining = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - remaining.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def merge(self, other):
+        """같은 정밀도의 다른 스케치와 병합"""
+        if other.p != self.p:
+            raise ValueError("정밀도(p)가 다른 HyperLogLog는 병합할 수 없습니다.")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self):
+        """고유값 수 추정치 반환"""
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+
+        # 작은 범위 보정 (선형 카운팅)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * math.log(m / zeros)
+
+        return int(round(estimate))
+
+class TDigest:
+    """분위수 추정용 병합형 t-digest"""
+
+    __slots__ = ("compression", "centroids", "count", "_buffer", "_buffer_size", "min", "max")
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroids = []  # (평균, 가중치) 목록, 평균 기준 정렬
+        self.count = 0
+        self._buffer = []
+        self._buffer_size = compression * 5
+        self.min = None
+        self.max = None
+
+    def add(self, value, weight=1):
+        """값 하나 반영"""
+        x = float(value)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+        self._buffer.append((x, weight))
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def merge(self, other):
+        """다른 t-digest의 센트로이드를 병합"""
+        other._compress()
+        for mean, weight in other.centroids:
+            self._buffer.append((mean, weight))
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+
+    def _k(self, q):
+        # 스케일 함수 k1: 분위수 → 센트로이드 경계 단위 (양 끝에서 기울기가 커져 센트로이드가 작아짐)
+        return self.compression / (2.0 * math.pi) * math.asin(2.0 * q - 1.0)
+
+    def _q(self, k):
+        return (math.sin(k * 2.0 * math.pi / self.compression) + 1.0) / 2.0
+
+    def _q_limit(self, q):
+        # q에서 시작한 센트로이드가 차지할 수 있는 최대 분위수 (k가 1 늘어나는 지점)
+        return self._q(min(self._k(q) + 1.0, self.compression / 4.0))
+
+    def _compress(self):
+        if not self._buffer:
+            return
+
+        points = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        total = sum(w for _, w in points)
+        self.count = total
+
+        merged = []
+        cumulative = 0.0
+        q_limit = self._q_limit(0.0)
+        cur_mean, cur_weight = points[0]
+        for mean, weight in points[1:]:
+            if (cumulative + cur_weight + weight) / total <= q_limit:
+                cur_mean += (mean - cur_mean) * weight / (cur_weight + weight)
+                cur_weight += weight
+            else:
+                merged.append((cur_mean, cur_weight))
+                cumulative += cur_weight
+                q_limit = self._q_limit(cumulative / total)
+                cur_mean, cur_weight = mean, weight
+        merged.append((cur_mean, cur_weight))
+        self.centroids = merged
+
+    def quantile(self, q):
+        """q 분위수 추정치 반환 (0 <= q <= 1)"""
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+
+        target = q * self.count
+        cumulative = 0.0
+        prev_mean, prev_center = self.min, 0.0
+        for mean, weight in self.centroids:
+            center = cumulative + weight / 2.0
+            if target < center:
+                # 인접 센트로이드 중심 사이를 선형 보간
+                span = center - prev_center
+                fraction = (target - prev_center) / span if span > 0 else 0.0
+                return prev_mean + (mean - prev_mean) * fraction
+            cumulative += weight
+            prev_mean, prev_center = mean, center
+
+        span = self.count - prev_center
+        fraction = (target - prev_center) / span if span > 0 else 0.0
+        return prev_mean + (self.max - prev_mean) * fraction
+
+class MisraGries:
+    """빈도 상위값 추정용 Misra-Gries 요약 (카운터 k개)"""
+
+    __slots__ = ("k", "counters", "total")
+
+    def __init__(self, k=100):
+        self.k = k
+        self.counters = {}
+        self.total = 0
+
+    def add(self, value):
+        """값 하나 반영"""
+        self.total += 1
+        counters = self.counters
+        if value in counters:
+            counters[value] += 1
+        elif len(counters) < self.k:
+            counters[value] = 1
+        else:
+            # 카운터가 가득 차면 모든 카운터를 1씩 감소 (분할 상환 O(1))
+            for key in list(counters):
+                counters[key] -= 1
+                if counters[key] == 0:
+                    del counters[key]
+
+    def error_bound(self):
+        """빈도 과소 추정의 최대 오차 N/(k+1)"""
+        return self.total // (self.k + 1)
+
+    def top(self, n=5):
+        """빈도 상위 n개 (값, 추정 빈도) 목록"""
+        return sorted(self.counters.items(), key=lambda x: x[1], reverse=True)[:n]
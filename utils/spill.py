@@ -0,0 +1,449 @@
+# utils/spill.py
+"""
+요청별 결과 메모리 한도와 디스크 내려 쓰기 (Arrow IPC + 메모리 매핑)
+
+요청마다 RequestMemory를 contextvars로 설정해 두면, 그 안에서 BigQuery 결과를 받는
+SpillingResultBuilder가 페이지마다 예상 메모리를 예약한다. 요청 한도와 함께 동시에 처리 중인
+요청들이 나눠 쓰는 프로세스 전체 한도(SharedMemoryBudget)도 확인하며, 어느 쪽이든 넘으면
+그때까지 받은 행과 이후 페이지를 Arrow IPC 파일로 내려 쓰고, 완료 후 파일을 메모리 매핑해
+ResultSet으로 돌려준다. 매핑된 컬럼은 파이썬 객체를 만들지 않으므로 큰 결과도
+프로세스 힙에는 페이지 하나 분량만 올라온다.
+
+요청 동안 프로세스 RSS를 페이지마다 표본 추출하여 요청별 최대 RSS를 보고한다
+(RSS는 프로세스 전체 값이므로 동시에 처리 중인 다른 요청의 사용량도 포함된다).
+"""
+
+import contextvars
+import glob
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from bisect import bisect_right
+from contextlib import contextmanager
+
+from .metrics import metrics
+from .result_set import ResultSet, ResultSetBuilder
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # pyarrow는 선택 의존성 (없으면 한도와 관계없이 메모리에 보관)
+    pyarrow = None
+
+try:
+    import numpy as np
+except ImportError:  # numpy는 선택 의존성
+    np = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 내려 쓴 파일의 레코드 배치 크기 (행 조회 시 배치 하나만 파이썬 객체로 변환)
+SPILL_BATCH_ROWS = 8192
+
+# 행 크기 추정에 사용할 표본 행 수
+_ESTIMATE_SAMPLE_ROWS = 64
+
+_SPILL_PREFIX = "result-"
+
+def rss_bytes():
+    """현재 프로세스 RSS (바이트, 확인할 수 없으면 None)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return peak_rss_bytes()
+
+def peak_rss_bytes():
+    """프로세스 시작 이후 최대 RSS (바이트, 확인할 수 없으면 None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class SharedMemoryBudget:
+    """프로세스 전체 결과 메모리 예약량 (동시에 처리 중인 요청들이 나눠 쓰는 한도)"""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes or None
+        self.reserved = 0
+        self.peak_reserved = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size):
+        """size 바이트 예약 (한도를 넘으면 예약하지 않고 False)"""
+        with self._lock:
+            if self.budget_bytes is not None and self.reserved + size > self.budget_bytes:
+                self.rejected += 1
+                return False
+            self.reserved += size
+            self.peak_reserved = max(self.peak_reserved, self.reserved)
+            return True
+
+    def release(self, size):
+        with self._lock:
+            self.reserved = max(0, self.reserved - size)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "reserved_bytes": self.reserved,
+                "peak_reserved_bytes": self.peak_reserved,
+                "rejected": self.rejected
+            }
+
+class RequestMemory:
+    """요청 하나의 결과 메모리 예약량, 내려 쓴 양, 프로세스 RSS 표본
+
+    shared가 주어지면 예약은 프로세스 전체 한도에서도 함께 차감하고, close()에서 남은 예약을 돌려준다.
+    """
+
+    def __init__(self, budget_bytes, shared=None):
+        self.budget_bytes = budget_bytes or None
+        self.shared = shared
+        self.reserved = 0
+        self.peak_reserved = 0
+        self.spilled_bytes = 0
+        self.spilled_rows = 0
+        self.rss_start = rss_bytes()
+        self.rss_peak = self.rss_start
+        self._lock = threading.Lock()
+
+    def reserve(self, size):
+        """결과 메모리 size 바이트 예약 (한도를 넘으면 예약하지 않고 False)"""
+        with self._lock:
+            if self.budget_bytes is not None and self.reserved + size > self.budget_bytes:
+                return False
+            if self.shared is not None and not self.shared.reserve(size):
+                metrics.increment("result_spill.shared_budget_exceeded")
+                return False
+            self.reserved += size
+            self.peak_reserved = max(self.peak_reserved, self.reserved)
+            return True
+
+    def release(self, size):
+        """예약 해제 (결과를 디스크로 내려 쓴 뒤)"""
+        with self._lock:
+            size = min(size, self.reserved)
+            self.reserved -= size
+        if self.shared is not None:
+            self.shared.release(size)
+
+    def close(self):
+        """요청이 끝나면 남은 예약을 프로세스 전체 한도에 돌려줌"""
+        self.release(self.reserved)
+
+    def sample(self):
+        """현재 RSS를 표본으로 기록"""
+        rss = rss_bytes()
+        if rss is None:
+            return
+        with self._lock:
+            self.rss_peak = rss if self.rss_peak is None else max(self.rss_peak, rss)
+
+    def record_spill(self, size, rows):
+        with self._lock:
+            self.spilled_bytes += size
+            self.spilled_rows += rows
+
+    def report(self):
+        """응답에 포함할 메모리 사용 요약"""
+        self.sample()
+        with self._lock:
+            growth = None
+            if self.rss_start is not None and self.rss_peak is not None:
+                growth = self.rss_peak - self.rss_start
+            return {
+                "budget_bytes": self.budget_bytes,
+                "result_bytes_peak": self.peak_reserved,
+                "rss_start_bytes": self.rss_start,
+                "rss_peak_bytes": self.rss_peak,
+                "rss_growth_bytes": growth,
+                "spilled": self.spilled_rows > 0,
+                "spilled_bytes": self.spilled_bytes,
+                "spilled_rows": self.spilled_rows
+            }
+
+_current = contextvars.ContextVar("request_memory", default=None)
+
+def current_request_memory():
+    """현재 요청의 RequestMemory (없으면 None)"""
+    return _current.get()
+
+@contextmanager
+def request_memory(budget_bytes, shared=None):
+    """with 문 안에서 받는 결과에 적용할 요청별 메모리 한도 설정 (0이면 제한 없음, shared는 프로세스 전체 한도)"""
+    memory = RequestMemory(budget_bytes, shared)
+    token = _current.set(memory)
+    try:
+        yield memory
+    finally:
+        _current.reset(token)
+        memory.close()
+        metrics.increment("result_spill.requests")
+        if memory.spilled_rows:
+            metrics.increment("result_spill.spilled_requests")
+
+def _value_size(value):
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_value_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_value_size(v) for v in value)
+    return sys.getsizeof(value)
+
+def estimate_rows_bytes(rows):
+    """행(딕셔너리) 목록을 열 우선 저장소에 보관할 때의 대략적인 바이트 수 (앞쪽 표본 기준)"""
+    if not rows:
+        return 0
+    sample = rows[:_ESTIMATE_SAMPLE_ROWS]
+    per_row = sum(
+        8 + (0 if value is None else _value_size(value))
+        for row in sample for value in row.values()
+    ) / len(sample)
+    return int(per_row * len(rows))
+
+def arrow_type(field):
+    """BigQuery 스키마 필드 → 내려 쓸 Arrow 타입
+
+    변환된 행 기준이므로 날짜/시간은 ISO 문자열, 반복/중첩 필드는 JSON 문자열로 저장한다.
+    """
+    if field.mode == "REPEATED" or field.field_type in ("RECORD", "STRUCT", "JSON"):
+        return pyarrow.string()
+    if field.field_type in ("INTEGER", "INT64"):
+        return pyarrow.int64()
+    if field.field_type in ("FLOAT", "FLOAT64"):
+        return pyarrow.float64()
+    if field.field_type in ("BOOLEAN", "BOOL"):
+        return pyarrow.bool_()
+    return pyarrow.string()
+
+def _text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return str(value)
+
+class _ArrowColumn:
+    """메모리 매핑된 Arrow 컬럼 (ResultSet 컬럼 저장소 인터페이스)"""
+
+    __slots__ = ("kind", "_array", "_chunks", "_offsets", "_cache")
+
+    def __init__(self, chunked):
+        if pyarrow.types.is_integer(chunked.type):
+            self.kind = "int"
+        elif pyarrow.types.is_floating(chunked.type):
+            self.kind = "float"
+        else:
+            self.kind = "object"
+        self._array = chunked
+        self._chunks = chunked.chunks
+        self._offsets = [0]
+        for chunk in self._chunks:
+            self._offsets.append(self._offsets[-1] + len(chunk))
+        self._cache = (None, None)  # 마지막으로 변환한 (배치 번호, 값 목록)
+
+    def __len__(self):
+        return self._offsets[-1]
+
+    def get(self, pos):
+        i = bisect_right(self._offsets, pos) - 1
+        cached_index, values = self._cache
+        if cached_index != i:
+            values = self._chunks[i].to_pylist()
+            self._cache = (i, values)
+        return values[pos - self._offsets[i]]
+
+    def slice(self, start, stop):
+        return self._array.slice(start, stop - start).to_pylist()
+
+    def to_numpy(self, start, stop, index=None):
+        if np is None or self.kind not in ("int", "float"):
+            return None
+        if index is None:
+            data = self._array.slice(start, stop - start)
+        else:
+            data = self._array.take(pyarrow.array(np.frombuffer(index, dtype=np.int64)))
+        if data.null_count:
+            return data.cast(pyarrow.float64()).to_numpy()
+        return data.to_numpy()
+
+    def nbytes(self):
+        # 매핑된 파일 페이지는 프로세스 힙이 아니라 페이지 캐시에 있음
+        return 0
+
+class SpillFile:
+    """내려 쓴 결과 파일 (ResultSet이 살아 있는 동안 메모리 매핑 유지)"""
+
+    def __init__(self, path, size, rows, digest, source):
+        self.path = path
+        self.size = size
+        self.rows = rows
+        self.digest = digest  # 파일 내용 sha256 (결과 전체를 JSON으로 만들지 않고 지문으로 사용)
+        self._source = source
+
+    def to_dict(self):
+        return {"bytes": self.size, "rows": self.rows}
+
+class SpillingResultBuilder:
+    """BigQuery 결과 페이지를 받아 ResultSet을 만드는 빌더 (요청 메모리 한도를 넘으면 디스크로)
+
+    with 문으로 사용하면 도중에 예외(취소 등)가 나도 쓰던 파일을 지운다.
+    """
+
+    def __init__(self, bq_schema, spill_dir, memory=None):
+        self._fields = list(bq_schema or [])
+        self._names = [field.name for field in self._fields]
+        self._builder = ResultSetBuilder(self._names)
+        self._memory = memory or current_request_memory()
+        self._reserved = 0
+        self._spill_dir = spill_dir
+        self._path = None
+        self._sink = None
+        self._writer = None
+        self._schema = None
+        self.row_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        return False
+
+    @property
+    def spilled(self):
+        return self._writer is not None
+
+    def append_rows(self, rows):
+        """변환된 행(딕셔너리) 페이지 추가"""
+        rows = list(rows)
+        if self._memory is not None:
+            self._memory.sample()
+
+        if self._writer is None:
+            size = estimate_rows_bytes(rows)
+            if self._memory is None or pyarrow is None or not self._fields or self._memory.reserve(size):
+                self._reserved += size
+                self._builder.append_rows(rows)
+                self.row_count += len(rows)
+                return
+            self._start_spill()
+
+        self._write_rows(rows)
+        self.row_count += len(rows)
+
+    def _start_spill(self):
+        """지금까지 메모리에 모은 행을 파일로 옮기고 이후 페이지는 파일에 바로 기록"""
+        os.makedirs(self._spill_dir, exist_ok=True)
+        self._path = os.path.join(self._spill_dir, f"{_SPILL_PREFIX}{uuid.uuid4().hex}.arrow")
+        self._schema = pyarrow.schema([(field.name, arrow_type(field)) for field in self._fields])
+        self._sink = pyarrow.OSFile(self._path, "wb")
+        self._writer = pyarrow.ipc.new_file(self._sink, self._schema)
+
+        buffered = self._builder.build()
+        self._builder = None
+        if buffered:
+            self._write_columns({name: buffered.column(name) for name in self._names})
+        del buffered
+        self._memory.release(self._reserved)
+        self._reserved = 0
+        metrics.increment("result_spill.spilled")
+        print(f"결과 메모리 한도 초과, 디스크로 내려 씀: {self._path} ({self.row_count}행 이후)")
+
+    def _write_rows(self, rows):
+        if rows:
+            self._write_columns({name: [row.get(name) for row in rows] for name in self._names})
+
+    def _write_columns(self, columns):
+        arrays = []
+        for field in self._schema:
+            values = list(columns[field.name])
+            if pyarrow.types.is_string(field.type):
+                values = [_text(value) for value in values]
+            arrays.append(pyarrow.array(values, type=field.type))
+        table = pyarrow.Table.from_arrays(arrays, schema=self._schema)
+        self._writer.write_table(table, max_chunksize=SPILL_BATCH_ROWS)
+
+    def build(self):
+        """ResultSet 생성 (내려 쓴 경우 파일을 메모리 매핑해 읽음)"""
+        if self._writer is None:
+            return self._builder.build()
+
+        self._writer.close()
+        self._sink.close()
+        size = os.path.getsize(self._path)
+        digest = hashlib.sha256()
+        with open(self._path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        source = pyarrow.memory_map(self._path, "r")
+        table = pyarrow.ipc.open_file(source).read_all()
+        try:
+            # 매핑은 파일을 지운 뒤에도 유효 (마지막 참조가 사라지면 공간 반환)
+            os.unlink(self._path)
+        except OSError:
+            pass
+        self._memory.record_spill(size, table.num_rows)
+        metrics.increment("result_spill.bytes", size)
+        metrics.increment("result_spill.rows", table.num_rows)
+
+        columns = [_ArrowColumn(table.column(i)) for i in range(table.num_columns)]
+        spill = SpillFile(self._path, size, table.num_rows, digest.hexdigest(), source)
+        self._writer = None
+        return ResultSet(self._names, columns, 0, table.num_rows, spill=spill)
+
+    def abort(self):
+        """쓰던 파일 정리"""
+        if self._writer is None:
+            return
+        try:
+            self._writer.close()
+            self._sink.close()
+        except Exception:
+            pass
+        try:
+            os.unlink(self._path)
+        except OSError:
+            pass
+        self._writer = None
+
+def cleanup_spill_dir(spill_dir, min_age_seconds=0):
+    """이전 프로세스가 남긴 결과 파일 삭제 → 삭제한 파일 수
+
+    여러 인스턴스가 같은 볼륨을 쓰면 다른 인스턴스가 쓰는 중인 파일이 있으므로
+    min_age_seconds보다 오래된 파일만 지운다.
+    """
+    removed = 0
+    cutoff = time.time() - min_age_seconds
+    for path in glob.glob(os.path.join(spill_dir, f"{_SPILL_PREFIX}*.arrow")):
+        try:
+            if min_age_seconds and os.path.getmtime(path) > cutoff:
+                continue
+            os.unlink(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+def memory_stats(budget_bytes, spill_dir, shared=None):
+    """헬스 체크용 결과 메모리 설정과 내려 쓰기 통계"""
+    return {
+        "budget_bytes": budget_bytes or None,
+        "process_budget": shared.stats() if shared is not None else None,
+        "spill_dir": spill_dir,
+        "spill_available": pyarrow is not None,
+        "process_rss_bytes": rss_bytes(),
+        "process_peak_rss_bytes": peak_rss_bytes(),
+        "counters": metrics.snapshot("result_spill.")["counters"]
+    }
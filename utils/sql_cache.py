@@ -0,0 +1,68 @@
+# utils/sql_cache.py
+"""
+질문 → 실행에 성공한 SQL 캐시
+
+같은 질문(공백/대소문자/끝 문장부호 차이 무시)이 다시 들어오면 Claude 호출 없이 이전에
+실행에 성공한 SQL을 그대로 사용한다. SQL 문자열이 같으므로 BigQuery 결과 캐시와 결과 해시
+기준 리포트 캐시도 함께 적중한다. 캐시된 SQL이 실패하면 지우고 일반 생성/수정 흐름을 따른다.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from .stale_cache import normalize_question
+
+class SqlCache:
+    """(질문, 하위 쿼리 분해 여부)별 SQL LRU"""
+
+    def __init__(self, max_entries=500, max_age_seconds=86400, enabled=True):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, question, decompose, sql_query):
+        if not self.enabled:
+            return
+        key = (normalize_question(question), bool(decompose))
+        with self._lock:
+            self._entries[key] = (time.time(), sql_query)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, question, decompose):
+        """캐시된 SQL, 없거나 너무 오래되었으면 None"""
+        if not self.enabled:
+            return None
+        key = (normalize_question(question), bool(decompose))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.max_age_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def forget(self, question, decompose):
+        key = (normalize_question(question), bool(decompose))
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
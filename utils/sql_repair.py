@@ -0,0 +1,140 @@
+# utils/sql_repair.py
+"""
+BigQuery 오류 기반 SQL 수정(repair) 보조 유틸리티
+
+생성된 SQL이 BigQuery에서 거부되면 오류 메시지와 함께 Claude에게 수정을 요청한다.
+수정에 성공한 (오류 → 변경 조각) 쌍은 캐시에 저장해, 같은 오류가 다시 나오면
+LLM 호출 없이 로컬에서 바로 패치한다.
+"""
+
+import difflib
+import re
+import threading
+from collections import OrderedDict
+
+# 수정 요청으로 고칠 수 있는 쿼리 오류 (권한/네트워크/할당량 오류는 제외)
+_REPAIRABLE_PATTERNS = re.compile(
+    r"^400\b|Syntax error|Unrecognized name|No matching signature|not found|"
+    r"cannot be|must be|is not|Cannot access field|Unexpected|invalidQuery",
+    re.IGNORECASE
+)
+_NON_REPAIRABLE_PATTERNS = re.compile(
+    r"^(401|403|429|5\d\d)\b|quota|rateLimitExceeded|accessDenied|NoneType|"
+    r"bytesBilledLimitExceeded|limit for bytes billed",
+    re.IGNORECASE
+)
+
+# SQL 토큰 (백틱 식별자, 문자열 리터럴, 단어, 기타 기호)
+_TOKEN_PATTERN = re.compile(r"`[^`]*`|'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|\w+|\S")
+
+def is_repairable_error(error):
+    """SQL 수정으로 해결될 수 있는 오류인지 여부"""
+    text = str(error or "")
+    if not text or _NON_REPAIRABLE_PATTERNS.search(text):
+        return False
+    return bool(_REPAIRABLE_PATTERNS.search(text))
+
+def error_signature(error):
+    """오류 메시지에서 위치/작업 ID 등 가변 정보를 제거한 캐시 키"""
+    text = str(error or "")
+    # google.api_core 예외 형식: "400 POST https://...: <메시지>" 또는 "...; message: <메시지>"
+    if "message: " in text:
+        text = text.rsplit("message: ", 1)[1]
+    text = re.sub(r"^\d{3}\s+(POST|GET)\s+\S+:\s*", "", text)
+    text = re.sub(r"\s+at \[\d+:\d+\]", "", text)
+    text = re.sub(r"\s*Location: \S+|\s*Job ID: \S+", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def _tokens(sql_query):
+    return [(m.group(0), m.start(), m.end()) for m in _TOKEN_PATTERN.finditer(sql_query)]
+
+def extract_sql_patches(bad_sql, fixed_sql, max_patches=3, max_fragment_chars=200):
+    """두 SQL의 토큰 차이를 (원본 조각, 수정 조각) 목록으로 추출
+
+    앞뒤 토큰 하나씩을 문맥으로 포함해 다른 쿼리에서도 같은 위치에만 적용되게 한다.
+    변경이 너무 많거나 크면(사실상 재작성) 빈 목록을 반환한다.
+    """
+    bad_tokens, fixed_tokens = _tokens(bad_sql), _tokens(fixed_sql)
+    matcher = difflib.SequenceMatcher(
+        a=[t[0] for t in bad_tokens], b=[t[0] for t in fixed_tokens], autojunk=False
+    )
+    opcodes = [op for op in matcher.get_opcodes() if op[0] != "equal"]
+    if not opcodes or len(opcodes) > max_patches:
+        return []
+
+    patches = []
+    for _, i1, i2, j1, j2 in opcodes:
+        # 문맥 토큰 한 개씩 포함 (삽입도 기준 위치가 생기도록)
+        i1, i2 = max(i1 - 1, 0), min(i2 + 1, len(bad_tokens))
+        j1, j2 = max(j1 - 1, 0), min(j2 + 1, len(fixed_tokens))
+        if i1 >= i2:
+            return []
+        old = bad_sql[bad_tokens[i1][1]:bad_tokens[i2 - 1][2]]
+        new = fixed_sql[fixed_tokens[j1][1]:fixed_tokens[j2 - 1][2]] if j1 < j2 else ""
+        if len(old) > max_fragment_chars or len(new) > max_fragment_chars:
+            return []
+        patches.append((old, new))
+    return patches
+
+class SqlRepairCache:
+    """오류 시그니처별 SQL 패치 LRU 캐시"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, sql_query, error):
+        """캐시된 패치를 적용한 SQL 반환 (적용할 수 없으면 None)"""
+        key = error_signature(error)
+        with self._lock:
+            patches = self._entries.get(key)
+            if patches is not None:
+                self._entries.move_to_end(key)
+
+        patched = None
+        if patches:
+            patched = sql_query
+            for old, new in patches:
+                # 원본 조각이 정확히 한 번 나타날 때만 적용
+                if patched.count(old) != 1:
+                    patched = None
+                    break
+                patched = patched.replace(old, new)
+
+        with self._lock:
+            if patched is not None and patched != sql_query:
+                self.hits += 1
+                return patched
+            self.misses += 1
+        return None
+
+    def learn(self, bad_sql, error, fixed_sql):
+        """성공한 수정 결과로부터 패치 저장 (저장했으면 True)"""
+        patches = extract_sql_patches(bad_sql, fixed_sql)
+        if not patches:
+            return False
+        key = error_signature(error)
+        with self._lock:
+            self._entries[key] = patches
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return True
+
+    def forget(self, error):
+        """패치를 적용했는데도 실패한 경우 해당 항목 삭제"""
+        with self._lock:
+            self._entries.pop(error_signature(error), None)
+
+    def stats(self):
+        """헬스 체크용 캐시 현황"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
@@ -0,0 +1,76 @@
+# utils/stale_cache.py
+"""
+최근 성공 응답 보관소 (백엔드 장애 시 대체 응답용)
+
+서킷 브레이커가 열렸거나 백엔드가 포화 상태일 때, 같은 모드/질문에 대해 최근에
+성공했던 응답이 있으면 오래된(stale) 응답임을 표시해 대신 돌려준다.
+
+응답 전체(결과 행 포함)를 보관하므로 항목 수와 함께 크기(바이트 합계)로도 제한한다.
+크기는 호출하는 쪽이 직렬화 크기 등으로 계산해 넘긴다.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+def normalize_question(question):
+    """캐시 키용 질문 정규화 (공백/대소문자/끝 문장부호 차이 무시)"""
+    text = re.sub(r"\s+", " ", (question or "").strip().lower())
+    return text.rstrip("?.!？。 ")
+
+class StaleResponseCache:
+    """(모드, 질문)별 최근 성공 응답 LRU (항목 수/바이트 합계 제한)"""
+
+    def __init__(self, max_entries=200, max_age_seconds=86400, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.served = 0
+        self.rejected = 0
+
+    def put(self, mode, question, payload, size=0):
+        """응답 보관 (size: 응답의 대략적인 바이트 수, 한도보다 크면 보관하지 않음)"""
+        key = (mode, normalize_question(question))
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            if self.max_bytes and size > self.max_bytes:
+                self.rejected += 1
+                return
+            self._entries[key] = (time.time(), payload, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def get(self, mode, question):
+        """보관된 응답 → (응답, 경과 초), 없거나 너무 오래되었으면 None"""
+        key = (mode, normalize_question(question))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, payload, size = entry
+            age = time.time() - stored_at
+            if age > self.max_age_seconds:
+                del self._entries[key]
+                self._bytes -= size
+                return None
+            self.served += 1
+            return payload, age
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "served": self.served,
+                "rejected": self.rejected
+            }
@@ -0,0 +1,113 @@
+# utils/static_assets.py
+"""
+빌드 시점에 지문(fingerprint)과 사전 압축본이 만들어진 정적 파일 제공
+
+scripts/build_static_assets.py가 만든 manifest.json을 읽어, 지문이 붙은 파일은
+immutable 캐시 헤더로, index.html은 ETag 재검증(no-cache)으로 제공한다.
+파일 내용은 처음 한 번만 디스크에서 읽고 메모리에 보관한다.
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+
+from .compression import parse_accept_encoding
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# 사전 압축본 파일 확장자 (선호 순서)
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+class StaticAssetStore:
+    """지문이 붙은 정적 파일과 사전 압축본을 메모리에 캐시하여 제공"""
+
+    def __init__(self, root_dir, dist_dir):
+        self.root_dir = os.path.abspath(root_dir)
+        self.dist_dir = os.path.abspath(dist_dir)
+        self.manifest = {}
+        self.fingerprinted = set()
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """manifest.json 다시 읽기 (없으면 빌드되지 않은 개발 환경)"""
+        manifest_path = os.path.join(self.dist_dir, "manifest.json")
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.fingerprinted = {path.lstrip("/") for path in self.manifest.get("assets", {}).values()}
+        with self._lock:
+            self._cache.clear()
+
+    @property
+    def is_built(self):
+        return bool(self.manifest)
+
+    def index_path(self):
+        """제공할 index.html 경로 (빌드본 우선)"""
+        built = self.manifest.get("index")
+        if built:
+            return os.path.join(self.root_dir, built.lstrip("/"))
+        return os.path.join(self.root_dir, "index.html")
+
+    def is_fingerprinted(self, filename):
+        return filename in self.fingerprinted
+
+    def _load(self, path):
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached is not None:
+            return cached
+
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            data = None
+
+        entry = None
+        if data is not None:
+            etag = hashlib.sha256(data).hexdigest()[:16]
+            entry = (data, etag)
+        with self._lock:
+            self._cache[path] = entry
+        return entry
+
+    def load_variant(self, path, accept_encoding):
+        """클라이언트가 허용하는 사전 압축본을 찾아 (본문, ETag, 인코딩) 반환"""
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+            if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+                entry = self._load(path + suffix)
+                if entry is not None:
+                    return entry[0], entry[1] + "-" + encoding, encoding
+
+        entry = self._load(path)
+        if entry is None:
+            return None
+        return entry[0], entry[1], None
+
+    def build_response(self, response_class, request, path, cache_control):
+        """정적 파일 응답 생성 (없으면 None)"""
+        if not path.startswith(self.root_dir + os.sep):
+            return None
+
+        variant = self.load_variant(path, request.headers.get("Accept-Encoding"))
+        if variant is None:
+            return None
+        data, etag, encoding = variant
+
+        mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        response = response_class(data, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = cache_control
+        response.headers["Vary"] = "Accept-Encoding"
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        return response.make_conditional(request)
@@ -0,0 +1,202 @@
+# utils/streaming_stats.py
+"""
+행 조회 중 페이지 단위로 갱신되는 스트리밍 통계 누적기
+
+execute_bigquery가 결과 페이지를 받을 때마다 값을 넘겨주면, 마지막 페이지가
+도착하는 즉시 analyze_data_structure와 같은 형태의 분석 결과를 돌려준다.
+컬럼별 상태는 고정 크기(t-digest, Misra-Gries, 상한 이후 HyperLogLog)라서
+메모리 사용량이 행 수와 무관하게 제한된다.
+"""
+
+import math
+import random
+
+from .sketches import HyperLogLog, TDigest, MisraGries
+
+class _ColumnAccumulator:
+    """단일 컬럼의 스트리밍 통계 상태"""
+
+    __slots__ = (
+        "kind", "count", "nulls",
+        "n", "mean", "m2", "min", "max", "sum", "digest",
+        "heavy_hitters", "distinct", "hll",
+        "_max_distinct", "_compression"
+    )
+
+    def __init__(self, max_counters, max_distinct, compression=100):
+        self.kind = None
+        self.count = 0
+        self.nulls = 0
+        # 숫자형: Welford 방식의 평균/분산 + 중앙값용 t-digest
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.sum = 0
+        self.digest = None
+        # 범주형: Misra-Gries 상위값 + 상한까지는 정확한 고유값 집합, 이후 HyperLogLog
+        self.heavy_hitters = MisraGries(k=max_counters)
+        self.distinct = set()
+        self.hll = None
+        self._max_distinct = max_distinct
+        self._compression = compression
+
+    def add(self, value):
+        """값 하나 반영"""
+        self.count += 1
+        if value is None:
+            self.nulls += 1
+            return
+
+        # 첫 번째 non-null 값으로 타입 결정 (analyze_data_structure와 동일)
+        if self.kind is None:
+            if isinstance(value, (int, float)):
+                self.kind = "numeric"
+            elif isinstance(value, str):
+                self.kind = "categorical"
+            else:
+                self.kind = "unknown"
+
+        if self.kind == "numeric":
+            if isinstance(value, (int, float)):
+                self._add_numeric(value)
+        elif self.kind == "categorical":
+            self._add_categorical(value)
+
+    def _add_numeric(self, value):
+        self.sum += value
+        x = float(value)
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+
+        if self.digest is None:
+            self.digest = TDigest(compression=self._compression)
+        self.digest.add(x)
+
+    def _add_categorical(self, value):
+        self.heavy_hitters.add(value)
+
+        if self.hll is not None:
+            self.hll.add(value)
+            return
+
+        self.distinct.add(value)
+        if len(self.distinct) > self._max_distinct:
+            # 상한을 넘으면 HyperLogLog로 전환하고 정확한 집합은 버림
+            self.hll = HyperLogLog()
+            for seen in self.distinct:
+                self.hll.add(seen)
+            self.distinct = set()
+
+    def result(self):
+        """analyze_data_structure의 컬럼 분석과 같은 형태로 변환"""
+        non_null_count = self.count - self.nulls
+        col_analysis = {
+            "type": self.kind or "unknown",
+            "non_null_count": non_null_count,
+            "null_count": self.nulls,
+            "null_percentage": round((self.nulls / self.count) * 100, 1) if self.count > 0 else 0
+        }
+
+        if self.kind == "numeric" and self.n > 0:
+            variance = self.m2 / (self.n - 1) if self.n > 1 else 0.0
+            col_analysis.update({
+                "min": self.min,
+                "max": self.max,
+                "mean": round(self.mean, 2),
+                "median": round(self.digest.quantile(0.5), 2),
+                "sum": self.sum,
+                "std": round(math.sqrt(variance), 2)
+            })
+        elif self.kind == "categorical":
+            top_values = dict(self.heavy_hitters.top(5))
+            col_analysis.update({
+                "unique_count": self.hll.count() if self.hll is not None else len(self.distinct),
+                "most_common": next(iter(top_values), None),
+                "top_values": top_values
+            })
+            approximate = []
+            if self.hll is not None:
+                approximate.append("unique_count")
+            if self.hll is not None or len(self.distinct) > self.heavy_hitters.k:
+                # 고유값이 카운터 수를 넘은 적이 있으면 상위값 빈도는 과소 추정 (data_utils 스케치 모드와 같은 표기)
+                col_analysis["top_values_max_error"] = self.heavy_hitters.error_bound()
+                approximate.append("top_values")
+            if approximate:
+                col_analysis["approximate"] = approximate
+
+        return col_analysis
+
+class StreamingStatsAccumulator:
+    """결과 페이지를 받을 때마다 컬럼별 통계와 행 샘플을 갱신하는 누적기"""
+
+    def __init__(self, sample_size=100, max_counters=1000, max_distinct=10000, tdigest_compression=100, seed=None):
+        self.row_count = 0
+        self.columns = {}
+        self.sample_size = sample_size
+        self._sample = []
+        self._rng = random.Random(seed)
+        self._max_counters = max_counters
+        self._max_distinct = max_distinct
+        self._tdigest_compression = tdigest_compression
+
+    def _column(self, name):
+        col = self.columns.get(name)
+        if col is None:
+            col = _ColumnAccumulator(self._max_counters, self._max_distinct, self._tdigest_compression)
+            # 중간에 나타난 컬럼은 앞선 행들을 null로 간주
+            col.count = col.nulls = self.row_count
+            self.columns[name] = col
+        return col
+
+    def add_row(self, row):
+        """행(딕셔너리) 하나 반영"""
+        if not isinstance(row, dict):
+            return
+
+        for key, value in row.items():
+            self._column(key).add(value)
+        self.row_count += 1
+
+        # 프롬프트용 행 저장소 샘플 (Algorithm R)
+        if len(self._sample) < self.sample_size:
+            self._sample.append(row)
+        else:
+            j = self._rng.randrange(self.row_count)
+            if j < self.sample_size:
+                self._sample[j] = row
+
+    def add_page(self, rows):
+        """결과 페이지(행 목록) 반영"""
+        for row in rows:
+            self.add_row(row)
+
+    def sample(self):
+        """행 저장소 샘플 반환"""
+        return list(self._sample)
+
+    def result(self):
+        """analyze_data_structure와 같은 형태의 분석 결과 반환"""
+        columns = {}
+        for name, col in self.columns.items():
+            # 일부 행에만 있던 컬럼은 나머지를 null로 보정
+            missing = self.row_count - col.count
+            if missing > 0:
+                col.count += missing
+                col.nulls += missing
+            columns[name] = col.result()
+
+        return {
+            "row_count": self.row_count,
+            "columns": columns,
+            "summary_stats": {},
+            "patterns": [],
+            "source": "streaming"
+        }
@@ -0,0 +1,523 @@
+# utils/summary_tables.py
+"""
+반복되는 집계 쿼리용 요약 테이블: 추천(advisor)과 SQL 재작성(router)
+
+BigQuery 작업 이력(query_history.JobHistory)에서 자주 실행된 형태 중 "원본 이벤트 테이블에서 지표 하나를
+차원 하나(또는 없이)로 집계하고 이벤트 이름/날짜로 거르는" 쿼리를 골라, 차원별로
+(event_date, event_name, 차원)과 전체 이벤트 합계 행(event_date, 차원; all_events = 1)을
+GROUPING SETS로 미리 집계한 요약 테이블을 추천/생성한다.
+
+요약 테이블 컬럼
+- event_count, revenue_usd: 합산 가능 (어떤 필터/차원 조합이든 SUM으로 정확히 재집계)
+- users, sessions: 요약 단위별 정확한 고유 수 (날짜 하나로 고정되어 요약 행 하나가 결과 행
+  하나에 대응할 때만 정확, 일 단위 샤드 테이블은 날짜가 하나뿐이므로 항상 정확)
+- users_sketch, sessions_sketch: HLL 스케치 (여러 날짜를 합쳐야 하면 HLL_COUNT.MERGE로 근사,
+  approximate_distinct가 True일 때만 사용)
+
+SQL 매칭은 템플릿 SQL(intent_templates)과 같은 식/필터만 인식하는 보수적인 파서로 하며,
+조금이라도 다르면 재작성하지 않는다. 원본 테이블이 요약 테이블 생성 이후 바뀌었으면
+(테이블 메타데이터의 수정 시각) 다시 만들 때까지 사용하지 않는다.
+
+생성한 요약 테이블 목록은 따로 저장하지 않고 요약 테이블 데이터셋의 nlq_summary_* 테이블과
+그 라벨(source=summary_advisor, base_modified=생성 시점 원본 수정 시각 밀리초)에서 읽으므로,
+스크립트로 만든 테이블을 모든 인스턴스가 함께 사용한다.
+"""
+
+import re
+import threading
+import time
+
+from .intent_templates import DIMENSION_EXPRESSIONS, METRIC_EXPRESSIONS
+from .metrics import metrics
+
+SUMMARY_TABLE_PREFIX = "nlq_summary_"
+
+# 이벤트 단위 요약 테이블 키 (차원 없음 / 이벤트 이름별 집계에 사용)
+EVENT_KEY = "event"
+
+# 지표 별칭 → (요약 테이블 컬럼, 고유 수 스케치 컬럼 또는 None)
+_MEASURES = {
+    "event_count": ("event_count", None),
+    "revenue_usd": ("revenue_usd", None),
+    "users": ("users", "users_sketch"),
+    "sessions": ("sessions", "sessions_sketch")
+}
+
+_CLAUSES = ("select", "from", "where", "group", "order", "limit")
+_CLAUSE_KEYWORD = re.compile(
+    r"(SELECT|FROM|WHERE|GROUP\s+BY|ORDER\s+BY|LIMIT|HAVING|QUALIFY|WINDOW|JOIN|UNION|INTERSECT|EXCEPT|WITH)\b",
+    re.IGNORECASE
+)
+_TABLE_REF = re.compile(r"^(`[^`]+`|[A-Za-z_][\w.-]*)$")
+_CONDITION_TEMPLATE = (
+    r"event_name\s*=\s*'(?P<event>[a-z0-9_]+)'|"
+    r"{date}\s*=\s*'(?P<date>\d{{8}})'|"
+    r"{date}\s+BETWEEN\s+'(?P<start>\d{{8}})'\s+AND\s+'(?P<end>\d{{8}})'"
+)
+_CONDITION = re.compile(_CONDITION_TEMPLATE.format(date="event_date"), re.IGNORECASE)
+# 와일드카드 테이블(events_*)에서는 _TABLE_SUFFIX 조건도 날짜 조건 (GA4 샤드 접미사 = event_date)
+_SHARDED_CONDITION = re.compile(_CONDITION_TEMPLATE.format(date="(?:event_date|_TABLE_SUFFIX)"), re.IGNORECASE)
+_AND = re.compile(r"\s+AND\s+", re.IGNORECASE)
+_ALIAS = re.compile(r"^(?P<expr>.+?)(?:\s+AS\s+(?P<alias>\w+))?$", re.IGNORECASE | re.DOTALL)
+_ORDER_ITEM = re.compile(r"^(?P<ref>.+?)(?:\s+(?P<direction>ASC|DESC))?$", re.IGNORECASE | re.DOTALL)
+_SHARD_SUFFIX = re.compile(r"_\d{8}$")
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+def _canon(expr):
+    """식 비교용 정규형 (공백 제거, 소문자)"""
+    return re.sub(r"\s+", "", expr).lower()
+
+def _unquote(table):
+    return table.strip("`").lower()
+
+_METRIC_BY_CANON = {_canon(expr): metric for metric, expr in METRIC_EXPRESSIONS.items()}
+_METRIC_BY_CANON["count(1)"] = "event_count"
+_DIMENSION_BY_CANON = {_canon(expr): dimension for dimension, expr in DIMENSION_EXPRESSIONS.items()}
+
+def _top_level_clauses(sql):
+    """바깥 쿼리의 절 {select/from/where/group/order/limit: 본문} (지원하지 않는 구문이면 None)
+
+    괄호와 따옴표 안은 건너뛰므로 세션 식 안의 서브쿼리는 SELECT 절 본문에 남는다.
+    """
+    positions = []
+    depth = 0
+    quote = None
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if quote:
+            if char == "\\":
+                i += 2
+                continue
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and (i == 0 or not (sql[i - 1].isalnum() or sql[i - 1] == "_")):
+            match = _CLAUSE_KEYWORD.match(sql, i)
+            if match:
+                keyword = match.group(1).split()[0].lower()
+                if keyword not in _CLAUSES:
+                    return None
+                positions.append((keyword, match.start(), match.end()))
+                i = match.end()
+                continue
+        i += 1
+
+    names = [name for name, _, _ in positions]
+    if not names or names[0] != "select" or len(set(names)) != len(names):
+        return None
+    if [name for name in _CLAUSES if name in names] != names:
+        return None
+
+    clauses = {}
+    for index, (name, _, body_start) in enumerate(positions):
+        body_end = positions[index + 1][1] if index + 1 < len(positions) else len(sql)
+        clauses[name] = sql[body_start:body_end].strip()
+    return clauses
+
+def _split_items(text):
+    """최상위 쉼표로 나눈 목록"""
+    items = []
+    depth = 0
+    quote = None
+    start = 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"`":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            items.append(text[start:i].strip())
+            start = i + 1
+    items.append(text[start:].strip())
+    return items
+
+def _parse_conditions(where, sharded=False):
+    """WHERE 절 → (이벤트 이름, [시작일, 종료일]) (인식할 수 없는 조건이면 None)"""
+    condition = _SHARDED_CONDITION if sharded else _CONDITION
+    event = None
+    dates = None
+    pos = 0
+    while True:
+        match = condition.match(where, pos)
+        if match is None:
+            return None
+        if match.group("event"):
+            if event is not None:
+                return None
+            event = match.group("event")
+        else:
+            if dates is not None:
+                return None
+            dates = [match.group("date")] * 2 if match.group("date") else [match.group("start"), match.group("end")]
+        pos = match.end()
+        if pos == len(where):
+            return event, dates
+        joiner = _AND.match(where, pos)
+        if joiner is None:
+            return None
+        pos = joiner.end()
+
+def parse_aggregate_sql(sql_query, base_table, sharded=False):
+    """요약 테이블로 답할 수 있는 집계 쿼리 → 구조 딕셔너리 (아니면 None)
+
+    SELECT [차원 [AS 이름],] 지표 AS 이름 [, ROUND(100 * 지표 / SUM(지표) OVER (), 2) AS 이름]
+    FROM 원본 테이블 [WHERE 이벤트/날짜 조건] [GROUP BY 차원] [ORDER BY 출력 컬럼 [ASC|DESC]] [LIMIT n]
+
+    sharded가 True이면 base_table은 와일드카드 테이블(events_*)이며 _TABLE_SUFFIX 조건도 인식한다.
+    """
+    sql = _COMMENT.sub(" ", sql_query or "")
+    sql = re.sub(r"\s+", " ", sql).strip().rstrip(";").strip()
+    clauses = _top_level_clauses(sql)
+    if clauses is None or "from" not in clauses:
+        return None
+    if not _TABLE_REF.match(clauses["from"]) or _unquote(clauses["from"]) != _unquote(base_table):
+        return None
+
+    metric = dimension = share = None
+    outputs = []
+    for item in _split_items(clauses["select"]):
+        match = _ALIAS.match(item)
+        expr, alias = match.group("expr").strip(), match.group("alias")
+        canon = _canon(expr)
+        if canon in _METRIC_BY_CANON and metric is None and alias:
+            metric = {"name": _METRIC_BY_CANON[canon], "canon": canon, "out": alias}
+            outputs.append(alias)
+        elif canon in _DIMENSION_BY_CANON and dimension is None:
+            out = alias or (expr.split(".")[-1] if re.fullmatch(r"[\w.]+", expr) else None)
+            if out is None:
+                return None
+            dimension = {"name": _DIMENSION_BY_CANON[canon], "canon": canon, "out": out}
+            outputs.append(out)
+        elif metric is not None and share is None and alias and canon == (
+            f"round(100*{metric['canon']}/sum({metric['canon']})over(),2)"
+        ):
+            share = alias
+            outputs.append(alias)
+        else:
+            return None
+    if metric is None or (share is not None and dimension is None):
+        return None
+
+    event, dates = None, None
+    if "where" in clauses:
+        conditions = _parse_conditions(clauses["where"], sharded)
+        if conditions is None:
+            return None
+        event, dates = conditions
+
+    group = clauses.get("group")
+    if dimension is None:
+        if group is not None:
+            return None
+    elif group is None or _canon(group) not in (dimension["canon"], dimension["out"].lower(), str(outputs.index(dimension["out"]) + 1)):
+        return None
+
+    order = None
+    if "order" in clauses:
+        match = _ORDER_ITEM.match(clauses["order"])
+        ref = _canon(match.group("ref"))
+        by_canon = {metric["canon"]: metric["out"]}
+        if dimension is not None:
+            by_canon[dimension["canon"]] = dimension["out"]
+        names = {out.lower(): out for out in outputs}
+        if ref in names:
+            column = names[ref]
+        elif ref in by_canon:
+            column = by_canon[ref]
+        elif ref.isdigit() and 1 <= int(ref) <= len(outputs):
+            column = outputs[int(ref) - 1]
+        else:
+            return None
+        order = (column, (match.group("direction") or "ASC").upper())
+
+    limit = None
+    if "limit" in clauses:
+        # OFFSET이나 식이 붙은 LIMIT은 재작성하지 않음
+        if not re.fullmatch(r"\d+", clauses["limit"]):
+            return None
+        limit = int(clauses["limit"])
+
+    return {
+        "metric": metric["name"],
+        "metric_out": metric["out"],
+        "dimension": dimension["name"] if dimension else None,
+        "dimension_out": dimension["out"] if dimension else None,
+        "share_out": share,
+        "event": event,
+        "dates": dates,
+        "order": order,
+        "limit": limit
+    }
+
+def summary_key(parsed):
+    """구조에 맞는 요약 테이블 키 (차원 없음/이벤트 이름별은 이벤트 단위 테이블)"""
+    if parsed["dimension"] in (None, "event_name"):
+        return EVENT_KEY
+    return parsed["dimension"]
+
+def distinct_argument(metric):
+    """고유 수 지표의 COUNT(DISTINCT ...) 인자 식 (스케치 생성용)"""
+    return METRIC_EXPRESSIONS[metric][len("COUNT(DISTINCT "):-1]
+
+def summary_table_name(project, dataset, key):
+    return f"{project}.{dataset}.{SUMMARY_TABLE_PREFIX}{key}"
+
+def summary_dataset(base_table, dataset=None):
+    """요약 테이블을 둘 (프로젝트, 데이터셋) (dataset을 비우면 원본 테이블과 같은 데이터셋)"""
+    project, base_dataset, _ = base_table.strip("`").split(".")
+    return project, dataset or base_dataset
+
+def list_summary_tables(client, project, dataset):
+    """데이터셋의 요약 테이블 → {키: {key, table_name, base_modified, created_at}} (테이블 목록 API, 과금 없음)
+
+    advisor가 만든 테이블(source=summary_advisor 라벨)만 읽으며, base_modified 라벨이 없으면
+    언제 만든 것인지 알 수 없어 제외한다.
+    """
+    tables = {}
+    for item in client.list_tables(f"{project}.{dataset}"):
+        labels = item.labels or {}
+        if not item.table_id.startswith(SUMMARY_TABLE_PREFIX) or labels.get("source") != "summary_advisor":
+            continue
+        if not labels.get("base_modified", "").isdigit():
+            continue
+        key = item.table_id[len(SUMMARY_TABLE_PREFIX):]
+        tables[key] = {
+            "key": key,
+            "table_name": f"{item.project}.{item.dataset_id}.{item.table_id}",
+            "base_modified": int(labels["base_modified"]) / 1000,
+            "created_at": item.created.timestamp() if item.created else None
+        }
+    return tables
+
+def is_daily_shard(table_name):
+    """일 단위 샤드 테이블(events_YYYYMMDD)인지 (모든 행의 event_date가 같음)"""
+    return _SHARD_SUFFIX.search(table_name.strip("`")) is not None
+
+def summary_table_sql(key, base_table, table_name, base_modified=0):
+    """요약 테이블 생성 SQL (있으면 교체, base_modified: 생성 직전 원본 테이블 수정 시각 epoch 초)"""
+    dimension = group = ""
+    if key != EVENT_KEY:
+        expr = DIMENSION_EXPRESSIONS[key]
+        dimension = f", {key}" if expr == key else f", {expr} AS {key}"
+        group = f", {key}"
+    return (
+        f"CREATE OR REPLACE TABLE `{table_name}`\n"
+        f"CLUSTER BY event_date, event_name\n"
+        f"OPTIONS (labels = [('app', 'nlq'), ('source', 'summary_advisor'), "
+        f"('base_modified', '{int(base_modified * 1000)}')])\n"
+        f"AS SELECT event_date, event_name{dimension},\n"
+        f"  GROUPING(event_name) AS all_events,\n"
+        f"  {METRIC_EXPRESSIONS['event_count']} AS event_count,\n"
+        f"  {METRIC_EXPRESSIONS['revenue_usd']} AS revenue_usd,\n"
+        f"  {METRIC_EXPRESSIONS['users']} AS users,\n"
+        f"  HLL_COUNT.INIT({distinct_argument('users')}) AS users_sketch,\n"
+        f"  {METRIC_EXPRESSIONS['sessions']} AS sessions,\n"
+        f"  HLL_COUNT.INIT({distinct_argument('sessions')}) AS sessions_sketch\n"
+        f"FROM {base_table}\n"
+        f"GROUP BY GROUPING SETS ((event_date, event_name{group}), (event_date{group}))"
+    )
+
+def rewrite_sql(parsed, table_name, approximate_distinct=False, single_date=False):
+    """구조 → 요약 테이블 SQL → (SQL, 정확 여부) (정확하게 답할 수 없고 근사도 허용하지 않으면 (None, False))
+
+    single_date는 원본이 일 단위 샤드라 날짜가 하나뿐인 경우.
+    """
+    column, sketch = _MEASURES[parsed["metric"]]
+    by_event = bool(parsed["event"]) or parsed["dimension"] == "event_name"
+    date_fixed = single_date or (parsed["dates"] is not None and parsed["dates"][0] == parsed["dates"][1])
+
+    exact = True
+    if sketch is None:
+        measure = f"SUM({column})"
+    elif date_fixed:
+        # 결과 행 하나가 요약 행 하나에 대응 (합계가 곧 그 행의 고유 수)
+        measure = f"SUM({column})"
+    elif approximate_distinct:
+        measure = f"HLL_COUNT.MERGE({sketch})"
+        exact = False
+    else:
+        return None, False
+    if parsed["metric"] != "revenue_usd":
+        # 행이 없을 때 원본 COUNT와 같이 0
+        measure = f"COALESCE({measure}, 0)"
+
+    columns = []
+    if parsed["dimension"]:
+        columns.append(f"{parsed['dimension']} AS {parsed['dimension_out']}")
+    columns.append(f"{measure} AS {parsed['metric_out']}")
+    if parsed["share_out"]:
+        columns.append(f"ROUND(100 * {measure} / SUM({measure}) OVER (), 2) AS {parsed['share_out']}")
+
+    # 이벤트별 행과 전체 이벤트 합계 행 중 하나만 (같은 이벤트를 두 번 세지 않도록)
+    filters = [f"all_events = {0 if by_event else 1}"]
+    if parsed["event"]:
+        filters.append(f"event_name = '{parsed['event']}'")
+    if parsed["dates"]:
+        start, end = parsed["dates"]
+        filters.append(f"event_date = '{start}'" if start == end else f"event_date BETWEEN '{start}' AND '{end}'")
+
+    sql = f"SELECT {', '.join(columns)} FROM `{table_name}` WHERE {' AND '.join(filters)}"
+    if parsed["dimension"]:
+        sql += f" GROUP BY {parsed['dimension']}"
+    if parsed["order"]:
+        sql += f" ORDER BY {parsed['order'][0]} {parsed['order'][1]}"
+    if parsed["limit"] is not None:
+        sql += f" LIMIT {parsed['limit']}"
+    return sql + ";", exact
+
+class SummaryAdvisor:
+    """쿼리 이력에서 요약 테이블 후보 추천 (차원별로 묶은 실행 횟수/처리 바이트 순)"""
+
+    def __init__(self, history, base_table, project, dataset, min_queries=20):
+        self.history = history
+        self.base_table = base_table
+        self.project = project
+        self.dataset = dataset
+        self.min_queries = min_queries
+
+    def propose(self, since=None, max_shapes=500):
+        """요약 테이블 후보 목록 [{key, table_name, queries, bytes_total, seconds_total, shapes, create_sql}]"""
+        groups = {}
+        for shape in self.history.hottest(min_count=1, limit=max_shapes, since=since):
+            parsed = parse_aggregate_sql(shape["example_sql"], self.base_table)
+            if parsed is None:
+                continue
+            key = summary_key(parsed)
+            group = groups.get(key)
+            if group is None:
+                table_name = summary_table_name(self.project, self.dataset, key)
+                group = groups[key] = {
+                    "key": key,
+                    "table_name": table_name,
+                    "queries": 0,
+                    "bytes_total": 0,
+                    "seconds_total": 0.0,
+                    "shapes": [],
+                    "create_sql": summary_table_sql(key, self.base_table, table_name)
+                }
+            group["queries"] += shape["count"]
+            group["bytes_total"] += shape["bytes_total"]
+            group["seconds_total"] += shape["seconds_total"]
+            group["shapes"].append({"shape_hash": shape["shape_hash"], "count": shape["count"], "shape": shape["shape"]})
+
+        proposals = [group for group in groups.values() if group["queries"] >= self.min_queries]
+        return sorted(proposals, key=lambda group: (group["bytes_total"], group["queries"]), reverse=True)
+
+class SummaryRouter:
+    """생성된 요약 테이블 목록과 SQL 재작성
+
+    load_tables는 {키: {key, table_name, base_modified, created_at}}를 돌려주는 함수로
+    (list_summary_tables), base_modified는 원본 테이블의 마지막 수정 시각(epoch 초)을 돌려주는
+    함수다. 둘 다 staleness_check_seconds마다 한 번만 호출한다. 요약 테이블보다 원본이 새로우면
+    다시 만들 때까지 그 테이블로 보내지 않는다.
+    """
+
+    def __init__(self, load_tables, base_table, base_modified=None, approximate_distinct=False,
+                 staleness_check_seconds=300, enabled=True):
+        self.load_tables = load_tables
+        self.base_table = base_table
+        self.base_modified = base_modified
+        self.approximate_distinct = approximate_distinct
+        self.staleness_check_seconds = staleness_check_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._tables_loaded_at = 0.0
+        self._base_modified_value = None
+        self._base_checked_at = 0.0
+
+    def _refresh_tables(self):
+        """요약 테이블 목록 (staleness_check_seconds 동안 캐시, 조회 실패 시 이전 목록 유지)"""
+        now = time.monotonic()
+        with self._lock:
+            if self._tables_loaded_at and now - self._tables_loaded_at < self.staleness_check_seconds:
+                return self._tables
+            self._tables_loaded_at = now
+        try:
+            tables = self.load_tables()
+        except Exception as e:
+            print(f"요약 테이블 목록 조회 실패: {e}")
+            return self._tables
+        with self._lock:
+            self._tables = tables
+        return tables
+
+    def tables(self):
+        with self._lock:
+            return dict(self._tables)
+
+    def _current_base_modified(self):
+        """원본 테이블 수정 시각 (staleness_check_seconds 동안 캐시, 확인 실패 시 None)"""
+        if self.base_modified is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            if self._base_checked_at and now - self._base_checked_at < self.staleness_check_seconds:
+                return self._base_modified_value
+            self._base_checked_at = now
+        try:
+            value = self.base_modified()
+        except Exception as e:
+            print(f"원본 테이블 메타데이터 조회 실패: {e}")
+            value = None
+        with self._lock:
+            self._base_modified_value = value
+        return value
+
+    def is_stale(self, entry):
+        """요약 테이블 생성 이후 원본 테이블이 바뀌었는지 (확인할 수 없으면 오래된 것으로 봄)"""
+        if self.base_modified is None:
+            return False
+        current = self._current_base_modified()
+        return current is None or current > entry["base_modified"]
+
+    def route(self, sql_query):
+        """SQL을 요약 테이블 SQL로 재작성 → (SQL, 정보) (해당 없으면 (None, None))"""
+        if not self.enabled:
+            return None, None
+        parsed = parse_aggregate_sql(sql_query, self.base_table)
+        if parsed is None:
+            return None, None
+        key = summary_key(parsed)
+        entry = self._refresh_tables().get(key)
+        if entry is None:
+            metrics.increment("summary.skipped.no_table")
+            return None, None
+        if self.is_stale(entry):
+            metrics.increment("summary.skipped.stale")
+            return None, None
+        routed_sql, exact = rewrite_sql(
+            parsed, entry["table_name"], self.approximate_distinct, single_date=is_daily_shard(self.base_table)
+        )
+        if routed_sql is None:
+            metrics.increment("summary.skipped.inexact")
+            return None, None
+        return routed_sql, {"table": entry["table_name"], "key": key, "exact": exact}
+
+    def stats(self):
+        """헬스 체크용 요약 테이블 현황"""
+        tables = self.tables()
+        return {
+            "enabled": self.enabled,
+            "approximate_distinct": self.approximate_distinct,
+            "tables": {
+                key: {
+                    "table": entry["table_name"],
+                    "stale": self.is_stale(entry),
+                    "created_at": entry["created_at"]
+                }
+                for key, entry in tables.items()
+            },
+            **metrics.snapshot("summary.")
+        }
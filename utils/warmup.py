@@ -0,0 +1,237 @@
+# utils/warmup.py
+"""
+캐시 예열: 인기 질문과 예시 질문을 미리 실행
+
+매일 아침 첫 사용자는 같은 인기 질문에 대해 Claude SQL 생성 + BigQuery 실행 + 리포트 생성
+지연을 모두 부담한다. 인기 질문은 모든 인스턴스가 실행한 BigQuery 작업 이력
+(INFORMATION_SCHEMA.JOBS의 app/mode/question_hash 라벨)에서 모드/질문별 실행 횟수로 구하고,
+새 데이터가 적재되었을 때(테이블 메타데이터 수정 시각 변화)나 외부 스케줄러 호출 시 상위 K개
+질문의 최근 SQL과 스키마 예시 질문을 미리 실행한다. 인기 질문 SQL은 BigQuery 결과 캐시(모든
+인스턴스가 공유)를, 예시 질문은 파이프라인 전체(SQL/결과/리포트 캐시)를 채운다.
+
+- 전용 스레드 풀(max_concurrent)로 실행하고, 주기 확인은 요청 처리 스레드와 별개인 데몬 스레드에서 함
+- 한 번의 예열에 최대 질문 수(max_questions)와 BigQuery 처리 바이트 한도(max_bytes)를 적용
+  (바이트는 끝난 질문 기준으로 누적하므로 실행 중인 질문만큼 넘을 수 있음)
+- 사용자 요청이 백엔드 대기열에서 기다리는 동안(is_busy)에는 새 질문을 시작하지 않음
+- 인스턴스가 0개까지 줄어드는 배포에서는 인스턴스마다 폴링하는 대신 외부 스케줄러가 인증된
+  엔드포인트로 한 인스턴스에서만 run_once()를 실행하도록 한다
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from .metrics import metrics
+
+class SharedPopularity:
+    """BigQuery 작업 이력 기준 인기 질문 (모든 인스턴스 공통, 조회 결과는 cache_seconds 동안 보관)
+
+    run_query(sql)는 행 딕셔너리 목록을, popular_sql(k)는 상위 k개 조회 SQL을 반환한다.
+    """
+
+    def __init__(self, run_query, popular_sql, cache_seconds=3600, enabled=True):
+        self.run_query = run_query
+        self.popular_sql = popular_sql
+        self.cache_seconds = cache_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._cached = None
+        self._cached_at = 0.0
+        self._cached_k = 0
+
+    def top(self, k=10):
+        """실행 횟수 상위 질문 [{mode, question_hash, runs, sql_query}] (조회 실패 시 빈 목록)"""
+        if not self.enabled:
+            return []
+        with self._lock:
+            if self._cached is not None and self._cached_k >= k and time.time() - self._cached_at < self.cache_seconds:
+                return self._cached[:k]
+        try:
+            rows = [
+                {"mode": row["mode"], "question_hash": row["question_hash"], "runs": row["runs"],
+                 "sql_query": row["sql_query"]}
+                for row in self.run_query(self.popular_sql(k))
+            ]
+        except Exception as e:
+            print(f"인기 질문 조회 실패: {e}")
+            return []
+        with self._lock:
+            self._cached, self._cached_at, self._cached_k = rows, time.time(), k
+        return rows
+
+    def stats(self):
+        """헬스 체크용 요약 (질문/SQL 없이 횟수만)"""
+        with self._lock:
+            cached = list(self._cached or [])
+            cached_at = self._cached_at or None
+        return {
+            "enabled": self.enabled,
+            "popular_questions": len(cached),
+            "runs": [row["runs"] for row in cached],
+            "refreshed_at": cached_at
+        }
+
+class WarmupScheduler:
+    """새 데이터 적재/정해진 시각에 질문들을 미리 실행하는 백그라운드 스케줄러
+
+    candidates()는 우선순위 순 [(mode, 종류, 내용)] (종류는 "question" 또는 "sql"),
+    run(mode, 종류, 내용)은 질문 파이프라인이나 SQL을 실행하고 (성공 여부, BigQuery 처리 바이트)를,
+    data_version()은 데이터 버전(예: 테이블 최종 수정 시각)을 반환한다. 처음 확인한 데이터 버전은
+    기준값으로만 기록한다. 스레드는 start()를 처음 호출할 때 (모듈 import가 아니라 첫 요청에서)
+    시작하며, data_version이 None이고 schedule_hours가 비어 있고 시작 예열도 없으면 만들지 않는다.
+    """
+
+    def __init__(self, run, candidates, data_version=None, schedule_hours=(), check_seconds=300,
+                 max_concurrent=2, max_questions=20, max_bytes=None, is_busy=None,
+                 warm_on_start=False, startup_max_questions=5, enabled=True):
+        self.run = run
+        self.candidates = candidates
+        self.data_version = data_version
+        self.schedule_hours = set(schedule_hours)
+        self.check_seconds = check_seconds
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_questions = max_questions
+        self.max_bytes = max_bytes
+        self.is_busy = is_busy
+        self.warm_on_start = warm_on_start
+        self.startup_max_questions = startup_max_questions
+        self.enabled = enabled
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._version = None
+        self._last_slot = None
+        self.last_run = None
+
+    def start(self):
+        """스케줄러 스레드 시작 (한 번만, 할 일이 없으면 시작하지 않음)"""
+        if not self.enabled or self._thread is not None:
+            return
+        if not self.warm_on_start and self.data_version is None and not self.schedule_hours:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="warmup-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        if self.warm_on_start:
+            self.run_once("startup", max_questions=self.startup_max_questions)
+        if self.data_version is None and not self.schedule_hours:
+            return
+        while not self._stop.is_set():
+            reason = self._due()
+            if reason is not None:
+                self.run_once(reason)
+            self._stop.wait(self.check_seconds)
+
+    def _due(self):
+        """지금 예열해야 하는 사유 ("schedule" / "data"), 아니면 None"""
+        now = datetime.now()
+        if now.hour in self.schedule_hours and self._last_slot != (now.date(), now.hour):
+            self._last_slot = (now.date(), now.hour)
+            return "schedule"
+        if self.data_version is None:
+            return None
+        try:
+            version = self.data_version()
+        except Exception as e:
+            print(f"예열용 데이터 버전 확인 실패: {e}")
+            return None
+        previous, self._version = self._version, version
+        if previous is not None and version is not None and version != previous:
+            return "data"
+        return None
+
+    def run_once(self, reason="manual", max_questions=None, wait=False):
+        """질문들을 예산 안에서 미리 실행 → 실행 기록
+
+        이미 실행 중이면 wait=False는 None을 반환하고, wait=True는 끝나기를 기다렸다가 실행한다.
+        """
+        if not self._run_lock.acquire(blocking=wait):
+            return None
+        try:
+            return self._run(reason, self.max_questions if max_questions is None else max_questions)
+        finally:
+            self._run_lock.release()
+
+    def _run(self, reason, max_questions):
+        started = time.time()
+        record = {"reason": reason, "started_at": started, "warmed": 0, "failed": 0, "bytes_processed": 0,
+                  "skipped": 0, "finished_at": None}
+        self.last_run = record
+        try:
+            queue = list(dict.fromkeys(
+                (mode, kind, text) for mode, kind, text in self.candidates() if text
+            ))
+        except Exception as e:
+            print(f"예열 질문 목록 조회 실패: {e}")
+            queue = []
+        record["skipped"] = max(0, len(queue) - max_questions)
+        queue = queue[:max_questions]
+        print(f"캐시 예열 시작 ({reason}): 질문 {len(queue)}개")
+        metrics.increment(f"warmup.runs.{reason}")
+
+        def account(done):
+            for future in done:
+                success, bytes_processed = future.result()
+                record["warmed" if success else "failed"] += 1
+                record["bytes_processed"] += bytes_processed or 0
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="warmup") as pool:
+            pending = set()
+            for index, (mode, kind, text) in enumerate(queue):
+                while len(pending) >= self.max_concurrent:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    account(done)
+                while self.is_busy is not None and self.is_busy() and not self._stop.is_set():
+                    # 사용자 요청이 백엔드를 기다리는 동안에는 양보
+                    self._stop.wait(5)
+                if self._stop.is_set() or (self.max_bytes and record["bytes_processed"] >= self.max_bytes):
+                    record["skipped"] += len(queue) - index
+                    metrics.increment("warmup.budget_exhausted")
+                    break
+                pending.add(pool.submit(self._warm, mode, kind, text))
+            account(pending)
+
+        record["finished_at"] = time.time()
+        metrics.observe("warmup.run", record["finished_at"] - started)
+        print(
+            f"캐시 예열 완료 ({reason}): 성공 {record['warmed']}개, 실패 {record['failed']}개, "
+            f"건너뜀 {record['skipped']}개, 처리 {record['bytes_processed'] / 1024 / 1024:.1f} MB"
+        )
+        return record
+
+    def _warm(self, mode, kind, text):
+        start = time.monotonic()
+        try:
+            success, bytes_processed = self.run(mode, kind, text)
+        except Exception as e:
+            print(f"예열 실패 ({mode}, {kind}): {text[:100]}: {e}")
+            success, bytes_processed = False, 0
+        metrics.observe("warmup.question", time.monotonic() - start)
+        metrics.increment("warmup.questions.warmed" if success else "warmup.questions.failed")
+        metrics.increment("warmup.bytes_processed", bytes_processed or 0)
+        return success, bytes_processed
+
+    def stats(self):
+        """헬스 체크용 예열 현황"""
+        return {
+            "enabled": self.enabled,
+            "running": self._run_lock.locked(),
+            "schedule_hours": sorted(self.schedule_hours),
+            "max_concurrent": self.max_concurrent,
+            "max_questions": self.max_questions,
+            "max_bytes": self.max_bytes,
+            "warm_on_start": self.warm_on_start,
+            "polling": self.data_version is not None or bool(self.schedule_hours),
+            "last_run": dict(self.last_run) if self.last_run else None,
+            **metrics.snapshot("warmup.")
+        }